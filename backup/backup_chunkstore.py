@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+
+import sys
+import os
+import bz2
+import zlib
+import json
+import hmac
+import hashlib
+import threading
+import getpass
+
+import path_utils
+import openssl_wrapper
+
+# content addressed chunk store, used by deduplicated backups. inputs are split into content defined chunks, and each
+# unique chunk is stored once - compressed and encrypted - under its own id. each input then only needs a small index
+# (the ordered list of its chunks). chunk ids are keyed with the backup's passphrase, so they reveal nothing about the contents.
+#
+# new chunks are not encrypted one by one (that would take one openssl run - and one passphrase derivation - per chunk).
+# they are gathered, compressed, into packs instead: each pack is encrypted as a whole, and each chunk id in the store
+# then points at its pack (and at its place inside it). restoring decrypts each pack once for all of its chunks in a row.
+#
+# cut points only depend on the bytes right before them (so an insertion only disturbs the chunks around it): a cut
+# is made after an anchor byte whenever the crc of the window ending at it matches a mask. anchors are located with
+# bytes.find and windows hashed with zlib - a byte by byte rolling hash would be far too slow in pure python.
+
+BACKUP_CHUNKSTORE_FOLDER = "(chunks)"
+BACKUP_CHUNKSTORE_INDEX_EXTENSION = "index"
+BACKUP_CHUNKSTORE_INDEX_FORMAT = "backup_chunkstore_index"
+BACKUP_CHUNKSTORE_INDEX_FORMAT_VERSION = 1
+BACKUP_CHUNKSTORE_PACK_EXTENSION = "pack"
+
+BACKUP_CHUNKSTORE_KEY_SALT = b"mvtools_backup_chunkstore"
+BACKUP_CHUNKSTORE_KEY_ITERATIONS = 100000
+
+BACKUP_CHUNK_MIN_SIZE = 256*1024
+BACKUP_CHUNK_MAX_SIZE = 4*1024*1024
+BACKUP_CHUNK_ANCHOR = b"\n"
+BACKUP_CHUNK_WINDOW = 32
+BACKUP_CHUNK_MASK_BITS = 12 # on random-like data, anchors are 2^8 bytes apart - so cut points are about 2^20 bytes apart
+BACKUP_CHUNK_PACK_SIZE = 16*1024*1024 # (compressed) bytes gathered before a pack is encrypted and written
+
+def make_key(passphrase):
+    return hashlib.pbkdf2_hmac("sha256", passphrase.encode(), BACKUP_CHUNKSTORE_KEY_SALT, BACKUP_CHUNKSTORE_KEY_ITERATIONS)
+
+def make_chunk_id(key, chunk):
+    return hmac.new(key, chunk, hashlib.sha256).hexdigest()
+
+def get_chunk_filename(chunk_store, chunk_id):
+    return path_utils.concat_path(chunk_store, chunk_id[:2], chunk_id)
+
+def get_pack_filename(chunk_store, pack_id):
+    return path_utils.concat_path(chunk_store, pack_id[:2], "%s.%s" % (pack_id, BACKUP_CHUNKSTORE_PACK_EXTENSION))
+
+def _write_file_replace(target_file, contents):
+
+    # written aside and then renamed into place - other workers may be storing the very same file
+    target_file_tmp = "%s.%s.tmp" % (target_file, threading.get_ident())
+    try:
+        if not path_utils.guaranteefolder(path_utils.dirname_filtered(target_file)):
+            return False, "Unable to create folder for [%s]" % target_file
+        with open(target_file_tmp, "wb") as f:
+            f.write(contents)
+        os.replace(target_file_tmp, target_file)
+    except OSError as ex:
+        if os.path.exists(target_file_tmp):
+            os.unlink(target_file_tmp)
+        return False, "Unable to write [%s]: [%s]" % (target_file, ex)
+
+    return True, None
+
+def _read_chunk_location(chunk_store, chunk_id):
+
+    # returns the (pack id, offset, length) a chunk is stored at
+
+    with open(get_chunk_filename(chunk_store, chunk_id)) as f:
+        location = json.load(f)
+    if not isinstance(location, list) or len(location) != 3 or not isinstance(location[0], str) or len(location[0]) < 2 or not isinstance(location[1], int) or not isinstance(location[2], int):
+        raise ValueError("malformed chunk [%s]" % chunk_id)
+    return location
+
+class Chunker:
+
+    # splits a stream into content defined chunks. bytes below the minimum chunk size are not even looked at (they can't
+    # hold a cut point), and the scan is resumed wherever the last feed left it
+
+    def __init__(_self):
+        _self.min_size = BACKUP_CHUNK_MIN_SIZE
+        _self.max_size = BACKUP_CHUNK_MAX_SIZE
+        _self.anchor = BACKUP_CHUNK_ANCHOR
+        _self.window = BACKUP_CHUNK_WINDOW
+        _self.mask = (1 << BACKUP_CHUNK_MASK_BITS) - 1
+        _self.buffer = bytearray()
+        _self.scan_pos = 0
+
+    def _find_cut(_self):
+
+        buf = _self.buffer
+        i = max(_self.scan_pos, _self.min_size)
+        end = min(len(buf), _self.max_size)
+
+        while True:
+            p = buf.find(_self.anchor, i, end)
+            if p == -1:
+                break
+            i = p+1
+            if not (zlib.crc32(buf[max(0, i - _self.window):i]) & _self.mask):
+                return i
+
+        if len(buf) >= _self.max_size:
+            return _self.max_size
+
+        _self.scan_pos = end
+        return None
+
+    def feed(_self, data):
+
+        # returns the chunks completed by data (if any)
+
+        _self.buffer += data
+        chunks = []
+        while True:
+            cut = _self._find_cut()
+            if cut is None:
+                break
+            chunks.append(bytes(_self.buffer[:cut]))
+            del _self.buffer[:cut]
+            _self.scan_pos = 0
+        return chunks
+
+    def finish(_self):
+
+        # returns whatever is left (as the last chunk)
+
+        if len(_self.buffer) == 0:
+            return []
+        chunk = bytes(_self.buffer)
+        _self.buffer = bytearray()
+        _self.scan_pos = 0
+        return [chunk]
+
+class ChunkWriter:
+
+    # stores a stream into one or more chunk stores (i.e. one per target). write() has the output function signature
+    # expected by generic_run.run_cmd_pipeline. chunks already present are not stored again, and new ones are gathered
+    # into packs - finish() writes out the last (partial) pack
+
+    def __init__(_self, key, passphrase, chunk_stores):
+        _self.key = key
+        _self.passphrase = passphrase
+        _self.chunk_stores = chunk_stores
+        _self.chunker = Chunker()
+        _self.entries = []
+        _self.size = 0
+        _self.new_chunks = 0
+        _self.new_bytes = 0
+        _self.new_packs = 0
+        _self.pack_chunks = [] # (chunk id, offset, length) of each chunk gathered into the current pack
+        _self.pack_contents = []
+        _self.pack_size = 0
+        _self.pack_stores = set() # indices of the chunk stores missing any of the current pack's chunks
+        _self.pack_ids = set()
+
+    def _store_chunk(_self, chunk):
+
+        chunk_id = make_chunk_id(_self.key, chunk)
+        _self.entries.append([chunk_id, len(chunk)])
+        _self.size += len(chunk)
+
+        if chunk_id in _self.pack_ids:
+            return True, None
+
+        missing = set()
+        for i in range(len(_self.chunk_stores)):
+            if not os.path.exists(get_chunk_filename(_self.chunk_stores[i], chunk_id)):
+                missing.add(i)
+        if len(missing) == 0:
+            return True, None
+
+        compressed = bz2.compress(chunk)
+        _self.pack_chunks.append((chunk_id, _self.pack_size, len(compressed)))
+        _self.pack_contents.append(compressed)
+        _self.pack_size += len(compressed)
+        _self.pack_stores |= missing
+        _self.pack_ids.add(chunk_id)
+
+        if _self.pack_size >= BACKUP_CHUNK_PACK_SIZE:
+            return _self._store_pack()
+        return True, None
+
+    def _store_pack(_self):
+
+        if len(_self.pack_chunks) == 0:
+            return True, None
+
+        pack_plain = b"".join(_self.pack_contents)
+        pack_id = make_chunk_id(_self.key, pack_plain)
+        v, r = openssl_wrapper.encrypt_des3_pbkdf2_content(pack_plain, _self.passphrase)
+        if not v:
+            return False, r
+        encrypted = r
+
+        # the pack goes first - chunks only ever point at packs that are already in place. stores that already had
+        # some of these chunks get them repointed at this pack too (either copy is just as good)
+        for i in sorted(_self.pack_stores):
+            cs = _self.chunk_stores[i]
+            v, r = _write_file_replace(get_pack_filename(cs, pack_id), encrypted)
+            if not v:
+                return False, r
+            for chunk_id, offset, length in _self.pack_chunks:
+                v, r = _write_file_replace(get_chunk_filename(cs, chunk_id), json.dumps([pack_id, offset, length]).encode())
+                if not v:
+                    return False, r
+
+        _self.new_chunks += len(_self.pack_chunks)
+        _self.new_bytes += len(encrypted)
+        _self.new_packs += 1
+        _self.pack_chunks = []
+        _self.pack_contents = []
+        _self.pack_size = 0
+        _self.pack_stores = set()
+        _self.pack_ids = set()
+        return True, None
+
+    def write(_self, data):
+        for chunk in _self.chunker.feed(data):
+            v, r = _self._store_chunk(chunk)
+            if not v:
+                return False, r
+        return True, None
+
+    def finish(_self):
+        for chunk in _self.chunker.finish():
+            v, r = _self._store_chunk(chunk)
+            if not v:
+                return False, r
+        v, r = _self._store_pack()
+        if not v:
+            return False, r
+        return True, _self.entries
+
+def save_index(index_file, entries):
+
+    contents = json.dumps({"format": BACKUP_CHUNKSTORE_INDEX_FORMAT, "version": BACKUP_CHUNKSTORE_INDEX_FORMAT_VERSION, "chunks": entries})
+
+    index_file_tmp = "%s.tmp" % index_file
+    try:
+        with open(index_file_tmp, "w") as f:
+            f.write(contents)
+        os.replace(index_file_tmp, index_file)
+    except OSError as ex:
+        if os.path.exists(index_file_tmp):
+            os.unlink(index_file_tmp)
+        return False, "Unable to write index [%s]: [%s]" % (index_file, ex)
+
+    return True, None
+
+def load_index(index_file):
+
+    try:
+        with open(index_file) as f:
+            contents = json.load(f)
+    except (OSError, ValueError) as ex:
+        return False, "Unable to read index [%s]: [%s]" % (index_file, ex)
+
+    if not isinstance(contents, dict) or contents.get("format", None) != BACKUP_CHUNKSTORE_INDEX_FORMAT or contents.get("version", None) != BACKUP_CHUNKSTORE_INDEX_FORMAT_VERSION:
+        return False, "Unsupported index: [%s]" % index_file
+
+    entries = contents.get("chunks", None)
+    if not isinstance(entries, list):
+        return False, "Malformed index: [%s]" % index_file
+    for e in entries:
+        if not isinstance(e, list) or len(e) != 2 or not isinstance(e[0], str) or len(e[0]) < 2:
+            return False, "Malformed index: [%s]" % index_file
+
+    return True, entries
+
+def remove_unreferenced(chunk_store, referenced_ids):
+
+    # removes every chunk (and leftover temporary file) that is not referenced anymore, and then every pack no
+    # remaining chunk points at. returns how many chunks were removed. packs are never rewritten - a pack that is
+    # still partly referenced is kept whole
+
+    removed = 0
+    pack_suffix = ".%s" % BACKUP_CHUNKSTORE_PACK_EXTENSION
+    packs = []
+    live_packs = set()
+    try:
+        for sub in os.listdir(chunk_store):
+            sub_full = path_utils.concat_path(chunk_store, sub)
+            for n in os.listdir(sub_full):
+                if n.endswith(pack_suffix):
+                    packs.append(path_utils.concat_path(sub_full, n))
+                elif n not in referenced_ids:
+                    os.unlink(path_utils.concat_path(sub_full, n))
+                    removed += 1
+                else:
+                    live_packs.add(_read_chunk_location(chunk_store, n)[0])
+        for pack_file in packs:
+            if path_utils.basename_filtered(pack_file)[:-len(pack_suffix)] not in live_packs:
+                os.unlink(pack_file)
+        for sub in os.listdir(chunk_store):
+            sub_full = path_utils.concat_path(chunk_store, sub)
+            if len(os.listdir(sub_full)) == 0:
+                os.rmdir(sub_full)
+    except (OSError, ValueError) as ex:
+        return False, "Unable to clean up chunk store [%s]: [%s]" % (chunk_store, ex)
+
+    return True, removed
+
+def _restore_delegate(chunk_store, entries, key, passphrase, out):
+
+    # consecutive chunks mostly share the same pack - so the last decrypted pack is kept at hand
+
+    current_pack_id = None
+    current_pack = None
+
+    for chunk_id, chunk_size in entries:
+
+        pack_id, offset, length = _read_chunk_location(chunk_store, chunk_id)
+
+        if pack_id != current_pack_id:
+            with open(get_pack_filename(chunk_store, pack_id), "rb") as f:
+                encrypted = f.read()
+            v, r = openssl_wrapper.decrypt_des3_pbkdf2_content(encrypted, passphrase)
+            if not v:
+                return False, r
+            current_pack_id = pack_id
+            current_pack = r
+
+        chunk = bz2.decompress(current_pack[offset:offset+length])
+
+        if len(chunk) != chunk_size or not hmac.compare_digest(make_chunk_id(key, chunk), chunk_id):
+            return False, "Chunk [%s] is corrupted" % chunk_id
+        out.write(chunk)
+
+    return True, None
+
+def restore(chunk_store, index_file, key, passphrase, output_file):
+
+    # rebuilds the original stream (i.e. the artifact's tar file) out of its index
+
+    v, r = load_index(index_file)
+    if not v:
+        return False, r
+    entries = r
+
+    if os.path.exists(output_file):
+        return False, "[%s] already exists." % output_file
+
+    try:
+        with open(output_file, "xb") as out:
+            v, r = _restore_delegate(chunk_store, entries, key, passphrase, out)
+    except (OSError, ValueError) as ex:
+        v, r = False, "Unable to restore [%s]: [%s]" % (index_file, ex)
+
+    if not v and os.path.exists(output_file):
+        os.unlink(output_file)
+    return v, r
+
+def puaq(selfhelp):
+    print("Usage: %s chunk_store index_file output_file" % path_utils.basename_filtered(__file__))
+    if selfhelp:
+        sys.exit(0)
+    else:
+        sys.exit(1)
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 4:
+        puaq(False)
+
+    chunk_store = sys.argv[1]
+    index_file = sys.argv[2]
+    output_file = sys.argv[3]
+
+    passphrase = getpass.getpass("Type in...\n")
+
+    v, r = restore(chunk_store, index_file, make_key(passphrase), passphrase, output_file)
+    if not v:
+        print("Failed restoring: [%s]" % r)
+        sys.exit(1)
@@ -2,6 +2,8 @@
 
 import os
 import shutil
+import hashlib
+import concurrent.futures
 
 import path_utils
 import generic_run
@@ -15,6 +17,47 @@ import terminal_colors
 import maketimestamp
 import create_and_write_file
 
+import backup_manifest
+import backup_chunkstore
+
+# staged mode: each artifact is packaged (tar, then bzip2) into BKTEMP, encrypted and hashed, and only then
+# is BKTEMP copied over to each target. streaming mode: each artifact is piped through tar, bzip2 and openssl
+# in one go, and the ciphertext is hashed and written to every target as it comes out - no intermediate
+# (and no plaintext) files. both modes produce the very same layout on the targets.
+BACKUP_MODE_STAGED = "staged"
+BACKUP_MODE_STREAMING = "streaming"
+BACKUP_MODE_DEDUP = "dedup"
+BACKUP_MODES = [BACKUP_MODE_STAGED, BACKUP_MODE_STREAMING, BACKUP_MODE_DEDUP]
+
+# dedup mode: each artifact's tar stream is split into chunks that go (compressed and encrypted) into a chunk store on
+# each target (see backup_chunkstore), and the artifact itself is just an index file. chunks already in the store - i.e.
+# shared with other artifacts, or unchanged since the last backup - are not written again. the targets are always kept
+# from one backup to the next (as with incremental backups), and chunks nothing refers to anymore are removed at the end.
+
+# incremental backups (either mode) keep the previous backup on the targets and only package again the artifacts
+# whose manifest (see backup_manifest) changed since. packages are always replaced manifest-last, so a manifest on
+# a target always vouches for the package next to it - an interrupted backup just gets its leftovers redone next time.
+BACKUP_DATE_FILE = "bk_date.txt"
+
+class _StreamFanout:
+
+    # receives the pipeline's output, hashing it and writing it to every target file along the way
+
+    def __init__(_self, target_files):
+        _self.target_files = target_files
+        _self.hasher = hashlib.sha512()
+        _self.size = 0
+
+    def write(_self, chunk):
+        _self.hasher.update(chunk)
+        _self.size += len(chunk)
+        try:
+            for f in _self.target_files:
+                f.write(chunk)
+        except OSError as ex:
+            return False, "Failed writing to target: [%s]" % ex
+        return True, None
+
 def _get_dirname_helper(path):
     dn = path_utils.dirname_filtered(path)
     if dn is None:
@@ -25,7 +68,7 @@ def _get_dirname_helper(path):
 
 class BackupEngine:
 
-    def __init__(_self, bkprep, bkarts, bktgs_root, bktgs_base, bktmp, bkwarns, pphrase):
+    def __init__(_self, bkprep, bkarts, bktgs_root, bktgs_base, bktmp, bkwarns, pphrase, bkmode=BACKUP_MODE_STAGED, bkworkers=1, bkincremental=False):
         _self.BKPREPARATION = bkprep
         _self.BKARTIFACTS = bkarts
         _self.BKTARGETS_ROOT = bktgs_root
@@ -33,10 +76,619 @@ class BackupEngine:
         _self.BKTEMP = bktmp
         _self.BKWARNINGS = bkwarns
         _self.PASSPHRASE = pphrase
+        _self.BKMODE = bkmode
+        _self.BKWORKERS = bkworkers
+        _self.BKINCREMENTAL = bkincremental
+        _self.MANIFEST_KEY = None
+        _self.CHUNK_KEY = None
+        _self.CHUNK_STORES = []
 
-    def run(_self):
+    def _get_artifact_subfolder(_self, artifact_path, dirname_sentinel):
+
+        # returns the folder (relative to the backup's base folder) the artifact's package goes into
+
+        dn = _get_dirname_helper(artifact_path)
+        bn_of_dn = path_utils.basename_filtered(dn)
+
+        # check if this basename-of-dirname has already been used for another (albeit similar) full dirname
+        if bn_of_dn in dirname_sentinel:
+            if dirname_sentinel[bn_of_dn] != dn: # same basename-of-dirname but different dirname overall. issue a warning about risk of overwrites.
+                _msg = "WARNING! Path [%s] has a common dirname with another artifact (%s). Both artifacts will be placed inside the same folder in the target backup base folder!" % (artifact_path, dirname_sentinel[bn_of_dn])
+                print("%s%s%s" % (terminal_colors.TTY_YELLOW_BOLD, _msg, terminal_colors.get_standard_color()))
+        else:
+            dirname_sentinel[bn_of_dn] = dn
+
+        if path_utils.basename_filtered(path_utils.concat_path(_self.BKTARGETS_BASEDIR, bn_of_dn)) == path_utils.basename_filtered(_self.BKTARGETS_BASEDIR):
+            _msg = "WARNING! Path [%s] was deduced to be inside root. It will be placed inside the '(root)' folder!" % artifact_path
+            print("%s%s%s" % (terminal_colors.TTY_YELLOW_BOLD, _msg, terminal_colors.get_standard_color()))
+            return path_utils.concat_path(bn_of_dn, "(root)")
+        return bn_of_dn
+
+    def _get_warn_size_each(_self, artifact):
+
+        # returns (active, size, abort) - the artifact's own options override the global ones
+
+        warn_size_each_active_local = (_self.BKWARNINGS[0][0] is not None) and (_self.BKWARNINGS[0][1] is not None)
+        warn_size_each_local = _self.BKWARNINGS[0][0]
+        warn_size_each_abort_local = _self.BKWARNINGS[0][1]
+
+        if artifact[2] is not None:
+            # warning size option overridden
+            warn_size_each_active_local = True
+            warn_size_each_local = artifact[2]
+
+        if artifact[3] is not None:
+            # warning abort option overridden
+            warn_size_each_active_local = True
+            warn_size_each_abort_local = artifact[3]
+
+        return warn_size_each_active_local, warn_size_each_local, warn_size_each_abort_local
+
+    def _check_warn_size_each(_self, artifact, package, package_size, report=print):
+
+        # returns False if the backup must be aborted
+
+        warn_size_each_active_local, warn_size_each_local, warn_size_each_abort_local = _self._get_warn_size_each(artifact)
+        if warn_size_each_active_local:
+            if package_size > warn_size_each_local:
+                if warn_size_each_abort_local:
+                    report("%sGenerated package [%s] exceeds the size limit. Aborting.%s" % (terminal_colors.TTY_RED, package, terminal_colors.get_standard_color()))
+                    return False
+                else:
+                    report("%sGenerated package [%s] exceeds the size limit.%s" % (terminal_colors.TTY_YELLOW_BOLD, package, terminal_colors.get_standard_color()))
+        return True
+
+    def _check_warn_size_final(_self, backup_size):
+
+        # returns False if the backup must be aborted
+
+        warn_size_final_active_local = (_self.BKWARNINGS[1][0] is not None) and (_self.BKWARNINGS[1][1] is not None)
+        if warn_size_final_active_local:
+            if backup_size > _self.BKWARNINGS[1][0]:
+                if _self.BKWARNINGS[1][1]: # abort
+                    print("%sGenerated backup exceeds size limit. Aborting.%s" % (terminal_colors.TTY_RED, terminal_colors.get_standard_color()))
+                    return False
+                else:
+                    print("%sGenerated backup exceeds size limit.%s" % (terminal_colors.TTY_YELLOW_BOLD, terminal_colors.get_standard_color()))
+        return True
+
+    def _make_artifact_bases(_self, bases):
+
+        # returns, for each artifact (in order), the folders its package goes into (one per base). all of the
+        # layout is settled here, upfront and in order - so it does not depend on the order packages get done in
 
         dirname_sentinel = {}
+        art_bases = []
+        package_names = {}
+        for it in _self.BKARTIFACTS:
+
+            art_subfolder = _self._get_artifact_subfolder(it[0], dirname_sentinel)
+            package_name = path_utils.concat_path(art_subfolder, path_utils.basename_filtered(it[0]))
+            if package_name in package_names:
+                print("%sFailed generating [%s] - duplicated artifact (%s) - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, it[0], package_names[package_name], terminal_colors.get_standard_color()))
+                return False, None
+            package_names[package_name] = it[0]
+
+            cur_art_bases = []
+            for b in bases:
+                art_base = path_utils.concat_path(b, art_subfolder)
+                if not path_utils.guaranteefolder(art_base):
+                    print("%sFailed attempting to guarantee [%s].%s" % (terminal_colors.TTY_RED, art_base, terminal_colors.get_standard_color()))
+                    return False, None
+                cur_art_bases.append(art_base)
+            art_bases.append(cur_art_bases)
+
+        return True, art_bases
+
+    def _package_artifact_buffered(_self, package_function, it, art_bases):
+        report_buffer = []
+        ret = package_function(it, art_bases, report_buffer.append)
+        return ret, report_buffer
+
+    def _package_artifacts(_self, package_function, art_bases):
+
+        # returns False if the backup must be aborted
+
+        if _self.BKWORKERS <= 1:
+            for i in range(len(_self.BKARTIFACTS)):
+                if not package_function(_self.BKARTIFACTS[i], art_bases[i], print):
+                    return False
+            return True
+
+        # up to BKWORKERS artifacts are packaged at the same time (which also caps how many intermediate
+        # files can exist at once). artifacts are started in order, and each one's report is printed in
+        # order too. upon a failure, no further artifacts are started - the ones already running are let finish
+
+        results = [None for x in _self.BKARTIFACTS]
+        in_flight = {}
+        next_start = 0
+        next_report = 0
+        failed = False
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=_self.BKWORKERS) as executor:
+
+            while True:
+
+                while not failed and next_start < len(_self.BKARTIFACTS) and len(in_flight) < _self.BKWORKERS:
+                    in_flight[executor.submit(_self._package_artifact_buffered, package_function, _self.BKARTIFACTS[next_start], art_bases[next_start])] = next_start
+                    next_start += 1
+
+                if len(in_flight) == 0:
+                    break
+
+                done, not_done = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for f in done:
+                    i = in_flight.pop(f)
+                    results[i] = f.result()
+                    if not results[i][0]:
+                        failed = True
+
+                while next_report < len(results) and results[next_report] is not None:
+                    for msg in results[next_report][1]:
+                        print(msg)
+                    next_report += 1
+
+        return not failed
+
+    def _package_artifact_staged(_self, it, art_bases, report):
+
+        report("%sCurrent: [%s], started at %s%s" % (terminal_colors.TTY_BLUE, it[0], maketimestamp.get_timestamp_now(), terminal_colors.get_standard_color()))
+
+        CURPAK = path_utils.concat_path(art_bases[0], path_utils.basename_filtered(it[0]))
+        CURPAK_TAR = CURPAK + ".tar"
+        CURPAK_TAR_BZ2 = CURPAK_TAR + ".bz2"
+        CURPAK_TAR_BZ2_ENC = CURPAK_TAR_BZ2 + ".enc"
+        CURPAK_TAR_BZ2_ENC_HASH = CURPAK_TAR_BZ2_ENC + ".sha512"
+
+        # check if there are any preexisting artifacts
+        if os.path.exists(CURPAK):
+            report("%sFailed generating [%s] - duplicated artifact - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, CURPAK, terminal_colors.get_standard_color()))
+            return False
+        if os.path.exists(CURPAK_TAR):
+            report("%sFailed generating [%s] - duplicated artifact - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, CURPAK_TAR, terminal_colors.get_standard_color()))
+            return False
+        if os.path.exists(CURPAK_TAR_BZ2):
+            report("%sFailed generating [%s] - duplicated artifact - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2, terminal_colors.get_standard_color()))
+            return False
+        if os.path.exists(CURPAK_TAR_BZ2_ENC):
+            report("%sFailed generating [%s] - duplicated artifact - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2_ENC, terminal_colors.get_standard_color()))
+            return False
+        if os.path.exists(CURPAK_TAR_BZ2_ENC_HASH):
+            report("%sFailed generating [%s] - duplicated artifact - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2_ENC_HASH, terminal_colors.get_standard_color()))
+            return False
+
+        # create the package
+        v, r = pakgen.pakgen(CURPAK, False, [it[0]]) # hash will be generated later (from the encrypted package)
+        if not v:
+            report("%sFailed generating [%s].%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2, terminal_colors.get_standard_color()))
+            return False
+        if len(r) > 0:
+            report("Output from pakgen: [%s]" % r)
+
+        # encrypt plain package
+        v, r = encrypt.symmetric_encrypt(CURPAK_TAR_BZ2, CURPAK_TAR_BZ2_ENC, _self.PASSPHRASE)
+        if not v:
+            report("%sFailed encrypting package: [%s].%s" % (terminal_colors.TTY_RED, r, terminal_colors.get_standard_color()))
+            return False
+
+        # shred plain package
+        v, r = shred_wrapper.shred_target(CURPAK_TAR_BZ2)
+        if not v:
+            report("%sFailed shredding plain package: [%s].%s" % (terminal_colors.TTY_RED, r, terminal_colors.get_standard_color()))
+            return False
+
+        if not _self._check_warn_size_each(it, CURPAK_TAR_BZ2_ENC, dirsize.get_dir_size(CURPAK_TAR_BZ2_ENC, False), report):
+            return False
+
+        # create hash from the encrypted package
+        v, r = sha512_wrapper.hash_sha_512_app_file(CURPAK_TAR_BZ2_ENC)
+        if not v:
+            report("%sFailed generating hash for [%s].%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2_ENC, terminal_colors.get_standard_color()))
+            return False
+        create_and_write_file.create_file_contents(CURPAK_TAR_BZ2_ENC_HASH, r)
+
+        return True
+
+    def _package_artifact_streaming(_self, it, art_bases, report):
+
+        report("%sCurrent: [%s], started at %s%s" % (terminal_colors.TTY_BLUE, it[0], maketimestamp.get_timestamp_now(), terminal_colors.get_standard_color()))
+
+        pak_name = "%s.tar.bz2.enc" % path_utils.basename_filtered(it[0])
+        packages = []
+        for ab in art_bases:
+            packages.append(path_utils.concat_path(ab, pak_name))
+
+        v, r = _self._stream_artifact(it[0], packages)
+        if not v:
+            report("%sFailed generating [%s]: %s.%s" % (terminal_colors.TTY_RED, packages[0], r, terminal_colors.get_standard_color()))
+            return False
+        pak_hash, pak_size, pak_output = r
+        if len(pak_output) > 0:
+            report(pak_output)
+
+        if not _self._check_warn_size_each(it, packages[0], pak_size, report):
+            return False
+
+        for pkg in packages:
+            create_and_write_file.create_file_contents("%s.sha512" % pkg, pak_hash)
+
+        return True
+
+    def _make_stream_cmds(_self, artifact_path):
+        tar_cmd = ["tar", "-cf", "-", path_utils.filter_remove_trailing_sep(artifact_path)]
+        bzip2_cmd = ["bzip2", "-c"]
+        openssl_cmd = ["openssl", "des3", "-e", "-pbkdf2", "-k", _self.PASSPHRASE]
+        return [tar_cmd, bzip2_cmd, openssl_cmd]
+
+    def _stream_artifact(_self, artifact_path, packages):
+
+        # packages: the encrypted package's full filename on each target. returns (hash, size, tar's output)
+
+        target_files = []
+        try:
+            for pkg in packages:
+                target_files.append(open(pkg, "xb"))
+        except FileExistsError as ex:
+            for f in target_files:
+                f.close()
+            return False, "duplicated artifact [%s] - aborting to avoid overwrites" % ex.filename
+        except OSError as ex:
+            for f in target_files:
+                f.close()
+            return False, "unable to create package: [%s]" % ex
+
+        fanout = _StreamFanout(target_files)
+        try:
+            v, r = generic_run.run_cmd_pipeline(_self._make_stream_cmds(artifact_path), fanout.write)
+        finally:
+            for f in target_files:
+                f.close()
+        if not v:
+            return False, r
+
+        for cmd_result in r:
+            if not cmd_result.success:
+                return False, "Failed running the packaging pipeline: [%s]" % cmd_result.stderr
+
+        return True, (fanout.hasher.hexdigest(), fanout.size, r[0].stderr.rstrip())
+
+    def _remove_from_targets(_self):
+        for it in _self.BKTARGETS_ROOT:
+            target_base = path_utils.concat_path(it, _self.BKTARGETS_BASEDIR)
+            if os.path.exists(target_base):
+                shutil.rmtree(target_base)
+
+    def _run_streaming(_self):
+
+        # the targets are written to directly. anything written so far is removed again when aborting,
+        # which leaves the targets just as the staged mode would (the old backup is already gone by now)
+
+        print("%sCreating backup (streaming)...%s" % (terminal_colors.TTY_BLUE, terminal_colors.get_standard_color()))
+
+        target_bases = []
+        bk_date = maketimestamp.get_timestamp_now() + "\n"
+        for it in _self.BKTARGETS_ROOT:
+            target_base = path_utils.concat_path(it, _self.BKTARGETS_BASEDIR)
+            if not path_utils.guaranteefolder(target_base):
+                print("%sFailed attempting to guarantee [%s].%s" % (terminal_colors.TTY_RED, target_base, terminal_colors.get_standard_color()))
+                _self._remove_from_targets()
+                return False
+            with open(path_utils.concat_path(target_base, BACKUP_DATE_FILE), "w+") as f:
+                f.write(bk_date)
+            target_bases.append(target_base)
+
+        v, r = _self._make_artifact_bases(target_bases)
+        if not v:
+            _self._remove_from_targets()
+            return False
+        art_bases = r
+
+        if not _self._package_artifacts(_self._package_artifact_streaming, art_bases):
+            _self._remove_from_targets()
+            return False
+
+        if not _self._check_warn_size_final(dirsize.get_dir_size(target_bases[0], False)):
+            _self._remove_from_targets()
+            return False
+
+        for it in _self.BKTARGETS_ROOT:
+            v, r = umount_wrapper.umount(it)
+            if not v:
+                print("%sWARNING! umount for target [%s] failed: [%s]%s" % (terminal_colors.TTY_YELLOW_BOLD, it, r, terminal_colors.get_standard_color()))
+
+        return True
+
+    def _get_package_name(_self, artifact_path):
+        if _self.BKMODE == BACKUP_MODE_DEDUP:
+            return "%s.tar.%s" % (path_utils.basename_filtered(artifact_path), backup_chunkstore.BACKUP_CHUNKSTORE_INDEX_EXTENSION)
+        return "%s.tar.bz2.enc" % path_utils.basename_filtered(artifact_path)
+
+    def _package_artifact_dedup(_self, it, tgt_bases, report):
+
+        report("%sCurrent: [%s], started at %s%s" % (terminal_colors.TTY_BLUE, it[0], maketimestamp.get_timestamp_now(), terminal_colors.get_standard_color()))
+
+        packages = []
+        for tb in tgt_bases:
+            packages.append(path_utils.concat_path(tb, _self._get_package_name(it[0])))
+
+        writer = backup_chunkstore.ChunkWriter(_self.CHUNK_KEY, _self.PASSPHRASE, _self.CHUNK_STORES)
+        tar_cmd = ["tar", "-cf", "-", path_utils.filter_remove_trailing_sep(it[0])]
+        v, r = generic_run.run_cmd_pipeline([tar_cmd], writer.write)
+        if not v:
+            report("%sFailed generating [%s]: %s.%s" % (terminal_colors.TTY_RED, packages[0], r, terminal_colors.get_standard_color()))
+            return False
+        if not r[0].success:
+            report("%sFailed generating [%s]: %s.%s" % (terminal_colors.TTY_RED, packages[0], r[0].stderr, terminal_colors.get_standard_color()))
+            return False
+        tar_output = r[0].stderr.rstrip()
+        if len(tar_output) > 0:
+            report(tar_output)
+
+        v, r = writer.finish()
+        if not v:
+            report("%sFailed generating [%s]: %s.%s" % (terminal_colors.TTY_RED, packages[0], r, terminal_colors.get_standard_color()))
+            return False
+        entries = r
+        report("Chunks: [%s], new: [%s] in [%s] packs (%s bytes written)" % (len(entries), writer.new_chunks, writer.new_packs, writer.new_bytes))
+
+        # the size limits apply to the (uncompressed) archive - its chunks may well be shared with other artifacts
+        if not _self._check_warn_size_each(it, packages[0], writer.size, report):
+            return False
+
+        for pkg in packages:
+            v, r = backup_chunkstore.save_index(pkg, entries)
+            if not v:
+                report("%sFailed writing index: [%s].%s" % (terminal_colors.TTY_RED, r, terminal_colors.get_standard_color()))
+                return False
+            v, r = sha512_wrapper.hash_sha_512_app_file(pkg)
+            if not v:
+                report("%sFailed generating hash for [%s].%s" % (terminal_colors.TTY_RED, pkg, terminal_colors.get_standard_color()))
+                return False
+            create_and_write_file.create_file_contents("%s.sha512" % pkg, r)
+
+        return True
+
+    def _package_artifact_incremental(_self, it, art_bases, report):
+
+        # in staged mode, the first of art_bases is the temporary folder (the targets follow)
+
+        tgt_bases = art_bases
+        if _self.BKMODE == BACKUP_MODE_STAGED:
+            tgt_bases = art_bases[1:]
+
+        pak_name = _self._get_package_name(it[0])
+        packages = []
+        for ab in tgt_bases:
+            packages.append(path_utils.concat_path(ab, pak_name))
+
+        if not _self.BKINCREMENTAL:
+            # dedup mode, packaging everything - unchanged contents still end up not being written again
+            return _self._replace_package(it, art_bases, tgt_bases, packages, None, report)
+
+        # a manifest only counts if its package is still there alongside it
+        old_manifests = []
+        for pkg in packages:
+            old_manifest = None
+            if os.path.exists(pkg) and os.path.exists("%s.sha512" % pkg):
+                v, r = backup_manifest.load_manifest(backup_manifest.get_manifest_filename(pkg))
+                if v:
+                    old_manifest = r
+            old_manifests.append(old_manifest)
+
+        # the manifest is made before packaging. should the artifact change in between, the package is newer
+        # than its manifest says - which just makes the next run package it again
+        v, r = backup_manifest.make_manifest(_self.MANIFEST_KEY, it[0], old_manifests[0])
+        if not v:
+            report("%sFailed generating [%s]: %s.%s" % (terminal_colors.TTY_RED, packages[0], r, terminal_colors.get_standard_color()))
+            return False
+        new_manifest = r
+
+        unchanged = True
+        for om in old_manifests:
+            if not backup_manifest.same_contents(om, new_manifest):
+                unchanged = False
+                break
+
+        if unchanged:
+            report("%sUnchanged: [%s], keeping the existing package%s" % (terminal_colors.TTY_BLUE, it[0], terminal_colors.get_standard_color()))
+            if not _self._check_warn_size_each(it, packages[0], _self._get_package_size(packages[0]), report):
+                return False
+            # mtimes are refreshed, so that the next run does not need to read these files again
+            for i in range(len(packages)):
+                if old_manifests[i] != new_manifest:
+                    v, r = backup_manifest.save_manifest(backup_manifest.get_manifest_filename(packages[i]), new_manifest)
+                    if not v:
+                        report("%sFailed updating manifest: [%s].%s" % (terminal_colors.TTY_RED, r, terminal_colors.get_standard_color()))
+                        return False
+            return True
+
+        return _self._replace_package(it, art_bases, tgt_bases, packages, new_manifest, report)
+
+    def _replace_package(_self, it, art_bases, tgt_bases, packages, new_manifest, report):
+
+        # manifest first, then the package itself
+        try:
+            for pkg in packages:
+                for f in [backup_manifest.get_manifest_filename(pkg), pkg, "%s.sha512" % pkg]:
+                    if os.path.lexists(f):
+                        os.unlink(f)
+        except OSError as ex:
+            report("%sFailed removing the previous package: [%s].%s" % (terminal_colors.TTY_RED, ex, terminal_colors.get_standard_color()))
+            return False
+
+        if _self.BKMODE == BACKUP_MODE_STAGED:
+            if not _self._package_artifact_staged(it, art_bases[:1], report):
+                return False
+            tmp_pkg = path_utils.concat_path(art_bases[0], _self._get_package_name(it[0]))
+            try:
+                for pkg in packages:
+                    shutil.copyfile(tmp_pkg, pkg)
+                    shutil.copyfile("%s.sha512" % tmp_pkg, "%s.sha512" % pkg)
+                os.unlink(tmp_pkg)
+                os.unlink("%s.sha512" % tmp_pkg)
+            except OSError as ex:
+                report("%sFailed writing [%s] to the targets: [%s].%s" % (terminal_colors.TTY_RED, tmp_pkg, ex, terminal_colors.get_standard_color()))
+                return False
+        elif _self.BKMODE == BACKUP_MODE_DEDUP:
+            if not _self._package_artifact_dedup(it, tgt_bases, report):
+                return False
+        else:
+            if not _self._package_artifact_streaming(it, tgt_bases, report):
+                return False
+
+        if new_manifest is None:
+            return True
+
+        for pkg in packages:
+            v, r = backup_manifest.save_manifest(backup_manifest.get_manifest_filename(pkg), new_manifest)
+            if not v:
+                report("%sFailed writing manifest: [%s].%s" % (terminal_colors.TTY_RED, r, terminal_colors.get_standard_color()))
+                return False
+
+        return True
+
+    def _get_package_size(_self, package):
+
+        if _self.BKMODE != BACKUP_MODE_DEDUP:
+            return dirsize.get_dir_size(package, False)
+
+        v, r = backup_chunkstore.load_index(package)
+        if not v:
+            return 0
+        size = 0
+        for e in r:
+            size += e[1]
+        return size
+
+    def _remove_stale_chunks(_self, target_base, packages):
+
+        # chunks are only removed once every index of this backup is in place (so nothing still in use goes away)
+
+        referenced_ids = set()
+        for pkg in packages:
+            v, r = backup_chunkstore.load_index(pkg)
+            if not v:
+                return False, r
+            for e in r:
+                referenced_ids.add(e[0])
+
+        return backup_chunkstore.remove_unreferenced(path_utils.concat_path(target_base, backup_chunkstore.BACKUP_CHUNKSTORE_FOLDER), referenced_ids)
+
+    def _remove_stale(_self, target_bases, tgt_art_bases):
+
+        # removes everything from the targets that does not belong to the current backup (i.e. artifacts that are gone)
+
+        for i in range(len(target_bases)):
+
+            packages = []
+            expected = {path_utils.concat_path(target_bases[i], BACKUP_DATE_FILE)}
+            for j in range(len(_self.BKARTIFACTS)):
+                pkg = path_utils.concat_path(tgt_art_bases[j][i], _self._get_package_name(_self.BKARTIFACTS[j][0]))
+                packages.append(pkg)
+                expected.add(pkg)
+                expected.add("%s.sha512" % pkg)
+                expected.add(backup_manifest.get_manifest_filename(pkg))
+
+            try:
+                found_dirs = []
+                for root, dirs, files in os.walk(target_bases[i]):
+                    if root == target_bases[i] and _self.BKMODE == BACKUP_MODE_DEDUP and backup_chunkstore.BACKUP_CHUNKSTORE_FOLDER in dirs:
+                        dirs.remove(backup_chunkstore.BACKUP_CHUNKSTORE_FOLDER)
+                    for n in files:
+                        full_path = path_utils.concat_path(root, n)
+                        if full_path not in expected:
+                            os.unlink(full_path)
+                    if root != target_bases[i]:
+                        found_dirs.append(root)
+                found_dirs.reverse()
+                for d in found_dirs:
+                    if len(os.listdir(d)) == 0:
+                        os.rmdir(d)
+            except OSError as ex:
+                print("%sFailed removing stale contents from [%s]: [%s].%s" % (terminal_colors.TTY_RED, target_bases[i], ex, terminal_colors.get_standard_color()))
+                return False
+
+            if _self.BKMODE == BACKUP_MODE_DEDUP:
+                v, r = _self._remove_stale_chunks(target_bases[i], packages)
+                if not v:
+                    print("%sFailed removing stale chunks from [%s]: [%s].%s" % (terminal_colors.TTY_RED, target_bases[i], r, terminal_colors.get_standard_color()))
+                    return False
+
+        return True
+
+    def _run_incremental(_self):
+
+        if _self.BKMODE == BACKUP_MODE_DEDUP:
+            print("%sUpdating backup (dedup)...%s" % (terminal_colors.TTY_BLUE, terminal_colors.get_standard_color()))
+        else:
+            print("%sUpdating backup (incremental)...%s" % (terminal_colors.TTY_BLUE, terminal_colors.get_standard_color()))
+
+        target_bases = []
+        for it in _self.BKTARGETS_ROOT:
+            target_base = path_utils.concat_path(it, _self.BKTARGETS_BASEDIR)
+            if not path_utils.guaranteefolder(target_base):
+                print("%sFailed attempting to guarantee [%s].%s" % (terminal_colors.TTY_RED, target_base, terminal_colors.get_standard_color()))
+                return False
+            target_bases.append(target_base)
+
+        bases = target_bases
+        if _self.BKMODE == BACKUP_MODE_STAGED:
+            if not path_utils.scratchfolder(_self.BKTEMP):
+                print("%sUnable to create temporary path [%s]. Aborting.%s" % (terminal_colors.TTY_RED, _self.BKTEMP, terminal_colors.get_standard_color()))
+                return False
+            BKTEMP_AND_BASEDIR = path_utils.concat_path(_self.BKTEMP, _self.BKTARGETS_BASEDIR)
+            os.mkdir(BKTEMP_AND_BASEDIR)
+            bases = [BKTEMP_AND_BASEDIR] + target_bases
+
+        v, r = _self._make_artifact_bases(bases)
+        if not v:
+            return False
+        art_bases = r
+
+        if _self.BKMODE == BACKUP_MODE_DEDUP:
+            _self.CHUNK_KEY = backup_chunkstore.make_key(_self.PASSPHRASE)
+            _self.CHUNK_STORES = []
+            for tb in target_bases:
+                chunk_store = path_utils.concat_path(tb, backup_chunkstore.BACKUP_CHUNKSTORE_FOLDER)
+                for ab in art_bases:
+                    if chunk_store in ab:
+                        print("%sFailed generating [%s] - its folder clashes with the chunk store. Aborting.%s" % (terminal_colors.TTY_RED, chunk_store, terminal_colors.get_standard_color()))
+                        return False
+                if not path_utils.guaranteefolder(chunk_store):
+                    print("%sFailed attempting to guarantee [%s].%s" % (terminal_colors.TTY_RED, chunk_store, terminal_colors.get_standard_color()))
+                    return False
+                _self.CHUNK_STORES.append(chunk_store)
+
+        _self.MANIFEST_KEY = backup_manifest.make_key(_self.PASSPHRASE)
+        if not _self._package_artifacts(_self._package_artifact_incremental, art_bases):
+            return False
+
+        tgt_art_bases = art_bases
+        if _self.BKMODE == BACKUP_MODE_STAGED:
+            shutil.rmtree(_self.BKTEMP)
+            tgt_art_bases = []
+            for ab in art_bases:
+                tgt_art_bases.append(ab[1:])
+
+        if not _self._remove_stale(target_bases, tgt_art_bases):
+            return False
+
+        bk_date = maketimestamp.get_timestamp_now() + "\n"
+        for tb in target_bases:
+            with open(path_utils.concat_path(tb, BACKUP_DATE_FILE), "w+") as f:
+                f.write(bk_date)
+
+        if not _self._check_warn_size_final(dirsize.get_dir_size(target_bases[0], False)):
+            return False
+
+        for it in _self.BKTARGETS_ROOT:
+            v, r = umount_wrapper.umount(it)
+            if not v:
+                print("%sWARNING! umount for target [%s] failed: [%s]%s" % (terminal_colors.TTY_YELLOW_BOLD, it, r, terminal_colors.get_standard_color()))
+
+        return True
+
+    def run(_self):
 
         # validations
         art_filtered = []
@@ -74,6 +726,12 @@ class BackupEngine:
                     return False
                 print(prepr.rstrip())
 
+        if _self.BKINCREMENTAL or _self.BKMODE == BACKUP_MODE_DEDUP:
+            if not _self._run_incremental():
+                return False
+            print("%sDone at %s%s" % (terminal_colors.TTY_GREEN, maketimestamp.get_timestamp_now(), terminal_colors.get_standard_color()))
+            return True
+
         print("%sDeleting old backup...%s" % (terminal_colors.TTY_BLUE, terminal_colors.get_standard_color()))
         for it in _self.BKTARGETS_ROOT:
             test_subj = path_utils.concat_path(it, _self.BKTARGETS_BASEDIR)
@@ -83,6 +741,12 @@ class BackupEngine:
             else:
                 shutil.rmtree(test_subj) # redundant but necessary
 
+        if _self.BKMODE == BACKUP_MODE_STREAMING:
+            if not _self._run_streaming():
+                return False
+            print("%sDone at %s%s" % (terminal_colors.TTY_GREEN, maketimestamp.get_timestamp_now(), terminal_colors.get_standard_color()))
+            return True
+
         print("%sCreating backup...%s" % (terminal_colors.TTY_BLUE, terminal_colors.get_standard_color()))
 
         if not path_utils.scratchfolder(_self.BKTEMP):
@@ -93,112 +757,19 @@ class BackupEngine:
         if not os.path.exists(BKTEMP_AND_BASEDIR):
             print("%sUnable to create temporary+base path [%s]. Aborting.%s" % (terminal_colors.TTY_RED, BKTEMP_AND_BASEDIR, terminal_colors.get_standard_color()))
             return False
-        with open(path_utils.concat_path(BKTEMP_AND_BASEDIR, "bk_date.txt"), "w+") as f:
+        with open(path_utils.concat_path(BKTEMP_AND_BASEDIR, BACKUP_DATE_FILE), "w+") as f:
             f.write(maketimestamp.get_timestamp_now() + "\n")
 
-        for it in _self.BKARTIFACTS:
-            print("%sCurrent: [%s], started at %s%s" % (terminal_colors.TTY_BLUE, it[0], maketimestamp.get_timestamp_now(), terminal_colors.get_standard_color()))
-
-            dn = _get_dirname_helper(it[0])
-            bn_of_dn = path_utils.basename_filtered(dn)
-
-            # check if this basename-of-dirname has already been used for another (albeit similar) full dirname
-            if bn_of_dn in dirname_sentinel:
-                if dirname_sentinel[bn_of_dn] != dn: # same basename-of-dirname but different dirname overall. issue a warning about risk of overwrites.
-                    _msg = "WARNING! Path [%s] has a common dirname with another artifact (%s). Both artifacts will be placed inside the same folder in the target backup base folder!" % (it[0], dirname_sentinel[bn_of_dn])
-                    print("%s%s%s" % (terminal_colors.TTY_YELLOW_BOLD, _msg, terminal_colors.get_standard_color()))
-            else:
-                dirname_sentinel[bn_of_dn] = dn
-
-            BKTMP_PLUS_ARTBASE = path_utils.concat_path(BKTEMP_AND_BASEDIR, bn_of_dn)
-            if path_utils.basename_filtered(BKTMP_PLUS_ARTBASE) == path_utils.basename_filtered(BKTEMP_AND_BASEDIR):
-                _msg = "WARNING! Path [%s] was deduced to be inside root. It will be placed inside the '(root)' folder!" % it[0]
-                print("%s%s%s" % (terminal_colors.TTY_YELLOW_BOLD, _msg, terminal_colors.get_standard_color()))
-                BKTMP_PLUS_ARTBASE = path_utils.concat_path(BKTMP_PLUS_ARTBASE, "(root)")
-            if not path_utils.guaranteefolder(BKTMP_PLUS_ARTBASE):
-                print("%sFailed attempting to guarantee [%s].%s" % (terminal_colors.TTY_RED, BKTMP_PLUS_ARTBASE, terminal_colors.get_standard_color()))
-                return False
-
-            CURPAK = path_utils.concat_path(BKTMP_PLUS_ARTBASE, path_utils.basename_filtered(it[0]))
-            CURPAK_TAR = CURPAK + ".tar"
-            CURPAK_TAR_BZ2 = CURPAK_TAR + ".bz2"
-            CURPAK_TAR_BZ2_ENC = CURPAK_TAR_BZ2 + ".enc"
-            CURPAK_TAR_BZ2_ENC_HASH = CURPAK_TAR_BZ2_ENC + ".sha512"
-
-            # check if there are any preexisting artifacts
-            if os.path.exists(CURPAK):
-                print("%sFailed generating [%s] - duplicated artifact - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, CURPAK, terminal_colors.get_standard_color()))
-                return False
-            if os.path.exists(CURPAK_TAR):
-                print("%sFailed generating [%s] - duplicated artifact - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, CURPAK_TAR, terminal_colors.get_standard_color()))
-                return False
-            if os.path.exists(CURPAK_TAR_BZ2):
-                print("%sFailed generating [%s] - duplicated artifact - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2, terminal_colors.get_standard_color()))
-                return False
-            if os.path.exists(CURPAK_TAR_BZ2_ENC):
-                print("%sFailed generating [%s] - duplicated artifact - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2_ENC, terminal_colors.get_standard_color()))
-                return False
-            if os.path.exists(CURPAK_TAR_BZ2_ENC_HASH):
-                print("%sFailed generating [%s] - duplicated artifact - aborting to avoid overwrites.%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2_ENC_HASH, terminal_colors.get_standard_color()))
-                return False
-
-            # create the package
-            v, r = pakgen.pakgen(CURPAK, False, [it[0]]) # hash will be generated later (from the encrypted package)
-            if not v:
-                print("%sFailed generating [%s].%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2, terminal_colors.get_standard_color()))
-                return False
-            if len(r) > 0:
-                print("Output from pakgen: [%s]" % r)
-
-            # encrypt plain package
-            v, r = encrypt.symmetric_encrypt(CURPAK_TAR_BZ2, CURPAK_TAR_BZ2_ENC, _self.PASSPHRASE)
-            if not v:
-                print("%sFailed encrypting package: [%s].%s" % (terminal_colors.TTY_RED, r, terminal_colors.get_standard_color()))
-                return False
-
-            # shred plain package
-            v, r = shred_wrapper.shred_target(CURPAK_TAR_BZ2)
-            if not v:
-                print("%sFailed shredding plain package: [%s].%s" % (terminal_colors.TTY_RED, r, terminal_colors.get_standard_color()))
-                return False
-
-            warn_size_each_active_local = (_self.BKWARNINGS[0][0] is not None) and (_self.BKWARNINGS[0][1] is not None)
-            warn_size_each_local = _self.BKWARNINGS[0][0]
-            warn_size_each_abort_local = _self.BKWARNINGS[0][1]
-
-            if it[2] is not None:
-                # warning size option overridden
-                warn_size_each_active_local = True
-                warn_size_each_local = it[2]
-
-            if it[3] is not None:
-                # warning abort option overridden
-                warn_size_each_active_local = True
-                warn_size_each_abort_local = it[3]
-
-            if warn_size_each_active_local:
-                if dirsize.get_dir_size(CURPAK_TAR_BZ2_ENC, False) > warn_size_each_local:
-                    if warn_size_each_abort_local:
-                        print("%sGenerated package [%s] exceeds the size limit. Aborting.%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2_ENC, terminal_colors.get_standard_color()))
-                        return False
-                    else:
-                        print("%sGenerated package [%s] exceeds the size limit.%s" % (terminal_colors.TTY_YELLOW_BOLD, CURPAK_TAR_BZ2_ENC, terminal_colors.get_standard_color()))
+        v, r = _self._make_artifact_bases([BKTEMP_AND_BASEDIR])
+        if not v:
+            return False
+        art_bases = r
 
-            # create hash from the encrypted package
-            v, r = sha512_wrapper.hash_sha_512_app_file(CURPAK_TAR_BZ2_ENC)
-            if not v:
-                print("%sFailed generating hash for [%s].%s" % (terminal_colors.TTY_RED, CURPAK_TAR_BZ2_ENC, terminal_colors.get_standard_color()))
-                return False
-            create_and_write_file.create_file_contents(CURPAK_TAR_BZ2_ENC_HASH, r)
+        if not _self._package_artifacts(_self._package_artifact_staged, art_bases):
+            return False
 
-        warn_size_final_active_local = (_self.BKWARNINGS[1][0] is not None) and (_self.BKWARNINGS[1][1] is not None)
-        if warn_size_final_active_local:
-            if dirsize.get_dir_size(BKTEMP_AND_BASEDIR, False) > _self.BKWARNINGS[1][0]:
-                if _self.BKWARNINGS[1][1]: # abort
-                    print("%sGenerated backup exceeds size limit. Aborting.%s" % (terminal_colors.TTY_RED, terminal_colors.get_standard_color()))
-                    return False
-                else:
-                    print("%sGenerated backup exceeds size limit.%s" % (terminal_colors.TTY_YELLOW_BOLD, terminal_colors.get_standard_color()))
+        if not _self._check_warn_size_final(dirsize.get_dir_size(BKTEMP_AND_BASEDIR, False)):
+            return False
 
         print("%sWriting to targets...%s" % (terminal_colors.TTY_BLUE, terminal_colors.get_standard_color()))
 
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+import sys
+import os
+import stat
+import json
+import hmac
+import hashlib
+
+import path_utils
+
+# per-artifact manifests, used by incremental backups. a manifest lists every entry (files, folders, links) of an
+# artifact, as (path, mode, size, mtime, content digest). manifests are stored on the targets, next to the (encrypted)
+# packages - so paths and digests are keyed with the backup's passphrase, and no plain names or plain content hashes
+# ever reach the targets. an artifact whose manifest did not change (mtimes aside) does not need to be packaged again.
+
+BACKUP_MANIFEST_EXTENSION = "manifest"
+BACKUP_MANIFEST_FORMAT = "backup_manifest"
+BACKUP_MANIFEST_FORMAT_VERSION = 1
+
+BACKUP_MANIFEST_KEY_SALT = b"mvtools_backup_manifest"
+BACKUP_MANIFEST_KEY_ITERATIONS = 100000
+BACKUP_MANIFEST_READ_SIZE = 1024*1024
+
+# entry fields
+BACKUP_MANIFEST_ENTRY_PATH = 0
+BACKUP_MANIFEST_ENTRY_MODE = 1
+BACKUP_MANIFEST_ENTRY_SIZE = 2
+BACKUP_MANIFEST_ENTRY_MTIME = 3
+BACKUP_MANIFEST_ENTRY_DIGEST = 4
+
+def make_key(passphrase):
+    return hashlib.pbkdf2_hmac("sha256", passphrase.encode(), BACKUP_MANIFEST_KEY_SALT, BACKUP_MANIFEST_KEY_ITERATIONS)
+
+def get_manifest_filename(package):
+    return "%s.%s" % (package, BACKUP_MANIFEST_EXTENSION)
+
+def _digest_path(key, rel_path):
+    return hmac.new(key, rel_path.encode(errors="surrogateescape"), hashlib.sha256).hexdigest()
+
+def _digest_file(key, full_path):
+    hasher = hmac.new(key, None, hashlib.sha256)
+    with open(full_path, "rb") as f:
+        while True:
+            chunk = f.read(BACKUP_MANIFEST_READ_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def _make_entry(key, full_path, rel_path, previous_entries):
+
+    st = os.lstat(full_path)
+    path_digest = _digest_path(key, rel_path)
+
+    if stat.S_ISDIR(st.st_mode):
+        # folders are fully described by their own entries - their mtimes only change along with them
+        return [path_digest, st.st_mode, 0, 0, None]
+
+    if stat.S_ISLNK(st.st_mode):
+        content_digest = hmac.new(key, os.readlink(full_path).encode(errors="surrogateescape"), hashlib.sha256).hexdigest()
+        return [path_digest, st.st_mode, st.st_size, st.st_mtime_ns, content_digest]
+
+    # quick check: same mode, size and mtime as last time means the same contents - no need to read the file again
+    prev = previous_entries.get(path_digest, None)
+    if prev is not None and prev[BACKUP_MANIFEST_ENTRY_MODE] == st.st_mode and prev[BACKUP_MANIFEST_ENTRY_SIZE] == st.st_size and prev[BACKUP_MANIFEST_ENTRY_MTIME] == st.st_mtime_ns:
+        return [path_digest, st.st_mode, st.st_size, st.st_mtime_ns, prev[BACKUP_MANIFEST_ENTRY_DIGEST]]
+
+    content_digest = None
+    if stat.S_ISREG(st.st_mode):
+        content_digest = _digest_file(key, full_path)
+    return [path_digest, st.st_mode, st.st_size, st.st_mtime_ns, content_digest]
+
+def make_manifest(key, artifact_path, previous_manifest=None):
+
+    # previous_manifest: the artifact's last known manifest (or None). returns the entries, sorted
+
+    previous_entries = {}
+    if previous_manifest is not None:
+        for e in previous_manifest:
+            previous_entries[e[BACKUP_MANIFEST_ENTRY_PATH]] = e
+
+    artifact_path = path_utils.filter_remove_trailing_sep(artifact_path)
+    if not os.path.lexists(artifact_path):
+        return False, "Artifact [%s] does not exist" % artifact_path
+
+    entries = []
+    try:
+        entries.append(_make_entry(key, artifact_path, "", previous_entries))
+        if os.path.isdir(artifact_path) and not os.path.islink(artifact_path):
+            for root, dirs, files in os.walk(artifact_path):
+                for n in dirs + files:
+                    full_path = path_utils.concat_path(root, n)
+                    entries.append(_make_entry(key, full_path, os.path.relpath(full_path, artifact_path), previous_entries))
+    except OSError as ex:
+        return False, "Unable to make manifest for [%s]: [%s]" % (artifact_path, ex)
+
+    entries.sort()
+    return True, entries
+
+def _strip_mtimes(manifest):
+    result = []
+    for e in manifest:
+        result.append((e[BACKUP_MANIFEST_ENTRY_PATH], e[BACKUP_MANIFEST_ENTRY_MODE], e[BACKUP_MANIFEST_ENTRY_SIZE], e[BACKUP_MANIFEST_ENTRY_DIGEST]))
+    return result
+
+def same_contents(manifest_first, manifest_second):
+
+    # mtimes are left out - touching a file without changing it does not make its artifact any different
+
+    if manifest_first is None or manifest_second is None:
+        return False
+    return _strip_mtimes(manifest_first) == _strip_mtimes(manifest_second)
+
+def save_manifest(manifest_file, manifest):
+
+    contents = json.dumps({"format": BACKUP_MANIFEST_FORMAT, "version": BACKUP_MANIFEST_FORMAT_VERSION, "entries": manifest})
+
+    # written aside and then renamed into place - a manifest only ever exists complete
+    manifest_file_tmp = "%s.tmp" % manifest_file
+    try:
+        with open(manifest_file_tmp, "w") as f:
+            f.write(contents)
+        os.replace(manifest_file_tmp, manifest_file)
+    except OSError as ex:
+        if os.path.exists(manifest_file_tmp):
+            os.unlink(manifest_file_tmp)
+        return False, "Unable to write manifest [%s]: [%s]" % (manifest_file, ex)
+
+    return True, None
+
+def load_manifest(manifest_file):
+
+    try:
+        with open(manifest_file) as f:
+            contents = json.load(f)
+    except (OSError, ValueError) as ex:
+        return False, "Unable to read manifest [%s]: [%s]" % (manifest_file, ex)
+
+    if not isinstance(contents, dict) or contents.get("format", None) != BACKUP_MANIFEST_FORMAT or contents.get("version", None) != BACKUP_MANIFEST_FORMAT_VERSION:
+        return False, "Unsupported manifest: [%s]" % manifest_file
+
+    entries = contents.get("entries", None)
+    if not isinstance(entries, list):
+        return False, "Malformed manifest: [%s]" % manifest_file
+    for e in entries:
+        if not isinstance(e, list) or len(e) != 5:
+            return False, "Malformed manifest: [%s]" % manifest_file
+
+    return True, entries
+
+if __name__ == "__main__":
+    print("Hello from %s" % path_utils.basename_filtered(__file__))
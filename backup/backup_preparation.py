@@ -9,6 +9,7 @@ import terminal_colors
 import fsquery
 import path_utils
 import dsl_type20
+import dsl_type20_cache
 import create_and_write_file
 import dirsize
 
@@ -82,7 +83,7 @@ class BackupPreparation:
             cfg_contents = f.read()
 
         # parses into dsl class
-        v, r = self.dsl.parse(cfg_contents)
+        v, r = dsl_type20_cache.parse_cached(self.dsl, cfg_contents)
         if not v:
             raise BackupPreparationException("Failed parsing: %s" % r)
 
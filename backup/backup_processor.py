@@ -10,6 +10,7 @@ import fsquery
 import mvtools_exception
 import path_utils
 import dsl_type20
+import dsl_type20_cache
 import convert_unit
 
 import backup_engine
@@ -85,7 +86,7 @@ def read_config(config_file):
         cfg_contents = f.read()
 
     dsl = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(True, True))
-    v, r = dsl.parse(cfg_contents)
+    v, r = dsl_type20_cache.parse_cached(dsl, cfg_contents)
     if not v:
         print("%sFailed parsing [%s]: %s%s" % (terminal_colors.TTY_RED, config_file, r, terminal_colors.get_standard_color()))
         return False, ()
@@ -99,6 +100,9 @@ def read_config(config_file):
     BKTARGETS_BASEDIR = ""
     BKWARNING_EACH = (None, None)
     BKWARNING_FINAL = (None, None)
+    BKMODE = backup_engine.BACKUP_MODE_STAGED
+    BKWORKERS = 1
+    BKINCREMENTAL = False
 
     v, r = dsl.get_all_variables()
     if not v:
@@ -191,6 +195,27 @@ def read_config(config_file):
             warn_each_abort = dsl_type20.hasopt_var(v, "abort")
             BKWARNING_FINAL = (conv_value, warn_each_abort)
 
+        elif var_name == "BKMODE":
+            if var_value not in backup_engine.BACKUP_MODES:
+                print("%sBKMODE has an invalid value: [%s]. Valid values are: [%s]%s" % (terminal_colors.TTY_RED, var_value, ", ".join(backup_engine.BACKUP_MODES), terminal_colors.get_standard_color()))
+                return False, ()
+            BKMODE = var_value
+
+        elif var_name == "BKWORKERS":
+            try:
+                BKWORKERS = int(var_value)
+            except (TypeError, ValueError):
+                BKWORKERS = 0
+            if BKWORKERS < 1:
+                print("%sBKWORKERS has an invalid value: [%s]. It must be a positive integer.%s" % (terminal_colors.TTY_RED, var_value, terminal_colors.get_standard_color()))
+                return False, ()
+
+        elif var_name == "BKINCREMENTAL":
+            if var_value is not None:
+                print("%sBKINCREMENTAL takes no value: [%s]%s" % (terminal_colors.TTY_RED, var_value, terminal_colors.get_standard_color()))
+                return False, ()
+            BKINCREMENTAL = True
+
         else:
             print("%sUnrecognized variable: [%s]%s" % (terminal_colors.TTY_RED, var_name, terminal_colors.get_standard_color()))
             return False, ()
@@ -208,7 +233,7 @@ def read_config(config_file):
         print("%sBKTARGETS_BASEDIR can't be empty.%s" % (terminal_colors.TTY_RED, terminal_colors.get_standard_color()))
         return False, ()
 
-    ret = True, ( (BKPREPARATION, BKPREPARATION_PARAMS), BKSOURCE, BKTARGETS_ROOT, BKTARGETS_BASEDIR, BKTEMP, (BKWARNING_EACH, BKWARNING_FINAL) )
+    ret = True, ( (BKPREPARATION, BKPREPARATION_PARAMS), BKSOURCE, BKTARGETS_ROOT, BKTARGETS_BASEDIR, BKTEMP, (BKWARNING_EACH, BKWARNING_FINAL), BKMODE, BKWORKERS, BKINCREMENTAL )
     return ret
 
 def run_backup(config_file, pass_hash_file):
@@ -226,7 +251,7 @@ def run_backup(config_file, pass_hash_file):
         return False
 
     # call the backup engine
-    bkeng = backup_engine.BackupEngine(v_cfg[0], make_backup_artifacts_list(v_cfg[1]), v_cfg[2], v_cfg[3], v_cfg[4], v_cfg[5], passphrase)
+    bkeng = backup_engine.BackupEngine(v_cfg[0], make_backup_artifacts_list(v_cfg[1]), v_cfg[2], v_cfg[3], v_cfg[4], v_cfg[5], passphrase, v_cfg[6], v_cfg[7], v_cfg[8])
     bkeng_ret = bkeng.run()
     return bkeng_ret
 
@@ -3,16 +3,121 @@
 import sys
 import os
 import shutil
+import time
+import hashlib
+import concurrent.futures
 
 import path_utils
 import input_checked_passphrase
+import fsquery
+import generic_run
+import terminal_colors
 
 import test_mass_hash_check
 import test_mass_decrypt
 
 import backup_processor
 
-def backups_mass_check(config_file, pass_hash_file):
+# streamed verification: each encrypted package is read once - hashed on the way in, and decrypted to nowhere (openssl
+# still has to get through the whole package, padding check included, for it to pass). nothing is ever written to disk,
+# so no temp path is needed at all. packages are verified by a pool of workers (openssl does the heavy lifting).
+
+VERIFY_READ_SIZE = 1024*1024
+
+class _HashingReader:
+
+    def __init__(_self, filename):
+        _self.filename = filename
+        _self.hasher = hashlib.sha512()
+        _self.size = 0
+
+    def chunks(_self):
+        with open(_self.filename, "rb") as f:
+            while True:
+                chunk = f.read(VERIFY_READ_SIZE)
+                if not chunk:
+                    break
+                _self.hasher.update(chunk)
+                _self.size += len(chunk)
+                yield chunk
+
+def _discard_output(chunk):
+    return True, None
+
+def verify_file_streamed(filename, passphrase):
+
+    # returns (bool, (error message | size in bytes))
+
+    hash_file = filename + ".sha512"
+    if not os.path.exists(hash_file):
+        return False, filename + " has no corresponding hash file."
+
+    reader = _HashingReader(filename)
+    v, r = generic_run.run_cmd_pipeline([["openssl", "des3", "-d", "-pbkdf2", "-k", passphrase]], _discard_output, use_input_chunks=reader.chunks())
+    if not v:
+        return False, "%s FAILED: [%s]" % (filename, r)
+
+    with open(hash_file, "r") as f:
+        hash_file_contents = f.read()
+    if hash_file_contents[0:128] != reader.hasher.hexdigest():
+        return False, filename + " check FAILED."
+
+    if not r[0].success:
+        return False, filename + " FAILED"
+
+    return True, reader.size
+
+def verify_folder_streamed(path_files, extension, passphrase, workers):
+
+    # returns (bool, (report, total size in bytes))
+
+    if not os.path.exists(path_files):
+        return False, (["%s does not exist." % path_files], 0)
+
+    v, r = fsquery.makecontentlist(path_files, True, False, True, False, True, False, True, [extension])
+    if not v:
+        return False, ([r], 0)
+    filelist = r
+
+    if len(filelist) == 0:
+        print("WARNING: Nothing to test.")
+
+    report = []
+    total_size = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for f in filelist:
+            futures.append(executor.submit(verify_file_streamed, f, passphrase))
+        for fut in futures:
+            v, r = fut.result()
+            if v:
+                total_size += r
+            else:
+                report.append(r)
+
+    return (len(report) == 0), (report, total_size)
+
+def backups_mass_check_streamed(extension, passphrase, path_folders, workers):
+
+    return_value = True
+
+    for pf in path_folders:
+        print("Mass verifying (streamed) [%s]..." % pf)
+        start_time = time.monotonic()
+        v, r = verify_folder_streamed(pf, extension, passphrase, workers)
+        elapsed = time.monotonic() - start_time
+        report, total_size = r
+        return_value &= v
+
+        throughput = 0.0
+        if elapsed > 0:
+            throughput = (total_size / (1024*1024)) / elapsed
+        print("%sVerified [%s] bytes in [%.2f] seconds (%.2f MB/s).%s" % (terminal_colors.TTY_BLUE, total_size, elapsed, throughput, terminal_colors.get_standard_color()))
+        test_mass_hash_check.print_report(v, report)
+
+    return return_value
+
+def backups_mass_check(config_file, pass_hash_file, streamed=False, workers=1):
 
     # gets and checks the passphrase
     r_pp, passphrase = input_checked_passphrase.get_checked_passphrase(pass_hash_file)
@@ -30,6 +135,9 @@ def backups_mass_check(config_file, pass_hash_file):
     temp_path = r[4]
     extension = "enc"
 
+    if streamed:
+        return backups_mass_check_streamed(extension, passphrase, path_folders, workers)
+
     # avoid conflict with tmp folder used by actual backup creation
     if os.path.exists(temp_path):
         print("Temp path [%s] already exists. Aborting." % temp_path)
@@ -65,7 +173,7 @@ def backups_mass_check_delegate(extension, passphrase, path_folders, temp_path):
     return return_value
 
 def puaq(selfhelp):
-    print("Usage: %s config-file passhash-file" % path_utils.basename_filtered(__file__))
+    print("Usage: %s config-file passhash-file [--streamed] [--jobs N (streamed only - defaults to the number of cpus)]" % path_utils.basename_filtered(__file__))
     if selfhelp:
         sys.exit(0)
     else:
@@ -78,6 +186,35 @@ if __name__ == "__main__":
 
     cfg_file_path = sys.argv[1]
     ph_file = sys.argv[2]
+    params = sys.argv[3:]
+
+    streamed = False
+    workers = os.cpu_count() or 1
+    workers_parse_next = False
+
+    for p in params:
+
+        if workers_parse_next:
+            try:
+                workers = int(p)
+            except ValueError:
+                puaq(False)
+            if workers < 1:
+                puaq(False)
+            workers_parse_next = False
+            continue
+
+        if p == "--streamed":
+            streamed = True
+        elif p == "--jobs":
+            workers_parse_next = True
+        elif p == "--help":
+            puaq(True)
+        else:
+            puaq(False)
+
+    if workers_parse_next:
+        puaq(False)
 
-    if not backups_mass_check(cfg_file_path, ph_file):
+    if not backups_mass_check(cfg_file_path, ph_file, streamed, workers):
         sys.exit(1)
@@ -4,9 +4,10 @@ import os
 import sys
 
 import path_utils
-import fsquery
 import mvtools_exception
 import git_visitor_base
+import git_visitor_index
+import detect_repo_type
 import git_lib
 import terminal_colors
 import mvtools_envvars
@@ -42,19 +43,6 @@ def print_success(msg):
 def print_error(msg):
     print("%s: %s%s%s" % (path_utils.basename_filtered(__file__), terminal_colors.TTY_RED, msg, terminal_colors.get_standard_color()))
 
-def filter_bare_git_repos(repos):
-
-    repos_result = []
-
-    for x in repos:
-        v, r = git_lib.is_repo_bare(x)
-        if not v:
-            raise mvtools_exception.mvtools_exception(r)
-        if r:
-            repos_result.append(x)
-
-    return repos_result
-
 def sanitize_remote_path(path):
     if path is None:
         return None
@@ -172,13 +160,11 @@ def repo_storages_comparison_check(repos):
         return True
 
     # get list of repos from other storage, to compare with local storage
-    v, r = fsquery.makecontentlist(check_repos_options["compare-repo-storage"], True, False, False, True, False, True, True, [])
+    v, r = git_visitor_index.get_repo_list(check_repos_options["compare-repo-storage"], detect_repo_type.REPO_TYPE_GIT_BARE)
     if not v:
         raise mvtools_exception.mvtools_exception(r)
     compare_repos = r
 
-    compare_repos = filter_bare_git_repos(compare_repos)
-
     visitor_repos_len = len(repos)
     compare_repos_len = len(compare_repos)
 
@@ -2,6 +2,8 @@
 
 import sys
 import os
+import importlib
+import concurrent.futures
 
 import path_utils
 import getcontents
@@ -9,6 +11,7 @@ import create_and_write_file
 import string_utils
 import fsquery
 import terminal_colors
+import codelint_cache
 
 # plugins
 import lint_sample_echo
@@ -25,6 +28,8 @@ import lint_if_start_this_then_end_that
 CODELINT_CMDLINE_RETURN_PLUGIN_FINDING = 1
 CODELINT_CMDLINE_RETURN_ERROR = 2
 
+CODELINT_SHARDS_PER_JOB = 4 # more (smaller) shards than jobs, so that workers are kept evenly busy
+
 plugin_table = {}
 plugin_table["lint-sample-echo"] = (lint_sample_echo, "{lint-sample-echo-pattern-match -> pattern}")
 plugin_table["lint-func-indexer"] = (lint_func_indexer, "{lint-func-indexer-param-left -> pattern / lint-func-indexer-param-right -> pattern}")
@@ -142,7 +147,7 @@ def helper_make_extra_plugin_end_str(num_findings, num_patches_applied):
         extra_str = " (%s%s%s)" % (findings_str, inbetween_str, patches_str)
     return extra_str
 
-def codelint(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files):
+def codelint(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files, jobs=1, use_cache=False):
 
     report = []
 
@@ -179,6 +184,12 @@ def codelint(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files
     if not isinstance(files, list):
         return False, ("files is not a list", report)
 
+    if not isinstance(jobs, int) or isinstance(jobs, bool) or jobs < 1:
+        return False, ("jobs must be a positive integer", report)
+
+    if not isinstance(use_cache, bool):
+        return False, ("use_cache is not a bool", report)
+
     if len(plugins) < 1:
         return False, ("No plugins selected", report)
 
@@ -216,9 +227,206 @@ def codelint(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files
     if "max-findings" in filters:
         filter_max_findings = int(filters["max-findings"][0])
 
+    # autocorrected files are rewritten - their results are not worth caching
+    lint_cache = None
+    if use_cache and not autocorrect:
+        lint_cache = codelint_cache.make_lint_cache(plugins_resolved, plugins_params, filters, sys.modules[__name__])
+
+    if jobs == 1 or len(files) == 1:
+        v, r = codelint_files(plugins_resolved, plugins_params, filter_min_line, filter_max_line, filter_max_findings, autocorrect, skip_non_utf8, files, lint_cache)
+    else:
+        v, r = codelint_files_parallel(plugins_resolved, plugins_params, filter_min_line, filter_max_line, filter_max_findings, autocorrect, skip_non_utf8, files, jobs, lint_cache)
+    if not v:
+        return False, r
+    report = r
+
+    if lint_cache is not None:
+        report.append((False, lint_cache.make_stats_str()))
+    return True, report
+
+def helper_get_cycle_range(num_lines, filter_min_line, filter_max_line):
+
+    # returns the (zero based, end exclusive) range of lines that go through lint_cycle. the range is empty (but never
+    # inverted) when the filters leave no lines at all - for example, min-line being past the end of the file
+
+    start = min(filter_min_line, num_lines)
+    end = num_lines
+    if filter_max_line is not None:
+        end = min(end, max(filter_min_line, filter_max_line-1))
+    end = max(start, end)
+    return start, end
+
+def helper_cycle_many(p, plugins_params, fn, shared_state, lines, start, end):
+
+    # plugins may optionally offer lint_cycle_many(plugins_params, filename, shared_state, first_line_index, content_lines),
+    # which lints a whole range of lines at once (returning one lint_cycle result per line). it must behave just as if
+    # lint_cycle had been called on each line, in sequence - and its plugin's lint_post must not depend on how far the
+    # cycles went (the batch may run past the max-findings filter, whose surplus results are then discarded)
+
+    v, r = p.lint_cycle_many(plugins_params, fn, shared_state, (start+1), lines[start:end])
+    if not v:
+        return False, r
+    if not isinstance(r, list) or len(r) != (end - start):
+        return False, "invalid result return: lint_cycle_many must return one result per line"
+    return True, r
+
+def helper_lint_lines_sequential(plugins_resolved, plugins_params, fn, lines, filter_min_line, filter_max_line, filter_max_findings, autocorrect, lines_copy, report):
+
+    # runs each plugin through all lines, one plugin after the other
+    # returns the number of patches applied
+
+    shared_state = {}
+    num_findings = 0
+    num_patches_applied = 0
+    start, end = helper_get_cycle_range(len(lines), filter_min_line, filter_max_line)
+
+    for p in plugins_resolved:
+
+        report.append((False, "Plugin: [%s] - begin" % p.lint_name()))
+        v, r = p.lint_pre(plugins_params, fn, shared_state, len(lines))
+        if not v:
+            return False, "Plugin [%s] failed (pre): [%s]" % (p.lint_name(), r)
+
+        batch_results = None
+        if hasattr(p, "lint_cycle_many"):
+            v, r = helper_cycle_many(p, plugins_params, fn, shared_state, lines, start, end)
+            if not v:
+                return False, "Plugin [%s] failed (cycle): [%s]" % (p.lint_name(), r)
+            batch_results = r
+
+        for idx in range(start, end):
+
+            if filter_max_findings is not None:
+                if num_findings == filter_max_findings:
+                    break
+
+            if batch_results is not None:
+                r = batch_results[idx - start]
+            else:
+                v, r = p.lint_cycle(plugins_params, fn, shared_state, (idx+1), lines[idx])
+                if not v:
+                    return False, "Plugin [%s] failed (cycle): [%s]" % (p.lint_name(), r)
+
+            v, r = helper_process_result(r, report, autocorrect, lines_copy)
+            if not v:
+                return False, "Plugin [%s] failed (cycle-result): [%s]" % (p.lint_name(), r)
+            r_left, r_right = r
+            num_findings += r_left
+            num_patches_applied += r_right
+
+        v, r = p.lint_post(plugins_params, fn, shared_state)
+        if not v:
+            return False, "Plugin [%s] failed (post): [%s]" % (p.lint_name(), r)
+
+        v, r = helper_process_result(r, report, autocorrect, lines_copy)
+        if not v:
+            return False, "Plugin [%s] failed (post-result): [%s]" % (p.lint_name(), r)
+        r_left, r_right = r
+        num_findings += r_left
+        num_patches_applied += r_right
+
+        extra_str = helper_make_extra_plugin_end_str(num_findings, num_patches_applied)
+        report.append((False, "Plugin: [%s] - end%s" % (p.lint_name(), extra_str)))
+
+    return True, num_patches_applied
+
+def helper_collect_results_fused(plugins_resolved, plugins_params, fn, lines, filter_min_line, filter_max_line):
+
+    # walks the lines only once, dispatching every plugin on each line (plugins offering lint_cycle_many get the
+    # whole range at once instead). returns each plugin's cycle results and post result, or False if any plugin fails
+
+    shared_state = {}
+    start, end = helper_get_cycle_range(len(lines), filter_min_line, filter_max_line)
+
+    for p in plugins_resolved:
+        v, r = p.lint_pre(plugins_params, fn, shared_state, len(lines))
+        if not v:
+            return False, None
+
+    cycle_results = []
+    per_line_plugins = []
+    for p in plugins_resolved:
+        if hasattr(p, "lint_cycle_many"):
+            v, r = helper_cycle_many(p, plugins_params, fn, shared_state, lines, start, end)
+            if not v:
+                return False, None
+            cycle_results.append(r)
+        else:
+            cycle_results.append([])
+            per_line_plugins.append((p, cycle_results[-1]))
+
+    for idx in range(start, end):
+        for p, p_results in per_line_plugins:
+            v, r = p.lint_cycle(plugins_params, fn, shared_state, (idx+1), lines[idx])
+            if not v:
+                return False, None
+            p_results.append(r)
+
+    post_results = []
+    for p in plugins_resolved:
+        v, r = p.lint_post(plugins_params, fn, shared_state)
+        if not v:
+            return False, None
+        post_results.append(r)
+
+    return True, (cycle_results, post_results)
+
+def helper_lint_lines_fused(plugins_resolved, plugins_params, fn, lines, filter_min_line, filter_max_line, autocorrect, lines_copy, report):
+
+    # single pass version of helper_lint_lines_sequential (not usable with the max-findings filter, which
+    # has plugins stop early). results are collected first and then processed plugin by plugin, so the report
+    # comes out the same. should any plugin fail, the lines are linted again in sequence - which yields the
+    # exact same error (and partial report) as a sequential run would
+
+    v, r = helper_collect_results_fused(plugins_resolved, plugins_params, fn, lines, filter_min_line, filter_max_line)
+    if not v:
+        return helper_lint_lines_sequential(plugins_resolved, plugins_params, fn, lines, filter_min_line, filter_max_line, None, autocorrect, lines_copy, report)
+    cycle_results, post_results = r
+
+    num_findings = 0
+    num_patches_applied = 0
+
+    for pi in range(len(plugins_resolved)):
+
+        p = plugins_resolved[pi]
+        report.append((False, "Plugin: [%s] - begin" % p.lint_name()))
+
+        for r in cycle_results[pi]:
+            v, r = helper_process_result(r, report, autocorrect, lines_copy)
+            if not v:
+                return False, "Plugin [%s] failed (cycle-result): [%s]" % (p.lint_name(), r)
+            r_left, r_right = r
+            num_findings += r_left
+            num_patches_applied += r_right
+
+        v, r = helper_process_result(post_results[pi], report, autocorrect, lines_copy)
+        if not v:
+            return False, "Plugin [%s] failed (post-result): [%s]" % (p.lint_name(), r)
+        r_left, r_right = r
+        num_findings += r_left
+        num_patches_applied += r_right
+
+        extra_str = helper_make_extra_plugin_end_str(num_findings, num_patches_applied)
+        report.append((False, "Plugin: [%s] - end%s" % (p.lint_name(), extra_str)))
+
+    return True, num_patches_applied
+
+def codelint_files(plugins_resolved, plugins_params, filter_min_line, filter_max_line, filter_max_findings, autocorrect, skip_non_utf8, files, lint_cache=None):
+
+    # lints files in sequence (inputs are expected to be already validated and resolved by codelint())
+
+    report = []
+
     for f in files:
 
-        shared_state = {}
+        cache_file = None
+        if lint_cache is not None:
+            cache_file = lint_cache.get_cache_filename(f)
+            cached_report = lint_cache.lookup(cache_file)
+            if cached_report is not None:
+                report += cached_report
+                continue
+        report_start = len(report)
 
         fn = path_utils.basename_filtered(f)
         try:
@@ -235,55 +443,78 @@ def codelint(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files
 
         report.append((False, "Processing [%s] - begin" % f))
 
-        num_findings = 0
-        num_patches_applied = 0
+        if len(plugins_resolved) > 1 and filter_max_findings is None:
+            v, r = helper_lint_lines_fused(plugins_resolved, plugins_params, fn, lines, filter_min_line, filter_max_line, autocorrect, lines_copy, report)
+        else:
+            v, r = helper_lint_lines_sequential(plugins_resolved, plugins_params, fn, lines, filter_min_line, filter_max_line, filter_max_findings, autocorrect, lines_copy, report)
+        if not v:
+            return False, (r, report)
+        num_patches_applied = r
 
-        for p in plugins_resolved:
+        if autocorrect and num_patches_applied > 0:
+            os.unlink(f)
+            create_and_write_file.create_file_contents(f, string_utils.line_list_to_string(lines_copy))
+        report.append((False, "Processing [%s] - end" % f))
 
-            report.append((False, "Plugin: [%s] - begin" % p.lint_name()))
-            v, r = p.lint_pre(plugins_params, fn, shared_state, len(lines))
-            if not v:
-                return False, ("Plugin [%s] failed (pre): [%s]" % (p.lint_name(), r), report)
+        if lint_cache is not None:
+            lint_cache.store(cache_file, report[report_start:])
 
-            for idx in range(filter_min_line, len(lines)):
+    return True, report
 
-                if filter_max_findings is not None:
-                    if num_findings == filter_max_findings:
-                        break
+def _codelint_files_shard(plugins_module_names, plugins_params, filter_min_line, filter_max_line, filter_max_findings, autocorrect, skip_non_utf8, files, lint_cache_setup):
 
-                if filter_max_line is not None:
-                    if (idx+1) == filter_max_line:
-                        break
+    # runs inside a worker process: plugins are passed by module name (modules can't be pickled)
+    # and resolved again here (plugins keep their state per file, so files are independent from each other)
 
-                v, r = p.lint_cycle(plugins_params, fn, shared_state, (idx+1), lines[idx])
-                if not v:
-                    return False, ("Plugin [%s] failed (cycle): [%s]" % (p.lint_name(), r), report)
+    plugins_resolved = []
+    for pn in plugins_module_names:
+        plugins_resolved.append(importlib.import_module(pn))
 
-                v, r = helper_process_result(r, report, autocorrect, lines_copy)
-                if not v:
-                    return False, ("Plugin [%s] failed (cycle-result): [%s]" % (p.lint_name(), r), report)
-                r_left, r_right = r
-                num_findings += r_left
-                num_patches_applied += r_right
+    # each shard gets its own lint cache (over the same cache files) - its stats are sent back along with the results
+    lint_cache = None
+    if lint_cache_setup is not None:
+        lint_cache = codelint_cache.LintCache(lint_cache_setup[0], lint_cache_setup[1])
 
-            v, r = p.lint_post(plugins_params, fn, shared_state)
-            if not v:
-                return False, ("Plugin [%s] failed (post): [%s]" % (p.lint_name(), r), report)
+    v, r = codelint_files(plugins_resolved, plugins_params, filter_min_line, filter_max_line, filter_max_findings, autocorrect, skip_non_utf8, files, lint_cache)
 
-            v, r = helper_process_result(r, report, autocorrect, lines_copy)
-            if not v:
-                return False, ("Plugin [%s] failed (post-result): [%s]" % (p.lint_name(), r), report)
-            r_left, r_right = r
-            num_findings += r_left
-            num_patches_applied += r_right
+    cache_stats = None
+    if lint_cache is not None:
+        cache_stats = lint_cache.get_stats()
+    return (v, r), cache_stats
 
-            extra_str = helper_make_extra_plugin_end_str(num_findings, num_patches_applied)
-            report.append((False, "Plugin: [%s] - end%s" % (p.lint_name(), extra_str)))
+def codelint_files_parallel(plugins_resolved, plugins_params, filter_min_line, filter_max_line, filter_max_findings, autocorrect, skip_non_utf8, files, jobs, lint_cache=None):
 
-        if autocorrect and num_patches_applied > 0:
-            os.unlink(f)
-            create_and_write_file.create_file_contents(f, string_utils.line_list_to_string(lines_copy))
-        report.append((False, "Processing [%s] - end" % f))
+    # shards files (in contiguous slices) across a pool of jobs processes. shard reports are merged back in file order,
+    # so the final report is the same as the sequential one. upon the first failing shard (in file order), its partial
+    # report is returned and shards not yet started are cancelled (shards already running still run to completion)
+
+    report = []
+
+    plugins_module_names = []
+    for p in plugins_resolved:
+        plugins_module_names.append(p.__name__)
+
+    lint_cache_setup = None
+    if lint_cache is not None:
+        lint_cache_setup = lint_cache.get_setup()
+
+    num_shards = min(len(files), jobs * CODELINT_SHARDS_PER_JOB)
+    shard_size = (len(files) + num_shards - 1) // num_shards
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, num_shards)) as executor:
+
+        futures = []
+        for idx in range(0, len(files), shard_size):
+            futures.append(executor.submit(_codelint_files_shard, plugins_module_names, plugins_params, filter_min_line, filter_max_line, filter_max_findings, autocorrect, skip_non_utf8, files[idx:idx+shard_size], lint_cache_setup))
+
+        for fut in futures:
+            (v, r), cache_stats = fut.result()
+            if cache_stats is not None:
+                lint_cache.add_stats(cache_stats)
+            if not v:
+                executor.shutdown(wait=True, cancel_futures=True)
+                return False, (r[0], report + r[1])
+            report += r
 
     return True, report
 
@@ -298,9 +529,9 @@ def print_report(report):
             print(e[1])
     return any_findings
 
-def applet_helper(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files):
+def applet_helper(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files, jobs, use_cache):
 
-    v, r = codelint(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files)
+    v, r = codelint(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files, jobs, use_cache)
     if not v:
         print("%s%s%s" % (terminal_colors.TTY_RED, r[0], terminal_colors.get_standard_color()))
         if len(r[1]) > 0:
@@ -320,7 +551,7 @@ def files_from_folder(folder, extensions):
     return v, r
 
 def puaq(selfhelp):
-    print("Usage: %s [--help] [--plugin (see below)] [--plugin-param name value] [--filter name value] [--autocorrect (only one plugin allowed per run)] [--skip-non-utf8] [--files [targets] | --folder target [extensions]]" % path_utils.basename_filtered(__file__))
+    print("Usage: %s [--help] [--plugin (see below)] [--plugin-param name value] [--filter name value] [--autocorrect (only one plugin allowed per run)] [--skip-non-utf8] [--jobs N (lints files in N processes)] [--no-cache (bypasses the lint results cache)] [--files [targets] | --folder target [extensions]]" % path_utils.basename_filtered(__file__))
     print("\nPlugin list:")
     for p in plugin_table:
         print("* %s %s (%s)" % (p, plugin_table[p][1], plugin_table[p][0].lint_desc()))
@@ -345,6 +576,8 @@ if __name__ == "__main__":
     filters = {}
     autocorrect = False
     skip_non_utf8 = False
+    jobs = 1
+    use_cache = True
     files = None
     folder = None
     extensions = None
@@ -356,6 +589,7 @@ if __name__ == "__main__":
     filter_name = None
     filter_name_next = False
     filter_value_next = False
+    jobs_next = False
     files_next = False
     folder_next = False
 
@@ -367,6 +601,15 @@ if __name__ == "__main__":
             folder = p
             break
 
+        if jobs_next:
+            jobs_next = False
+            try:
+                jobs = int(p)
+            except ValueError:
+                print("Invalid jobs: [%s]" % p)
+                sys.exit(CODELINT_CMDLINE_RETURN_ERROR)
+            continue
+
         if plugin_next:
             plugin_next = False
             if not p in plugin_table:
@@ -423,6 +666,12 @@ if __name__ == "__main__":
         elif p == "--filter":
             filter_name_next = True
 
+        elif p == "--jobs":
+            jobs_next = True
+
+        elif p == "--no-cache":
+            use_cache = False
+
         elif p == "--folder":
             folder_next = True
 
@@ -438,6 +687,10 @@ if __name__ == "__main__":
         print("Missing plugin param value (expected for [%s])" % plugin_param_name)
         sys.exit(CODELINT_CMDLINE_RETURN_ERROR)
 
+    if jobs_next:
+        print("Missing jobs value")
+        sys.exit(CODELINT_CMDLINE_RETURN_ERROR)
+
     if filter_name_next:
         print("Missing filter name")
         sys.exit(CODELINT_CMDLINE_RETURN_ERROR)
@@ -463,4 +716,4 @@ if __name__ == "__main__":
         print("Neither --files nor --folder chosen")
         sys.exit(CODELINT_CMDLINE_RETURN_ERROR)
 
-    applet_helper(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files)
+    applet_helper(plugins, plugins_params, filters, autocorrect, skip_non_utf8, files, jobs, use_cache)
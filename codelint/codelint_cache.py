@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+
+import sys
+import os
+import json
+import types
+import hashlib
+import sysconfig
+
+import path_utils
+import mvtools_envvars
+import hash_engine
+
+# persistent cache of codelint results. each file's report is stored (as json) inside the mvtools temp folder, in a file
+# named after a hash of: the file's contents, the file name (as given - reports mention it), the plugins (names and
+# sources - so editing a plugin misses the cache), the sources of codelint itself and of every mvtools module it or the
+# plugins import (miniparse, string_utils, and so on), the plugins' params and the filters. linting an unchanged file
+# again with the same setup then just replays its cached report. only successful runs are ever stored.
+
+CODELINT_CACHE_FOLDER = "codelint_cache"
+CODELINT_CACHE_EXTENSION = "json"
+CODELINT_CACHE_FORMAT = "codelint_cache"
+CODELINT_CACHE_FORMAT_VERSION = 1
+
+# must be bumped whenever codelint's results change in ways the hashed sources can't tell (for example, through a
+# change to a third party or standard library module) - so that reports cached by earlier versions are not replayed
+CODELINT_ENGINE_VERSION = 1
+
+def is_first_party_module(mod):
+
+    # modules from the standard library or from site-packages are not first party, nor are the builtin ones
+
+    mod_file = getattr(mod, "__file__", None)
+    if mod_file is None or not mod_file.endswith(".py"):
+        return False
+
+    mod_file = os.path.abspath(mod_file)
+    for k in ["stdlib", "platstdlib", "purelib", "platlib"]:
+        lib_path = sysconfig.get_paths().get(k, None)
+        if lib_path is not None and mod_file.startswith(os.path.join(os.path.abspath(lib_path), "")):
+            return False
+    return True
+
+def collect_first_party_sources(modules):
+
+    # returns the (sorted) source files of modules, and of every first party module they import (directly or not)
+
+    sources = set()
+    visited = set()
+    to_visit = list(modules)
+
+    while len(to_visit) > 0:
+
+        mod = to_visit.pop()
+        if id(mod) in visited:
+            continue
+        visited.add(id(mod))
+        if not is_first_party_module(mod):
+            continue
+        sources.add(os.path.abspath(mod.__file__))
+
+        for v in vars(mod).values():
+            if isinstance(v, types.ModuleType):
+                to_visit.append(v)
+
+    return sorted(sources)
+
+def get_cache_folder():
+
+    v, r = mvtools_envvars.mvtools_envvar_read_temp_path()
+    if not v:
+        return False, r
+    temp_path = r
+
+    if not os.path.exists(temp_path):
+        return False, "Temp path [%s] does not exist" % temp_path
+
+    cache_folder = path_utils.concat_path(temp_path, CODELINT_CACHE_FOLDER)
+    if not os.path.exists(cache_folder):
+        try:
+            os.mkdir(cache_folder)
+        except FileExistsError:
+            pass
+        except OSError as ex:
+            return False, "Unable to create cache folder [%s]: [%s]" % (cache_folder, ex)
+
+    return True, cache_folder
+
+def make_setup_key(plugins_resolved, plugins_params, filters, engine_module=None):
+
+    # hashes everything that shapes the results, other than the linted file itself. engine_module is codelint's
+    # own module - it is passed in (instead of imported) because codelint may well be running as __main__
+
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([CODELINT_CACHE_FORMAT_VERSION, CODELINT_ENGINE_VERSION, plugins_params, filters], sort_keys=True).encode())
+
+    for p in plugins_resolved:
+        hasher.update(("\n%s\n" % p.__name__).encode())
+
+    modules = list(plugins_resolved)
+    if engine_module is not None:
+        modules.append(engine_module)
+
+    for src in collect_first_party_sources(modules):
+        v, r = hash_engine.hash_file("sha256", src)
+        if not v:
+            return False, r
+        hasher.update(("\n%s\n%s" % (path_utils.basename_filtered(src), r)).encode(errors="surrogatepass"))
+
+    return True, hasher.hexdigest()
+
+def load_report(cache_file):
+
+    try:
+        with open(cache_file) as f:
+            contents = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(contents, dict) or contents.get("format", None) != CODELINT_CACHE_FORMAT or contents.get("version", None) != CODELINT_CACHE_FORMAT_VERSION:
+        return None
+    report_records = contents.get("report", None)
+    if not isinstance(report_records, list):
+        return None
+
+    report = []
+    for rec in report_records:
+        if not isinstance(rec, list) or len(rec) != 2 or not isinstance(rec[0], bool) or not isinstance(rec[1], str):
+            return None
+        report.append((rec[0], rec[1]))
+    return report
+
+def save_report(cache_file, report):
+
+    contents = json.dumps({"format": CODELINT_CACHE_FORMAT, "version": CODELINT_CACHE_FORMAT_VERSION, "report": report})
+
+    # written aside and then renamed into place, so that readers (i.e. other jobs) never see a partially written cache
+    cache_file_tmp = "%s.%s.tmp" % (cache_file, os.getpid())
+    try:
+        with open(cache_file_tmp, "w") as f:
+            f.write(contents)
+        os.replace(cache_file_tmp, cache_file)
+    except OSError as ex:
+        if os.path.exists(cache_file_tmp):
+            os.unlink(cache_file_tmp)
+        return False, "Unable to write cache file [%s]: [%s]" % (cache_file, ex)
+
+    return True, None
+
+class LintCache:
+
+    def __init__(_self, cache_folder, setup_key):
+        _self.cache_folder = cache_folder
+        _self.setup_key = setup_key
+        _self.hits = 0
+        _self.misses = 0
+
+    def get_cache_filename(_self, filename):
+
+        # returns the cache file for filename's current contents (None if filename can't be read)
+
+        v, r = hash_engine.hash_file("sha256", filename)
+        if not v:
+            return None
+        key = hashlib.sha256(("%s\n%s\n%s" % (_self.setup_key, filename, r)).encode(errors="surrogatepass")).hexdigest()
+        return path_utils.concat_path(_self.cache_folder, "%s.%s" % (key, CODELINT_CACHE_EXTENSION))
+
+    def lookup(_self, cache_file):
+
+        # returns the cached report (None on a miss)
+
+        report = None
+        if cache_file is not None:
+            report = load_report(cache_file)
+        if report is None:
+            _self.misses += 1
+        else:
+            _self.hits += 1
+        return report
+
+    def store(_self, cache_file, report):
+
+        # best-effort: failing to store just means a miss next time around
+        if cache_file is not None:
+            save_report(cache_file, report)
+
+    def get_setup(_self):
+        return (_self.cache_folder, _self.setup_key)
+
+    def get_stats(_self):
+        return (_self.hits, _self.misses)
+
+    def add_stats(_self, stats):
+        _self.hits += stats[0]
+        _self.misses += stats[1]
+
+    def make_stats_str(_self):
+
+        total = _self.hits + _self.misses
+        ratio = 0.0
+        if total > 0:
+            ratio = (100.0 * _self.hits) / total
+        hits_plural = "s"
+        if _self.hits == 1:
+            hits_plural = ""
+        misses_plural = "es"
+        if _self.misses == 1:
+            misses_plural = ""
+        return "Lint cache: %s hit%s, %s miss%s (%.1f%% hit ratio)" % (_self.hits, hits_plural, _self.misses, misses_plural, ratio)
+
+def make_lint_cache(plugins_resolved, plugins_params, filters, engine_module=None):
+
+    # caching is best-effort: returns None whenever the cache is unavailable
+
+    v, r = get_cache_folder()
+    if not v:
+        return None
+    cache_folder = r
+
+    v, r = make_setup_key(plugins_resolved, plugins_params, filters, engine_module)
+    if not v:
+        return None
+
+    return LintCache(cache_folder, r)
+
+if __name__ == "__main__":
+    print("Hello from %s" % path_utils.basename_filtered(__file__))
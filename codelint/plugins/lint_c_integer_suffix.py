@@ -2,10 +2,14 @@
 
 import sys
 import os
+import re
 
 import path_utils
 import string_utils
 
+# a line can only have findings if it has digits, and can only open or close a /* */ comment if it has an asterisk
+candidate_line_re = re.compile("[0-9*]")
+
 def lint_name():
     return path_utils.basename_filtered(__file__)
 
@@ -262,6 +266,25 @@ def lint_cycle(plugins_params, filename, shared_state, line_index, content_line)
         return True, ("[%s:%s] has [%s] integer suffix violation%s." % (filename, line_index, findings, plural_maybe), final_patches)
     return True, None
 
+def lint_cycle_many(plugins_params, filename, shared_state, first_line_index, content_lines):
+
+    # lines that aren't candidates (see candidate_line_re) neither yield findings nor change the comment state, so
+    # only candidates go through the (character by character) lint_cycle
+
+    results = []
+    line_index = first_line_index
+    for content_line in content_lines:
+        if candidate_line_re.search(content_line) is not None:
+            v, r = lint_cycle(plugins_params, filename, shared_state, line_index, content_line)
+            if not v:
+                return False, r
+            results.append(r)
+        else:
+            results.append(None)
+        line_index += 1
+
+    return True, results
+
 def lint_post(plugins_params, filename, shared_state):
 
     return True, None
@@ -5,6 +5,7 @@ import os
 
 import path_utils
 import string_utils
+import miniparse
 
 def lint_name():
     return path_utils.basename_filtered(__file__)
@@ -36,8 +37,14 @@ def lint_cycle(plugins_params, filename, shared_state, line_index, content_line)
     except KeyError:
         pass
 
-    for p in plugins_params["lint-if-has-then-must-be-start-pattern"]:
-        if p in content_line_local:
+    patterns = plugins_params["lint-if-has-then-must-be-start-pattern"]
+    matcher = miniparse.get_multi_pattern_matcher(patterns)
+    if not matcher.has_any(content_line_local):
+        return True, None
+    present = matcher.find_present(content_line_local)
+
+    for p in patterns:
+        if p in present:
             if not content_line_local.startswith(p):
                 tolerate = False
                 for t in start_tolerate:
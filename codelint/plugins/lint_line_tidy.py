@@ -6,6 +6,8 @@ import os
 import path_utils
 import string_utils
 
+LINT_LINE_TIDY_INDENT_RATIO = 4
+
 def lint_name():
     return path_utils.basename_filtered(__file__)
 
@@ -23,7 +25,6 @@ def lint_cycle(plugins_params, filename, shared_state, line_index, content_line)
     if len(content_line_local) == 0:
         return True, None
 
-    indent_ratio = 4
     indent_counter = 0
 
     msg_indent = None
@@ -34,7 +35,7 @@ def lint_cycle(plugins_params, filename, shared_state, line_index, content_line)
         if c != " ":
             break
         indent_counter += 1
-        if indent_counter == indent_ratio:
+        if indent_counter == LINT_LINE_TIDY_INDENT_RATIO:
             indent_counter = 0
 
     if indent_counter > 0:
@@ -69,6 +70,25 @@ def lint_cycle(plugins_params, filename, shared_state, line_index, content_line)
 
     return True, result_return
 
+def lint_cycle_many(plugins_params, filename, shared_state, first_line_index, content_lines):
+
+    # only lines with trailing spaces or with a number of leading spaces that isn't a multiple of the indentation
+    # ratio can have findings - those are cheaply told apart (str methods), and only they go through lint_cycle
+
+    results = []
+    line_index = first_line_index
+    for content_line in content_lines:
+        if content_line.endswith(" ") or ((len(content_line) - len(content_line.lstrip(" "))) % LINT_LINE_TIDY_INDENT_RATIO) != 0:
+            v, r = lint_cycle(plugins_params, filename, shared_state, line_index, content_line)
+            if not v:
+                return False, r
+            results.append(r)
+        else:
+            results.append(None)
+        line_index += 1
+
+    return True, results
+
 def lint_post(plugins_params, filename, shared_state):
 
     return True, None
@@ -5,6 +5,7 @@ import os
 
 import path_utils
 import string_utils
+import miniparse
 
 def lint_name():
     return path_utils.basename_filtered(__file__)
@@ -39,13 +40,16 @@ def lint_cycle(plugins_params, filename, shared_state, line_index, content_line)
     if "lint-select-filter-exclude" in plugins_params:
         patterns_exc = plugins_params["lint-select-filter-exclude"]
 
+    # every include pattern must be found, and no exclude pattern may be found (empty patterns are found anywhere)
+    present_inc = miniparse.get_multi_pattern_matcher(patterns_inc).find_present(content_line)
     for inc_f in patterns_inc:
-        if content_line.find(inc_f) == -1:
+        if inc_f != "" and not inc_f in present_inc:
             return True, None
 
-    for exc_f in patterns_exc:
-        if content_line.find(exc_f) > -1:
-            return True, None
+    if "" in patterns_exc:
+        return True, None
+    if miniparse.get_multi_pattern_matcher(patterns_exc).has_any(content_line):
+        return True, None
 
     return True, ("[%s:%s]: %s." % (filename, line_index, content_line), [])
 
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+import sys
+import os
+import codecs
+
+import path_utils
+import generic_run
+
+# parsing of delimited command outputs (i.e. "git status -z" and friends). records are cut out with str.split, which
+# does the scanning in c and allocates each record once - instead of growing a string one character at a time.
+# RecordParser does the same incrementally, so outputs can also be parsed as they come out of the subprocess' pipe,
+# without ever holding the whole output in memory.
+
+NULLTERM = "\x00"
+
+def split_records(output, terminator=NULLTERM, keep_partial=False):
+
+    # returns the list of records in output. a record is only complete once its terminator shows up, so whatever
+    # follows the last terminator is dropped - unless keep_partial is set (in which case it is returned as the last
+    # record, even if empty - just as str.split does)
+
+    records = output.split(terminator)
+    if not keep_partial:
+        records.pop()
+    return records
+
+class RecordParser:
+
+    # splits a stream of str or bytes (decoded as it comes) into records. feed() returns the records completed by each
+    # piece, and write() has the output function signature expected by generic_run.run_cmd_pipeline (records are
+    # then accumulated, see get_records)
+
+    def __init__(_self, terminator=NULLTERM, encoding="utf8", errors="ignore"):
+        _self.terminator = terminator
+        _self.decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        _self.partial = ""
+        _self.records = []
+
+    def feed(_self, data):
+
+        if isinstance(data, bytes):
+            data = _self.decoder.decode(data)
+        if len(data) == 0:
+            return []
+
+        # the leftover goes in front, as it may hold the start of a (multi character) terminator
+        records = (_self.partial + data).split(_self.terminator)
+        _self.partial = records.pop()
+        return records
+
+    def finish(_self, keep_partial=False):
+
+        # returns whatever is left after the last terminator (as a record), if keep_partial is set
+
+        partial = _self.partial + _self.decoder.decode(b"", True)
+        _self.partial = ""
+        if keep_partial and partial != "":
+            return [partial]
+        return []
+
+    def write(_self, data):
+        _self.records += _self.feed(data)
+        return True, None
+
+    def get_records(_self):
+        return _self.records
+
+def run_cmd_records(cmd_list, terminator=NULLTERM, keep_partial=False):
+
+    # runs cmd_list and parses its stdout into records while it is being produced
+    # return format: bool, (list of records | error message)
+
+    parser = RecordParser(terminator)
+    v, r = generic_run.run_cmd_pipeline([cmd_list], parser.write)
+    if not v:
+        return False, r
+    if not r[0].success:
+        return False, r[0].stderr
+
+    return True, parser.get_records() + parser.finish(keep_partial)
+
+def puaq(selfhelp):
+    print("Hello from %s" % path_utils.basename_filtered(__file__))
+    if selfhelp:
+        sys.exit(0)
+    else:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    puaq(False)
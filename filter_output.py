@@ -5,6 +5,10 @@ import os
 
 import path_utils
 import terminal_colors
+import mvtools_exception
+import delimited_output
+
+FILTER_OUTPUT_WRITE_SIZE = 64*1024
 
 def is_digit(character):
     return character in ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9"]
@@ -281,81 +285,125 @@ def asan_vga_v1_should_ignore_stack(stack_entries):
 
     return False
 
-def filter_asan_echo(contents):
+def lines_from_stream(stream):
+
+    # yields the lines of a (text) stream exactly as stream.read().split("\n") would, but as they come in
+    # (without ever holding more than a line in memory)
+
+    last_ended = True
+    for l in stream:
+        if l.endswith("\n"):
+            yield l[:-1]
+            last_ended = True
+        else:
+            yield l
+            last_ended = False
+
+    if last_ended:
+        yield ""
+
+def lines_from_pieces(pieces):
+
+    # yields the lines of the text produced by pieces exactly as "".join(pieces).split("\n") would
+
+    parser = delimited_output.RecordParser("\n")
+    for piece in pieces:
+        for l in parser.feed(piece):
+            yield l
 
-    contents_list = contents.split("\n")
-    contents_list_result = ""
+    remaining = parser.finish(True)
+    if len(remaining) == 0:
+        yield ""
+    else:
+        yield remaining[0]
+
+def helper_flag_last(lines):
+
+    # yields (line, is_last_line) - looking one line ahead
+
+    has_previous = False
+    previous = None
+    for l in lines:
+        if has_previous:
+            yield previous, False
+        previous = l
+        has_previous = True
+
+    if has_previous:
+        yield previous, True
+
+def filter_asan_echo_lines(lines):
+
+    # incremental: consumes lines and yields pieces of the filtered output as it goes
+    # raises mvtools_exception if the input is not recognized
 
     n = 0
     exp_idx = 0
     stack_mode = False
-    for l in contents_list:
+    for l, is_last in helper_flag_last(lines):
         n += 1
 
         if stack_mode:
 
             if l == "":
-                contents_list_result += "\n"
+                yield "\n"
                 exp_idx = 0
                 stack_mode = False
                 continue
 
             v, r = is_asan_stack_entry(exp_idx, l)
             if not v:
-                return False, r
+                raise mvtools_exception.mvtools_exception(r)
             exp_idx += 1
 
-            contents_list_result += "%s\n" % l
+            yield "%s\n" % l
 
         else:
 
             if l == "":
-                if n != len(contents_list):
-                    contents_list_result += "\n"
+                if not is_last:
+                    yield "\n"
                 continue
 
             if "=================================================================" == l:
-                contents_list_result += "%s\n" % l
+                yield "%s\n" % l
             elif "Too many leaks! Only the first 5000 leaks encountered will be reported." == l:
-                contents_list_result += "%s\n" % l
+                yield "%s\n" % l
             elif "AddressSanitizer:DEADLYSIGNAL" == l:
-                contents_list_result += "%s\n" % l
+                yield "%s\n" % l
             elif is_line_error_asan_segv_unk_addr(l):
-                contents_list_result += "%s%s%s\n" % (terminal_colors.TTY_RED_BOLD, l, terminal_colors.get_standard_color())
+                yield "%s%s%s\n" % (terminal_colors.TTY_RED_BOLD, l, terminal_colors.get_standard_color())
             elif is_line_sig_caused_by_read_or_write_mem_acc(l):
-                contents_list_result += "%s\n" % l
+                yield "%s\n" % l
             elif is_line_hint_addr_point_zero_page(l):
-                contents_list_result += "%s\n" % l
+                yield "%s\n" % l
                 exp_idx = 0
                 stack_mode = True
             elif "ERROR: LeakSanitizer: detected memory leaks" in l:
-                contents_list_result += "%s%s%s\n" % (terminal_colors.TTY_RED_BOLD, l, terminal_colors.get_standard_color())
+                yield "%s%s%s\n" % (terminal_colors.TTY_RED_BOLD, l, terminal_colors.get_standard_color())
             elif "Direct leak of" in l or "Indirect leak of" in l:
-                contents_list_result += "%s%s%s\n" % (terminal_colors.TTY_BLUE_BOLD, l, terminal_colors.get_standard_color())
+                yield "%s%s%s\n" % (terminal_colors.TTY_BLUE_BOLD, l, terminal_colors.get_standard_color())
                 exp_idx = 0
                 stack_mode = True
             elif "SUMMARY: AddressSanitizer:" in l:
-                contents_list_result += "%s" % l
+                yield "%s" % l
             elif "AddressSanitizer can not provide additional info." == l:
-                contents_list_result += "%s\n" % l
+                yield "%s\n" % l
             elif is_line_aborting(l):
-                contents_list_result += "\n%s" % l
+                yield "\n%s" % l
             else:
-                return False, "Unable to detect pattern: [%s] (line number %d)" % (l, n-1)
+                raise mvtools_exception.mvtools_exception("Unable to detect pattern: [%s] (line number %d)" % (l, n-1))
 
-    return True, contents_list_result
-
-def filter_asan_vga_v1(contents):
+def filter_asan_vga_v1_lines(lines):
 
-    contents_list = contents.split("\n")
-    contents_list_result = ""
+    # incremental: consumes lines and yields pieces of the filtered output as it goes (only the
+    # current stack is held back, until it's known whether it should be ignored or not)
+    # raises mvtools_exception if the input is not recognized
 
     exp_idx = 0
     stack_mode = False
     stack_entry = []
-    n = 0
-    for l in contents_list:
-        n += 1
+    for l, is_last in helper_flag_last(lines):
 
         if stack_mode:
 
@@ -364,14 +412,14 @@ def filter_asan_vga_v1(contents):
                 stack_mode = False
                 if not asan_vga_v1_should_ignore_stack(stack_entry):
                     for sen in stack_entry:
-                        contents_list_result += "%s\n" % sen
-                    contents_list_result += "\n"
+                        yield "%s\n" % sen
+                    yield "\n"
                 stack_entry = []
                 continue
 
             v, r = is_asan_stack_entry(exp_idx, l)
             if not v:
-                return False, r
+                raise mvtools_exception.mvtools_exception(r)
             exp_idx += 1
 
             stack_entry.append(l)
@@ -379,8 +427,8 @@ def filter_asan_vga_v1(contents):
         else:
 
             if l == "":
-                if n != len(contents_list):
-                    contents_list_result += "\n"
+                if not is_last:
+                    yield "\n"
                 continue
 
             if "Direct leak of" in l or "Indirect leak of" in l:
@@ -390,32 +438,84 @@ def filter_asan_vga_v1(contents):
                 stack_entry.append(l)
                 continue
 
-            contents_list_result += l
-            if n != len(contents_list):
-                contents_list_result += "\n"
+            yield l
+            if not is_last:
+                yield "\n"
 
-    return True, contents_list_result
+def apply_filters_lines(lines, asan_echo, asan_vga_v1):
 
-def apply_filters(contents, asan_echo, asan_vga_v1):
+    # chains the selected filters (each one consuming the lines of the previous one's output)
+    # returns a generator of pieces of the final output
 
-    local_contents = contents
+    pieces = None
 
     if asan_vga_v1:
-        v, r = filter_asan_vga_v1(local_contents)
-        if not v:
-            return False, r
-        local_contents = r
+        pieces = filter_asan_vga_v1_lines(lines)
 
     if asan_echo: # asan_echo must be last of the asan filters
-        v, r = filter_asan_echo(local_contents)
-        if not v:
-            return False, r
-        local_contents = r
+        if pieces is not None:
+            lines = lines_from_pieces(pieces)
+        pieces = filter_asan_echo_lines(lines)
+
+    if pieces is None:
+        pieces = helper_join_lines(lines)
+
+    return pieces
+
+def helper_join_lines(lines):
+
+    first = True
+    for l in lines:
+        if not first:
+            yield "\n"
+        first = False
+        yield l
 
-    return True, local_contents
+def helper_run_filter(pieces):
+
+    try:
+        return True, "".join(pieces)
+    except mvtools_exception.mvtools_exception as ex:
+        return False, ex.get_message()
+
+def filter_asan_echo(contents):
+    return helper_run_filter(filter_asan_echo_lines(contents.split("\n")))
+
+def filter_asan_vga_v1(contents):
+    return helper_run_filter(filter_asan_vga_v1_lines(contents.split("\n")))
+
+def apply_filters(contents, asan_echo, asan_vga_v1):
+    return helper_run_filter(apply_filters_lines(contents.split("\n"), asan_echo, asan_vga_v1))
+
+def apply_filters_stream(input_stream, output_stream, asan_echo, asan_vga_v1):
+
+    # filters input_stream into output_stream as it is read - in constant memory (i.e. as the tail of a pipe). the output
+    # is written in batches of up to FILTER_OUTPUT_WRITE_SIZE characters (writing each piece by itself is way slower),
+    # except when writing to a terminal, which gets each piece right away
+
+    write_size = FILTER_OUTPUT_WRITE_SIZE
+    if output_stream.isatty():
+        write_size = 0
+
+    batch = []
+    batch_size = 0
+    try:
+        for piece in apply_filters_lines(lines_from_stream(input_stream), asan_echo, asan_vga_v1):
+            batch.append(piece)
+            batch_size += len(piece)
+            if batch_size >= write_size:
+                output_stream.write("".join(batch))
+                batch = []
+                batch_size = 0
+    except mvtools_exception.mvtools_exception as ex:
+        output_stream.write("".join(batch))
+        return False, ex.get_message()
+
+    output_stream.write("".join(batch))
+    return True, None
 
 def puaq(selfhelp):
-    print("Usage: %s input_file [--asan-vga-v1 --asan-echo]" % path_utils.basename_filtered(__file__))
+    print("Usage: %s input_file (- for stdin) [--asan-vga-v1 --asan-echo]" % path_utils.basename_filtered(__file__))
     if selfhelp:
         sys.exit(0)
     else:
@@ -427,7 +527,7 @@ if __name__ == "__main__":
         puaq(False)
     input_file = sys.argv[1]
 
-    if not os.path.exists(input_file):
+    if input_file != "-" and not os.path.exists(input_file):
         print("[%s] does not exist" % input_file)
         sys.exit(1)
 
@@ -445,12 +545,13 @@ if __name__ == "__main__":
             print("Unknown parameter: [%s]" % p)
             sys.exit(1)
 
-    contents = ""
-    with open(input_file, "r") as f:
-        contents = f.read()
-
-    v, r = apply_filters(contents, asan_echo, asan_vga_v1)
-    print(r)
+    if input_file == "-":
+        v, r = apply_filters_stream(sys.stdin, sys.stdout, asan_echo, asan_vga_v1)
+    else:
+        with open(input_file, "r") as f:
+            v, r = apply_filters_stream(f, sys.stdout, asan_echo, asan_vga_v1)
 
     if not v:
+        print("\n%s" % r)
         sys.exit(1)
+    print("")
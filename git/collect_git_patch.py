@@ -15,7 +15,7 @@ def _known_states():
 
     return st
 
-def _test_repo_status(repo_path):
+def _test_repo_status(repo_path, status_snapshot=None):
 
     # mvtodo: supporting exotic statuses (such as merge conflicts and etc) bears complexity that does not justify the gains. the git backend
     # also has segfault issues when trying to diff / deal with some of these states. it's best to avoid automating the handling of these
@@ -25,8 +25,15 @@ def _test_repo_status(repo_path):
     unexpected_items = []
     funcs = [git_lib.get_head_deleted_deleted_files, git_lib.get_head_updated_added_files, git_lib.get_head_updated_deleted_files, git_lib.get_head_deleted_updated_files, git_lib.get_head_added_added_files, git_lib.get_head_added_updated_files, git_lib.get_head_renamed_modified_files]
 
+    # every probe is answered off of the same git status
+    if status_snapshot is None:
+        v, r = git_lib.make_status_snapshot(repo_path)
+        if not v:
+            return False, "Unable to probe statuses on repo [%s]: [%s]" % (repo_path, r)
+        status_snapshot = r
+
     for f in funcs:
-        v, r = f(repo_path)
+        v, r = f(repo_path, status_snapshot)
         if not v:
             return False, "Unable to probe for illegal statuses on repo [%s]: [%s]" % (repo_path, r)
         forbidden_items += r
@@ -34,7 +41,7 @@ def _test_repo_status(repo_path):
     if len(forbidden_items) > 0:
         return False, "The repo [%s] has invalid statuses" % repo_path
 
-    v, r = git_lib.repo_has_any_not_of_states(repo_path, _known_states())
+    v, r = git_lib.repo_has_any_not_of_states(repo_path, _known_states(), status_snapshot)
     if not v:
         return False, "Unable to probe known states on repo: [%s]" % repo_path
     unexpected_items = r
@@ -100,11 +107,11 @@ def _apply_filters(items_input, default_filter, include_list, exclude_list):
 
     return items_filtered
 
-def _assemble_list_from_functions(repo, func_list):
+def _assemble_list_from_functions(repo, func_list, status_snapshot=None):
 
     total_items = []
     for f in func_list:
-        v, r = f(repo)
+        v, r = f(repo, status_snapshot)
         if not v:
             return False, "Failed retrieving listing: [%s]" % r
         total_items += r
@@ -130,13 +137,19 @@ def collect_git_patch_cmd_generic(repo, storage_path, output_filename, log_title
 
     return True, output_filename_full
 
-def collect_git_patch_head(repo, storage_path, default_filter, include_list, exclude_list):
+def collect_git_patch_head(repo, storage_path, default_filter, include_list, exclude_list, status_snapshot=None):
 
     head_items_final = []
 
+    if status_snapshot is None:
+        v, r = git_lib.make_status_snapshot(repo)
+        if not v:
+            return False, "Unable to retrieve the status of repo [%s]: [%s]" % (repo, r)
+        status_snapshot = r
+
     head_items = []
     funcs = [git_lib.get_head_modified_files, git_lib.get_head_deleted_files, git_lib.get_head_updated_files, git_lib.get_head_modified_modified_files, git_lib.get_head_added_modified_files]
-    v, r = _assemble_list_from_functions(repo, funcs)
+    v, r = _assemble_list_from_functions(repo, funcs, status_snapshot)
     if not v:
         return False, "Unable to assemble list of head items on repo [%s]: [%s]" % (repo, r)
     head_items = r
@@ -161,12 +174,18 @@ def collect_git_patch_head_id(repo, storage_path):
         return False, "Failed calling git command for head-id: [%s]. Repository: [%s]." % (r, repo)
     return collect_git_patch_cmd_generic(repo, storage_path, "head_id.txt", "head-id", r)
 
-def collect_git_patch_staged(repo, storage_path, default_filter, include_list, exclude_list):
+def collect_git_patch_staged(repo, storage_path, default_filter, include_list, exclude_list, status_snapshot=None):
 
     final_file_list = []
 
+    if status_snapshot is None:
+        v, r = git_lib.make_status_snapshot(repo)
+        if not v:
+            return False, "Unable to retrieve the status of repo [%s]: [%s]" % (repo, r)
+        status_snapshot = r
+
     # get staged-modified files
-    v, r = git_lib.get_staged_modified_files(repo)
+    v, r = git_lib.get_staged_modified_files(repo, status_snapshot)
     if not v:
         return False, "Unable to retrieve staged-modified files on repo [%s]: [%s]" % (repo, r)
     staged_modified_files = r
@@ -178,7 +197,7 @@ def collect_git_patch_staged(repo, storage_path, default_filter, include_list, e
     final_file_list += staged_modified_files_filtered.copy()
 
     # get staged-added files
-    v, r = git_lib.get_staged_added_files(repo)
+    v, r = git_lib.get_staged_added_files(repo, status_snapshot)
     if not v:
         return False, "Unable to retrieve staged-added files on repo [%s]: [%s]" % (repo, r)
     staged_added_files = r
@@ -190,7 +209,7 @@ def collect_git_patch_staged(repo, storage_path, default_filter, include_list, e
     final_file_list += staged_added_files_filtered.copy()
 
     # get staged-deleted files
-    v, r = git_lib.get_staged_deleted_files(repo)
+    v, r = git_lib.get_staged_deleted_files(repo, status_snapshot)
     if not v:
         return False, "Unable to retrieve staged-deleted files on repo [%s]: [%s]" % (repo, r)
     staged_deleted_files = r
@@ -202,7 +221,7 @@ def collect_git_patch_staged(repo, storage_path, default_filter, include_list, e
     final_file_list += staged_deleted_files_filtered.copy()
 
     # get staged-renamed files
-    v, r = git_lib.get_staged_renamed_files(repo)
+    v, r = git_lib.get_staged_renamed_files(repo, status_snapshot)
     if not v:
         return False, "Unable to retrieve staged-renamed files on repo [%s]: [%s]" % (repo, r)
     staged_renamed_files = r
@@ -356,7 +375,13 @@ def collect_git_patch(repo, storage_path, default_filter, include_list, exclude_
     if not os.path.exists(storage_path):
         return False, ["Storage path [%s] does not exist." % storage_path]
 
-    v, r = _test_repo_status(repo)
+    # a single git status serves every status query below (collecting patches does not change the repo)
+    v, r = git_lib.make_status_snapshot(repo)
+    if not v:
+        return False, ["Unable to retrieve the status of repo [%s]: [%s]" % (repo, r)]
+    status_snapshot = r
+
+    v, r = _test_repo_status(repo, status_snapshot)
     if not v:
         return False, [r]
 
@@ -365,7 +390,7 @@ def collect_git_patch(repo, storage_path, default_filter, include_list, exclude_
 
     # head
     if head:
-        v, r = collect_git_patch_head(repo, storage_path, default_filter, include_list, exclude_list)
+        v, r = collect_git_patch_head(repo, storage_path, default_filter, include_list, exclude_list, status_snapshot)
         if not v:
             has_any_failed = True
             report.append("collect_git_patch_head: [%s]." % r)
@@ -383,7 +408,7 @@ def collect_git_patch(repo, storage_path, default_filter, include_list, exclude_
 
     # staged
     if staged:
-        v, r = collect_git_patch_staged(repo, storage_path, default_filter, include_list, exclude_list)
+        v, r = collect_git_patch_staged(repo, storage_path, default_filter, include_list, exclude_list, status_snapshot)
         if not v:
             has_any_failed = True
             report.append("collect_git_patch_staged: [%s]." % r)
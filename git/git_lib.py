@@ -6,6 +6,7 @@ import os
 import git_wrapper
 import path_utils
 import string_utils
+import delimited_output
 
 def change_stash_index(stash_name, index):
     if stash_name is None or index is None:
@@ -141,10 +142,83 @@ def discover_repo_root(repo):
             return None
     return curpath
 
-def is_head_clear(repo):
+class GitStatusSnapshot:
+
+    # the parsed output of a single "git status -z --porcelain=v1" (status_items: its nullterm records), indexed by
+    # status code. many status queries can then be answered off of the same snapshot (see the status_snapshot parameters
+    # below), instead of each query running and parsing git status again. a snapshot is only valid for as long as the
+    # repo is left untouched.
+
+    def __init__(_self, repo, status_items):
+        _self.repo = repo
+        _self.entries = [] # (status code, path, original path) - the original path is only set for renamed/copied entries
+        _self.index = {}
+        _self.index_staged = {}
+
+        i = 0
+        while i < len(status_items):
+            it = status_items[i]
+            i += 1
+            if len(it) < 3:
+                continue
+            ces = it[0:2]
+            original = None
+            if "R" in ces or "C" in ces: # renamed/copied states come in pairs
+                if i < len(status_items):
+                    original = status_items[i]
+                i += 1
+            _self._add_entry((ces, it[3:], original))
+
+    def _add_entry(_self, entry):
+        _self.entries.append(entry)
+        if entry[0] not in _self.index:
+            _self.index[entry[0]] = []
+        _self.index[entry[0]].append(entry)
+        if entry[0][0] not in _self.index_staged:
+            _self.index_staged[entry[0][0]] = []
+        _self.index_staged[entry[0][0]].append(entry)
+
+    def get_repo(_self):
+        return _self.repo
+
+    def get_entries(_self):
+        return _self.entries
+
+    def get_entries_by_status(_self, status_code):
+        return _self.index.get(status_code, [])
+
+    def get_entries_by_staged_status(_self, check_chars):
+        if len(check_chars) == 1:
+            return _self.index_staged.get(check_chars[0], [])
+        ret = []
+        for e in _self.entries:
+            if e[0][0] in check_chars:
+                ret.append(e)
+        return ret
+
+    def is_clear(_self):
+        return len(_self.entries) == 0
+
+def make_status_snapshot(repo):
+
+    if repo is None:
+        return False, "No repo specified"
+
+    repo = os.path.abspath(repo)
+
+    v, r = git_wrapper.status_nullterm_porcelain_v1_records(repo)
+    if not v:
+        return False, r
+
+    return True, GitStatusSnapshot(repo, r)
+
+def is_head_clear(repo, status_snapshot=None):
 
     # is_head_clear is a misnomer, because this will also take into consideration staged, unversioned, etc.
 
+    if status_snapshot is not None:
+        return True, status_snapshot.is_clear()
+
     if repo is None:
         return False, "No repo specified"
 
@@ -407,7 +481,7 @@ def switch_branch(repo, remote_branch_name):
         return False, "switch_branch failed: [%s]" % r
     return True, None
 
-def repo_has_any_not_of_states(repo, states):
+def repo_has_any_not_of_states(repo, states, status_snapshot=None):
 
     list_unexpected = []
 
@@ -422,94 +496,82 @@ def repo_has_any_not_of_states(repo, states):
 
     repo = os.path.abspath(repo)
 
-    t1 = is_repo_working_tree(repo)
-    if t1 is None:
-        return False, "%s does not exist" % repo
-    elif t1 is False:
-        return False, "%s is not a git work tree" % repo
+    if status_snapshot is None:
 
-    v, r = git_wrapper.status_nullterm_porcelain_v1(repo)
-    if not v:
-        return False, "repo_has_any_not_of_states failed: [%s]" % r
-    saved_st_msg = r
-
-    current = ""
-    status_items = []
-    for c in saved_st_msg:
-        if c == "\x00":
-            status_items.append(current)
-            current = ""
-        else:
-            current += c
-
-    skip_next = False
-    for it in status_items:
+        t1 = is_repo_working_tree(repo)
+        if t1 is None:
+            return False, "%s does not exist" % repo
+        elif t1 is False:
+            return False, "%s is not a git work tree" % repo
 
-        if skip_next:
-            skip_next = False
-            continue
-
-        if len(it) < 3:
-            continue
+        v, r = make_status_snapshot(repo)
+        if not v:
+            return False, "repo_has_any_not_of_states failed: [%s]" % r
+        status_snapshot = r
 
-        ces = it[0:2]
-        if "R" in ces: # renamed states come in pairs
-            skip_next = True
-        if ces not in states:
-            list_unexpected.append(ces)
+    for e in status_snapshot.get_entries():
+        if e[0] not in states:
+            list_unexpected.append(e[0])
 
     return True, list_unexpected
 
-def get_head_files(repo):
+def get_head_files(repo, status_snapshot=None):
 
     total_entries = []
 
+    # all queries are answered off of the same git status
+    if status_snapshot is None:
+        v, r = make_status_snapshot(repo)
+        if not v:
+            return False, "get_head_files failed: %s" % r
+        status_snapshot = r
+
     funcs = [get_head_modified_files, get_head_deleted_files, get_head_updated_files, get_head_updated_deleted_files, get_head_deleted_updated_files, get_head_added_added_files, get_head_deleted_deleted_files, get_head_updated_added_files, get_head_added_updated_files, get_head_modified_modified_files, get_head_added_modified_files, get_head_renamed_modified_files]
 
     for f in funcs:
-        v, r = f(repo)
+        v, r = f(repo, status_snapshot)
         if not v:
             return False, r
         total_entries += r
 
     return True, total_entries
 
-def get_head_modified_files(repo):
-    return get_head_files_delegate(repo, " M", "modified", False)
+def get_head_modified_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, " M", "modified", False, status_snapshot)
 
-def get_head_deleted_files(repo):
-    return get_head_files_delegate(repo, " D", "deleted", False)
+def get_head_deleted_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, " D", "deleted", False, status_snapshot)
 
-def get_head_modified_modified_files(repo):
-    return get_head_files_delegate(repo, "MM", "modified", False)
+def get_head_modified_modified_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, "MM", "modified", False, status_snapshot)
 
-def get_head_added_modified_files(repo):
-    return get_head_files_delegate(repo, "AM", "added_modified", False)
+def get_head_added_modified_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, "AM", "added_modified", False, status_snapshot)
 
-def get_head_updated_files(repo):
-    return get_head_files_delegate(repo, "UU", "updated", False)
+def get_head_updated_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, "UU", "updated", False, status_snapshot)
 
-def get_head_deleted_deleted_files(repo):
-    return get_head_files_delegate(repo, "DD", "deleted_deleted", False)
+def get_head_deleted_deleted_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, "DD", "deleted_deleted", False, status_snapshot)
 
-def get_head_updated_added_files(repo):
-    return get_head_files_delegate(repo, "UA", "updated_added", False)
+def get_head_updated_added_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, "UA", "updated_added", False, status_snapshot)
 
-def get_head_updated_deleted_files(repo):
-    return get_head_files_delegate(repo, "UD", "updated_deleted", False)
+def get_head_updated_deleted_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, "UD", "updated_deleted", False, status_snapshot)
 
-def get_head_deleted_updated_files(repo):
-    return get_head_files_delegate(repo, "DU", "deleted_updated", False)
+def get_head_deleted_updated_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, "DU", "deleted_updated", False, status_snapshot)
 
-def get_head_added_added_files(repo):
-    return get_head_files_delegate(repo, "AA", "added_added", False)
+def get_head_added_added_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, "AA", "added_added", False, status_snapshot)
 
-def get_head_added_updated_files(repo):
-    return get_head_files_delegate(repo, "AU", "added_updated", False)
+def get_head_added_updated_files(repo, status_snapshot=None):
+    return get_head_files_delegate(repo, "AU", "added_updated", False, status_snapshot)
 
-def get_head_renamed_modified_files(repo):
+def get_head_renamed_modified_files(repo, status_snapshot=None):
 
-    v, r = get_head_files_delegate(repo, "RM", "renamed_modified", True)
+    v, r = get_head_files_delegate(repo, "RM", "renamed_modified", True, status_snapshot)
     if not v:
         return False, r
     renamed_list = r
@@ -527,74 +589,63 @@ def get_head_renamed_modified_files(repo):
 
     return True, renamed_list_plus_repo
 
-def get_head_files_delegate(repo, status_detect, info_variation, pair_mode):
+def get_head_files_delegate(repo, status_detect, info_variation, pair_mode, status_snapshot=None):
 
     if repo is None:
         return False, "No repo specified"
 
     repo = os.path.abspath(repo)
 
-    t1 = is_repo_working_tree(repo)
-    if t1 is None:
-        return False, "%s does not exist." % repo
-    elif t1 is False:
-        return False, "%s is not a git work tree." % repo
-
-    v, r = git_wrapper.status_nullterm_porcelain_v1(repo)
-    if not v:
-        return False, "get_head_%s_files failed: %s" % (info_variation, r)
-    saved_st_msg = r
-
-    current = ""
-    status_items = []
-    for c in saved_st_msg:
-        if c == "\x00":
-            status_items.append(current)
-            current = ""
-        else:
-            current += c
+    if status_snapshot is None:
 
-    ret = []
-    pair_flag = False
-    pair_previous = None
-    for it in status_items:
+        t1 = is_repo_working_tree(repo)
+        if t1 is None:
+            return False, "%s does not exist." % repo
+        elif t1 is False:
+            return False, "%s is not a git work tree." % repo
 
-        if pair_flag:
-            ret.append((pair_previous, it))
-            pair_flag = False
-            continue
+        v, r = make_status_snapshot(repo)
+        if not v:
+            return False, "get_head_%s_files failed: %s" % (info_variation, r)
+        status_snapshot = r
 
-        if (len(it) < 3):
-            continue
+    return True, _collect_status_entries(repo, status_snapshot.get_entries_by_status(status_detect), pair_mode)
 
-        if it[0:2] == status_detect:
+def _collect_status_entries(repo, entries, pair_mode):
 
-            ce = it[3:]
+    ret = []
+    for e in entries:
 
-            if pair_mode:
-                pair_flag = True
-                pair_previous = ce
-                continue
+        if pair_mode:
+            ret.append((e[1], e[2]))
+            continue
 
-            cef = path_utils.concat_path(repo, ce)
-            ret.append(os.path.abspath(cef))
+        cef = path_utils.concat_path(repo, e[1])
+        ret.append(os.path.abspath(cef))
 
-    return True, ret
+    return ret
 
-def get_staged_files(repo):
+def get_staged_files(repo, status_snapshot=None):
 
     all_staged_files = []
 
+    # all queries are answered off of the same git status
+    if status_snapshot is None:
+        v, r = make_status_snapshot(repo)
+        if not v:
+            return False, "get_staged_files failed: [%s]" % r
+        status_snapshot = r
+
     # mvtodo: in theory there shold also be a status "C" (Copied)
     funcs = [get_staged_modified_files, get_staged_added_files, get_staged_deleted_files]
 
     for f in funcs:
-        v, r = f(repo)
+        v, r = f(repo, status_snapshot)
         if not v:
             return False, r
         all_staged_files += r
 
-    v, r = get_staged_renamed_files(repo)
+    v, r = get_staged_renamed_files(repo, status_snapshot)
     if not v:
         return False, r
     for x in r:
@@ -602,18 +653,18 @@ def get_staged_files(repo):
 
     return True, all_staged_files
 
-def get_staged_modified_files(repo):
-    return get_staged_delegate(repo, ["M"], False)
+def get_staged_modified_files(repo, status_snapshot=None):
+    return get_staged_delegate(repo, ["M"], False, status_snapshot)
 
-def get_staged_added_files(repo):
-    return get_staged_delegate(repo, ["A"], False)
+def get_staged_added_files(repo, status_snapshot=None):
+    return get_staged_delegate(repo, ["A"], False, status_snapshot)
 
-def get_staged_deleted_files(repo):
-    return get_staged_delegate(repo, ["D"], False)
+def get_staged_deleted_files(repo, status_snapshot=None):
+    return get_staged_delegate(repo, ["D"], False, status_snapshot)
 
-def get_staged_renamed_files(repo):
+def get_staged_renamed_files(repo, status_snapshot=None):
 
-    v, r = get_staged_delegate(repo, ["R"], True)
+    v, r = get_staged_delegate(repo, ["R"], True, status_snapshot)
     if not v:
         return False, r
     renamed_list = r
@@ -631,59 +682,27 @@ def get_staged_renamed_files(repo):
 
     return True, renamed_list_plus_repo
 
-def get_staged_delegate(repo, check_chars, pair_mode):
+def get_staged_delegate(repo, check_chars, pair_mode, status_snapshot=None):
 
     if repo is None:
         return False, "No repo specified"
 
     repo = os.path.abspath(repo)
 
-    t1 = is_repo_working_tree(repo)
-    if t1 is None:
-        return False, "%s does not exist." % repo
-    elif t1 is False:
-        return False, "%s is not a git work tree." % repo
+    if status_snapshot is None:
 
-    v, r = git_wrapper.status_nullterm_porcelain_v1(repo)
-    if not v:
-        return False, "get_staged_files failed: [%s]" % r
-    saved_st_msg = r
-
-    current = ""
-    status_items = []
-    for c in saved_st_msg:
-        if c == "\x00":
-            status_items.append(current)
-            current = ""
-        else:
-            current += c
-
-    ret = []
-    pair_flag = False
-    pair_previous = None
-    for it in status_items:
-
-        if pair_flag:
-            ret.append((pair_previous, it))
-            pair_flag = False
-            continue
-
-        if (len(it) < 3):
-            continue
-
-        if it[0] in check_chars:
-
-            ce = it[3:]
-
-            if pair_mode:
-                pair_flag = True
-                pair_previous = ce
-                continue
+        t1 = is_repo_working_tree(repo)
+        if t1 is None:
+            return False, "%s does not exist." % repo
+        elif t1 is False:
+            return False, "%s is not a git work tree." % repo
 
-            cef = path_utils.concat_path(repo, ce)
-            ret.append(os.path.abspath(cef))
+        v, r = make_status_snapshot(repo)
+        if not v:
+            return False, "get_staged_files failed: [%s]" % r
+        status_snapshot = r
 
-    return True, ret
+    return True, _collect_status_entries(repo, status_snapshot.get_entries_by_staged_status(check_chars), pair_mode)
 
 def get_unversioned_files(repo):
 
@@ -692,19 +711,13 @@ def get_unversioned_files(repo):
 
     repo = os.path.abspath(repo)
 
-    v, r = git_wrapper.ls_files_nullterm(repo)
+    v, r = git_wrapper.ls_files_nullterm_records(repo)
     if not v:
         return False, r
-    saved_ls_msg = r
 
-    current = ""
     unversioned_files = []
-    for c in saved_ls_msg:
-        if c == "\x00":
-            unversioned_files.append(path_utils.concat_path(repo, current))
-            current = ""
-        else:
-            current += c
+    for f in r:
+        unversioned_files.append(path_utils.concat_path(repo, f))
     return True, unversioned_files
 
 def get_unversioned_files_and_folders(repo):
@@ -720,15 +733,7 @@ def get_unversioned_files_and_folders(repo):
     if not v:
         return False, r
     saved_st_msg = r
-
-    current = ""
-    status_items = []
-    for c in saved_st_msg:
-        if c == "\x00":
-            status_items.append(current)
-            current = ""
-        else:
-            current += c
+    status_items = delimited_output.split_records(saved_st_msg)
 
     unversioned_files = []
     for si in status_items:
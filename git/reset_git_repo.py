@@ -30,7 +30,7 @@ def _known_states():
 
     return st
 
-def _test_repo_status(repo_path):
+def _test_repo_status(repo_path, status_snapshot=None):
 
     # mvtodo: supporting exotic statuses (such as merge conflicts and etc) bears complexity that does not justify the gains. the git backend
     # also has segfault issues when trying to diff / deal with some of these states. it's best to avoid automating the handling of these
@@ -40,8 +40,15 @@ def _test_repo_status(repo_path):
     unexpected_items = []
     funcs = [git_lib.get_head_deleted_deleted_files, git_lib.get_head_updated_added_files, git_lib.get_head_updated_deleted_files, git_lib.get_head_deleted_updated_files, git_lib.get_head_added_added_files, git_lib.get_head_added_updated_files, git_lib.get_head_renamed_modified_files]
 
+    # every probe is answered off of the same git status
+    if status_snapshot is None:
+        v, r = git_lib.make_status_snapshot(repo_path)
+        if not v:
+            return False, "Unable to probe statuses on repo [%s]: [%s]" % (repo_path, r)
+        status_snapshot = r
+
     for f in funcs:
-        v, r = f(repo_path)
+        v, r = f(repo_path, status_snapshot)
         if not v:
             return False, "Unable to probe for illegal statuses on repo [%s]: [%s]" % (repo_path, r)
         forbidden_items += r
@@ -49,7 +56,7 @@ def _test_repo_status(repo_path):
     if len(forbidden_items) > 0:
         return False, "The repo [%s] has invalid statuses" % repo_path
 
-    v, r = git_lib.repo_has_any_not_of_states(repo_path, _known_states())
+    v, r = git_lib.repo_has_any_not_of_states(repo_path, _known_states(), status_snapshot)
     if not v:
         return False, "Unable to probe known states on repo: [%s]" % repo_path
     unexpected_items = r
@@ -376,8 +383,14 @@ def reset_git_repo_head(target_repo, backup_obj, default_filter, include_list, e
     report = []
     has_any_failed = False
 
+    # all head queries are answered off of the same git status (taken before anything gets reset)
+    v, r = git_lib.make_status_snapshot(target_repo)
+    if not v:
+        return False, "Unable to retrieve the status of repo [%s]: [%s]" % (target_repo, r)
+    status_snapshot = r
+
     # get updated files
-    v, r = git_lib.get_head_updated_files(target_repo)
+    v, r = git_lib.get_head_updated_files(target_repo, status_snapshot)
     if not v:
         return False, "Unable to retrieve head-updated files on repo [%s]: [%s]" % (target_repo, r)
     upd_files = r
@@ -389,7 +402,7 @@ def reset_git_repo_head(target_repo, backup_obj, default_filter, include_list, e
     upd_files_final = upd_files_filtered.copy()
 
     # get modified files
-    v, r = git_lib.get_head_modified_files(target_repo)
+    v, r = git_lib.get_head_modified_files(target_repo, status_snapshot)
     if not v:
         return False, "Unable to retrieve head-modified files on repo [%s]: [%s]" % (target_repo, r)
     mod_files = r
@@ -401,7 +414,7 @@ def reset_git_repo_head(target_repo, backup_obj, default_filter, include_list, e
     mod_files_final = mod_files_filtered.copy()
 
     # get deleted files
-    v, r = git_lib.get_head_deleted_files(target_repo)
+    v, r = git_lib.get_head_deleted_files(target_repo, status_snapshot)
     if not v:
         return False, "Unable to retrieve head-deleted files on repo [%s]: [%s]" % (target_repo, r)
     deleted_files = r
@@ -413,7 +426,7 @@ def reset_git_repo_head(target_repo, backup_obj, default_filter, include_list, e
     deleted_files_final = deleted_files_filtered.copy()
 
     # get modified-modified files
-    v, r = git_lib.get_head_modified_modified_files(target_repo)
+    v, r = git_lib.get_head_modified_modified_files(target_repo, status_snapshot)
     if not v:
         return False, "Unable to retrieve head-modified-modified files on repo [%s]: [%s]" % (target_repo, r)
     mod_mod_files = r
@@ -425,7 +438,7 @@ def reset_git_repo_head(target_repo, backup_obj, default_filter, include_list, e
     mod_mod_files_final = mod_mod_files_filtered.copy()
 
     # get added-modified files
-    v, r = git_lib.get_head_added_modified_files(target_repo)
+    v, r = git_lib.get_head_added_modified_files(target_repo, status_snapshot)
     if not v:
         return False, "Unable to retrieve head-added-modified files on repo [%s]: [%s]" % (target_repo, r)
     add_mod_files = r
@@ -3,21 +3,21 @@
 import terminal_colors
 import git_lib
 
-def do_fetch(repo, remotes):
+def do_fetch(repo, remotes, feedback_object=print):
 
     ORIGINAL_COLOR = terminal_colors.get_standard_color() 
     report = []
 
     remotes_list = [i for i in remotes if "fetch" in remotes[i]]
 
-    print("\n* Fetching on %s ..." % repo)
+    feedback_object("\n* Fetching on %s ..." % repo)
     hasanyfailed = False
     v, r = git_lib.fetch_multiple(repo, remotes_list)
     if v:
         out = "OK."
         color = terminal_colors.TTY_GREEN
     else:
-        print(r)
+        feedback_object(r)
         hasanyfailed = True
         out = "Failed."
         color = terminal_colors.TTY_RED
@@ -3,14 +3,14 @@
 import terminal_colors
 import git_lib
 
-def do_push(repo, remotes, branches):
+def do_push(repo, remotes, branches, feedback_object=print):
 
     ORIGINAL_COLOR = terminal_colors.get_standard_color()
     report = []
 
     remotes_list = [i for i in remotes if "push" in remotes[i]]
 
-    print("\n* Pushing on %s ..." % repo)
+    feedback_object("\n* Pushing on %s ..." % repo)
     hasanyfailed = False
     for rm in remotes_list:
         for bn in branches:
@@ -20,7 +20,7 @@ def do_push(repo, remotes, branches):
                 out = "OK."
                 color = terminal_colors.TTY_GREEN
             else:
-                print(r)
+                feedback_object(r)
                 hasanyfailed = True
                 out = "Failed."
                 color = terminal_colors.TTY_RED
@@ -1,11 +1,12 @@
 #!/usr/bin/env python
 
 import os
+import concurrent.futures
 
 import path_utils
-import fsquery
 import mvtools_exception
 import git_lib
+import git_visitor_index
 
 import terminal_colors
 import mvtools_envvars
@@ -220,18 +221,16 @@ def get_path_from_env():
 def make_repo_list(path):
 
     """ make_repo_list
-    returns a list of git repositories found in the given base path
+    returns a list of git repositories found in the given base path (see git_visitor_index)
     """
 
     if path is None:
         return None
 
-    v, r = fsquery.makecontentlist(path, True, False, False, True, False, True, True, [])
+    v, r = git_visitor_index.get_repo_list(path)
     if not v:
         raise mvtools_exception.mvtools_exception(r)
     ret_list = r
-    ret_list = filter_git_only(ret_list)
-    ret_list = pluck_dotgit(ret_list)
     if len(ret_list) > 0:
         return ret_list
     else:
@@ -267,8 +266,68 @@ def process_filters(query):
                 return None
             options_ret["xor-remotename"] = query[idx] # inserts option
 
+        # JOBS (how many repos are visited at the same time)
+        if it == "--jobs":
+            if idx == len(query): # error: this option requires a parameter, but none was given
+                return None
+            try:
+                jobs = int(query[idx])
+            except ValueError:
+                return None
+            if jobs < 1:
+                return None
+            options_ret["jobs"] = jobs
+
     return options_ret
 
+def visit_repos(repos, options, repo_func, buffer_feedback=False):
+
+    """ visit_repos
+    calls repo_func(repo, options) for each repo. with the "jobs" option (see process_filters), up to that
+    many repos are visited at the same time (each in its own thread - it's mostly waiting on git/the network)
+    returns the list of results, in the same order as repos (regardless of the order they finish in)
+    with buffer_feedback, repo_func is called as repo_func(repo, options, feedback_object) instead, and is expected
+    to report its progress through feedback_object. concurrent visits have their progress buffered, and then printed
+    in the same order as repos, so that it always reads the same as a sequential run
+    """
+
+    jobs = 1
+    if options is not None and "jobs" in options:
+        jobs = options["jobs"]
+
+    if jobs < 2 or len(repos) < 2:
+        results = []
+        for rp in repos:
+            if buffer_feedback:
+                results.append(repo_func(rp, options, print))
+            else:
+                results.append(repo_func(rp, options))
+        return results
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = []
+        for rp in repos:
+            if buffer_feedback:
+                futures.append(executor.submit(_visit_repo_buffered, repo_func, rp, options))
+            else:
+                futures.append(executor.submit(repo_func, rp, options))
+        results = []
+        for fut in futures:
+            if buffer_feedback:
+                result, feedback_buffer = fut.result()
+                for msg in feedback_buffer:
+                    print(msg)
+                results.append(result)
+            else:
+                results.append(fut.result())
+
+    return results
+
+def _visit_repo_buffered(repo_func, repo, options):
+    feedback_buffer = []
+    result = repo_func(repo, options, feedback_buffer.append)
+    return result, feedback_buffer
+
 def print_report(has_all_passed, report_list):
 
     print("\nRESULTS:")
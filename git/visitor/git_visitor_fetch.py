@@ -8,25 +8,26 @@ import git_visitor_base
 import git_lib
 import git_fetch
 
-def visitor_fetch(repos, options):
+def visit_repo_fetch(rp, options, feedback_object=print):
 
     ORIGINAL_COLOR = terminal_colors.get_standard_color()
 
+    v, r = git_lib.get_remotes(rp)
+    if not v:
+        return False, ["visitor_fetch failed [%s]: [%s]" % (rp, r)]
+    remotes = r
+    remotes = git_visitor_base.filter_remotes(remotes, options)
+    if remotes is None:
+        return True, ["%s%s: Failed filtering remotes.%s" % (terminal_colors.TTY_RED, rp, ORIGINAL_COLOR)]
+    op_piece, report_piece = git_fetch.do_fetch(rp, remotes, feedback_object)
+    return (not op_piece), report_piece
+
+def visitor_fetch(repos, options):
+
     report = []
     all_passed = True
-    for rp in repos:
-        v, r = git_lib.get_remotes(rp)
-        if not v:
-            all_passed = False
-            report.append("visitor_fetch failed [%s]: [%s]" % (rp, r))
-            continue
-        remotes = r
-        remotes = git_visitor_base.filter_remotes(remotes, options)
-        if remotes is None:
-            report.append("%s%s: Failed filtering remotes.%s" % (terminal_colors.TTY_RED, rp, ORIGINAL_COLOR)) 
-            continue
-        op_piece, report_piece = git_fetch.do_fetch(rp, remotes)
-        all_passed = all_passed and (not op_piece)
+    for passed, report_piece in git_visitor_base.visit_repos(repos, options, visit_repo_fetch, True):
+        all_passed = all_passed and passed
         for ri in report_piece:
             report.append(ri)
 
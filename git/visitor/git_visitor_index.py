@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+
+import sys
+import os
+import json
+import hashlib
+
+import path_utils
+import mvtools_envvars
+import detect_repo_type
+import git_lib
+
+# persistent index of the repositories found under a base path. the index remembers every folder of the tree, along
+# with its modification time, its subfolders and whether it is a repo. a folder's modification time changes whenever
+# entries are added to, removed from or renamed inside it - so refreshing the index only takes one stat per folder,
+# and only folders that changed are listed again. the insides of .git folders and of bare repos are never visited.
+# indexes are stored inside the mvtools temp folder (one per base path). without a temp path, the tree is just scanned.
+
+GIT_VISITOR_INDEX_FOLDER = "git_visitor_index"
+GIT_VISITOR_INDEX_EXTENSION = "json"
+GIT_VISITOR_INDEX_FORMAT = "git_visitor_index"
+GIT_VISITOR_INDEX_FORMAT_VERSION = 1
+
+GIT_VISITOR_INDEX_ENTRY_MTIME = 0
+GIT_VISITOR_INDEX_ENTRY_SUBDIRS = 1
+GIT_VISITOR_INDEX_ENTRY_REPO_TYPE = 2
+
+def get_index_folder():
+
+    v, r = mvtools_envvars.mvtools_envvar_read_temp_path()
+    if not v:
+        return False, r
+    temp_path = r
+
+    if not os.path.exists(temp_path):
+        return False, "Temp path [%s] does not exist" % temp_path
+
+    index_folder = path_utils.concat_path(temp_path, GIT_VISITOR_INDEX_FOLDER)
+    if not os.path.exists(index_folder):
+        try:
+            os.mkdir(index_folder)
+        except FileExistsError:
+            pass
+        except OSError as ex:
+            return False, "Unable to create index folder [%s]: [%s]" % (index_folder, ex)
+
+    return True, index_folder
+
+def get_index_filename(index_folder, base_path):
+    key = hashlib.sha256(os.path.abspath(base_path).encode(errors="surrogatepass")).hexdigest()
+    return path_utils.concat_path(index_folder, "%s.%s" % (key, GIT_VISITOR_INDEX_EXTENSION))
+
+def load_index(index_file):
+
+    # returns the folders of a previously saved index (an empty index, if there is no usable index)
+
+    try:
+        with open(index_file) as f:
+            contents = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(contents, dict) or contents.get("format", None) != GIT_VISITOR_INDEX_FORMAT or contents.get("version", None) != GIT_VISITOR_INDEX_FORMAT_VERSION:
+        return {}
+    dirs = contents.get("dirs", None)
+    if not isinstance(dirs, dict):
+        return {}
+    return dirs
+
+def save_index(index_file, dirs):
+
+    contents = json.dumps({"format": GIT_VISITOR_INDEX_FORMAT, "version": GIT_VISITOR_INDEX_FORMAT_VERSION, "dirs": dirs})
+
+    index_file_tmp = "%s.%s.tmp" % (index_file, os.getpid())
+    try:
+        with open(index_file_tmp, "w") as f:
+            f.write(contents)
+        os.replace(index_file_tmp, index_file)
+    except OSError as ex:
+        if os.path.exists(index_file_tmp):
+            os.unlink(index_file_tmp)
+        return False, "Unable to write index [%s]: [%s]" % (index_file, ex)
+
+    return True, None
+
+def _is_bare_candidate(names):
+    return ("HEAD" in names) and ("objects" in names) and ("refs" in names)
+
+def _scan_dir(path, mtime):
+
+    # returns the index entry of a single folder: [mtime, subfolders, repo type]
+
+    subdirs = []
+    names = []
+    repo_type = None
+
+    with os.scandir(path) as it:
+        for e in it:
+            names.append(e.name)
+            if e.name == ".git":
+                if e.is_dir():
+                    repo_type = detect_repo_type.REPO_TYPE_GIT_STD
+                continue # never looked into
+            if e.is_dir(follow_symlinks=False):
+                subdirs.append(e.name)
+
+    if repo_type is None and _is_bare_candidate(names):
+        v, r = git_lib.is_repo_bare(path)
+        if v and r:
+            repo_type = detect_repo_type.REPO_TYPE_GIT_BARE
+            subdirs = [] # never looked into
+
+    subdirs.sort()
+    return [mtime, subdirs, repo_type]
+
+def refresh_index(base_path, dirs):
+
+    # walks the tree with one stat per folder, reusing the entries of folders that did not change.
+    # returns the refreshed folders (folders that are gone are dropped) and how many folders had to be listed
+
+    new_dirs = {}
+    scanned = 0
+
+    to_visit = [""]
+    while len(to_visit) > 0:
+
+        rel = to_visit.pop()
+        full = base_path
+        if rel != "":
+            full = path_utils.concat_path(base_path, rel)
+
+        try:
+            st = os.stat(full)
+            entry = dirs.get(rel, None)
+            if not isinstance(entry, list) or len(entry) != 3 or entry[GIT_VISITOR_INDEX_ENTRY_MTIME] != st.st_mtime_ns:
+                entry = _scan_dir(full, st.st_mtime_ns)
+                scanned += 1
+        except OSError:
+            continue # vanished (or unreadable) meanwhile
+
+        new_dirs[rel] = entry
+        for sd in entry[GIT_VISITOR_INDEX_ENTRY_SUBDIRS]:
+            if rel == "":
+                to_visit.append(sd)
+            else:
+                to_visit.append(path_utils.concat_path(rel, sd))
+
+    return new_dirs, scanned
+
+def get_repo_list(base_path, repo_type=detect_repo_type.REPO_TYPE_GIT_STD, use_index=True):
+
+    """ get_repo_list
+    returns the (sorted) list of repos of repo_type found inside base_path, refreshing (and saving) its index
+    """
+
+    if base_path is None:
+        return False, "No path specified"
+    base_path = path_utils.filter_remove_trailing_sep(base_path)
+    if not os.path.isdir(base_path):
+        return False, "Path [%s] does not exist" % base_path
+
+    index_file = None
+    dirs = {}
+    if use_index:
+        v, r = get_index_folder()
+        if v:
+            index_file = get_index_filename(r, base_path)
+            dirs = load_index(index_file)
+
+    new_dirs, scanned = refresh_index(base_path, dirs)
+
+    if index_file is not None and (scanned > 0 or len(new_dirs) != len(dirs)):
+        v, r = save_index(index_file, new_dirs)
+        if not v:
+            return False, r
+
+    repos = []
+    for rel in new_dirs:
+        if new_dirs[rel][GIT_VISITOR_INDEX_ENTRY_REPO_TYPE] == repo_type:
+            if rel == "":
+                repos.append(base_path)
+            else:
+                repos.append(path_utils.concat_path(base_path, rel))
+    repos.sort()
+
+    return True, repos
+
+def puaq(selfhelp):
+    print("Usage: %s base_path [--bare] [--no-index]" % path_utils.basename_filtered(__file__))
+    if selfhelp:
+        sys.exit(0)
+    else:
+        sys.exit(1)
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        puaq(False)
+
+    base_path = sys.argv[1]
+    repo_type = detect_repo_type.REPO_TYPE_GIT_STD
+    use_index = True
+
+    params = sys.argv[2:]
+    for p in params:
+        if p == "--bare":
+            repo_type = detect_repo_type.REPO_TYPE_GIT_BARE
+        elif p == "--no-index":
+            use_index = False
+        else:
+            puaq(False)
+
+    v, r = get_repo_list(base_path, repo_type, use_index)
+    if not v:
+        print(r)
+        sys.exit(1)
+
+    for rp in r:
+        print(rp)
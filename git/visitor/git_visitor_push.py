@@ -7,27 +7,28 @@ import git_push
 
 import sys
 
-def visitor_push(repos, options):
+def visit_repo_push(rp, options, feedback_object=print):
 
     ORIGINAL_COLOR = terminal_colors.get_standard_color() 
 
-    report = []
-    all_passed = True
-    for rp in repos:
+    try:
+        remotes, branches = git_visitor_base.apply_filters(rp, options)
+    except git_visitor_base.gvbexcept as gvbex:
+        return False, ["%s%s: %s.%s" % (terminal_colors.TTY_RED, rp, gvbex.message, ORIGINAL_COLOR)]
 
-        try:
-            remotes, branches = git_visitor_base.apply_filters(rp, options)
-        except git_visitor_base.gvbexcept as gvbex:
-            all_passed = False
-            report.append("%s%s: %s.%s" % (terminal_colors.TTY_RED, rp, gvbex.message, ORIGINAL_COLOR)) 
-            continue
+    op_piece, report_piece = git_push.do_push(rp, remotes, branches, feedback_object)
+    return (not op_piece), report_piece
 
-        op_piece, report_piece = git_push.do_push(rp, remotes, branches)
-        all_passed = all_passed and (not op_piece)
+def visitor_push(repos, options):
+
+    report = []
+    all_passed = True
+    for passed, report_piece in git_visitor_base.visit_repos(repos, options, visit_repo_push, True):
+        all_passed = all_passed and passed
         for ri in report_piece:
             report.append(ri)
 
-    git_visitor_base.print_report(all_passed, report)    
+    git_visitor_base.print_report(all_passed, report)
     return all_passed
 
 if __name__ == "__main__":
@@ -5,21 +5,30 @@ import os
 import git_visitor_base
 import git_lib
 
+def visit_repo_status(repo, options):
+    return git_lib.status_simple(repo)
+
 def visitor_status(repos, options):
 
-    for repo in repos:
+    results = git_visitor_base.visit_repos(repos, options, visit_repo_status)
+    for i in range(len(repos)):
 
-        v, r = git_lib.status_simple(repo)
+        v, r = results[i]
         if not v:
             print("visitor-status failed: %s" % r)
             return False
         if len(r) != 0:
-            print("%s is dirty." % repo)
+            print("%s is dirty." % repos[i])
 
     return True
 
 if __name__ == "__main__":
-    r = git_visitor_base.do_visit(None, None, visitor_status)
+
+    filters = None
+    if len(sys.argv) > 1:
+        filters = sys.argv[1:]
+
+    r = git_visitor_base.do_visit(None, filters, visitor_status)
     if r is None:
         sys.exit(1)
     elif False in r:
@@ -39,6 +39,12 @@ def print_color_patterns(line, has_patterns):
     line_result = ""
     pattern_countdown = 0
 
+    # where each (largest) pattern starts - found in a single pass over the line
+    matcher = miniparse.get_multi_pattern_matcher(has_patterns)
+    matches_at = {}
+    for pos, pattern_index in matcher.find_all_positions(line_local):
+        matches_at[pos] = pattern_index
+
     for i in range(len(line_local)):
 
         if pattern_countdown > 0:
@@ -46,9 +52,9 @@ def print_color_patterns(line, has_patterns):
             if pattern_countdown == 0:
                 line_result += terminal_colors.get_standard_color()
 
-        largest = miniparse.scan_largest_of(line_local, i, has_patterns)
-        if largest is not None:
+        if i in matches_at:
 
+            largest = matches_at[i]
             pattern = has_patterns[largest]
             selected_color = COLOR_TABLE[largest % len(COLOR_TABLE)]
             line_result += selected_color
@@ -3,6 +3,8 @@
 import sys
 import os
 import subprocess
+import tempfile
+import threading
 
 class run_cmd_result:
     def __init__(self, _success, _returncode, _stdout, _stderr):
@@ -47,3 +49,93 @@ def run_cmd_simple(cmd_list, suppress_stderr=False, use_input=None, use_shell=Fa
     if len(r.stderr) > 0 and not suppress_stderr:
         print(r.stderr, end="")
     return True, r.stdout
+
+def _kill_processes(procs):
+    for p in procs:
+        if p.poll() is None:
+            p.kill()
+        p.wait()
+
+def _feed_pipeline_input(input_chunks, stdin, feed_errors):
+
+    # runs on its own thread - writing and reading at the same time is what keeps the pipeline from stalling
+    try:
+        for chunk in input_chunks:
+            stdin.write(chunk)
+    except BrokenPipeError:
+        pass # the first command quit early - its own result tells why
+    except Exception as ex:
+        feed_errors.append(str(ex))
+    finally:
+        try:
+            stdin.close()
+        except BrokenPipeError:
+            pass
+
+def run_cmd_pipeline(cmd_lists, output_function, chunk_size=1024*1024, use_cwd=None, use_env=None, use_encoding="utf8", use_errors="ignore", use_input_chunks=None):
+
+    # runs the commands as a pipeline (each command's stdout feeding the next command's stdin). the
+    # last command's stdout is handed over to output_function (as bytes), chunk by chunk, as it is produced.
+    # output_function must return (bool, error_message) - when it fails, the whole pipeline is killed.
+    # use_input_chunks: optional iterable of bytes, written to the first command's stdin as the pipeline runs
+    # return format: bool, (string | list of run_cmd_result) - one result (with stdout left empty) per command
+
+    if not isinstance(cmd_lists, list):
+        return False, "[%s] is not a list" % cmd_lists
+    if len(cmd_lists) == 0:
+        return False, "Nothing to run"
+
+    procs = []
+    stderr_files = []
+    feeder = None
+    feed_errors = []
+    try:
+
+        prev_stdout = None
+        if use_input_chunks is not None:
+            prev_stdout = subprocess.PIPE
+        for cmd_list in cmd_lists:
+            # stderr goes to files - pipes could fill up and stall the pipeline
+            err_file = tempfile.TemporaryFile()
+            stderr_files.append(err_file)
+            procs.append(subprocess.Popen(cmd_list, stdin=prev_stdout, stdout=subprocess.PIPE, stderr=err_file, cwd=use_cwd, env=use_env))
+            if prev_stdout is not None and prev_stdout != subprocess.PIPE:
+                prev_stdout.close() # only the next process holds it now, so it gets a sigpipe should that one quit early
+            prev_stdout = procs[-1].stdout
+
+        if use_input_chunks is not None:
+            feeder = threading.Thread(target=_feed_pipeline_input, args=(use_input_chunks, procs[0].stdin, feed_errors))
+            feeder.start()
+
+        while True:
+            chunk = prev_stdout.read(chunk_size)
+            if not chunk:
+                break
+            v, r = output_function(chunk)
+            if not v:
+                _kill_processes(procs)
+                return False, r
+        prev_stdout.close()
+
+        if feeder is not None:
+            feeder.join()
+            if len(feed_errors) > 0:
+                _kill_processes(procs)
+                return False, "Failed feeding the pipeline: [%s]" % feed_errors[0]
+
+        results = []
+        for i in range(len(procs)):
+            returncode = procs[i].wait()
+            stderr_files[i].seek(0)
+            stderr_contents = stderr_files[i].read().decode(use_encoding, errors=use_errors)
+            results.append(run_cmd_result( (returncode==0), returncode, "", stderr_contents ))
+        return True, results
+
+    except Exception as ex:
+        _kill_processes(procs)
+        return False, str(ex)
+    finally:
+        if feeder is not None:
+            feeder.join()
+        for f in stderr_files:
+            f.close()
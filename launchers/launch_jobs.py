@@ -2,12 +2,12 @@
 
 import sys
 import os
+import heapq
 
 import path_utils
 import maketimestamp
 import toolbus
 import minicron
-import retry
 import terminal_colors
 import mvtools_exception
 
@@ -41,6 +41,10 @@ class BaseTask:
         return "Base task"
     def run_task(self, feedback_object, execution_name=None):
         return False, "Not implemented"
+    def mutates_environ(self):
+        # tasks that modify the process environment (os.environ) while running must return True here - jobs
+        # never run such tasks concurrently with other entries (see jobs/standard_job.py)
+        return False
 
 def _format_job_info_msg_started(job, parent_job_name):
     p_str = ""
@@ -75,6 +79,98 @@ def _format_task_warning_msg(task, detail):
 def _format_task_warning_msg_console_output(task, detail):
     return "%s%s%s." % (terminal_colors.TTY_YELLOW, _format_task_warning_msg(task, detail), terminal_colors.get_standard_color())
 
+# entries (jobs or tasks) may declare dependencies on sibling entries (entries of the same parent job), by name,
+# through the "depends_on" param. a dependency on a name shared by several siblings means a dependency on all of them.
+ENTRY_DEPENDS_ON_PARAM = "depends_on"
+
+# jobs may run their entries concurrently through the "parallel" param (see jobs/standard_job.py)
+JOB_PARALLEL_PARAM = "parallel"
+
+def get_entry_dependencies(entry):
+
+    if ENTRY_DEPENDS_ON_PARAM not in entry.params:
+        return []
+
+    deps = entry.params[ENTRY_DEPENDS_ON_PARAM]
+    if deps is None:
+        return []
+    if isinstance(deps, str):
+        return [deps]
+    return list(deps)
+
+def has_dependencies(entries_list):
+
+    for entry in entries_list:
+        if len(get_entry_dependencies(entry)) > 0:
+            return True
+    return False
+
+def any_mutates_environ(entries_list):
+
+    # whether any of the entries (nested jobs' entries included) modifies the process environment while running
+
+    entries_to_check = list(entries_list)
+    while len(entries_to_check) > 0:
+        entry = entries_to_check.pop()
+        if entry.get_type() == BASE_TYPE_JOB:
+            entries_to_check += entry.entries_list
+        elif entry.mutates_environ():
+            return True
+    return False
+
+def make_dependency_graph(entries_list):
+
+    # returns, for each entry (by index), the set of indices of the entries it depends on.
+    # fails on unknown names and on cycles
+
+    name_map = {}
+    for i in range(len(entries_list)):
+        entry_name = entries_list[i].name
+        if entry_name not in name_map:
+            name_map[entry_name] = []
+        name_map[entry_name].append(i)
+
+    graph = []
+    for entry in entries_list:
+        entry_deps = set()
+        for dep_name in get_entry_dependencies(entry):
+            if dep_name not in name_map:
+                return False, "Entry [%s] depends on [%s], which is not an entry of the same job." % (entry.name, dep_name)
+            entry_deps.update(name_map[dep_name])
+        graph.append(entry_deps)
+
+    v, r = sort_dependency_graph(graph)
+    if not v:
+        return False, "Dependency cycle detected between entries: [%s]" % ", ".join([str(entries_list[x].name) for x in r])
+
+    return True, graph
+
+def sort_dependency_graph(graph):
+
+    # kahn's algorithm - ties are broken by declaration order. returns the indices in a valid execution order,
+    # or (on failure) the indices of the entries that are part of (or blocked by) a cycle
+
+    dependents = [[] for x in graph]
+    pending_count = []
+    for i in range(len(graph)):
+        pending_count.append(len(graph[i]))
+        for d in graph[i]:
+            dependents[d].append(i)
+
+    ready = [i for i in range(len(graph)) if pending_count[i] == 0]
+    order = []
+    while len(ready) > 0:
+        i = heapq.heappop(ready)
+        order.append(i)
+        for d in dependents[i]:
+            pending_count[d] -= 1
+            if pending_count[d] == 0:
+                heapq.heappush(ready, d)
+
+    if len(order) != len(graph):
+        return False, [i for i in range(len(graph)) if pending_count[i] > 0]
+    return True, order
+
 def _setup_toolbus(execution_name):
 
     # ensures the toolbus database exists
@@ -90,16 +186,21 @@ def _setup_toolbus(execution_name):
 
     return True, None
 
-def _retry_helper(wait_object, wait_object_name, function):
+def _wait_helper(feedback_object, wait_object, wait_object_name, db_name, function):
+
+    # db_name being None means toolbus's internal (signals) database
 
     if wait_object is None:
         return True, None
 
-    retry_opts = {"retries_max": 800000, "retry_sleep_random": 2000}
-    v, r = retry.retry(retry_opts, function, wait_object)
+    if db_name is None:
+        v, r = toolbus.wait_internal_db(function, wait_object)
+    else:
+        v, r = toolbus.wait_custom_db(db_name, function, wait_object)
     if not v:
-        return False, "Failed retrying on %s [%s]: [%s]" % (wait_object_name, wait_object, r)
+        return False, "Failed waiting on %s [%s]: [%s]" % (wait_object_name, wait_object, r)
 
+    feedback_object("Waited on %s [%s] for [%.3f] seconds." % (wait_object_name, wait_object, r))
     return True, None
 
 def _handle_delayed_start_signal_delegate(signal_delay):
@@ -154,13 +255,13 @@ def _handle_delayed_start_signal(feedback_object, message_report_function, execu
     if signal_delay is None:
         return True, None
     feedback_object("%s Reason: signal delay [%s]" % (message_report_function(execution_name), signal_delay))
-    return _retry_helper(signal_delay, "signal", _handle_delayed_start_signal_delegate)
+    return _wait_helper(feedback_object, signal_delay, "signal", None, _handle_delayed_start_signal_delegate)
 
 def _handle_delayed_start_execution(feedback_object, message_report_function, execution_name, execution_delay):
     if execution_delay is None:
         return True, None
     feedback_object("%s Reason: execution delay [%s]" % (message_report_function(execution_name), execution_delay))
-    return _retry_helper(execution_delay, "execution", _handle_delayed_start_execution_delegate)
+    return _wait_helper(feedback_object, execution_delay, "execution", LAUNCHJOBS_TOOLBUS_DATABASE, _handle_delayed_start_execution_delegate)
 
 def _handle_delayed_start(feedback_object, execution_name, time_delay, signal_delay, execution_delay):
     try:
@@ -208,7 +309,7 @@ def _wait_if_paused(feedback_object, execution_name):
 
     # yes, execution has been paused
     feedback_object("Execution [%s] has been paused." % execution_name)
-    v, r = _retry_helper(execution_name, "execution name", _is_status_running_delegate)
+    v, r = _wait_helper(feedback_object, execution_name, "execution name", LAUNCHJOBS_TOOLBUS_DATABASE, _is_status_running_delegate)
     if not v:
         return False, r
     feedback_object("Execution [%s] will resume." % execution_name)
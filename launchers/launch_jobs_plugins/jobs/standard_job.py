@@ -1,8 +1,65 @@
 #!/usr/bin/env python
 
+import os
+import heapq
+import concurrent.futures
+
 import launch_jobs
 import mvtools_exception
 
+# sibling entries (jobs and tasks) can be run concurrently by setting the "parallel" option on the job, i.e.:
+# [
+# @job1 {parallel: "4"}
+# * task1 = "sample_echo_true.py"
+# * task2 = "sample_echo_true.py"
+# ]
+# the value is the maximum number of workers. if no value is given, the number of cpus is used instead.
+# each entry's feedback is buffered and then flushed in declaration order, so the output reads the same
+# as a sequential run. a failure that would end a sequential run (a failed task, or a failed job when
+# early_abort is set) prevents entries that have not yet started from starting.
+#
+# entries may also depend on their siblings (see launch_jobs.ENTRY_DEPENDS_ON_PARAM), i.e.:
+# [
+# @job1 {parallel}
+# * build-lib = "sample_echo_true.py"
+# * build-app {depends_on: "build-lib"} = "sample_echo_true.py"
+# * build-docs = "sample_echo_true.py"
+# ]
+# an entry only starts after all of its dependencies have succeeded - should any of them fail, the entry
+# is skipped. without the parallel option, entries are run one at a time, in dependency order.
+#
+# tasks that modify the process environment while running (i.e. recipe tasks with envvars) would leak
+# their changes onto whatever else is running at the same time - so whenever a job holds any such task
+# (directly or within its nested jobs), its entries are run one at a time, parallel option or not.
+#
+# nested jobs do not inherit the parallel option (the recipe processor only keeps it on the job that declares it), so that the cap set on
+# the outer job is not multiplied by every nested job running a pool of its own.
+
+STANDARD_JOB_PARALLEL_OPTION = launch_jobs.JOB_PARALLEL_PARAM
+
+ENTRY_RESULT_SUCCESS = 1 # detail: whether there were warnings
+ENTRY_RESULT_FAILURE = 2 # detail: error message. the job goes on, but will fail in the end
+ENTRY_RESULT_ABORT = 3 # detail: error message. the job stops right away
+ENTRY_RESULT_SKIPPED = 4 # detail: message. one of the entry's dependencies failed
+
+def _get_parallel_workers(params):
+
+    if STANDARD_JOB_PARALLEL_OPTION not in params:
+        return True, None
+
+    workers_str = params[STANDARD_JOB_PARALLEL_OPTION]
+    if workers_str is None:
+        return True, (os.cpu_count() or 1)
+
+    try:
+        workers = int(workers_str)
+    except ValueError:
+        return False, "Invalid value for the %s option: [%s]" % (STANDARD_JOB_PARALLEL_OPTION, workers_str)
+    if workers < 1:
+        return False, "Invalid value for the %s option: [%s]" % (STANDARD_JOB_PARALLEL_OPTION, workers_str)
+
+    return True, workers
+
 class StandardJob(launch_jobs.BaseJob): # hint: custom jobs should have a class named CustomJob
 
     def get_desc(self):
@@ -14,47 +71,178 @@ class StandardJob(launch_jobs.BaseJob): # hint: custom jobs should have a class
 
     def run_job(self, feedback_object, execution_name=None, options=None):
 
+        v, r = _get_parallel_workers(self.params)
+        if not v:
+            return False, r
+        workers = r
+
+        has_deps = launch_jobs.has_dependencies(self.entries_list)
+        if workers is None and not has_deps:
+            return self._run_entries_sequential(feedback_object, execution_name, options)
+
+        graph = [set() for x in self.entries_list]
+        if has_deps:
+            v, r = launch_jobs.make_dependency_graph(self.entries_list)
+            if not v:
+                return False, r
+            graph = r
+
+        if workers is None or launch_jobs.any_mutates_environ(self.entries_list):
+            workers = 1
+        return self._run_entries_graph(feedback_object, execution_name, options, workers, graph)
+
+    def _run_entries_sequential(self, feedback_object, execution_name, options):
+
         any_warnings = False
         intermediary_failure = False
 
         for entry in self.entries_list:
 
-            if entry.get_type() == launch_jobs.BASE_TYPE_JOB:
+            result, detail = self._run_entry(entry, feedback_object, execution_name, options)
+            if result == ENTRY_RESULT_ABORT:
+                return False, detail
+            elif result == ENTRY_RESULT_FAILURE:
+                intermediary_failure = True
+            elif detail:
+                any_warnings = True
 
-                v, r = launch_jobs.run_single_job(entry, self.name, feedback_object, execution_name, options)
-                if not v:
-                    if options.early_abort:
-                        return False, "Failed job: [%s]" % r
-                    else:
-                        intermediary_failure = True
-                if v and r:
-                    any_warnings = True
+        if intermediary_failure:
+            return False, "Intermediary failures"
+        return True, any_warnings
 
-                continue
+    def _run_entries_graph(self, feedback_object, execution_name, options, workers, graph):
 
-            v, r = launch_jobs._wait_if_paused(feedback_object, execution_name)
-            if not v:
-                return False, r
+        # entries are started as soon as all of their dependencies have succeeded (lower indices first), with
+        # at most [workers] entries running at once. each entry's outcome - (result, detail, feedback_buffer) - is
+        # consumed in declaration order, as soon as all outcomes before it are available
 
-            try:
-                v, r = entry.run_task(feedback_object, execution_name)
-            except mvtools_exception.mvtools_exception as mvtex:
-                return False, "Task [%s][%s] caused an mvtools exception: [%s]" % (entry.name, entry.get_desc(), mvtex)
-            except Exception as ex:
-                return False, "Task [%s][%s] caused an exception: [%s]" % (entry.name, entry.get_desc(), ex)
-            except:
-                return False, "Task [%s][%s] caused an unknown exception." % (entry.name, entry.get_desc())
+        any_warnings = False
+        intermediary_failure = False
+        abort_detail = None
 
-            if not v:
-                feedback_object(launch_jobs._format_task_error_msg(entry, r))
-                return False, "Failed task: [%s]" % r
+        dependents = [[] for x in graph]
+        pending_count = []
+        for i in range(len(graph)):
+            pending_count.append(len(graph[i]))
+            for d in graph[i]:
+                dependents[d].append(i)
 
-            if r is not None:
-                any_warnings = True
-                feedback_object(launch_jobs._format_task_warning_msg_console_output(entry, r))
-            else:
-                feedback_object(launch_jobs._format_task_info_msg(entry))
+        ready = [i for i in range(len(graph)) if pending_count[i] == 0]
+        outcomes = [None for x in graph]
+        in_flight = {}
+        next_consumed = 0
+        stop_starting = False
 
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+
+            while True:
+
+                while not stop_starting and len(ready) > 0 and len(in_flight) < workers:
+                    i = heapq.heappop(ready)
+                    in_flight[executor.submit(self._run_entry_buffered, self.entries_list[i], execution_name, options)] = i
+
+                if len(in_flight) == 0:
+                    break
+
+                done, not_done = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for f in done:
+
+                    i = in_flight.pop(f)
+                    outcomes[i] = f.result()
+                    result = outcomes[i][0]
+
+                    if result == ENTRY_RESULT_ABORT:
+                        stop_starting = True
+                    elif result == ENTRY_RESULT_FAILURE:
+                        self._skip_dependents(i, dependents, outcomes)
+                    else:
+                        for d in dependents[i]:
+                            pending_count[d] -= 1
+                            if pending_count[d] == 0:
+                                heapq.heappush(ready, d)
+
+                while next_consumed < len(outcomes) and outcomes[next_consumed] is not None:
+                    any_warnings, intermediary_failure, abort_detail = self._consume_outcome(outcomes[next_consumed], feedback_object, any_warnings, intermediary_failure, abort_detail)
+                    next_consumed += 1
+
+        # whatever is left over was never started
+        for o in outcomes[next_consumed:]:
+            if o is not None:
+                any_warnings, intermediary_failure, abort_detail = self._consume_outcome(o, feedback_object, any_warnings, intermediary_failure, abort_detail)
+
+        if abort_detail is not None:
+            return False, abort_detail
         if intermediary_failure:
             return False, "Intermediary failures"
         return True, any_warnings
+
+    def _skip_dependents(self, failed_index, dependents, outcomes):
+
+        to_skip = [(d, failed_index) for d in dependents[failed_index]]
+        while len(to_skip) > 0:
+            i, dep = to_skip.pop()
+            if outcomes[i] is not None:
+                continue
+            entry = self.entries_list[i]
+            msg = "Entry [%s][%s]: skipped because its dependency [%s] failed." % (entry.name, entry.get_desc(), self.entries_list[dep].name)
+            outcomes[i] = (ENTRY_RESULT_SKIPPED, msg, [msg])
+            to_skip += [(d, i) for d in dependents[i]]
+
+    def _consume_outcome(self, outcome, feedback_object, any_warnings, intermediary_failure, abort_detail):
+
+        result, detail, feedback_buffer = outcome
+        for msg in feedback_buffer:
+            feedback_object(msg)
+
+        if abort_detail is not None: # only the first abort (in declaration order) is reported
+            return any_warnings, intermediary_failure, abort_detail
+
+        if result == ENTRY_RESULT_ABORT:
+            abort_detail = detail
+        elif result == ENTRY_RESULT_FAILURE:
+            intermediary_failure = True
+        elif result == ENTRY_RESULT_SUCCESS and detail:
+            any_warnings = True
+
+        return any_warnings, intermediary_failure, abort_detail
+
+    def _run_entry_buffered(self, entry, execution_name, options):
+        feedback_buffer = []
+        result, detail = self._run_entry(entry, feedback_buffer.append, execution_name, options)
+        return result, detail, feedback_buffer
+
+    def _run_entry(self, entry, feedback_object, execution_name, options):
+
+        if entry.get_type() == launch_jobs.BASE_TYPE_JOB:
+
+            v, r = launch_jobs.run_single_job(entry, self.name, feedback_object, execution_name, options)
+            if not v:
+                if options.early_abort:
+                    return ENTRY_RESULT_ABORT, "Failed job: [%s]" % r
+                else:
+                    return ENTRY_RESULT_FAILURE, r
+            return ENTRY_RESULT_SUCCESS, r
+
+        v, r = launch_jobs._wait_if_paused(feedback_object, execution_name)
+        if not v:
+            return ENTRY_RESULT_ABORT, r
+
+        try:
+            v, r = entry.run_task(feedback_object, execution_name)
+        except mvtools_exception.mvtools_exception as mvtex:
+            return ENTRY_RESULT_ABORT, "Task [%s][%s] caused an mvtools exception: [%s]" % (entry.name, entry.get_desc(), mvtex)
+        except Exception as ex:
+            return ENTRY_RESULT_ABORT, "Task [%s][%s] caused an exception: [%s]" % (entry.name, entry.get_desc(), ex)
+        except:
+            return ENTRY_RESULT_ABORT, "Task [%s][%s] caused an unknown exception." % (entry.name, entry.get_desc())
+
+        if not v:
+            feedback_object(launch_jobs._format_task_error_msg(entry, r))
+            return ENTRY_RESULT_ABORT, "Failed task: [%s]" % r
+
+        if r is not None:
+            feedback_object(launch_jobs._format_task_warning_msg_console_output(entry, r))
+            return ENTRY_RESULT_SUCCESS, True
+
+        feedback_object(launch_jobs._format_task_info_msg(entry))
+        return ENTRY_RESULT_SUCCESS, False
@@ -39,6 +39,7 @@ class CustomTask(launch_jobs.BaseTask):
         filters = None
         autocorrect = None
         skip_non_utf8 = None
+        use_cache = None
         files = None
         folder = None
         extensions = None
@@ -79,6 +80,9 @@ class CustomTask(launch_jobs.BaseTask):
         # skip_non_utf8
         skip_non_utf8 = "skip_non_utf8" in self.params
 
+        # no_cache
+        use_cache = not "no_cache" in self.params
+
         # files
         try:
             files_read = self.params["files"]
@@ -125,7 +129,7 @@ class CustomTask(launch_jobs.BaseTask):
         if files is not None and extensions is not None:
             return False, "extensions cannot be used with files"
 
-        return True, (plugins, plugins_params, filters, autocorrect, skip_non_utf8, files, folder, extensions)
+        return True, (plugins, plugins_params, filters, autocorrect, skip_non_utf8, use_cache, files, folder, extensions)
 
     def run_task(self, feedback_object, execution_name=None):
 
@@ -133,7 +137,7 @@ class CustomTask(launch_jobs.BaseTask):
         v, r = self._read_params()
         if not v:
             return False, r
-        plugins, plugins_params, filters, autocorrect, skip_non_utf8, files, folder, extensions = r
+        plugins, plugins_params, filters, autocorrect, skip_non_utf8, use_cache, files, folder, extensions = r
 
         plugins_params_resolved = resolve_even_array_into_map(plugins_params)
         filters_resolved = resolve_even_array_into_map(filters)
@@ -147,7 +151,7 @@ class CustomTask(launch_jobs.BaseTask):
         findings_final = None
         findings_interm = []
 
-        v, r = codelint.codelint(plugins, plugins_params_resolved, filters_resolved, autocorrect, skip_non_utf8, files)
+        v, r = codelint.codelint(plugins, plugins_params_resolved, filters_resolved, autocorrect, skip_non_utf8, files, 1, use_cache)
         if not v:
             errmsg, partial_report = r
             if len(partial_report) > 0:
@@ -96,6 +96,14 @@ class CustomTask(launch_jobs.BaseTask):
 
         return True, (operation, recipe, exec_name, early_abort, time_delay, signal_delay, execution_delay, envvars)
 
+    def mutates_environ(self):
+
+        # envvars are set onto the (process wide) environment for the duration of the run
+        v, r = self._read_params()
+        if not v:
+            return False
+        return len(r[7]) > 0
+
     def run_task(self, feedback_object, execution_name=None):
 
         # read params
@@ -4,11 +4,6 @@ import os
 
 import launch_jobs
 import toolbus
-import retry
-
-def _check_signal(signal_name):
-    v, r = toolbus.get_signal(signal_name) # signal will be consumed
-    return v, not (r == None)
 
 class CustomTask(launch_jobs.BaseTask):
 
@@ -69,8 +64,8 @@ class CustomTask(launch_jobs.BaseTask):
 
         feedback_object("Will wait on signal [%s]" % signal_name)
 
-        retry_opts = {"retries_max": 800000, "retry_sleep_random": 2000}
-        v, r = retry.retry(retry_opts, _check_signal, signal_name)
+        v, r = toolbus.wait_signal(signal_name) # signal will be consumed
         if not v:
-            return False, "Failed retrying on %s [%s]: [%s]" % (wait_object_name, wait_object, r)
+            return False, "Failed waiting on signal [%s]: [%s]" % (signal_name, r)
+        feedback_object("Waited on signal [%s] for [%.3f] seconds." % (signal_name, r[1]))
         return True, None
@@ -8,6 +8,7 @@ import importlib.util
 
 import launch_jobs
 import dsl_type20
+import dsl_type20_cache
 
 import standard_job
 
@@ -124,6 +125,32 @@ ERROR_CODE_HARD_FAIL = 3
 # * custom-main-job-implementation = "custom_job_impl.py"
 # ]
 #
+# the entries (tasks and nested jobs) of a standard job can be run concurrently through the "parallel" job option:
+#
+# [
+# @job1 {parallel: "4"}
+# * task1 = "sample_echo_true.py"
+# * task2 = "sample_echo_true.py"
+# ]
+#
+# the value caps the number of entries running at once (the number of cpus is used when no value is given).
+# feedback is still reported in declaration order - see jobs/standard_job.py. the parallel option is not
+# inherited - it only applies to the job that declares it.
+# jobs holding recipe tasks with envvars run their entries one at a time regardless, since those envvars
+# are set onto the (process wide) environment.
+#
+# entries can also depend on other entries of the same job, through the "depends_on" option (either a name
+# or a list of names). recipes with unknown dependencies or with dependency cycles are rejected:
+#
+# [
+# @job1 {parallel: "4"}
+# * build-lib = "sample_echo_true.py"
+# * build-app {depends_on: "build-lib"} = "sample_echo_true.py"
+# * test-app {depends_on: ("build-lib", "build-app")} = "sample_echo_true.py"
+# ]
+#
+# likewise, the depends_on option is not inherited by the entries of the job that declares it.
+#
 
 RECIPE_PROCESSOR_CONFIG_METAJOB = "mvtools_recipe_processor_config"
 
@@ -156,6 +183,28 @@ def _convert_dsl_opts_into_py_map(options):
         result[o[0]] = o[1]
     return result
 
+def _drop_inherited_option(params, own_params, option):
+
+    # some options only make sense on the entry that declares them - options are inherited downwards
+    # though, so these are dropped unless they are amongst the entry's own (declared) options
+    if option in params and option not in own_params:
+        del params[option]
+
+def _get_entry_params(entry):
+
+    params = _convert_dsl_opts_into_py_map(dsl_type20.convert_opt_obj_list_to_neutral_format(entry.get_options()))
+    own_params = _convert_dsl_opts_into_py_map(dsl_type20.convert_opt_obj_list_to_neutral_format(entry.get_own_options()))
+    _drop_inherited_option(params, own_params, launch_jobs.ENTRY_DEPENDS_ON_PARAM)
+    _drop_inherited_option(params, own_params, launch_jobs.JOB_PARALLEL_PARAM)
+    return params
+
+def _validate_job_dependencies(job):
+
+    v, r = launch_jobs.make_dependency_graph(job.entries_list)
+    if not v:
+        return False, "Job [%s] has invalid dependencies: [%s]" % (job.name, r)
+    return True, None
+
 def _get_plugins_path(namespace=None):
 
     full_path = ""
@@ -177,6 +226,43 @@ def _get_plugins_path(namespace=None):
 
     return True, full_path
 
+# process-local cache of loaded plugin classes, keyed by (plugin's resolved path, class name). entries are
+# revalidated against the plugin file's stat signature, so edited plugins are picked up again
+_plugin_cache = {}
+
+def _get_plugin_sig(plugin_full_path):
+    st = os.stat(plugin_full_path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def clear_plugin_cache():
+    _plugin_cache.clear()
+
+def _load_plugin_class(plugin_full_path, mod_name, class_name, plugin_kind):
+
+    cache_key = (os.path.realpath(plugin_full_path), class_name)
+    plugin_sig = _get_plugin_sig(cache_key[0])
+
+    if cache_key in _plugin_cache:
+        cached_sig, cached_class = _plugin_cache[cache_key]
+        if cached_sig == plugin_sig:
+            return True, cached_class
+
+    # cache miss (or the plugin file changed since it was cached) - load the module from scratch. the loaded class is then
+    # kept in _plugin_cache, keyed by the plugin's realpath and revalidated against its stat signature on later lookups
+    loader = importlib.machinery.SourceFileLoader(mod_name, cache_key[0]) # (partly) red meat
+    spec = importlib.util.spec_from_file_location(mod_name, cache_key[0], loader=loader) # pork
+    mod = importlib.util.module_from_spec(spec) # pork
+    loader.exec_module(mod) # pork
+
+    try:
+        di = getattr(mod, class_name)()
+    except:
+        return False, "%s script [%s] has no class named %s." % (plugin_kind, plugin_full_path, class_name)
+
+    plugin_class = getattr(mod, class_name)
+    _plugin_cache[cache_key] = (plugin_sig, plugin_class)
+    return True, plugin_class
+
 def _get_task_instance(task_script, namespace=None):
 
     if namespace is None:
@@ -203,17 +289,7 @@ def _get_task_instance_delegate(task_script, namespace):
     if not os.path.exists(task_script_full):
         return False, "Task script [%s] does not exist." % task_script_full
 
-    loader = importlib.machinery.SourceFileLoader("CustomTaskMod", task_script_full) # (partly) red meat
-    spec = importlib.util.spec_from_loader(loader.name, loader) # pork
-    mod = importlib.util.module_from_spec(spec) # pork
-    loader.exec_module(mod) # pork
-
-    try:
-        di = mod.CustomTask()
-    except:
-        return False, "Task script [%s] has no class named CustomTask." % task_script_full
-
-    return True, mod.CustomTask
+    return _load_plugin_class(task_script_full, "CustomTaskMod", "CustomTask", "Task")
 
 def _get_job_instance(job_name, custom_job_impl, direct_job_script, namespace):
 
@@ -256,17 +332,7 @@ def _get_job_instance_internal(job_script, namespace):
     if not os.path.exists(job_script_full):
         return False, "Job script [%s] does not exist." % job_script_full
 
-    loader = importlib.machinery.SourceFileLoader("CustomJobMod", job_script_full) # (partly) red meat
-    spec = importlib.util.spec_from_loader(loader.name, loader) # pork
-    mod = importlib.util.module_from_spec(spec) # pork
-    loader.exec_module(mod) # pork
-
-    try:
-        di = mod.CustomJob()
-    except:
-        return False, "Job script [%s] has no class named CustomJob." % job_script_full
-
-    return True, mod.CustomJob
+    return _load_plugin_class(job_script_full, "CustomJobMod", "CustomJob", "Job")
 
 DEPTH_TRACKER_LIMIT = 200
 class RecipeProcessor:
@@ -335,10 +401,10 @@ class RecipeProcessor:
         if file_contents is None or file_contents == "":
             return False, "Recipe file [%s]'s contents are invalid." % local_recipe
 
-        dsl_opts = dsl_type20.DSLType20_Config(expand_envvars = True, expand_user = True, allow_var_dupes = True, inherit_options = True, var_decorator = "* ")
+        dsl_opts = dsl_type20.DSLType20_Config(expand_envvars = True, expand_user = True, allow_var_dupes = True, inherit_options = True, var_decorator = "* ", read_only_views = True)
         dsl = dsl_type20.DSLType20(dsl_opts)
 
-        v, r = dsl.parse(file_contents)
+        v, r = dsl_type20_cache.parse_cached(dsl, file_contents)
         if not v:
             return False, r
 
@@ -356,7 +422,7 @@ class RecipeProcessor:
             return False, "Failed attempting to retrieve context [%s]: [%s]" % (ctx_name, r)
         ctx = r
 
-        job_params = _convert_dsl_opts_into_py_map(dsl_type20.convert_opt_obj_list_to_neutral_format(ctx.get_options()))
+        job_params = _get_entry_params(ctx)
         v, r = _get_job_instance(ctx.get_name(), custom_job_impl, None, namespace)
         if not v:
             return False, r
@@ -368,7 +434,7 @@ class RecipeProcessor:
             # tasks
             if entry.get_type() == dsl_type20.DSLTYPE20_ENTRY_TYPE_VAR:
 
-                task_params = _convert_dsl_opts_into_py_map(dsl_type20.convert_opt_obj_list_to_neutral_format(entry.get_options()))
+                task_params = _get_entry_params(entry)
 
                 v, r = _get_task_instance(entry.get_value(), namespace)
                 if not v:
@@ -385,6 +451,10 @@ class RecipeProcessor:
                 if not v:
                     return False, r
 
+        v, r = _validate_job_dependencies(new_job)
+        if not v:
+            return False, r
+
         parent_job.add_entry(new_job)
         self.depth_tracker -= 1
         return True, None
@@ -478,6 +548,10 @@ class RecipeProcessor:
                 if not v:
                     return False, r
 
+        v, r = _validate_job_dependencies(root_job)
+        if not v:
+            return False, r
+
         return True, root_job
 
     def _get_launch_options_helper(self, dsl, option, valid_values, value_filter_function):
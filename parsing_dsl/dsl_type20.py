@@ -2,10 +2,12 @@
 
 import sys
 import os
+import copy
 
 import path_utils
 import miniparse
 import mvtools_exception
+import dsl_type20_stream
 
 # string parsing
 COMMENTS = ["#", "//"]
@@ -15,6 +17,13 @@ DSLTYPE20_ENTRY_TYPE_VAR = 1
 DSLTYPE20_ENTRY_TYPE_OPT = 2
 DSLTYPE20_ENTRY_TYPE_CTX = 3
 
+# parser engines
+DSLTYPE20_PARSER_CLASSIC = "classic"
+DSLTYPE20_PARSER_STREAM = "stream"
+DSLTYPE20_PARSER_CONFORMANCE = "conformance" # runs both engines, and raises if their outcomes differ in any way
+DSLTYPE20_PARSERS = [DSLTYPE20_PARSER_CLASSIC, DSLTYPE20_PARSER_STREAM, DSLTYPE20_PARSER_CONFORMANCE]
+DSLTYPE20_DEFAULT_PARSER = DSLTYPE20_PARSER_CLASSIC
+
 def hasopt_opts(opts, optname):
     for o in opts:
         if o[0] == optname:
@@ -243,6 +252,39 @@ def inherit_options_helper(parent_options, new_options):
 
     return result
 
+def compare_entries(entry_a, entry_b):
+
+    # structural comparison of two entries (variables, options or whole contexts, recursively)
+
+    if entry_a.get_type() != entry_b.get_type():
+        return False, "Entry types differ: [%s] and [%s]" % (entry_a.get_type(), entry_b.get_type())
+
+    if entry_a.get_name() != entry_b.get_name():
+        return False, "Entry names differ: [%s] and [%s]" % (entry_a.get_name(), entry_b.get_name())
+
+    if entry_a.get_type() in [DSLTYPE20_ENTRY_TYPE_VAR, DSLTYPE20_ENTRY_TYPE_OPT]:
+        if entry_a.get_value() != entry_b.get_value():
+            return False, "Values of [%s] differ: [%s] and [%s]" % (entry_a.get_name(), entry_a.get_value(), entry_b.get_value())
+
+    if entry_a.get_type() == DSLTYPE20_ENTRY_TYPE_OPT:
+        return True, None
+
+    if convert_opt_obj_list_to_neutral_format(entry_a.get_options()) != convert_opt_obj_list_to_neutral_format(entry_b.get_options()):
+        return False, "Options of [%s] differ" % entry_a.get_name()
+
+    if entry_a.get_type() == DSLTYPE20_ENTRY_TYPE_VAR:
+        return True, None
+
+    if len(entry_a.get_entries()) != len(entry_b.get_entries()):
+        return False, "Number of entries of context [%s] differ: [%s] and [%s]" % (entry_a.get_name(), len(entry_a.get_entries()), len(entry_b.get_entries()))
+
+    for sub_a, sub_b in zip(entry_a.get_entries(), entry_b.get_entries()):
+        v, r = compare_entries(sub_a, sub_b)
+        if not v:
+            return False, r
+
+    return True, None
+
 class DSLType20_Variable:
     def __init__(self, configs, name, value, options):
 
@@ -250,6 +292,7 @@ class DSLType20_Variable:
         self.name = name
         self.value = value
         self.options = options
+        self.options_view = None
 
         v, r = validate_variable(self.name, self.value)
         if not v:
@@ -306,6 +349,8 @@ class DSLType20_Context:
         self.name = name
         self.options = options
         self.entries = []
+        self.var_index = {} # variable name -> list of variable entries with that name, in order
+        self.options_view = None
 
         v, r = validate_context(self.name)
         if not v:
@@ -328,15 +373,123 @@ class DSLType20_Context:
 
     def add_entry(self, new_entry):
         self.entries.append(new_entry)
+        if new_entry.get_type() == DSLTYPE20_ENTRY_TYPE_VAR:
+            self.var_index.setdefault(new_entry.get_name(), []).append(new_entry)
+
+    def get_variable_entries(self, var_name = None):
+        if var_name is None:
+            return [x for x in self.entries if x.get_type() == DSLTYPE20_ENTRY_TYPE_VAR]
+        return self.var_index.get(var_name, [])
+
+    def rem_entries(self, entries_to_remove):
+        ids_to_remove = set(id(x) for x in entries_to_remove)
+        var_names = set(x.get_name() for x in entries_to_remove if x.get_type() == DSLTYPE20_ENTRY_TYPE_VAR)
+        self.entries[:] = [x for x in self.entries if id(x) not in ids_to_remove]
+        for var_name in var_names:
+            var_list = [x for x in self.var_index[var_name] if id(x) not in ids_to_remove]
+            if len(var_list) == 0:
+                del self.var_index[var_name]
+            else:
+                self.var_index[var_name] = var_list
+
+class DSLType20_OptionView:
+
+    # read-only views share the underlying entries instead of copying them. they are only valid
+    # for as long as the DSLType20 instance that created them is not modified
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        object.__setattr__(self, "_node", node)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DSLType20 views are read-only")
+
+    def get_type(self):
+        return DSLTYPE20_ENTRY_TYPE_OPT
+
+    def get_name(self):
+        return self._node.get_name()
+
+    def get_value(self):
+        return self._node.get_value()
+
+class DSLType20_VariableView:
+
+    __slots__ = ("_dsl", "_parent", "_node")
+
+    def __init__(self, dsl, parent, node):
+        object.__setattr__(self, "_dsl", dsl)
+        object.__setattr__(self, "_parent", parent)
+        object.__setattr__(self, "_node", node)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DSLType20 views are read-only")
+
+    def get_type(self):
+        return DSLTYPE20_ENTRY_TYPE_VAR
+
+    def get_name(self):
+        return self._node.get_name()
+
+    def get_value(self):
+        return self._node.get_value()
+
+    def get_options(self):
+        return list(self._dsl._get_options_view(self._parent, self._node))
+
+    def get_own_options(self):
+        # only the options declared on the variable itself (inherited ones excluded)
+        return [DSLType20_OptionView(x) for x in self._node.get_options()]
+
+class DSLType20_ContextView:
+
+    __slots__ = ("_dsl", "_node")
+
+    def __init__(self, dsl, node):
+        object.__setattr__(self, "_dsl", dsl)
+        object.__setattr__(self, "_node", node)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DSLType20 views are read-only")
+
+    def get_type(self):
+        return DSLTYPE20_ENTRY_TYPE_CTX
+
+    def get_parent_ptr(self):
+        if self._node.get_parent_ptr() is None:
+            return None
+        return DSLType20_ContextView(self._dsl, self._node.get_parent_ptr())
+
+    def get_name(self):
+        return self._node.get_name()
+
+    def get_options(self):
+        return list(self._dsl._get_options_view(self._node.get_parent_ptr(), self._node))
+
+    def get_own_options(self):
+        # only the options declared on the context itself (inherited ones excluded)
+        return [DSLType20_OptionView(x) for x in self._node.get_options()]
+
+    def get_entries(self):
+        result = []
+        for entry in self._node.get_entries():
+            if entry.get_type() == DSLTYPE20_ENTRY_TYPE_VAR:
+                result.append(DSLType20_VariableView(self._dsl, self._node, entry))
+            else:
+                result.append(DSLType20_ContextView(self._dsl, entry))
+        return result
 
 class DSLType20_Config:
-    def __init__(self, expand_envvars = False, expand_user = False, allow_var_dupes = True, inherit_options = False, var_decorator = ""):
+    def __init__(self, expand_envvars = False, expand_user = False, allow_var_dupes = True, inherit_options = False, var_decorator = "", parser = None, read_only_views = False):
 
         self.expand_envvars = expand_envvars
         self.expand_user = expand_user
         self.allow_var_dupes = allow_var_dupes
         self.inherit_options = inherit_options
         self.var_decorator = var_decorator
+        self.parser = parser # None means DSLTYPE20_DEFAULT_PARSER
+        self.read_only_views = read_only_views # query results are read-only views of the internal data, instead of copies
 
 class _internal_parse_context:
     def __init__(self):
@@ -357,6 +510,7 @@ class DSLType20:
 
         # internal
         self.data = None
+        self.context_index = None # context name -> context node. context names are unique across the whole tree
         self.root_context_id = "_DSL_TYPE20_RESERVED_INTERNAL_MASTER_ROOT_CONTEXT_"
         self.max_number_options = 1024
         self.indent = ""
@@ -368,6 +522,39 @@ class DSLType20:
     def clear(self):
         self.data = None
         self.data = DSLType20_Context(None, self.root_context_id, [])
+        self.context_index = {self.root_context_id: self.data}
+
+    def copy_shared(self, writable_contexts):
+
+        # returns a copy of this object that shares as much of its data as possible with it. every context
+        # node is duplicated (so that parent pointers stay consistent), but only the root context and the
+        # contexts named in writable_contexts get their own entries - all the others keep sharing theirs.
+        # variables are always shared. the copy may then add or remove variables from the writable contexts,
+        # add contexts to the root context and remove contexts (from writable parents) - without that ever
+        # showing on this object. any other change to the copy is not allowed
+
+        writable_contexts = set(writable_contexts)
+        writable_contexts.add(self.root_context_id)
+
+        new_dsl = copy.copy(self)
+        new_dsl.context_index = {}
+
+        node_map = {}
+        for ctx_name, ctx_node in self.context_index.items():
+            new_node = copy.copy(ctx_node)
+            node_map[id(ctx_node)] = new_node
+            new_dsl.context_index[ctx_name] = new_node
+
+        for new_node in new_dsl.context_index.values():
+            if new_node.ptr_parent is not None:
+                new_node.ptr_parent = node_map[id(new_node.ptr_parent)]
+            has_sub_contexts = any(x.get_type() == DSLTYPE20_ENTRY_TYPE_CTX for x in new_node.entries)
+            if has_sub_contexts or new_node.name in writable_contexts:
+                new_node.entries = [node_map.get(id(x), x) for x in new_node.entries]
+                new_node.var_index = {k: list(v) for k, v in new_node.var_index.items()}
+
+        new_dsl.data = node_map[id(self.data)]
+        return new_dsl
 
     def get_entire_dfs(self):
 
@@ -421,7 +608,7 @@ class DSLType20:
     def get_context(self, context_name = None):
 
         if context_name is None or context_name == self.root_context_id:
-            return True, self._ctx_shallow_copy(None, self.data)
+            return True, self._ctx_result(None, self.data)
 
         v, r = self._get_context_internal(context_name, True, None)
         if not v:
@@ -445,7 +632,7 @@ class DSLType20:
     def get_sub_context(self, context_name, parent_context = None):
 
         if context_name is None or context_name == self.root_context_id:
-            return True, self._ctx_shallow_copy(None, self.data)
+            return True, self._ctx_result(None, self.data)
 
         v, r = self._get_context_internal(context_name, False, parent_context)
         if not v:
@@ -461,6 +648,8 @@ class DSLType20:
         v, r = self.get_context(context_name)
         if not v:
             return False, r
+        if self.configs.read_only_views:
+            return True, r.get_options()
         return True, self._opt_list_copy(r.get_options())
 
     def rem_context(self, context_name):
@@ -483,21 +672,25 @@ class DSLType20:
         if ctx_parent is None:
             return False, "Context [%s] has no parent." % context_name
 
-        idx = 0
         entry_found = False
         for ctx in ctx_parent.get_entries():
-            if ctx.get_name() == context_name:
+            if ctx is ctx_info[0]:
                 entry_found = True
                 break
-            idx += 1
 
         if not entry_found:
             return False, "Context [%s] could not be removed (not found under its parent)" % context_name
 
-        try:
-            del ctx_parent.get_entries()[idx]
-        except:
-            return False, "Context [%s] could not be removed (unknown reason)" % context_name
+        ctx_parent.rem_entries([ctx_info[0]])
+
+        # the whole subtree is gone - drop it from the index too
+        ctx_to_unindex = [ctx_info[0]]
+        while len(ctx_to_unindex) > 0:
+            current = ctx_to_unindex.pop()
+            del self.context_index[current.get_name()]
+            for entry in current.get_entries():
+                if entry.get_type() == DSLTYPE20_ENTRY_TYPE_CTX:
+                    ctx_to_unindex.append(entry)
 
         return True, None
 
@@ -567,6 +760,82 @@ class DSLType20:
 
     def parse(self, contents):
 
+        parser = self._get_parser()
+        if parser == DSLTYPE20_PARSER_STREAM:
+            return self._parse_stream(contents)
+        elif parser == DSLTYPE20_PARSER_CONFORMANCE:
+            return self._parse_conformance(contents)
+        elif parser == DSLTYPE20_PARSER_CLASSIC:
+            return self._parse_classic(contents)
+        return False, "Invalid parser: [%s]" % parser
+
+    def parse_stream(self, source):
+
+        # source: a file object, or any other iterable of strings (lines or chunks of arbitrary size)
+
+        parser = self._get_parser()
+        if parser == DSLTYPE20_PARSER_STREAM:
+            return self._parse_stream(source)
+
+        if not isinstance(source, str):
+            source = "".join(source)
+        return self.parse(source)
+
+    def produce(self, _ctx_end_comment = False, _ctx_lvl_indent = False):
+
+        result = ""
+        self._clear_indent()
+        result += self._produce_context(self.data, _ctx_end_comment, _ctx_lvl_indent, True)
+        return result.strip()
+
+    def _get_parser(self):
+        if self.configs.parser is None:
+            return DSLTYPE20_DEFAULT_PARSER
+        return self.configs.parser
+
+    def _parse_conformance(self, contents):
+
+        stream_dsl = DSLType20(self._config_copy())
+        stream_dsl.configs.parser = DSLTYPE20_PARSER_STREAM
+        stream_dsl.max_number_options = self.max_number_options
+        v_stream, r_stream = stream_dsl._parse_stream(contents)
+
+        v, r = self._parse_classic(contents)
+
+        if v != v_stream:
+            raise mvtools_exception.mvtools_exception("Parser conformance failure: classic parser returned [%s, %s], stream parser returned [%s, %s]" % (v, r, v_stream, r_stream))
+
+        if v:
+            v_cmp, r_cmp = compare_entries(self.data, stream_dsl.data)
+            if not v_cmp:
+                raise mvtools_exception.mvtools_exception("Parser conformance failure: classic and stream parsers produced different results: [%s]" % r_cmp)
+
+        return v, r
+
+    def _parse_stream(self, source):
+
+        self.clear()
+        ipc = _internal_parse_context()
+
+        line_num = 0
+        for line in dsl_type20_stream.iterate_lines(source):
+            line_num += 1
+
+            b, e = dsl_type20_stream.sanitize_bounds(line)
+            if b == e:
+                continue
+
+            v, r = self._parse_stream_line_delegate(ipc, line, b, e, line_num)
+            if not v:
+                return False, r
+
+        if len(ipc.bracket_stack) > 0:
+            return False, "Unterminated context"
+
+        return True, None
+
+    def _parse_classic(self, contents):
+
         self.clear()
         ipc = _internal_parse_context()
         lines = contents.replace(miniparse.WIN_NEWLINE, miniparse.NEWLINE).split(miniparse.NEWLINE)
@@ -590,13 +859,6 @@ class DSLType20:
 
         return True, None
 
-    def produce(self, _ctx_end_comment = False, _ctx_lvl_indent = False):
-
-        result = ""
-        self._clear_indent()
-        result += self._produce_context(self.data, _ctx_end_comment, _ctx_lvl_indent, True)
-        return result.strip()
-
     def _get_entire_dfs(self, ctx):
 
         ctx.depth_sentinel += 1
@@ -604,10 +866,10 @@ class DSLType20:
             return False
 
         this_current_node = ctx.current_node
-        ctx.all.append(self._ctx_shallow_copy(this_current_node.get_parent_ptr(), this_current_node))
+        ctx.all.append(self._ctx_result(this_current_node.get_parent_ptr(), this_current_node))
         for entry in this_current_node.get_entries():
             if entry.get_type() == DSLTYPE20_ENTRY_TYPE_VAR:
-                ctx.all.append(DSLType20_Variable(self._config_copy(), entry.get_name(), entry.get_value(), self._opt_list_copy(self._inherit_options(this_current_node, entry))))
+                ctx.all.append(self._var_result(this_current_node, entry))
             elif entry.get_type() == DSLTYPE20_ENTRY_TYPE_CTX:
                 ctx.current_node = entry
                 if not self._get_entire_dfs(ctx):
@@ -623,7 +885,7 @@ class DSLType20:
             return False
 
         this_current_node = ctx.current_node
-        ctx.ctxs.append(self._ctx_shallow_copy(this_current_node.get_parent_ptr(), this_current_node))
+        ctx.ctxs.append(self._ctx_result(this_current_node.get_parent_ptr(), this_current_node))
         for entry in this_current_node.get_entries():
             if entry.get_type() == DSLTYPE20_ENTRY_TYPE_CTX:
                 ctx.current_node = entry
@@ -642,7 +904,7 @@ class DSLType20:
         this_current_node = ctx.current_node
         for entry in this_current_node.get_entries():
             if entry.get_type() == DSLTYPE20_ENTRY_TYPE_VAR:
-                ctx.vars.append(DSLType20_Variable(self._config_copy(), entry.get_name(), entry.get_value(), self._opt_list_copy(self._inherit_options(this_current_node, entry))))
+                ctx.vars.append(self._var_result(this_current_node, entry))
             elif entry.get_type() == DSLTYPE20_ENTRY_TYPE_CTX:
                 ctx.current_node = entry
                 if not self._get_all_variables_dfs(ctx):
@@ -702,6 +964,64 @@ class DSLType20:
 
         return True, None
 
+    def _parse_stream_line_delegate(self, ipc, line, b, e, current_line_number):
+
+        # same as _parse_line_delegate, except the line's contents are line[b:e]
+
+        # context name, begin
+        if e - b == 1 and line[b] == miniparse.LBRACKET:
+            ipc.bracket_stack.append(1) # start by assuming this is going to be a pseudo context
+            return True, None
+
+        # context name, end
+        if e - b == 1 and line[b] == miniparse.RBRACKET:
+            if len(ipc.bracket_stack) == 0:
+                return False, "[%s]: Unstarted context" % current_line_number
+            if read_list_top(ipc.bracket_stack) == 3: # only destack the TOS context if this was a named/regular context
+                ipc.context_stack.pop()
+            ipc.bracket_stack.pop()
+            return True, None
+
+        # context name, the name itself
+        if line[b] == miniparse.ATSIGN:
+
+            if len(ipc.bracket_stack) == 0:
+                return False, "[%s]: Unstarted context: [%s]" % (current_line_number, line[b:e])
+
+            if read_list_top(ipc.bracket_stack) == 2: # too late to define a name for this context
+                return False, "[%s]: Context name must appear just after the opening bracket" % current_line_number
+
+            if read_list_top(ipc.bracket_stack) == 3: # name already defined for this context
+                return False, "[%s]: Context name is already defined - tried redefining [%s%s] with [%s]" % (current_line_number, miniparse.ATSIGN, read_list_top(ipc.context_stack), line[b:e])
+
+            write_list_top(ipc.bracket_stack, 3) # TOS is now a named/regular context
+
+            v, r = dsl_type20_stream.parse_context_name(line, b, e, self.max_number_options)
+            if not v:
+                return False, "[%s]: %s" % (current_line_number, r)
+            parsed_context, parsed_context_options = r
+            ipc.context_stack.append(parsed_context)
+            v, r = self.add_context(read_list_top(ipc.context_stack), parsed_context_options, read_list_top_prev(ipc.context_stack))
+            if not v:
+                return False, "[%s]: Failed creating new context: [%s]." % (current_line_number, r)
+            return True, None
+
+        if len(ipc.bracket_stack) > 0: # skip root
+            if read_list_top(ipc.bracket_stack) == 1:
+                write_list_top(ipc.bracket_stack, 2) # TOS is now surely a pseudo context
+
+        # variable
+        v, r = dsl_type20_stream.parse_variable(line, b, e, self.configs.var_decorator, self.max_number_options)
+        if not v:
+            return False, "[%s]: %s" % (current_line_number, r)
+        var_name, var_value, parsed_opts = r
+
+        v, r = self.add_variable(var_name, var_value, parsed_opts, read_list_top(ipc.context_stack))
+        if not v:
+            return False, "[%s]: Unable to add variable [%s]: [%s]" % (current_line_number, var_name, r)
+
+        return True, None
+
     def _inherit_options(self, parent_ptr, child_ptr):
 
         if not self.configs.inherit_options:
@@ -772,24 +1092,7 @@ class DSLType20:
         if context_name is None:
             context_name = self.root_context_id
 
-        ptr_match = None
-        ctx_to_nav = []
-        ctx_to_nav.append(self.data)
-
-        while (len(ctx_to_nav) > 0):
-
-            current = ctx_to_nav.pop()
-
-            if current.get_type() == DSLTYPE20_ENTRY_TYPE_VAR:
-                continue
-
-            if current.get_name() == context_name:
-                ptr_match = current
-                break
-
-            for entry in current.get_entries():
-                if entry.get_type() == DSLTYPE20_ENTRY_TYPE_CTX:
-                    ctx_to_nav.append(entry)
+        ptr_match = self.context_index.get(context_name, None)
 
         if ptr_match is not None and callback_func is not None:
             v, r = callback_func(ptr_match, callback_data)
@@ -802,6 +1105,7 @@ class DSLType20:
 
         new_ctx = DSLType20_Context(ptr, cb_data_ctx[0], cb_data_ctx[1])
         ptr.add_entry(new_ctx)
+        self.context_index[new_ctx.get_name()] = new_ctx
         return True, None
 
     def _get_context_helper(self, ptr, cb_data_ctx):
@@ -809,19 +1113,48 @@ class DSLType20:
         target_ctx_name, return_ptr, get_itself = cb_data_ctx
 
         if get_itself:
-            return_ptr.append(self._ctx_shallow_copy(ptr.get_parent_ptr(), ptr))
+            return_ptr.append(self._ctx_result(ptr.get_parent_ptr(), ptr))
             return True, None
 
         for entry in ptr.get_entries():
             if entry.get_type() == DSLTYPE20_ENTRY_TYPE_CTX and (entry.get_name() == target_ctx_name or target_ctx_name is None):
-                return_ptr.append(self._ctx_shallow_copy(ptr, entry))
+                return_ptr.append(self._ctx_result(ptr, entry))
                 if target_ctx_name is not None:
                     break
 
         return True, None
 
     def _config_copy(self):
-        return DSLType20_Config(self.configs.expand_envvars, self.configs.expand_user, self.configs.allow_var_dupes, self.configs.inherit_options, self.configs.var_decorator)
+        return DSLType20_Config(self.configs.expand_envvars, self.configs.expand_user, self.configs.allow_var_dupes, self.configs.inherit_options, self.configs.var_decorator, self.configs.parser, self.configs.read_only_views)
+
+    def _var_result(self, parent_ptr, var_ptr):
+        if self.configs.read_only_views:
+            return DSLType20_VariableView(self, parent_ptr, var_ptr)
+        return self._var_copy(parent_ptr, var_ptr)
+
+    def _ctx_result(self, parent_ptr, ctx_ptr):
+        if self.configs.read_only_views:
+            return DSLType20_ContextView(self, ctx_ptr)
+        return self._ctx_shallow_copy(parent_ptr, ctx_ptr)
+
+    def _get_options_view(self, parent_ptr, entry_ptr):
+
+        # returns entry_ptr's options (inherited ones included) as a tuple of option views. it is memoized
+        # on the entry itself - neither an entry's options nor its ancestors ever change after creation
+
+        if entry_ptr.options_view is not None:
+            return entry_ptr.options_view
+
+        own_options = tuple(DSLType20_OptionView(x) for x in entry_ptr.get_options())
+
+        if not self.configs.inherit_options or parent_ptr is None:
+            entry_ptr.options_view = own_options
+        elif len(own_options) == 0:
+            entry_ptr.options_view = self._get_options_view(parent_ptr.get_parent_ptr(), parent_ptr)
+        else:
+            entry_ptr.options_view = tuple(inherit_options_helper(self._get_options_view(parent_ptr.get_parent_ptr(), parent_ptr), own_options))
+
+        return entry_ptr.options_view
 
     def _var_copy(self, original_parent_ptr, var_ptr):
         return DSLType20_Variable(self._config_copy(), var_ptr.get_name(), var_ptr.get_value(), self._opt_list_copy(self._inherit_options(original_parent_ptr, var_ptr)))
@@ -864,9 +1197,8 @@ class DSLType20:
         var_name, var_val, var_opts = cb_data_add
 
         if not self.configs.allow_var_dupes:
-            for entry in ptr.get_entries():
-                if entry.get_type() == DSLTYPE20_ENTRY_TYPE_VAR and entry.get_name() == var_name:
-                    return False, "Variable [%s] already exists" % var_name
+            if len(ptr.get_variable_entries(var_name)) > 0:
+                return False, "Variable [%s] already exists" % var_name
 
         new_var = DSLType20_Variable(self.configs, var_name, var_val, var_opts)
         ptr.add_entry(new_var)
@@ -876,28 +1208,22 @@ class DSLType20:
 
         var_name, list_ptr = cb_data_get
 
-        for entry in ptr.get_entries():
-            if entry.get_type() == DSLTYPE20_ENTRY_TYPE_VAR and (entry.get_name() == var_name or var_name is None):
-                var_copy = DSLType20_Variable(self._config_copy(), entry.get_name(), entry.get_value(), self._opt_list_copy(self._inherit_options(ptr, entry)))
-                list_ptr.append(var_copy)
+        for entry in ptr.get_variable_entries(var_name):
+            list_ptr.append(self._var_result(ptr, entry))
 
         return True, None
 
     def _rem_variable_helper(self, ptr, cb_data_rem):
 
         var_name, result = cb_data_rem
-        new_entries_list = []
-        entries_ptr = ptr.get_entries()
 
-        for entry in entries_ptr:
-            if entry.get_type() == DSLTYPE20_ENTRY_TYPE_VAR and (entry.get_name() == var_name or var_name is None):
-                result.append(entry.get_name())
-            else:
-                new_entries_list.append(entry)
+        entries_to_remove = ptr.get_variable_entries(var_name)
+        if len(entries_to_remove) == 0:
+            return True, None
 
-        entries_ptr.clear()
-        for n in new_entries_list:
-            entries_ptr.append(n)
+        for entry in entries_to_remove:
+            result.append(entry.get_name())
+        ptr.rem_entries(entries_to_remove)
         return True, None
 
     def _parse_context_name(self, str_input):
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+import sys
+import os
+import json
+import hashlib
+
+import path_utils
+import mvtools_envvars
+import dsl_type20
+
+# parse cache for t20 contents. the parsed tree is stored as json lines inside the mvtools temp folder,
+# in a file named after a hash of the contents (and of the configs that shape the tree) - changing the
+# source automatically misses the cache. values are stored before envvar/user expansion, so expansion
+# still reflects the environment of each run.
+#
+# the cache holds at most DSLTYPE20_CACHE_MAX_ENTRIES files: each hit refreshes its file's mtime, and
+# the least recently used files are dropped whenever a new one is stored. the cached trees are the
+# parsed contents in plain text, so the cache folder and its files are only accessible to their owner.
+
+DSLTYPE20_CACHE_FOLDER = "dsl_type20_cache"
+DSLTYPE20_CACHE_EXTENSION = "jsonl"
+DSLTYPE20_CACHE_FORMAT = "dsl_type20_cache"
+DSLTYPE20_CACHE_FORMAT_VERSION = 1
+DSLTYPE20_CACHE_MAX_ENTRIES = 256
+
+DSLTYPE20_CACHE_RECORD_CTX = "c"
+DSLTYPE20_CACHE_RECORD_VAR = "v"
+
+def get_cache_folder():
+
+    v, r = mvtools_envvars.mvtools_envvar_read_temp_path()
+    if not v:
+        return False, r
+    temp_path = r
+
+    if not os.path.exists(temp_path):
+        return False, "Temp path [%s] does not exist" % temp_path
+
+    cache_folder = path_utils.concat_path(temp_path, DSLTYPE20_CACHE_FOLDER)
+    if not os.path.exists(cache_folder):
+        try:
+            os.mkdir(cache_folder, 0o700)
+        except FileExistsError:
+            pass
+        except OSError as ex:
+            return False, "Unable to create cache folder [%s]: [%s]" % (cache_folder, ex)
+
+    return True, cache_folder
+
+def make_cache_key(configs, contents):
+
+    hasher = hashlib.sha256()
+    hasher.update(("%s\n%s\n%s\n%s\n" % (DSLTYPE20_CACHE_FORMAT_VERSION, configs.allow_var_dupes, len(configs.var_decorator), configs.var_decorator)).encode())
+    hasher.update(contents.encode(errors = "surrogatepass"))
+    return hasher.hexdigest()
+
+def get_cache_filename(cache_folder, configs, contents):
+    return path_utils.concat_path(cache_folder, "%s.%s" % (make_cache_key(configs, contents), DSLTYPE20_CACHE_EXTENSION))
+
+def _opts_to_records(opt_obj_list):
+    return [[x.get_name(), x.get_value()] for x in opt_obj_list]
+
+def _records_to_opts(opt_records):
+
+    if not isinstance(opt_records, list):
+        return None
+
+    result = []
+    for x in opt_records:
+        if not isinstance(x, list) or len(x) != 2:
+            return None
+        result.append((x[0], x[1]))
+    return result
+
+def make_records(dsl):
+
+    # walks the tree in pre-order - replaying the records in order rebuilds the tree, entry order included
+
+    records = []
+    ctx_to_nav = [(dsl.data, None)]
+
+    while len(ctx_to_nav) > 0:
+
+        current, current_name = ctx_to_nav.pop()
+
+        sub_contexts = []
+        for entry in current.get_entries():
+            if entry.get_type() == dsl_type20.DSLTYPE20_ENTRY_TYPE_VAR:
+                records.append([DSLTYPE20_CACHE_RECORD_VAR, current_name, entry.get_name(), entry.get_value(), _opts_to_records(entry.get_options())])
+            elif entry.get_type() == dsl_type20.DSLTYPE20_ENTRY_TYPE_CTX:
+                records.append([DSLTYPE20_CACHE_RECORD_CTX, current_name, entry.get_name(), None, _opts_to_records(entry.get_options())])
+                sub_contexts.append((entry, entry.get_name()))
+
+        # a context's own entries always come after the record that creates it
+        sub_contexts.reverse()
+        ctx_to_nav += sub_contexts
+
+    return records
+
+def replay_records(dsl, records):
+
+    dsl.clear()
+
+    for rec in records:
+
+        if not isinstance(rec, list) or len(rec) != 5:
+            return False, "Malformed cache record: [%s]" % rec
+        rec_type, ctx_name, entry_name, entry_value, opt_records = rec
+
+        opts = _records_to_opts(opt_records)
+        if opts is None:
+            return False, "Malformed cache record options: [%s]" % rec
+
+        if rec_type == DSLTYPE20_CACHE_RECORD_CTX:
+            v, r = dsl.add_context(entry_name, opts, ctx_name)
+        elif rec_type == DSLTYPE20_CACHE_RECORD_VAR:
+            v, r = dsl.add_variable(entry_name, entry_value, opts, ctx_name)
+        else:
+            return False, "Invalid cache record type: [%s]" % rec_type
+
+        if not v:
+            return False, r
+
+    return True, None
+
+def save_records(cache_file, records):
+
+    lines = [json.dumps({"format": DSLTYPE20_CACHE_FORMAT, "version": DSLTYPE20_CACHE_FORMAT_VERSION})]
+    for rec in records:
+        lines.append(json.dumps(rec))
+
+    # written aside and then renamed into place, so that readers never see a partially written cache
+    cache_file_tmp = "%s.%s.tmp" % (cache_file, os.getpid())
+    try:
+        with open(os.open(cache_file_tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(cache_file_tmp, cache_file)
+    except OSError as ex:
+        if os.path.exists(cache_file_tmp):
+            os.unlink(cache_file_tmp)
+        return False, "Unable to write cache file [%s]: [%s]" % (cache_file, ex)
+
+    return True, None
+
+def prune_cache(cache_folder, max_entries):
+
+    # drops the least recently used cache files, keeping at most max_entries of them. best-effort: files
+    # that vanish (or can't be removed) along the way, possibly because of a concurrent prune, are skipped
+
+    cache_files = []
+    try:
+        with os.scandir(cache_folder) as it:
+            for entry in it:
+                if entry.name.endswith(".%s" % DSLTYPE20_CACHE_EXTENSION):
+                    try:
+                        cache_files.append((entry.stat().st_mtime_ns, entry.path))
+                    except OSError:
+                        pass
+    except OSError:
+        return
+
+    if len(cache_files) <= max_entries:
+        return
+
+    cache_files.sort()
+    for mtime, cache_file in cache_files[:len(cache_files) - max_entries]:
+        try:
+            os.unlink(cache_file)
+        except OSError:
+            pass
+
+def load_records(cache_file):
+
+    records = []
+    try:
+        with open(cache_file) as f:
+
+            header = json.loads(f.readline())
+            if not isinstance(header, dict) or header.get("format", None) != DSLTYPE20_CACHE_FORMAT or header.get("version", None) != DSLTYPE20_CACHE_FORMAT_VERSION:
+                return False, "Unsupported cache file: [%s]" % cache_file
+
+            for line in f:
+                records.append(json.loads(line))
+
+    except (OSError, ValueError) as ex:
+        return False, "Unable to read cache file [%s]: [%s]" % (cache_file, ex)
+
+    return True, records
+
+def _touch_cache_file(cache_file):
+    # marks the cache file as recently used
+    try:
+        os.utime(cache_file)
+    except OSError:
+        pass
+
+def _store_records(cache_folder, cache_file, records):
+    v, r = save_records(cache_file, records)
+    if v:
+        prune_cache(cache_folder, DSLTYPE20_CACHE_MAX_ENTRIES)
+
+def parse_cached(dsl, contents):
+
+    # drop-in replacement for dsl.parse(contents). caching is best-effort: whenever the cache
+    # is unavailable (or unusable), the contents are just parsed as usual
+
+    v, r = get_cache_folder()
+    if not v:
+        return dsl.parse(contents)
+    cache_folder = r
+    cache_file = get_cache_filename(cache_folder, dsl.configs, contents)
+
+    if os.path.exists(cache_file):
+        v, r = load_records(cache_file)
+        if v:
+            v, r = replay_records(dsl, r)
+            if v:
+                _touch_cache_file(cache_file)
+                return True, None
+
+    if not dsl.configs.expand_envvars and not dsl.configs.expand_user:
+
+        v, r = dsl.parse(contents)
+        if not v:
+            return False, r
+        _store_records(cache_folder, cache_file, make_records(dsl))
+        return True, None
+
+    # the cache must hold the values as they were before expansion
+    raw_configs = dsl._config_copy()
+    raw_configs.expand_envvars = False
+    raw_configs.expand_user = False
+    raw_dsl = dsl_type20.DSLType20(raw_configs)
+
+    v, r = raw_dsl.parse(contents)
+    if not v:
+        return dsl.parse(contents)
+    records = make_records(raw_dsl)
+    _store_records(cache_folder, cache_file, records)
+
+    return replay_records(dsl, records)
+
+if __name__ == "__main__":
+    print("Hello from %s" % path_utils.basename_filtered(__file__))
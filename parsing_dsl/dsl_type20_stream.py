@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+
+import sys
+import os
+import re
+
+import path_utils
+import miniparse
+
+# single pass tokenizer for the t20 format. lines are consumed one at a time from any iterable (file objects included),
+# and each line is scanned by index (begin/end offsets) - no intermediate substrings are created except for the final
+# names and values. the accepted grammar is exactly the one implemented by the classic parser in dsl_type20.py, quirks included.
+
+MAX_NUMBER_VALUES = 500 # sentinel, mirrors the classic parser
+
+_IDENTIFIER_RE = re.compile(miniparse.IDENTIFIER)
+_ANYSPACE_RE = re.compile(miniparse.ANYSPACE)
+_WHITESPACE_RE = re.compile("\\s*")
+_COMMENT_RE = re.compile("[\"#]|//")
+_DESCAPE_RE = re.compile("\\\\(.?)", re.DOTALL)
+
+def iterate_lines(source):
+
+    # source: either a string or an iterable of strings (chunks of any size, i.e. file objects or lists of lines)
+
+    if isinstance(source, str):
+        source = [source]
+
+    pending = []
+    for chunk in source:
+
+        start = 0
+        while True:
+
+            n = chunk.find(miniparse.NEWLINE, start)
+            if n == -1:
+                break
+
+            pending.append(chunk[start:n])
+            line = "".join(pending)
+            pending = []
+            if line.endswith("\r"): # windows newline
+                line = line[:-1]
+            yield line
+            start = n+1
+
+        if start < len(chunk):
+            pending.append(chunk[start:])
+
+    yield "".join(pending)
+
+def _skip_ws(s, i, e):
+    return _WHITESPACE_RE.match(s, i, e).end()
+
+def _skip_spaces(s, i, e):
+    return _ANYSPACE_RE.match(s, i, e).end()
+
+def _rskip_ws(s, b, e):
+    while e > b and s[e-1].isspace():
+        e -= 1
+    return e
+
+def _scan_identifier(s, i, e):
+    r = _IDENTIFIER_RE.match(s, i, e)
+    if r is None:
+        return i
+    return r.end()
+
+def _descape(raw_value):
+    if miniparse.BSLASH not in raw_value:
+        return raw_value
+    return _DESCAPE_RE.sub("\\1", raw_value)
+
+def sanitize_bounds(line):
+
+    # returns the (begin, end) offsets of the line's meaningful contents (surrounding blanks and comments left out)
+
+    b = _skip_ws(line, 0, len(line))
+    e = _rskip_ws(line, b, len(line))
+    if b == e:
+        return b, b
+
+    guarded = False
+    for m in _COMMENT_RE.finditer(line, b, e):
+        if m.group() == miniparse.QUOTE:
+            guarded = not guarded
+        elif not guarded:
+            e = _rskip_ws(line, b, m.start())
+            break
+
+    return b, e
+
+def _parse_value_single(s, i, e):
+
+    if i >= e or s[i] != miniparse.QUOTE:
+        return False, "Failed parsing options: [%s]" % s[i:e]
+
+    # forward until the closing quote is found (the next one not preceded by an escape char)
+    j = i+1
+    while True:
+        j = s.find(miniparse.QUOTE, j, e)
+        if j == -1:
+            return False, "Failed parsing options: [%s]" % s[i:e]
+        if s[j-1] != miniparse.BSLASH:
+            break
+        j += 1
+
+    return True, (_descape(s[i+1:j]), _skip_ws(s, j+1, e))
+
+def _parse_value(s, i, e):
+
+    if i >= e or s[i] != miniparse.LPARENT:
+        return _parse_value_single(s, i, e)
+
+    # stringlist
+    opt_val = []
+    i = _skip_ws(s, i+1, e)
+    r_paren_allowed = True
+    while_sentinel = 0
+    while True:
+        while_sentinel += 1
+
+        if while_sentinel == MAX_NUMBER_VALUES:
+            return False, "Failed parsing options: too many values: [%s]" % s[:e]
+
+        if i < e and s[i] == miniparse.RPARENT:
+            if not r_paren_allowed:
+                return False, "Failed parsing options: [%s]" % s[:e]
+            i = _skip_ws(s, i+1, e)
+            break
+
+        v, r = _parse_value_single(s, i, e)
+        if not v:
+            return False, r
+        opt_val.append(r[0])
+        i = r[1]
+
+        r_paren_allowed = True
+        if i < e and s[i] == miniparse.COMMA:
+            i = _skip_ws(s, i+1, e)
+            r_paren_allowed = False
+
+    return True, (opt_val, i)
+
+def _parse_next_option(s, i, e):
+
+    # returns ((opt_name, opt_val), next_offset, more_options)
+
+    i = _skip_ws(s, i, e)
+    if i == e:
+        return False, "Invalid option input: [%s]" % s[:e]
+
+    n_end = _scan_identifier(s, i, e)
+    if n_end == i:
+        return False, "Parsing option failed: [%s]" % s[i:e]
+    opt_name = s[i:n_end].strip()
+    opt_val = None
+
+    j = _skip_spaces(s, n_end, e)
+    if j < e and s[j] == miniparse.COLON:
+
+        v, r = _parse_value(s, _skip_ws(s, j+1, e), e)
+        if not v:
+            return False, r
+        opt_val, j = r
+        j = _skip_ws(s, j, e)
+
+    elif j >= e or s[j] not in [miniparse.FSLASH, miniparse.RCBRACKET]:
+        return False, "Parsing option failed: [%s]" % s[i:e]
+
+    if j < e and s[j] == miniparse.FSLASH:
+        return True, ((opt_name, opt_val), _skip_ws(s, j+1, e), True)
+    if j < e and s[j] == miniparse.RCBRACKET:
+        return True, ((opt_name, opt_val), _skip_ws(s, j+1, e), False)
+
+    return False, "Parsing option failed: [%s]" % s[i:e]
+
+def _parse_options(s, i, e, max_number_options):
+
+    # i is expected just past the left curly bracket. returns (parsed_opts, remaining_offset)
+
+    i = _skip_ws(s, i, e)
+    if e - i == 1 and s[i] == miniparse.RCBRACKET: # tolerate empty option list
+        return True, ([], e)
+
+    parsed_opts = []
+    counter = -1
+    while True:
+        counter += 1
+
+        if counter >= max_number_options:
+            return False, "Failed parsing: [%s]. Maximum number of options exceeded: [%s]." % (s[:e], max_number_options)
+
+        v, r = _parse_next_option(s, i, e)
+        if not v:
+            return False, "Failed parsing options: [%s]" % r
+        parsed_opts.append(r[0])
+        i = r[1]
+        if not r[2]: # there are no more options
+            break
+
+    return True, (parsed_opts, i)
+
+def parse_context_name(s, b, e, max_number_options):
+
+    # s[b:e] is a sanitized line starting with the at ("@") sign. returns (context_name, parsed_opts)
+
+    i = _skip_spaces(s, b+1, e)
+    n_end = _scan_identifier(s, i, e)
+    if n_end == i:
+        return False, "Malformed context name: [%s]." % s[b:e]
+    parsed_context_name = s[i:n_end].strip()
+    parsed_opts = []
+
+    i = _skip_ws(s, n_end, e)
+    if i < e: # there might be options
+
+        if s[i] != miniparse.LCBRACKET:
+            return False, "Malformed context name: [%s]." % s[b:e]
+
+        v, r = _parse_options(s, i+1, e, max_number_options)
+        if not v:
+            return False, "Failed parsing options: [%s]: [%s]" % (s[i+1:e], r)
+        parsed_opts, i = r
+
+        if i != e:
+            return False, "Malformed context name: [%s]: Remaining unparseable contents: [%s]." % (s[b:e], s[i:e])
+
+    return True, (parsed_context_name, parsed_opts)
+
+def _parse_value_end_single(s, b, e):
+
+    # s[e-1] is expected to be the closing quote. returns (value, remaining_end)
+
+    q = e-1
+    if q == b or s[q-1] == miniparse.BSLASH: # the last quote was escaped (or there is no first quote at all)
+        return False, "Malformed variable: [%s]: value must be be enclosed with a nonescaped quote (failed at the second quote)." % s[b:e]
+
+    # find the previous nonescaped quote (beginning of the value)
+    p = s.rfind(miniparse.QUOTE, b, q)
+    while p > b and s[p-1] == miniparse.BSLASH:
+        p = s.rfind(miniparse.QUOTE, b, p)
+    if p == -1:
+        return False, "Malformed variable: [%s]: can't find first quote of the variable's value." % s[b:e]
+
+    return True, (_descape(s[p+1:q]), _rskip_ws(s, b, p))
+
+def _parse_value_end(s, b, e):
+
+    # parses the variable's value backwards, from the end of the line. returns (value, remaining_end)
+
+    var_value = None
+
+    if e > b and s[e-1] == miniparse.RPARENT:
+
+        # value is a string list
+        var_value = []
+        e = _rskip_ws(s, b, e-1)
+
+        while_sentinel = 0
+        while True:
+            while_sentinel += 1
+
+            if while_sentinel == MAX_NUMBER_VALUES:
+                return False, "Unable to finish parsing variable: [%s] has too many values" % s[b:e]
+
+            if not (e > b and s[e-1] == miniparse.QUOTE):
+                break
+
+            v, r = _parse_value_end_single(s, b, e)
+            if not v:
+                return False, r
+            var_value.append(r[0])
+            e = r[1]
+
+            if not (e > b and s[e-1] == miniparse.COMMA):
+                break
+            e = _rskip_ws(s, b, e-1)
+
+        # remove enclosing left parenthesis
+        if not (e > b and s[e-1] == miniparse.LPARENT):
+            return False, "Malformed variable: [%s]: string-list value must be be enclosed with parentheses (failed at the second/left parenthesis)." % s[b:e]
+        e = _rskip_ws(s, b, e-1)
+
+        var_value.reverse()
+
+    elif e > b and s[e-1] == miniparse.QUOTE:
+
+        v, r = _parse_value_end_single(s, b, e)
+        if not v:
+            return False, r
+        var_value, e = r
+
+    else:
+        return True, (None, e) # valueless
+
+    # remove equal sign just before the variable's value
+    if not (e > b and s[e-1] == miniparse.EQSIGN):
+        return False, "Malformed variable: [%s]: Failed to parse the equal sign before the variable's value." % s[b:e]
+
+    return True, (var_value, _rskip_ws(s, b, e-1))
+
+def parse_variable(s, b, e, var_decorator, max_number_options):
+
+    # s[b:e] is a sanitized line. returns (var_name, var_value, parsed_opts)
+
+    if var_decorator != "":
+        if not s.startswith(var_decorator, b, e):
+            return False, "Can't parse variable: [%s]: Decorator [%s] not found." % (s[b:e], var_decorator)
+        b = _skip_ws(s, b + len(var_decorator), e)
+
+    v, r = _parse_value_end(s, b, e)
+    if not v:
+        return False, "Can't parse variable: [%s]: [%s]." % (s[b:e], r)
+    var_value, e = r
+    parsed_opts = []
+
+    n_end = _scan_identifier(s, b, e)
+    if n_end == b:
+        return False, "Malformed variable: [%s]: Can't parse variable name." % s[b:e]
+    var_name = s[b:n_end].strip()
+
+    i = _skip_spaces(s, n_end, e)
+    if i < e and s[i] == miniparse.LCBRACKET:
+
+        # variable has options
+        v, r = _parse_options(s, i+1, e, max_number_options)
+        if not v:
+            return False, "Failed parsing options: [%s]: [%s]" % (s[i+1:e], r)
+        parsed_opts, i = r
+
+    else:
+        i = _skip_ws(s, i, e)
+
+    if i != e:
+        return False, "Malformed variable: [%s]: Remaining unparseable contents: [%s]." % (s[b:e], s[i:e])
+
+    if var_name == "":
+        return False, "Empty var name: [%s]" % s[b:e]
+
+    return True, (var_name, var_value, parsed_opts)
+
+if __name__ == "__main__":
+    print("Hello from %s" % path_utils.basename_filtered(__file__))
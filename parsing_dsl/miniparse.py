@@ -417,51 +417,96 @@ def scan_simple(thestr, theregex):
         return False
     return len(result[0]) == len(thestr)
 
-def scan_largest_of(target_str, target_str_offset, source_str_list):
+class MultiPatternMatcher:
 
-    largest_found = 0
-    index_largest_found = None
-    largest_available = 0
-    map_src_offsets = {}
+    # searches for several (literal) patterns at once, through a single regex compiled out of all of them (built once,
+    # then reused for every line). the alternatives are sorted from the largest pattern to the smallest, and since the
+    # regex engine settles for the first alternative that matches, that's always the largest pattern found at each
+    # position. patterns are reported by their (first) index in the original list. empty patterns never match.
 
-    for i in range(len(source_str_list)):
-        e = source_str_list[i]
-        if e in map_src_offsets:
-            continue
-        map_src_offsets[e] = [i, 0]
-        if len(e) > largest_available:
-            largest_available = len(e)
+    def __init__(_self, patterns):
 
-    scan_count = 0
-    for idx in range(target_str_offset, len(target_str)):
-        scan_count += 1
+        _self.pattern_indices = {}
+        for i in range(len(patterns)):
+            p = patterns[i]
+            if p == "" or p in _self.pattern_indices:
+                continue
+            _self.pattern_indices[p] = i
 
-        c = target_str[idx]
+        sorted_patterns = sorted(_self.pattern_indices, key=len, reverse=True)
 
-        no_matches = True
-        for e in map_src_offsets:
+        # the (smaller or equal) patterns that start each pattern - if a pattern is found, so are these
+        _self.pattern_prefixes = {}
+        for p in sorted_patterns:
+            _self.pattern_prefixes[p] = []
+            for q in sorted_patterns:
+                if p.startswith(q):
+                    _self.pattern_prefixes[p].append(q)
 
-            if scan_count > len(e):
-                continue
+        _self.regex = None
+        _self.regex_every_position = None
+        if len(sorted_patterns) > 0:
+            escaped_patterns = []
+            for p in sorted_patterns:
+                escaped_patterns.append(re.escape(p))
+            alternation = "|".join(escaped_patterns)
+            _self.regex = re.compile(alternation)
+            _self.regex_every_position = re.compile("(?=(%s))" % alternation) # zero-width: matches (possibly overlapping) at every position
 
-            if c == e[map_src_offsets[e][1]]:
-                map_src_offsets[e][1] += 1
-                no_matches = False
-            else:
-                map_src_offsets[e][1] = 0
+    def match_largest_at(_self, target_str, target_str_offset):
+
+        # returns the index of the largest pattern that target_str has at target_str_offset (None if there's none)
+
+        if _self.regex is None:
+            return None
+        result = _self.regex.match(target_str, target_str_offset)
+        if result is None:
+            return None
+        return _self.pattern_indices[result[0]]
+
+    def has_any(_self, target_str):
 
-            if map_src_offsets[e][1] == len(e):
-                if len(e) > largest_found:
-                    largest_found = len(e)
-                    index_largest_found = map_src_offsets[e][0]
+        if _self.regex is None:
+            return False
+        return _self.regex.search(target_str) is not None
 
-        if no_matches:
-            break
+    def find_all_positions(_self, target_str):
 
-        if largest_found == largest_available:
-            break
+        # returns every position of target_str where a pattern starts, along with the index of the largest pattern there
 
-    return index_largest_found
+        result = []
+        if _self.regex_every_position is None:
+            return result
+        for m in _self.regex_every_position.finditer(target_str):
+            result.append((m.start(), _self.pattern_indices[m[1]]))
+        return result
+
+    def find_present(_self, target_str):
+
+        # returns the set of patterns found in target_str (in a single pass)
+
+        present = set()
+        if _self.regex_every_position is None:
+            return present
+        for m in _self.regex_every_position.finditer(target_str):
+            if m[1] in present:
+                continue # and so are its prefixes
+            present.update(_self.pattern_prefixes[m[1]])
+        return present
+
+multi_pattern_matchers = {}
+
+def get_multi_pattern_matcher(patterns):
+
+    # matchers are built only once per set of patterns (per run)
+
+    key = tuple(patterns)
+    if not key in multi_pattern_matchers:
+        multi_pattern_matchers[key] = MultiPatternMatcher(patterns)
+    return multi_pattern_matchers[key]
+
+def scan_largest_of(target_str, target_str_offset, source_str_list):
+    return get_multi_pattern_matcher(source_str_list).match_largest_at(target_str, target_str_offset)
 
 def descape(thestr, escape_char):
 
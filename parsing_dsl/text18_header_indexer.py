@@ -5,6 +5,7 @@ import os
 
 import path_utils
 import dsl_type20
+import dsl_type20_cache
 
 PREFIX = "TEXT18_"
 VAR_DECO = "* "
@@ -54,7 +55,7 @@ def gen_from_t20(input_file, prod_ctx):
 
     dsl = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(expand_envvars = False, expand_user = False, allow_var_dupes = False, inherit_options = False, var_decorator = VAR_DECO))
 
-    v, r = dsl.parse(t20_contents)
+    v, r = dsl_type20_cache.parse_cached(dsl, t20_contents)
     if not v:
         return False, r
 
@@ -5,6 +5,7 @@ import os
 
 import path_utils
 import dsl_type20
+import dsl_type20_cache
 
 VAR_DECO = "* "
 
@@ -73,7 +74,7 @@ def compare_t18_schemas(left_t20, right_t20):
     with open(left_t20, "r") as f:
         t20_contents = f.read()
 
-    v, r = left_dsl.parse(t20_contents)
+    v, r = dsl_type20_cache.parse_cached(left_dsl, t20_contents)
     if not v:
         return False, r
 
@@ -81,7 +82,7 @@ def compare_t18_schemas(left_t20, right_t20):
     with open(right_t20, "r") as f:
         t20_contents = f.read()
 
-    v, r = right_dsl.parse(t20_contents)
+    v, r = dsl_type20_cache.parse_cached(right_dsl, t20_contents)
     if not v:
         return False, r
 
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+import sys
+import os
+import mmap
+import hashlib
+import concurrent.futures
+
+import path_utils
+
+# in-process hashing (no sha512sum/sha256sum processes). files are read with large unbuffered reads straight into a
+# reusable buffer - or mapped, when big enough - and hashlib releases the gil while hashing, so hash_files() gets
+# real parallelism out of plain threads.
+
+HASH_ENGINE_ALGORITHMS = ["sha256", "sha512"]
+HASH_ENGINE_READ_SIZE = 1024*1024
+HASH_ENGINE_MMAP_THRESHOLD = 64*1024*1024
+
+def _make_hasher(algorithm):
+    if algorithm not in HASH_ENGINE_ALGORITHMS:
+        return None
+    return hashlib.new(algorithm)
+
+def hash_content(algorithm, content):
+
+    # content: either str (hashed as utf8) or bytes
+
+    hasher = _make_hasher(algorithm)
+    if hasher is None:
+        return False, "Unsupported hash algorithm: [%s]" % algorithm
+
+    if isinstance(content, str):
+        content = content.encode("utf8")
+    hasher.update(content)
+    return True, hasher.hexdigest()
+
+def _hash_file_delegate(hasher, filename):
+
+    with open(filename, "rb", buffering=0) as f:
+
+        size = os.fstat(f.fileno()).st_size
+        if size >= HASH_ENGINE_MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hasher.update(mm)
+            return
+
+        buf = bytearray(HASH_ENGINE_READ_SIZE)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            hasher.update(view[:n])
+
+def hash_file(algorithm, filename):
+
+    hasher = _make_hasher(algorithm)
+    if hasher is None:
+        return False, "Unsupported hash algorithm: [%s]" % algorithm
+
+    try:
+        _hash_file_delegate(hasher, filename)
+    except (OSError, ValueError) as ex:
+        return False, "Unable to hash [%s]: [%s]" % (filename, ex)
+
+    return True, hasher.hexdigest()
+
+def hash_files(algorithm, filenames, workers=None):
+
+    # returns, for each file (in order), the result of hash_file. workers: defaults to the number of cpus
+
+    if algorithm not in HASH_ENGINE_ALGORITHMS:
+        return False, "Unsupported hash algorithm: [%s]" % algorithm
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        return False, "Invalid number of workers: [%s]" % workers
+
+    if workers == 1 or len(filenames) < 2:
+        results = []
+        for f in filenames:
+            results.append(hash_file(algorithm, f))
+        return True, results
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for f in filenames:
+            futures.append(executor.submit(hash_file, algorithm, f))
+        results = []
+        for fut in futures:
+            results.append(fut.result())
+
+    return True, results
+
+def puaq(selfhelp):
+    print("Usage: %s algorithm (%s) files" % (path_utils.basename_filtered(__file__), ", ".join(HASH_ENGINE_ALGORITHMS)))
+    if selfhelp:
+        sys.exit(0)
+    else:
+        sys.exit(1)
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 3:
+        puaq(False)
+
+    algorithm = sys.argv[1]
+    filenames = sys.argv[2:]
+
+    v, r = hash_files(algorithm, filenames)
+    if not v:
+        print(r)
+        sys.exit(1)
+
+    ret = 0
+    for i in range(len(filenames)):
+        if r[i][0]:
+            print("%s  %s" % (r[i][1], filenames[i]))
+        else:
+            print(r[i][1])
+            ret = 1
+    sys.exit(ret)
@@ -4,7 +4,7 @@ import sys
 import os
 import fsquery
 
-import hash_check
+import sha512_wrapper
 import path_utils
 import terminal_colors
 
@@ -29,11 +29,29 @@ def test_mass_hash_check(path_files, extension):
     if len(filelist) == 0:
         print("WARNING: Nothing to test.")
 
+    # all files are hashed in one go (in parallel)
+    to_hash = []
+    for f in filelist:
+        if os.path.exists(f + ".sha512"):
+            to_hash.append(f)
+
+    v, r = sha512_wrapper.hash_sha_512_app_files(to_hash)
+    if not v:
+        return False, [r]
+    hashes = {}
+    for i in range(len(to_hash)):
+        hashes[to_hash[i]] = r[i]
+
     for f in filelist:
         hash_file = f + ".sha512"
-        if not os.path.exists(hash_file):
+        if f not in hashes:
             report.append(f + " has no corresponding hash file.")
-        elif not hash_check.sha512sum_check(f, hash_file):
+            continue
+        hv, hr = hashes[f]
+        hash_file_contents = ""
+        with open(hash_file, "r") as hf:
+            hash_file_contents = hf.read()
+        if not hv or hash_file_contents[0:128] != hr:
             report.append(f + " check FAILED.")
 
     return (len(report) == 0), report
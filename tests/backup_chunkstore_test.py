@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import random
+import unittest
+from unittest import mock
+
+import mvtools_test_fixture
+import path_utils
+
+import backup_chunkstore
+
+class BackupChunkstoreTest(unittest.TestCase):
+
+    def setUp(self):
+        v, r = self.delegate_setUp()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+
+    def delegate_setUp(self):
+
+        v, r = mvtools_test_fixture.makeAndGetTestFolder("backup_chunkstore_test")
+        if not v:
+            return v, r
+        self.test_base_dir = r[0]
+        self.test_dir = r[1]
+
+        # small chunks (and packs), so that small inputs still make many of them
+        for n, val in [("BACKUP_CHUNK_MIN_SIZE", 1024), ("BACKUP_CHUNK_MAX_SIZE", 16*1024), ("BACKUP_CHUNK_MASK_BITS", 4), ("BACKUP_CHUNK_PACK_SIZE", 64*1024)]:
+            patcher = mock.patch("backup_chunkstore.%s" % n, val)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.passphrase = "test-passphrase"
+        self.key = backup_chunkstore.make_key(self.passphrase)
+        self.data = random.Random(1).randbytes(256*1024)
+
+        self.store_1 = path_utils.concat_path(self.test_dir, "store_1")
+        self.store_2 = path_utils.concat_path(self.test_dir, "store_2")
+        os.mkdir(self.store_1)
+        os.mkdir(self.store_2)
+        self.index_file = path_utils.concat_path(self.test_dir, "test.index")
+        self.output_file = path_utils.concat_path(self.test_dir, "output.bin")
+
+        return True, ""
+
+    def tearDown(self):
+        shutil.rmtree(self.test_base_dir)
+
+    def make_chunks(self, data, feed_size):
+        chunker = backup_chunkstore.Chunker()
+        chunks = []
+        for i in range(0, len(data), feed_size):
+            chunks += chunker.feed(data[i:i+feed_size])
+        return chunks + chunker.finish()
+
+    def store(self, data, stores):
+        writer = backup_chunkstore.ChunkWriter(self.key, self.passphrase, stores)
+        self.assertEqual(writer.write(data), (True, None))
+        v, r = writer.finish()
+        self.assertTrue(v)
+        return writer, r
+
+    def count_chunks(self, store, packs=False):
+        total = 0
+        for sub in os.listdir(store):
+            for n in os.listdir(path_utils.concat_path(store, sub)):
+                if n.endswith(".%s" % backup_chunkstore.BACKUP_CHUNKSTORE_PACK_EXTENSION) == packs:
+                    total += 1
+        return total
+
+    def testChunker1(self):
+
+        chunks = self.make_chunks(self.data, 1000)
+        self.assertEqual(b"".join(chunks), self.data)
+        self.assertTrue(len(chunks) > 2)
+        for c in chunks[:-1]:
+            self.assertTrue(len(c) >= 1024)
+            self.assertTrue(len(c) <= 16*1024)
+
+        # cut points do not depend on how the input is fed
+        self.assertEqual(self.make_chunks(self.data, 7777), chunks)
+        self.assertEqual(self.make_chunks(self.data, len(self.data)), chunks)
+
+    def testChunker2(self):
+
+        # an insertion only disturbs the chunks around it
+        chunks = self.make_chunks(self.data, 4096)
+        chunks_shifted = self.make_chunks(b"xyz" + self.data, 4096)
+        self.assertTrue(len(set(chunks) & set(chunks_shifted)) >= len(chunks) - 2)
+
+    def testChunker3(self):
+
+        # no anchors at all - cut at the maximum size
+        chunks = self.make_chunks(bytes(40*1024), 4096)
+        self.assertEqual([len(c) for c in chunks], [16*1024, 16*1024, 8*1024])
+        self.assertEqual(self.make_chunks(b"", 4096), [])
+
+    def testChunkWriter1(self):
+
+        writer, entries = self.store(self.data, [self.store_1, self.store_2])
+        self.assertEqual(writer.size, len(self.data))
+        self.assertEqual(writer.new_chunks, len(set([e[0] for e in entries])))
+        self.assertEqual(self.count_chunks(self.store_1), writer.new_chunks)
+        self.assertEqual(self.count_chunks(self.store_2), writer.new_chunks)
+
+        # the same contents again - nothing new is stored
+        writer, entries_again = self.store(self.data, [self.store_1, self.store_2])
+        self.assertEqual(entries_again, entries)
+        self.assertEqual(writer.new_chunks, 0)
+        self.assertEqual(writer.new_bytes, 0)
+
+        # missing from one store only
+        shutil.rmtree(self.store_2)
+        os.mkdir(self.store_2)
+        writer, entries_again = self.store(self.data, [self.store_1, self.store_2])
+        self.assertEqual(self.count_chunks(self.store_2), self.count_chunks(self.store_1))
+
+    def testChunkWriter2(self):
+
+        # stored chunks are neither plain nor plainly named
+        writer, entries = self.store(self.data, [self.store_1])
+        for sub in os.listdir(self.store_1):
+            for n in os.listdir(path_utils.concat_path(self.store_1, sub)):
+                with open(path_utils.concat_path(self.store_1, sub, n), "rb") as f:
+                    self.assertFalse(self.data[:64] in f.read())
+        self.assertNotEqual(backup_chunkstore.make_chunk_id(backup_chunkstore.make_key("other-passphrase"), self.data[:entries[0][1]]), entries[0][0])
+
+    def testChunkWriter3(self):
+
+        # a source of many chunks - openssl is only run once per pack, not once per chunk
+        with mock.patch("openssl_wrapper.encrypt_des3_pbkdf2_content", wraps=backup_chunkstore.openssl_wrapper.encrypt_des3_pbkdf2_content) as dummy:
+            writer, entries = self.store(self.data, [self.store_1, self.store_2])
+        self.assertTrue(writer.new_chunks > 10)
+        self.assertTrue(writer.new_packs < writer.new_chunks / 4)
+        self.assertEqual(dummy.call_count, writer.new_packs)
+        self.assertEqual(self.count_chunks(self.store_1, True), writer.new_packs)
+        self.assertEqual(self.count_chunks(self.store_2, True), writer.new_packs)
+
+        self.assertTrue(backup_chunkstore.save_index(self.index_file, entries)[0])
+        with mock.patch("openssl_wrapper.decrypt_des3_pbkdf2_content", wraps=backup_chunkstore.openssl_wrapper.decrypt_des3_pbkdf2_content) as dummy:
+            self.assertEqual(backup_chunkstore.restore(self.store_2, self.index_file, self.key, self.passphrase, self.output_file), (True, None))
+        self.assertEqual(dummy.call_count, writer.new_packs)
+        with open(self.output_file, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+    def testRestore1(self):
+
+        writer, entries = self.store(self.data, [self.store_1])
+        self.assertEqual(backup_chunkstore.save_index(self.index_file, entries), (True, None))
+        self.assertEqual(backup_chunkstore.load_index(self.index_file), (True, entries))
+
+        self.assertEqual(backup_chunkstore.restore(self.store_1, self.index_file, self.key, self.passphrase, self.output_file), (True, None))
+        with open(self.output_file, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+        # never overwrites
+        v, r = backup_chunkstore.restore(self.store_1, self.index_file, self.key, self.passphrase, self.output_file)
+        self.assertFalse(v)
+
+    def testRestore2(self):
+
+        writer, entries = self.store(self.data, [self.store_1])
+        self.assertTrue(backup_chunkstore.save_index(self.index_file, entries)[0])
+
+        # swapped chunks are caught
+        first = backup_chunkstore.get_chunk_filename(self.store_1, entries[0][0])
+        second = backup_chunkstore.get_chunk_filename(self.store_1, entries[1][0])
+        shutil.copyfile(second, first)
+        v, r = backup_chunkstore.restore(self.store_1, self.index_file, self.key, self.passphrase, self.output_file)
+        self.assertFalse(v)
+        self.assertFalse(os.path.exists(self.output_file))
+
+    def testLoadIndex1(self):
+
+        v, r = backup_chunkstore.load_index(self.index_file)
+        self.assertFalse(v)
+
+        with open(self.index_file, "w") as f:
+            f.write("{\"format\": \"backup_chunkstore_index\", \"version\": 1, \"chunks\": [[\"a\"]]}")
+        v, r = backup_chunkstore.load_index(self.index_file)
+        self.assertFalse(v)
+
+    def testRemoveUnreferenced1(self):
+
+        writer, entries = self.store(self.data, [self.store_1])
+        writer, entries_other = self.store(b"other contents\n" * 4096, [self.store_1])
+        total = self.count_chunks(self.store_1)
+        total_packs = self.count_chunks(self.store_1, True)
+
+        v, r = backup_chunkstore.remove_unreferenced(self.store_1, set([e[0] for e in entries]))
+        self.assertTrue(v)
+        self.assertEqual(r, total - len(set([e[0] for e in entries])))
+        self.assertEqual(self.count_chunks(self.store_1, True), total_packs - writer.new_packs)
+        self.assertTrue(backup_chunkstore.save_index(self.index_file, entries)[0])
+        self.assertEqual(backup_chunkstore.restore(self.store_1, self.index_file, self.key, self.passphrase, self.output_file), (True, None))
+
+        v, r = backup_chunkstore.remove_unreferenced(self.store_1, set())
+        self.assertTrue(v)
+        self.assertEqual(os.listdir(self.store_1), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import mvtools_test_fixture
+import create_and_write_file
+import path_utils
+
+import backup_manifest
+
+class BackupManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        v, r = self.delegate_setUp()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+
+    def delegate_setUp(self):
+
+        v, r = mvtools_test_fixture.makeAndGetTestFolder("backup_manifest_test")
+        if not v:
+            return v, r
+        self.test_base_dir = r[0]
+        self.test_dir = r[1]
+
+        self.key = backup_manifest.make_key("test-passphrase")
+
+        self.artifact = path_utils.concat_path(self.test_dir, "artifact")
+        os.mkdir(self.artifact)
+        self.subfolder = path_utils.concat_path(self.artifact, "subfolder")
+        os.mkdir(self.subfolder)
+        self.file1 = path_utils.concat_path(self.artifact, "file1.txt")
+        create_and_write_file.create_file_contents(self.file1, "abc")
+        self.file2 = path_utils.concat_path(self.subfolder, "file2.txt")
+        create_and_write_file.create_file_contents(self.file2, "def")
+
+        self.manifest_file = path_utils.concat_path(self.test_dir, "artifact.manifest")
+
+        return True, ""
+
+    def tearDown(self):
+        shutil.rmtree(self.test_base_dir)
+
+    def testMakeManifest1(self):
+
+        v, r = backup_manifest.make_manifest(self.key, self.artifact)
+        self.assertTrue(v)
+        self.assertEqual(len(r), 4) # the artifact itself, subfolder, file1.txt and file2.txt
+
+        # nothing in plain
+        for e in r:
+            self.assertFalse("file1.txt" in e[backup_manifest.BACKUP_MANIFEST_ENTRY_PATH])
+
+        # keyed by the passphrase
+        v, r2 = backup_manifest.make_manifest(backup_manifest.make_key("other-passphrase"), self.artifact)
+        self.assertTrue(v)
+        self.assertFalse(backup_manifest.same_contents(r, r2))
+
+    def testMakeManifest2(self):
+
+        v, r = backup_manifest.make_manifest(self.key, self.file1)
+        self.assertTrue(v)
+        self.assertEqual(len(r), 1)
+        self.assertEqual(r[0][backup_manifest.BACKUP_MANIFEST_ENTRY_SIZE], 3)
+
+        v, r = backup_manifest.make_manifest(self.key, path_utils.concat_path(self.test_dir, "nonexistent"))
+        self.assertFalse(v)
+
+    def testSameContents1(self):
+
+        v, first = backup_manifest.make_manifest(self.key, self.artifact)
+        self.assertTrue(v)
+
+        # touched but unchanged
+        st = os.stat(self.file1)
+        os.utime(self.file1, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        v, second = backup_manifest.make_manifest(self.key, self.artifact, first)
+        self.assertTrue(v)
+        self.assertNotEqual(first, second)
+        self.assertTrue(backup_manifest.same_contents(first, second))
+
+        # changed, same size
+        with open(self.file2, "w") as f:
+            f.write("ghi")
+        v, third = backup_manifest.make_manifest(self.key, self.artifact, second)
+        self.assertTrue(v)
+        self.assertFalse(backup_manifest.same_contents(second, third))
+
+        # new (empty) folder
+        os.mkdir(path_utils.concat_path(self.artifact, "subfolder_new"))
+        v, fourth = backup_manifest.make_manifest(self.key, self.artifact, third)
+        self.assertTrue(v)
+        self.assertFalse(backup_manifest.same_contents(third, fourth))
+
+        self.assertFalse(backup_manifest.same_contents(None, fourth))
+
+    def testMakeManifestQuickCheck1(self):
+
+        v, first = backup_manifest.make_manifest(self.key, self.artifact)
+        self.assertTrue(v)
+
+        # unchanged files are not read again
+        with mock.patch("backup_manifest._digest_file") as dummy:
+            v, second = backup_manifest.make_manifest(self.key, self.artifact, first)
+            dummy.assert_not_called()
+        self.assertTrue(v)
+        self.assertEqual(first, second)
+
+    def testSaveLoadManifest1(self):
+
+        v, r = backup_manifest.make_manifest(self.key, self.artifact)
+        self.assertTrue(v)
+        manifest = r
+
+        v, r = backup_manifest.save_manifest(self.manifest_file, manifest)
+        self.assertTrue(v)
+        self.assertFalse(os.path.exists("%s.tmp" % self.manifest_file))
+        v, r = backup_manifest.load_manifest(self.manifest_file)
+        self.assertTrue(v)
+        self.assertEqual(r, manifest)
+
+    def testSaveLoadManifest2(self):
+
+        v, r = backup_manifest.load_manifest(self.manifest_file)
+        self.assertFalse(v)
+
+        create_and_write_file.create_file_contents(self.manifest_file, "garbage")
+        v, r = backup_manifest.load_manifest(self.manifest_file)
+        self.assertFalse(v)
+
+        os.unlink(self.manifest_file)
+        create_and_write_file.create_file_contents(self.manifest_file, "{\"format\": \"backup_manifest\", \"version\": 1, \"entries\": [[1, 2]]}")
+        v, r = backup_manifest.load_manifest(self.manifest_file)
+        self.assertFalse(v)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,7 @@ import getpass
 
 import create_and_write_file
 import mvtools_test_fixture
+import mvtools_envvars
 import backup_preparation
 import git_test_fixture
 import git_wrapper
@@ -20,6 +21,11 @@ import git_lib
 class BackupPreparationTest(unittest.TestCase):
 
     def setUp(self):
+        self.mvtools_envvars_inst = mvtools_envvars.Mvtools_Envvars()
+        v, r = self.mvtools_envvars_inst.make_copy_environ()
+        if not v:
+            self.tearDown()
+            self.fail(r)
         v, r = self.delegate_setUp()
         if not v:
             self.tearDown()
@@ -33,6 +39,10 @@ class BackupPreparationTest(unittest.TestCase):
         self.test_base_dir = r[0]
         self.test_dir = r[1]
 
+        v, r = mvtools_envvars.mvtools_envvar_write_temp_path(self.test_dir)
+        if not v:
+            return False, "Failed setting up temp path envvar for testing."
+
         # folder where to store the preparation artifacts
         self.prep_target = path_utils.concat_path(self.test_dir, "preptarget")
         path_utils.scratchfolder(self.prep_target)
@@ -168,6 +178,9 @@ class BackupPreparationTest(unittest.TestCase):
 
     def tearDown(self):
         shutil.rmtree(self.test_base_dir)
+        v, r = self.mvtools_envvars_inst.restore_copy_environ()
+        if not v:
+            self.fail(r)
 
     def testDeriveFolderNameForTree(self):
         self.assertEqual(backup_preparation.derivefoldernamefortree("/home/user/folder"), "folder_tree_out.txt")
@@ -19,6 +19,8 @@ import convert_unit
 import mvtools_envvars
 
 import backup_processor
+import backup_engine
+import backup_chunkstore
 
 def get_tuple_list_index(the_tuple_list, the_key):
     for i in range(len(the_tuple_list)):
@@ -58,6 +60,10 @@ class BackupProcessorTest(unittest.TestCase):
         self.test_base_dir = r[0]
         self.test_dir = r[1]
 
+        v, r = mvtools_envvars.mvtools_envvar_write_temp_path(self.test_dir)
+        if not v:
+            return False, "Failed setting up temp path envvar for testing."
+
         v, r = mvtools_envvars.mvtools_envvar_read_test_bkproc_reserved_1()
         if v:
             return False, "Mvtool's backup_processor's test envvar is in use. This test requires it to not be in use."
@@ -249,6 +255,28 @@ class BackupProcessorTest(unittest.TestCase):
         self.test_config_file = path_utils.concat_path(self.test_dir, "test_config_file.t20")
         create_and_write_file.create_file_contents(self.test_config_file, self.cfg_file_contents)
 
+        # streaming mode config files
+        self.test_config_file_streaming = path_utils.concat_path(self.test_dir, "test_config_file_streaming.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_streaming, self.cfg_file_contents + ("BKMODE = \"streaming\"" + os.linesep))
+        self.test_config_file_incremental = path_utils.concat_path(self.test_dir, "test_config_file_incremental.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_incremental, self.cfg_file_contents + ("BKINCREMENTAL" + os.linesep))
+        self.test_config_file_streaming_incremental = path_utils.concat_path(self.test_dir, "test_config_file_streaming_incremental.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_streaming_incremental, self.cfg_file_contents + ("BKMODE = \"streaming\"" + os.linesep) + ("BKWORKERS = \"2\"" + os.linesep) + ("BKINCREMENTAL" + os.linesep))
+        self.test_config_file_invalid_incremental = path_utils.concat_path(self.test_dir, "test_config_file_invalid_incremental.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_invalid_incremental, self.cfg_file_contents + ("BKINCREMENTAL = \"yes\"" + os.linesep))
+        self.test_config_file_dedup = path_utils.concat_path(self.test_dir, "test_config_file_dedup.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_dedup, self.cfg_file_contents + ("BKMODE = \"dedup\"" + os.linesep) + ("BKWORKERS = \"2\"" + os.linesep))
+        self.test_config_file_dedup_incremental = path_utils.concat_path(self.test_dir, "test_config_file_dedup_incremental.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_dedup_incremental, self.cfg_file_contents + ("BKMODE = \"dedup\"" + os.linesep) + ("BKINCREMENTAL" + os.linesep))
+        self.test_config_file_workers = path_utils.concat_path(self.test_dir, "test_config_file_workers.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_workers, self.cfg_file_contents + ("BKWORKERS = \"3\"" + os.linesep))
+        self.test_config_file_streaming_workers = path_utils.concat_path(self.test_dir, "test_config_file_streaming_workers.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_streaming_workers, self.cfg_file_contents + ("BKMODE = \"streaming\"" + os.linesep) + ("BKWORKERS = \"3\"" + os.linesep))
+        self.test_config_file_invalid_workers = path_utils.concat_path(self.test_dir, "test_config_file_invalid_workers.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_invalid_workers, self.cfg_file_contents + ("BKWORKERS = \"0\"" + os.linesep))
+        self.test_config_file_invalid_mode = path_utils.concat_path(self.test_dir, "test_config_file_invalid_mode.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_invalid_mode, self.cfg_file_contents + ("BKMODE = \"invalid\"" + os.linesep))
+
         # hash file
         self.hash_file = path_utils.concat_path(self.test_dir, ".hash_file_test")
         self.passphrase = "abcdef"
@@ -434,6 +462,10 @@ class BackupProcessorTest(unittest.TestCase):
         cfg_file_contents_warn_global_each_abort += ("BKTARGETS_BASEDIR = \"%s\"" + os.linesep) % self.bk_base_folder_test
         self.test_config_file_warn_global_each_abort = path_utils.concat_path(self.test_dir, "test_config_file_warn_global_each_abort.t20")
         create_and_write_file.create_file_contents(self.test_config_file_warn_global_each_abort, cfg_file_contents_warn_global_each_abort)
+        self.test_config_file_warn_global_each_abort_workers = path_utils.concat_path(self.test_dir, "test_config_file_warn_global_each_abort_workers.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_warn_global_each_abort_workers, cfg_file_contents_warn_global_each_abort + ("BKSOURCE = \"%s\"" + os.linesep) % self.test_source_folder_another + ("BKWORKERS = \"2\"" + os.linesep))
+        self.test_config_file_warn_global_each_abort_streaming = path_utils.concat_path(self.test_dir, "test_config_file_warn_global_each_abort_streaming.t20")
+        create_and_write_file.create_file_contents(self.test_config_file_warn_global_each_abort_streaming, cfg_file_contents_warn_global_each_abort + ("BKMODE = \"streaming\"" + os.linesep))
 
         # config file, global warnings (final) that do cause aborts
         cfg_file_contents_warn_global_final_abort = ""
@@ -940,6 +972,256 @@ class BackupProcessorTest(unittest.TestCase):
         self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder4_file1) ) )
         self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.file0) ) )
 
+    def check_backup_targets(self):
+
+        for tg in [self.test_target_1_folder, self.test_target_2_folder]:
+
+            tg_final = path_utils.concat_path(tg, self.bk_base_folder_test)
+            self.assertTrue( os.path.exists( path_utils.concat_path(tg_final, "bk_date.txt")) )
+
+            path_utils.scratchfolder(self.extracted_folder)
+            for art in ["folder1", "folder2", "folder3", ".folder4", ".file0.txt"]:
+                art_e = path_utils.concat_path(tg_final, "source_test", "%s.tar.bz2.enc" % art)
+                art_z = path_utils.concat_path(tg_final, "source_test", "%s.tar.bz2" % art)
+                art_h = path_utils.concat_path(tg_final, "source_test", "%s.tar.bz2.enc.sha512" % art)
+                self.assertTrue(hash_check.sha512sum_check(art_e, art_h))
+                self.assertTrue(decrypt.symmetric_decrypt(art_e, art_z, self.passphrase)[0])
+                v, r = tar_wrapper.extract(art_z, self.extracted_folder)
+                self.assertTrue(v)
+
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder1_file1) ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder1_subfolder1_file2) ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder1_subfolder2_file3) ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder2_file1) ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder3_file1) ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder4_file1) ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.file0) ) )
+
+    def testRunBackupStreaming1(self):
+
+        v, r = backup_processor.read_config(self.test_config_file_streaming)
+        self.assertTrue(v)
+        self.assertEqual(r[6], backup_engine.BACKUP_MODE_STREAMING)
+
+        with mock.patch("input_checked_passphrase.get_checked_passphrase", return_value=(True, self.passphrase)):
+            r = backup_processor.run_backup(self.test_config_file_streaming, self.hash_file)
+        self.assertTrue(r)
+
+        # no temporary files at all
+        self.assertFalse( os.path.exists( self.bk_test_temp_folder ) )
+        self.check_backup_targets()
+
+    def testRunBackupStreaming2(self):
+
+        # aborting leaves nothing behind on the targets
+        with mock.patch("input_checked_passphrase.get_checked_passphrase", return_value=(True, self.passphrase)):
+            v = backup_processor.run_backup(self.test_config_file_warn_global_each_abort_streaming, self.hash_file)
+        self.assertFalse(v)
+        self.assertFalse( os.path.exists( path_utils.concat_path(self.test_target_1_folder, self.bk_base_folder_test) ) )
+
+    def testRunBackupStreaming3(self):
+        v, r = backup_processor.read_config(self.test_config_file_invalid_mode)
+        self.assertFalse(v)
+
+    def testRunBackupWorkers1(self):
+
+        v, r = backup_processor.read_config(self.test_config_file_workers)
+        self.assertTrue(v)
+        self.assertEqual(r[7], 3)
+
+        with mock.patch("input_checked_passphrase.get_checked_passphrase", return_value=(True, self.passphrase)):
+            r = backup_processor.run_backup(self.test_config_file_workers, self.hash_file)
+        self.assertTrue(r)
+        self.check_backup_targets()
+
+    def testRunBackupWorkers2(self):
+
+        with mock.patch("input_checked_passphrase.get_checked_passphrase", return_value=(True, self.passphrase)):
+            r = backup_processor.run_backup(self.test_config_file_streaming_workers, self.hash_file)
+        self.assertTrue(r)
+        self.assertFalse( os.path.exists( self.bk_test_temp_folder ) )
+        self.check_backup_targets()
+
+    def testRunBackupWorkers3(self):
+
+        # the size limits still abort the backup
+        with mock.patch("input_checked_passphrase.get_checked_passphrase", return_value=(True, self.passphrase)):
+            v = backup_processor.run_backup(self.test_config_file_warn_global_each_abort_workers, self.hash_file)
+        self.assertFalse(v)
+        self.assertFalse( os.path.exists( path_utils.concat_path(self.test_target_1_folder, self.bk_base_folder_test) ) )
+
+    def testRunBackupWorkers4(self):
+        v, r = backup_processor.read_config(self.test_config_file_invalid_workers)
+        self.assertFalse(v)
+
+    def get_package_stats(self, art):
+        pkg = path_utils.concat_path(self.test_target_1_folder, self.bk_base_folder_test, "source_test", "%s.tar.bz2.enc" % art)
+        st = os.stat(pkg)
+        return (st.st_ino, st.st_mtime_ns)
+
+    def run_incremental(self, config_file):
+        # the preparation script refuses to run over its own previous output
+        if os.path.exists(self.prep_generated_test_filename):
+            os.unlink(self.prep_generated_test_filename)
+        with mock.patch("input_checked_passphrase.get_checked_passphrase", return_value=(True, self.passphrase)):
+            return backup_processor.run_backup(config_file, self.hash_file)
+
+    def testRunBackupIncremental1(self):
+
+        v, r = backup_processor.read_config(self.test_config_file_incremental)
+        self.assertTrue(v)
+        self.assertTrue(r[8])
+
+        self.assertTrue(self.run_incremental(self.test_config_file_incremental))
+        self.assertFalse( os.path.exists( self.bk_test_temp_folder ) )
+        self.check_backup_targets()
+        self.assertTrue( os.path.exists( path_utils.concat_path(self.test_target_2_folder, self.bk_base_folder_test, "source_test", "folder1.tar.bz2.enc.manifest") ) )
+        folder1_before = self.get_package_stats("folder1")
+        folder2_before = self.get_package_stats("folder2")
+
+        # only the changed artifact is packaged again
+        create_and_write_file.create_file_contents(path_utils.concat_path(self.folder1, "file_new.txt"), "new")
+        self.assertTrue(self.run_incremental(self.test_config_file_incremental))
+        self.check_backup_targets()
+        self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder1, "file_new.txt") ) )
+        self.assertNotEqual(self.get_package_stats("folder1"), folder1_before)
+        self.assertEqual(self.get_package_stats("folder2"), folder2_before)
+
+    def testRunBackupIncremental2(self):
+
+        self.assertTrue(self.run_incremental(self.test_config_file_streaming_incremental))
+        self.check_backup_targets()
+        folder2_before = self.get_package_stats("folder2")
+
+        # touching a file does not change its artifact
+        st = os.stat(self.folder2_file1)
+        os.utime(self.folder2_file1, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertTrue(self.run_incremental(self.test_config_file_streaming_incremental))
+        self.assertEqual(self.get_package_stats("folder2"), folder2_before)
+
+        # a changed file does
+        with open(self.folder2_file1, "w") as f:
+            f.write("abd")
+        self.assertTrue(self.run_incremental(self.test_config_file_streaming_incremental))
+        self.assertNotEqual(self.get_package_stats("folder2"), folder2_before)
+        self.check_backup_targets()
+
+    def testRunBackupIncremental3(self):
+
+        self.assertTrue(self.run_incremental(self.test_config_file_incremental))
+        source_test_base = path_utils.concat_path(self.test_target_1_folder, self.bk_base_folder_test, "source_test")
+        self.assertTrue( os.path.exists( path_utils.concat_path(source_test_base, "folder3.tar.bz2.enc") ) )
+
+        # artifacts that are gone are removed from the targets, along with anything else that does not belong there
+        shutil.rmtree(self.folder3)
+        create_and_write_file.create_file_contents(path_utils.concat_path(source_test_base, "leftover.tar.bz2"), "zzz")
+        self.assertTrue(self.run_incremental(self.test_config_file_incremental))
+        for tg in [self.test_target_1_folder, self.test_target_2_folder]:
+            tg_base = path_utils.concat_path(tg, self.bk_base_folder_test, "source_test")
+            self.assertFalse( os.path.exists( path_utils.concat_path(tg_base, "folder3.tar.bz2.enc") ) )
+            self.assertFalse( os.path.exists( path_utils.concat_path(tg_base, "folder3.tar.bz2.enc.sha512") ) )
+            self.assertFalse( os.path.exists( path_utils.concat_path(tg_base, "folder3.tar.bz2.enc.manifest") ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path(tg_base, "folder1.tar.bz2.enc") ) )
+        self.assertFalse( os.path.exists( path_utils.concat_path(source_test_base, "leftover.tar.bz2") ) )
+
+    def testRunBackupIncremental4(self):
+
+        # a package without its manifest (i.e. an interrupted backup) is made again
+        self.assertTrue(self.run_incremental(self.test_config_file_incremental))
+        folder1_before = self.get_package_stats("folder1")
+        os.unlink(path_utils.concat_path(self.test_target_2_folder, self.bk_base_folder_test, "source_test", "folder1.tar.bz2.enc.manifest"))
+        self.assertTrue(self.run_incremental(self.test_config_file_incremental))
+        self.assertNotEqual(self.get_package_stats("folder1"), folder1_before)
+        self.assertTrue( os.path.exists( path_utils.concat_path(self.test_target_2_folder, self.bk_base_folder_test, "source_test", "folder1.tar.bz2.enc.manifest") ) )
+        self.check_backup_targets()
+
+    def testRunBackupIncremental5(self):
+        v, r = backup_processor.read_config(self.test_config_file_invalid_incremental)
+        self.assertFalse(v)
+
+    def get_chunk_files(self, tg):
+        result = {}
+        chunk_store = path_utils.concat_path(tg, self.bk_base_folder_test, backup_chunkstore.BACKUP_CHUNKSTORE_FOLDER)
+        for root, dirs, files in os.walk(chunk_store):
+            for n in files:
+                if not n.endswith(".%s" % backup_chunkstore.BACKUP_CHUNKSTORE_PACK_EXTENSION):
+                    result[n] = os.stat(path_utils.concat_path(root, n)).st_mtime_ns
+        return result
+
+    def check_backup_targets_dedup(self):
+
+        key = backup_chunkstore.make_key(self.passphrase)
+        for tg in [self.test_target_1_folder, self.test_target_2_folder]:
+
+            tg_final = path_utils.concat_path(tg, self.bk_base_folder_test)
+            chunk_store = path_utils.concat_path(tg_final, backup_chunkstore.BACKUP_CHUNKSTORE_FOLDER)
+            self.assertTrue( os.path.exists( path_utils.concat_path(tg_final, "bk_date.txt")) )
+
+            path_utils.scratchfolder(self.extracted_folder)
+            for art in ["folder1", "folder2", "folder3", ".folder4", ".file0.txt"]:
+                art_i = path_utils.concat_path(tg_final, "source_test", "%s.tar.index" % art)
+                art_h = path_utils.concat_path(tg_final, "source_test", "%s.tar.index.sha512" % art)
+                art_t = path_utils.concat_path(self.test_dir, "%s.tar" % art)
+                self.assertTrue(hash_check.sha512sum_check(art_i, art_h))
+                self.assertEqual(backup_chunkstore.restore(chunk_store, art_i, key, self.passphrase, art_t), (True, None))
+                v, r = tar_wrapper.extract(art_t, self.extracted_folder)
+                self.assertTrue(v)
+                os.unlink(art_t)
+
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder1_file1) ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder1_subfolder2_file3) ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder3_file1) ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.folder4_file1) ) )
+            self.assertTrue( os.path.exists( path_utils.concat_path( self.extracted_folder, self.file0) ) )
+
+    def testRunBackupDedup1(self):
+
+        self.assertTrue(self.run_incremental(self.test_config_file_dedup))
+        self.assertFalse( os.path.exists( self.bk_test_temp_folder ) )
+        self.check_backup_targets_dedup()
+        chunks_before = self.get_chunk_files(self.test_target_1_folder)
+        self.assertTrue(len(chunks_before) > 0)
+        self.assertEqual(chunks_before.keys(), self.get_chunk_files(self.test_target_2_folder).keys())
+
+        # nothing changed - nothing gets written to the chunk store
+        self.assertTrue(self.run_incremental(self.test_config_file_dedup))
+        self.assertEqual(self.get_chunk_files(self.test_target_1_folder), chunks_before)
+        self.check_backup_targets_dedup()
+
+    def testRunBackupDedup2(self):
+
+        self.assertTrue(self.run_incremental(self.test_config_file_dedup))
+        chunks_before = self.get_chunk_files(self.test_target_1_folder)
+
+        # chunks nothing refers to anymore are removed
+        shutil.rmtree(self.folder3)
+        with open(self.folder1_file1, "w") as f:
+            f.write("changed")
+        self.assertTrue(self.run_incremental(self.test_config_file_dedup))
+        chunks_after = self.get_chunk_files(self.test_target_1_folder)
+        self.assertNotEqual(chunks_after.keys(), chunks_before.keys())
+
+        referenced = set()
+        for root, dirs, files in os.walk(path_utils.concat_path(self.test_target_1_folder, self.bk_base_folder_test)):
+            for n in files:
+                if n.endswith(".tar.index"):
+                    v, r = backup_chunkstore.load_index(path_utils.concat_path(root, n))
+                    self.assertTrue(v)
+                    referenced |= set([e[0] for e in r])
+        self.assertEqual(set(chunks_after.keys()), referenced)
+        self.assertFalse( os.path.exists( path_utils.concat_path(self.test_target_1_folder, self.bk_base_folder_test, "source_test", "folder3.tar.index") ) )
+
+    def testRunBackupDedup3(self):
+
+        # along with incremental backups, unchanged artifacts are not even read again
+        self.assertTrue(self.run_incremental(self.test_config_file_dedup_incremental))
+        index_file = path_utils.concat_path(self.test_target_1_folder, self.bk_base_folder_test, "source_test", "folder2.tar.index")
+        st = os.stat(index_file)
+        self.assertTrue( os.path.exists( "%s.manifest" % index_file ) )
+        self.assertTrue(self.run_incremental(self.test_config_file_dedup_incremental))
+        self.assertEqual(os.stat(index_file).st_ino, st.st_ino)
+        self.check_backup_targets_dedup()
+
     def testRunBackup2(self):
 
         # basic execution
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import shutil
+import importlib
+import unittest
+from unittest import mock
+
+import mvtools_test_fixture
+import mvtools_envvars
+import create_and_write_file
+import path_utils
+
+import lint_test_helper
+
+import codelint
+import codelint_cache
+
+class CodelintCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mvtools_envvars_inst = mvtools_envvars.Mvtools_Envvars()
+        v, r = self.mvtools_envvars_inst.make_copy_environ()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+        v, r = self.delegate_setUp()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+
+    def delegate_setUp(self):
+
+        v, r = mvtools_test_fixture.makeAndGetTestFolder("codelint_cache_test")
+        if not v:
+            return v, r
+        self.test_base_dir = r[0]
+        self.test_dir = r[1]
+
+        v, r = mvtools_envvars.mvtools_envvar_write_temp_path(self.test_dir)
+        if not v:
+            return False, "Failed setting up temp path envvar for testing."
+        self.cache_folder = path_utils.concat_path(self.test_dir, codelint_cache.CODELINT_CACHE_FOLDER)
+
+        self.file1 = path_utils.concat_path(self.test_dir, "file1.txt")
+        create_and_write_file.create_file_contents(self.file1, "first-line \nsecond-line\n   third-line")
+        self.file2 = path_utils.concat_path(self.test_dir, "file2.txt")
+        create_and_write_file.create_file_contents(self.file2, "everyline\neveryline")
+
+        codelint.plugin_table["lint-test-helper"] = (lint_test_helper, "")
+
+        self.plugins = ["lint-line-tidy", "lint-test-helper"]
+        self.plugins_params = {}
+        self.plugins_params["lint-test-helper-cycle-pattern-match"] = ["everyline"]
+        self.plugins_params["lint-test-helper-cycle-pattern-replace"] = ["modified-everyline"]
+
+        return True, ""
+
+    def tearDown(self):
+        shutil.rmtree(self.test_base_dir)
+        v, r = self.mvtools_envvars_inst.restore_copy_environ()
+        if not v:
+            self.fail(r)
+
+    def testGetCacheFolder1(self):
+
+        self.assertFalse(os.path.exists(self.cache_folder))
+        v, r = codelint_cache.get_cache_folder()
+        self.assertTrue(v)
+        self.assertEqual(r, self.cache_folder)
+        self.assertTrue(os.path.isdir(self.cache_folder))
+
+    def testMakeSetupKey1(self):
+
+        v, key1 = codelint_cache.make_setup_key([lint_test_helper], {"a": ["1"], "b": ["2"]}, {})
+        self.assertTrue(v)
+        v, key2 = codelint_cache.make_setup_key([lint_test_helper], {"b": ["2"], "a": ["1"]}, {})
+        self.assertTrue(v)
+        self.assertEqual(key1, key2)
+
+        v, key3 = codelint_cache.make_setup_key([lint_test_helper], {"a": ["1"], "b": ["3"]}, {})
+        self.assertTrue(v)
+        self.assertNotEqual(key1, key3)
+
+        v, key4 = codelint_cache.make_setup_key([lint_test_helper], {"a": ["1"], "b": ["2"]}, {"max-line": ["5"]})
+        self.assertTrue(v)
+        self.assertNotEqual(key1, key4)
+
+    def testMakeSetupKey2(self):
+
+        # codelint itself, and every mvtools module imported along the way, are part of the setup
+        sources = codelint_cache.collect_first_party_sources([lint_test_helper, codelint])
+        self.assertIn(os.path.abspath(codelint.__file__), sources)
+        self.assertIn(os.path.abspath(codelint_cache.__file__), sources)
+        self.assertIn(os.path.abspath(lint_test_helper.__file__), sources)
+        self.assertIn(os.path.abspath(path_utils.__file__), sources)
+        self.assertNotIn(os.path.abspath(os.__file__), sources)
+
+        v, key1 = codelint_cache.make_setup_key([lint_test_helper], {}, {})
+        self.assertTrue(v)
+        v, key2 = codelint_cache.make_setup_key([lint_test_helper], {}, {}, codelint)
+        self.assertTrue(v)
+        self.assertNotEqual(key1, key2)
+
+        with mock.patch("codelint_cache.CODELINT_ENGINE_VERSION", codelint_cache.CODELINT_ENGINE_VERSION + 1):
+            v, key3 = codelint_cache.make_setup_key([lint_test_helper], {}, {}, codelint)
+            self.assertTrue(v)
+        self.assertNotEqual(key2, key3)
+
+    def testMakeSetupKey3(self):
+
+        # editing a module that a plugin imports (not just the plugin itself) changes the setup
+        dep_file = path_utils.concat_path(self.test_dir, "codelint_cache_test_dep.py")
+        create_and_write_file.create_file_contents(dep_file, "VALUE = 1\n")
+        plugin_file = path_utils.concat_path(self.test_dir, "codelint_cache_test_plugin.py")
+        create_and_write_file.create_file_contents(plugin_file, "import codelint_cache_test_dep\n")
+
+        sys.path.insert(0, self.test_dir)
+        try:
+            test_plugin = importlib.import_module("codelint_cache_test_plugin")
+            v, key1 = codelint_cache.make_setup_key([test_plugin], {}, {})
+            self.assertTrue(v)
+
+            os.unlink(dep_file)
+            create_and_write_file.create_file_contents(dep_file, "VALUE = 2\n")
+            v, key2 = codelint_cache.make_setup_key([test_plugin], {}, {})
+            self.assertTrue(v)
+            self.assertNotEqual(key1, key2)
+        finally:
+            sys.path.remove(self.test_dir)
+            for m in ["codelint_cache_test_plugin", "codelint_cache_test_dep"]:
+                if m in sys.modules:
+                    del sys.modules[m]
+
+    def testSaveLoadReport1(self):
+
+        cache_file = path_utils.concat_path(self.test_dir, "report.json")
+        report = [(False, "Processing [x] - begin"), (True, "finding"), (False, "Processing [x] - end")]
+
+        self.assertEqual(codelint_cache.load_report(cache_file), None)
+
+        v, r = codelint_cache.save_report(cache_file, report)
+        self.assertTrue(v)
+        self.assertEqual(codelint_cache.load_report(cache_file), report)
+
+        os.unlink(cache_file)
+        create_and_write_file.create_file_contents(cache_file, "garbage")
+        self.assertEqual(codelint_cache.load_report(cache_file), None)
+
+        os.unlink(cache_file)
+        create_and_write_file.create_file_contents(cache_file, "{\"format\": \"codelint_cache\", \"version\": 1, \"report\": [[1, 2]]}")
+        self.assertEqual(codelint_cache.load_report(cache_file), None)
+
+    def testMakeLintCache1(self):
+
+        self.assertNotEqual(codelint_cache.make_lint_cache([lint_test_helper], {}, {}), None)
+
+        v, r = mvtools_envvars.mvtools_envvar_write_temp_path(path_utils.concat_path(self.test_dir, "nonexistent"))
+        self.assertTrue(v)
+        self.assertEqual(codelint_cache.make_lint_cache([lint_test_helper], {}, {}), None)
+
+    def testCodelintCached1(self):
+
+        v, r = codelint.codelint(self.plugins, self.plugins_params, {}, False, False, [self.file1, self.file2], use_cache=True)
+        self.assertTrue(v)
+        self.assertEqual(r[-1], (False, "Lint cache: 0 hits, 2 misses (0.0% hit ratio)"))
+        first_report = r[:-1]
+
+        v, r = codelint.codelint(self.plugins, self.plugins_params, {}, False, False, [self.file1, self.file2])
+        self.assertTrue(v)
+        self.assertEqual(r, first_report)
+
+        # unchanged files are not linted again
+        with mock.patch("codelint.helper_lint_lines_fused") as dummy:
+            v, r = codelint.codelint(self.plugins, self.plugins_params, {}, False, False, [self.file1, self.file2], use_cache=True)
+            dummy.assert_not_called()
+        self.assertTrue(v)
+        self.assertEqual(r[:-1], first_report)
+        self.assertEqual(r[-1], (False, "Lint cache: 2 hits, 0 misses (100.0% hit ratio)"))
+
+        os.unlink(self.file1)
+        create_and_write_file.create_file_contents(self.file1, "first-line")
+        v, r = codelint.codelint(self.plugins, self.plugins_params, {}, False, False, [self.file1, self.file2], use_cache=True)
+        self.assertTrue(v)
+        self.assertEqual(r[-1], (False, "Lint cache: 1 hit, 1 miss (50.0% hit ratio)"))
+        self.assertNotIn((True, "[file1.txt:1]: trailing spaces detected."), r)
+
+        v, r = codelint.codelint(self.plugins, self.plugins_params, {"max-findings": ["1"]}, False, False, [self.file1, self.file2], use_cache=True)
+        self.assertTrue(v)
+        self.assertEqual(r[-1], (False, "Lint cache: 0 hits, 2 misses (0.0% hit ratio)"))
+
+    def testCodelintCached2(self):
+
+        test_files = [self.file1, self.file2, self.file1, self.file2]
+
+        v, r = codelint.codelint(self.plugins, self.plugins_params, {}, False, False, test_files, 2, True)
+        self.assertTrue(v)
+        first_report = r[:-1]
+
+        v, r = codelint.codelint(self.plugins, self.plugins_params, {}, False, False, test_files, 2, True)
+        self.assertTrue(v)
+        self.assertEqual(r[:-1], first_report)
+        self.assertEqual(r[-1], (False, "Lint cache: 4 hits, 0 misses (100.0% hit ratio)"))
+
+    def testCodelintCached3(self):
+
+        # failures and autocorrected runs are never cached
+        self.plugins_params["lint-test-helper-post-fail"] = ["post failed"]
+        v, r = codelint.codelint(self.plugins, self.plugins_params, {}, False, False, [self.file1], use_cache=True)
+        self.assertFalse(v)
+        v, r = codelint.codelint(self.plugins, self.plugins_params, {}, False, False, [self.file1], use_cache=True)
+        self.assertFalse(v)
+
+        del self.plugins_params["lint-test-helper-post-fail"]
+        v, r = codelint.codelint(["lint-test-helper"], self.plugins_params, {}, True, False, [self.file2], use_cache=True)
+        self.assertTrue(v)
+        self.assertEqual(r[-1], (False, "Processing [%s] - end" % self.file2))
+        self.assertEqual(os.listdir(self.cache_folder), [])
+
+        v, r = codelint.codelint(self.plugins, self.plugins_params, {}, False, False, [self.file1], use_cache="yes")
+        self.assertFalse(v)
+        self.assertEqual(r, ("use_cache is not a bool", []))
+
+if __name__ == "__main__":
+    unittest.main()
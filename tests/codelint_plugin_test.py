@@ -71,7 +71,7 @@ class CodelintPluginTest(unittest.TestCase):
 
         v, r = self.codelint_task._read_params()
         self.assertTrue(v)
-        self.assertEqual(r, (["dummy_value1"], None, None, False, False, ["dummy_value2"], None, None))
+        self.assertEqual(r, (["dummy_value1"], None, None, False, False, True, ["dummy_value2"], None, None))
 
     def testCodelintPluginReadParams4(self):
 
@@ -83,7 +83,7 @@ class CodelintPluginTest(unittest.TestCase):
 
         v, r = self.codelint_task._read_params()
         self.assertTrue(v)
-        self.assertEqual(r, (["dummy_value1"], ["dummy_value2", "dummy_value3"], None, False, False, ["dummy_value4"], None, None))
+        self.assertEqual(r, (["dummy_value1"], ["dummy_value2", "dummy_value3"], None, False, False, True, ["dummy_value4"], None, None))
 
     def testCodelintPluginReadParams5(self):
 
@@ -95,7 +95,7 @@ class CodelintPluginTest(unittest.TestCase):
 
         v, r = self.codelint_task._read_params()
         self.assertTrue(v)
-        self.assertEqual(r, (["dummy_value1"], None, ["dummy_value2", "dummy_value3"], False, False, ["dummy_value4"], None, None))
+        self.assertEqual(r, (["dummy_value1"], None, ["dummy_value2", "dummy_value3"], False, False, True, ["dummy_value4"], None, None))
 
     def testCodelintPluginReadParams6(self):
 
@@ -107,7 +107,7 @@ class CodelintPluginTest(unittest.TestCase):
 
         v, r = self.codelint_task._read_params()
         self.assertTrue(v)
-        self.assertEqual(r, (["dummy_value1"], None, None, True, False, ["dummy_value2"], None, None))
+        self.assertEqual(r, (["dummy_value1"], None, None, True, False, True, ["dummy_value2"], None, None))
 
     def testCodelintPluginReadParams7(self):
 
@@ -119,7 +119,7 @@ class CodelintPluginTest(unittest.TestCase):
 
         v, r = self.codelint_task._read_params()
         self.assertTrue(v)
-        self.assertEqual(r, (["dummy_value1"], None, None, False, True, ["dummy_value2"], None, None))
+        self.assertEqual(r, (["dummy_value1"], None, None, False, True, True, ["dummy_value2"], None, None))
 
     def testCodelintPluginReadParams8(self):
 
@@ -130,7 +130,7 @@ class CodelintPluginTest(unittest.TestCase):
 
         v, r = self.codelint_task._read_params()
         self.assertTrue(v)
-        self.assertEqual(r, (["dummy_value1"], None, None, False, False, None, "dummy_value2", None))
+        self.assertEqual(r, (["dummy_value1"], None, None, False, False, True, None, "dummy_value2", None))
 
     def testCodelintPluginReadParams9(self):
 
@@ -142,7 +142,7 @@ class CodelintPluginTest(unittest.TestCase):
 
         v, r = self.codelint_task._read_params()
         self.assertTrue(v)
-        self.assertEqual(r, (["dummy_value1"], None, None, False, False, None, "dummy_value2", ["dummy_value3"]))
+        self.assertEqual(r, (["dummy_value1"], None, None, False, False, True, None, "dummy_value2", ["dummy_value3"]))
 
     def testCodelintPluginReadParams10(self):
 
@@ -154,7 +154,7 @@ class CodelintPluginTest(unittest.TestCase):
 
         v, r = self.codelint_task._read_params()
         self.assertTrue(v)
-        self.assertEqual(r, (["dummy_value1"], None, None, False, False, None, "dummy_value2", ["dummy_value3", "dummy_value4"]))
+        self.assertEqual(r, (["dummy_value1"], None, None, False, False, True, None, "dummy_value2", ["dummy_value3", "dummy_value4"]))
 
     def testCodelintPluginReadParams11(self):
 
@@ -200,6 +200,18 @@ class CodelintPluginTest(unittest.TestCase):
         v, r = self.codelint_task._read_params()
         self.assertFalse(v)
 
+    def testCodelintPluginReadParams15(self):
+
+        local_params = {}
+        local_params["plugins"] = "dummy_value1"
+        local_params["files"] = "dummy_value2"
+        local_params["no_cache"] = "dummy_value3"
+        self.codelint_task.params = local_params
+
+        v, r = self.codelint_task._read_params()
+        self.assertTrue(v)
+        self.assertEqual(r, (["dummy_value1"], None, None, False, False, False, ["dummy_value2"], None, None))
+
     def testCodelintPluginRunTask1(self):
 
         local_params = {}
@@ -211,7 +223,7 @@ class CodelintPluginTest(unittest.TestCase):
             v, r = self.codelint_task.run_task(print, "exe_name")
             self.assertTrue(v)
             self.assertEqual(r, None)
-            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"])
+            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"], 1, True)
 
     def testCodelintPluginRunTask2(self):
 
@@ -225,7 +237,7 @@ class CodelintPluginTest(unittest.TestCase):
             v, r = self.codelint_task.run_task(print, "exe_name")
             self.assertTrue(v)
             self.assertEqual(r, None)
-            dummy.assert_called_with(["dummy_value1"], {"dummy_value2": ["dummy_value3"]}, {}, False, False, ["dummy_value4"])
+            dummy.assert_called_with(["dummy_value1"], {"dummy_value2": ["dummy_value3"]}, {}, False, False, ["dummy_value4"], 1, True)
 
     def testCodelintPluginRunTask3(self):
 
@@ -239,7 +251,7 @@ class CodelintPluginTest(unittest.TestCase):
             v, r = self.codelint_task.run_task(print, "exe_name")
             self.assertTrue(v)
             self.assertEqual(r, None)
-            dummy.assert_called_with(["dummy_value1"], {"dummy_value2": ["dummy_value3", "dummy_value4"]}, {}, False, False, ["dummy_value5"])
+            dummy.assert_called_with(["dummy_value1"], {"dummy_value2": ["dummy_value3", "dummy_value4"]}, {}, False, False, ["dummy_value5"], 1, True)
 
     def testCodelintPluginRunTask4(self):
 
@@ -253,7 +265,7 @@ class CodelintPluginTest(unittest.TestCase):
             v, r = self.codelint_task.run_task(print, "exe_name")
             self.assertTrue(v)
             self.assertEqual(r, None)
-            dummy.assert_called_with(["dummy_value1"], {}, {"dummy_value2": ["dummy_value3"]}, False, False, ["dummy_value4"])
+            dummy.assert_called_with(["dummy_value1"], {}, {"dummy_value2": ["dummy_value3"]}, False, False, ["dummy_value4"], 1, True)
 
     def testCodelintPluginRunTask5(self):
 
@@ -267,7 +279,7 @@ class CodelintPluginTest(unittest.TestCase):
             v, r = self.codelint_task.run_task(print, "exe_name")
             self.assertTrue(v)
             self.assertEqual(r, None)
-            dummy.assert_called_with(["dummy_value1"], {}, {"dummy_value2": ["dummy_value3", "dummy_value4"]}, False, False, ["dummy_value5"])
+            dummy.assert_called_with(["dummy_value1"], {}, {"dummy_value2": ["dummy_value3", "dummy_value4"]}, False, False, ["dummy_value5"], 1, True)
 
     def testCodelintPluginRunTask6(self):
 
@@ -281,7 +293,7 @@ class CodelintPluginTest(unittest.TestCase):
                 v, r = self.codelint_task.run_task(print, "exe_name")
                 self.assertTrue(v)
                 self.assertEqual(r, None)
-                dummy1.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value3"])
+                dummy1.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value3"], 1, True)
                 dummy2.assert_called_with("dummy_value2", None)
 
     def testCodelintPluginRunTask7(self):
@@ -297,7 +309,7 @@ class CodelintPluginTest(unittest.TestCase):
                 v, r = self.codelint_task.run_task(print, "exe_name")
                 self.assertTrue(v)
                 self.assertEqual(r, None)
-                dummy1.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value4"])
+                dummy1.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value4"], 1, True)
                 dummy2.assert_called_with("dummy_value2", ["dummy_value3"])
 
     def testCodelintPluginRunTask8(self):
@@ -313,7 +325,7 @@ class CodelintPluginTest(unittest.TestCase):
                 v, r = self.codelint_task.run_task(print, "exe_name")
                 self.assertTrue(v)
                 self.assertEqual(r, None)
-                dummy1.assert_called_with(["dummy_value1"], {}, {}, True, False, ["dummy_value4"])
+                dummy1.assert_called_with(["dummy_value1"], {}, {}, True, False, ["dummy_value4"], 1, True)
                 dummy2.assert_called_with("dummy_value3", None)
 
     def testCodelintPluginRunTask9(self):
@@ -329,7 +341,7 @@ class CodelintPluginTest(unittest.TestCase):
                 v, r = self.codelint_task.run_task(print, "exe_name")
                 self.assertTrue(v)
                 self.assertEqual(r, None)
-                dummy1.assert_called_with(["dummy_value1"], {}, {}, False, True, ["dummy_value4"])
+                dummy1.assert_called_with(["dummy_value1"], {}, {}, False, True, ["dummy_value4"], 1, True)
                 dummy2.assert_called_with("dummy_value3", None)
 
     def testCodelintPluginRunTask10(self):
@@ -343,7 +355,7 @@ class CodelintPluginTest(unittest.TestCase):
             v, r = self.codelint_task.run_task(print, "exe_name")
             self.assertFalse(v)
             self.assertEqual(r, "dummy_value3")
-            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"])
+            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"], 1, True)
 
     def testCodelintPluginRunTask11(self):
 
@@ -360,7 +372,7 @@ class CodelintPluginTest(unittest.TestCase):
             self.assertEqual(self.feedback_obj_mock_stash[0], "Partially generated report:")
             self.assertEqual(self.feedback_obj_mock_stash[1], "dummy_value4")
             self.assertEqual(self.feedback_obj_mock_stash[2], "dummy_value5")
-            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"])
+            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"], 1, True)
 
     def testCodelintPluginRunTask12(self):
 
@@ -374,7 +386,7 @@ class CodelintPluginTest(unittest.TestCase):
             self.assertTrue(v)
             self.assertEqual(r, "(1 finding): #1: dummy_value3.")
             self.assertEqual(len(self.feedback_obj_mock_stash), 0)
-            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"])
+            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"], 1, True)
 
     def testCodelintPluginRunTask13(self):
 
@@ -388,7 +400,7 @@ class CodelintPluginTest(unittest.TestCase):
             self.assertTrue(v)
             self.assertEqual(r, "(2 findings): #1: dummy_value3. #2: dummy_value4.")
             self.assertEqual(len(self.feedback_obj_mock_stash), 0)
-            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"])
+            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"], 1, True)
 
     def testCodelintPluginRunTask14(self):
 
@@ -403,7 +415,7 @@ class CodelintPluginTest(unittest.TestCase):
             self.assertEqual(r, None)
             self.assertEqual(len(self.feedback_obj_mock_stash), 1)
             self.assertEqual(self.feedback_obj_mock_stash[0], "dummy_value3")
-            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"])
+            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"], 1, True)
 
     def testCodelintPluginRunTask15(self):
 
@@ -419,7 +431,7 @@ class CodelintPluginTest(unittest.TestCase):
             self.assertEqual(len(self.feedback_obj_mock_stash), 2)
             self.assertEqual(self.feedback_obj_mock_stash[0], "dummy_value3")
             self.assertEqual(self.feedback_obj_mock_stash[1], "dummy_value4")
-            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"])
+            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"], 1, True)
 
     def testCodelintPluginRunTask16(self):
 
@@ -434,7 +446,21 @@ class CodelintPluginTest(unittest.TestCase):
             self.assertEqual(r, "(1 finding): #1: dummy_value3.")
             self.assertEqual(len(self.feedback_obj_mock_stash), 1)
             self.assertEqual(self.feedback_obj_mock_stash[0], "dummy_value4")
-            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"])
+            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"], 1, True)
+
+    def testCodelintPluginRunTask17(self):
+
+        local_params = {}
+        local_params["plugins"] = "dummy_value1"
+        local_params["files"] = "dummy_value2"
+        local_params["no_cache"] = "dummy_value3"
+        self.codelint_task.params = local_params
+
+        with mock.patch("codelint.codelint", return_value=(True, [])) as dummy:
+            v, r = self.codelint_task.run_task(print, "exe_name")
+            self.assertTrue(v)
+            self.assertEqual(r, None)
+            dummy.assert_called_with(["dummy_value1"], {}, {}, False, False, ["dummy_value2"], 1, False)
 
 if __name__ == "__main__":
     unittest.main()
@@ -1247,5 +1247,169 @@ class CodeLintTest(unittest.TestCase):
 
         self.assertEqual(getcontents.getcontents(test_file1), "modified-everyline\nmodified-everyline\nmodified-everyline\neveryline\neveryline")
 
+    def testCodelintJobs1(self):
+
+        test_files = []
+        for i in range(7):
+            test_file = path_utils.concat_path(self.test_dir, "file%d.txt" % (i+1))
+            create_and_write_file.create_file_contents(test_file, "everyline\nsome-line\neveryline\neveryline\neveryline")
+            test_files.append(test_file)
+
+        codelint.plugin_table["lint-test-helper"] = (lint_test_helper, "")
+
+        test_plugins = ["lint-test-helper"]
+        test_plugins_params = {}
+        test_filters = {}
+
+        test_plugins_params["lint-test-helper-cycle-pattern-match"] = ["everyline"]
+        test_plugins_params["lint-test-helper-cycle-pattern-replace"] = ["modified-everyline"]
+
+        test_filters["max-findings"] = ["2"]
+
+        expected_report = []
+        for test_file in test_files:
+            expected_report.append((False, "Processing [%s] - begin" % test_file))
+            expected_report.append((False, "Plugin: [lint_test_helper.py] - begin"))
+            expected_report.append((True, "detected pattern [everyline] at line [1]"))
+            expected_report.append((True, "detected pattern [everyline] at line [3]"))
+            expected_report.append((False, "Plugin: [lint_test_helper.py] - end (detected 2 findings, applied 2 patches)"))
+            expected_report.append((False, "Processing [%s] - end" % test_file))
+
+        v, r = codelint.codelint(test_plugins, test_plugins_params, test_filters, True, False, test_files, 3)
+        self.assertTrue(v)
+        self.assertEqual(r, expected_report)
+
+        for test_file in test_files:
+            self.assertEqual(getcontents.getcontents(test_file), "modified-everyline\nsome-line\nmodified-everyline\neveryline\neveryline")
+
+    def testCodelintJobs2(self):
+
+        test_files = []
+        for i in range(5):
+            test_file = path_utils.concat_path(self.test_dir, "file%d.txt" % (i+1))
+            create_and_write_file.create_file_contents(test_file, "first-line\nsecond-line\nthird-line")
+            test_files.append(test_file)
+
+        with open(test_files[2], "wb") as f:
+            f.write(b"\xff\xfe\xfa")
+
+        codelint.plugin_table["lint-test-helper"] = (lint_test_helper, "")
+
+        test_plugins = ["lint-test-helper"]
+        test_plugins_params = {}
+        test_filters = {}
+
+        test_plugins_params["lint-test-helper-cycle-pattern-match"] = ["second-line"]
+        test_plugins_params["lint-test-helper-cycle-pattern-replace"] = ["modified-second-line"]
+
+        v, r_seq = codelint.codelint(test_plugins, test_plugins_params, test_filters, False, False, test_files)
+        self.assertFalse(v)
+        self.assertEqual(r_seq[0], "File [%s] is not UTF8 decodable" % test_files[2])
+
+        for jobs in [2, 5, 10]:
+            v, r = codelint.codelint(test_plugins, test_plugins_params, test_filters, False, False, test_files, jobs)
+            self.assertFalse(v)
+            self.assertEqual(r, r_seq)
+
+        v, r_seq = codelint.codelint(test_plugins, test_plugins_params, test_filters, False, True, test_files)
+        self.assertTrue(v)
+
+        v, r = codelint.codelint(test_plugins, test_plugins_params, test_filters, False, True, test_files, 4)
+        self.assertTrue(v)
+        self.assertEqual(r, r_seq)
+
+    def testCodelintJobs3(self):
+
+        test_file1 = path_utils.concat_path(self.test_dir, "file1.txt")
+        create_and_write_file.create_file_contents(test_file1, "first-line")
+
+        codelint.plugin_table["lint-test-helper"] = (lint_test_helper, "")
+
+        for jobs in [0, -1, "2", None, True]:
+            v, r = codelint.codelint(["lint-test-helper"], {}, {}, False, False, [test_file1], jobs)
+            self.assertFalse(v)
+            self.assertEqual(r, ("jobs must be a positive integer", []))
+
+    def testCodelintFused1(self):
+
+        test_file1 = path_utils.concat_path(self.test_dir, "file1.c")
+        test_file2 = path_utils.concat_path(self.test_dir, "file2.c")
+        create_and_write_file.create_file_contents(test_file1, "#ifndef A\n#define A\nint a = 5ul; \n   int b = 0;\n/* 7zz\n*/ int c = 3q;\n#endif")
+        create_and_write_file.create_file_contents(test_file2, "#ifndef X\n#define X\n  int d = 1;\n#endif")
+
+        codelint.plugin_table["lint-test-helper"] = (lint_test_helper, "")
+
+        test_plugins = ["lint-line-tidy", "lint-c-integer-suffix", "lint-c-check-header-guards", "lint-test-helper"]
+        test_plugins_params = {}
+        test_plugins_params["lint-test-helper-cycle-pattern-match"] = ["#define X"]
+        test_plugins_params["lint-test-helper-cycle-pattern-replace"] = ["#define Y"]
+        test_files = [test_file1, test_file2]
+
+        # single pass (no max-findings) and plugin by plugin (max-findings never reached) must report the same
+        v, r_fused = codelint.codelint(test_plugins, test_plugins_params, {}, False, False, test_files)
+        self.assertTrue(v)
+        v, r_seq = codelint.codelint(test_plugins, test_plugins_params, {"max-findings": ["1000"]}, False, False, test_files)
+        self.assertTrue(v)
+        self.assertEqual(r_fused, r_seq)
+        self.assertIn((True, "[file1.c:3] has [1] integer suffix violation."), r_fused)
+        self.assertIn((True, "[file1.c:4]: bad indentation detected."), r_fused)
+        self.assertIn((True, "detected pattern [#define X] at line [2]"), r_fused)
+
+        # (the header guards plugin fails here, as the guard's start is filtered out)
+        v, r_fused = codelint.codelint(test_plugins, test_plugins_params, {"min-line": ["2"], "max-line": ["6"]}, False, False, test_files)
+        self.assertFalse(v)
+        v, r_seq = codelint.codelint(test_plugins, test_plugins_params, {"min-line": ["2"], "max-line": ["6"], "max-findings": ["1000"]}, False, False, test_files)
+        self.assertFalse(v)
+        self.assertEqual(r_fused, r_seq)
+
+    def testCodelintFused2(self):
+
+        test_file1 = path_utils.concat_path(self.test_dir, "file1.txt")
+        create_and_write_file.create_file_contents(test_file1, "first-line \nsecond-line\nthird-line")
+
+        codelint.plugin_table["lint-test-helper"] = (lint_test_helper, "")
+
+        test_plugins = ["lint-line-tidy", "lint-test-helper"]
+        test_plugins_params = {}
+        test_plugins_params["lint-test-helper-cycle-fail"] = ["cycle failed"]
+
+        expected_report = []
+        expected_report.append((False, "Processing [%s] - begin" % test_file1))
+        expected_report.append((False, "Plugin: [lint_line_tidy.py] - begin"))
+        expected_report.append((True, "[file1.txt:1]: trailing spaces detected."))
+        expected_report.append((False, "Plugin: [lint_line_tidy.py] - end (detected 1 finding)"))
+        expected_report.append((False, "Plugin: [lint_test_helper.py] - begin"))
+
+        # a failing plugin yields the same error and partial report as the plugin by plugin execution
+        v, r = codelint.codelint(test_plugins, test_plugins_params, {}, False, False, [test_file1])
+        self.assertFalse(v)
+        self.assertEqual(r, ("Plugin [lint_test_helper.py] failed (cycle): [cycle failed]", expected_report))
+
+    def testCodelintCycleRange1(self):
+
+        test_file1 = path_utils.concat_path(self.test_dir, "file1.c")
+        create_and_write_file.create_file_contents(test_file1, "int a = 5ul; \n  int b = 1;\nint c = 3;")
+
+        # a min-line past the end of the file leaves nothing to lint - it is not an error
+        for test_plugins in [["lint-line-tidy"], ["lint-c-integer-suffix"], ["lint-line-tidy", "lint-c-integer-suffix"]]:
+            for test_filters in [{"min-line": ["10"]}, {"min-line": ["10"], "max-line": ["12"]}, {"min-line": ["4"]}]:
+
+                expected_report = []
+                expected_report.append((False, "Processing [%s] - begin" % test_file1))
+                for p in test_plugins:
+                    plugin_name = "%s.py" % p.replace("-", "_")
+                    expected_report.append((False, "Plugin: [%s] - begin" % plugin_name))
+                    expected_report.append((False, "Plugin: [%s] - end" % plugin_name))
+                expected_report.append((False, "Processing [%s] - end" % test_file1))
+
+                v, r = codelint.codelint(test_plugins, {}, test_filters, False, False, [test_file1])
+                self.assertTrue(v)
+                self.assertEqual(r, expected_report)
+
+        self.assertEqual(codelint.helper_get_cycle_range(3, 9, None), (3, 3))
+        self.assertEqual(codelint.helper_get_cycle_range(3, 9, 12), (3, 3))
+        self.assertEqual(codelint.helper_get_cycle_range(3, 1, None), (1, 3))
+        self.assertEqual(codelint.helper_get_cycle_range(3, 0, 2), (0, 1))
+
 if __name__ == "__main__":
     unittest.main()
@@ -4,6 +4,7 @@ import sys
 import os
 import shutil
 import unittest
+from unittest import mock
 
 import path_utils
 import fsquery
@@ -140,6 +141,17 @@ class CollectGitPatchTest(unittest.TestCase):
         self.assertFalse( os.path.exists( second_head_patch_filename ) )
         self.assertTrue( os.path.exists( second_head_id_patch_filename ) )
 
+    def testGeneralSingleStatus(self):
+
+        open_and_update_file.update_file_contents(self.first_file1, "extra")
+
+        # the repo status is only queried once, regardless of how many patches are collected
+        with mock.patch("git_wrapper.status_nullterm_porcelain_v1_records", wraps=git_wrapper.status_nullterm_porcelain_v1_records) as dummy:
+            v, r = collect_git_patch.collect_git_patch(self.first_repo, self.storage_path, "include", [], [], True, True, False, False, 0, 0, None)
+            self.assertTrue(v)
+            self.assertEqual(dummy.call_count, 1)
+        self.assertTrue(os.path.exists(path_utils.concat_path(self.storage_path, self.first_repo, "head.patch")))
+
     def testCollectPatchHeadFail(self):
 
         open_and_update_file.update_file_contents(self.first_file1, "extra")
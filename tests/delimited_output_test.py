@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import unittest
+
+import mvtools_test_fixture
+import create_and_write_file
+import path_utils
+
+import delimited_output
+
+def make_synthetic_status(num_entries):
+    entries = []
+    codes = [" M", "??", "A ", "MM", " D"]
+    for i in range(num_entries):
+        entries.append("%s src/module_%d/some_source_file_%d.c" % (codes[i % len(codes)], i // 100, i))
+    return delimited_output.NULLTERM.join(entries) + delimited_output.NULLTERM
+
+def split_records_charwise(output):
+
+    # the previous way of parsing
+
+    current = ""
+    records = []
+    for c in output:
+        if c == delimited_output.NULLTERM:
+            records.append(current)
+            current = ""
+        else:
+            current += c
+    return records
+
+class DelimitedOutputTest(unittest.TestCase):
+
+    def setUp(self):
+        v, r = self.delegate_setUp()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+
+    def delegate_setUp(self):
+
+        v, r = mvtools_test_fixture.makeAndGetTestFolder("delimited_output_test")
+        if not v:
+            return v, r
+        self.test_base_dir = r[0]
+        self.test_dir = r[1]
+
+        self.file1 = path_utils.concat_path(self.test_dir, "file1.txt")
+        create_and_write_file.create_file_contents(self.file1, "first\x00sec ond\x00\x00アーカイブ\x00trailing")
+
+        return True, ""
+
+    def tearDown(self):
+        shutil.rmtree(self.test_base_dir)
+
+    def testSplitRecords1(self):
+
+        self.assertEqual(delimited_output.split_records(""), [])
+        self.assertEqual(delimited_output.split_records("\x00"), [""])
+        self.assertEqual(delimited_output.split_records("a\x00b c\x00"), ["a", "b c"])
+        self.assertEqual(delimited_output.split_records("a\x00\x00b\x00"), ["a", "", "b"])
+        self.assertEqual(delimited_output.split_records("a\x00partial"), ["a"])
+
+    def testSplitRecords2(self):
+
+        self.assertEqual(delimited_output.split_records("a\x00partial", keep_partial=True), ["a", "partial"])
+        self.assertEqual(delimited_output.split_records("line1\nline2\n", "\n", True), ["line1", "line2", ""])
+        self.assertEqual(delimited_output.split_records("line1\r\nline2\r\n", "\r\n"), ["line1", "line2"])
+
+    def testRecordParser1(self):
+
+        parser = delimited_output.RecordParser()
+        self.assertEqual(parser.feed("fir"), [])
+        self.assertEqual(parser.feed("st\x00sec"), ["first"])
+        self.assertEqual(parser.feed(""), [])
+        self.assertEqual(parser.feed("ond\x00\x00third\x00four"), ["second", "", "third"])
+        self.assertEqual(parser.finish(), [])
+
+        parser = delimited_output.RecordParser()
+        self.assertEqual(parser.feed("a\x00tail"), ["a"])
+        self.assertEqual(parser.finish(True), ["tail"])
+
+    def testRecordParser2(self):
+
+        # bytes, with multibyte characters and terminators cut in between pieces
+        data = "アーカイブ\r\nsecond\r\n".encode("utf8")
+        parser = delimited_output.RecordParser("\r\n")
+        records = []
+        for i in range(len(data)):
+            records += parser.feed(data[i:i+1])
+        self.assertEqual(records, ["アーカイブ", "second"])
+        self.assertEqual(parser.finish(True), [])
+
+    def testRecordParser3(self):
+
+        parser = delimited_output.RecordParser()
+        self.assertEqual(parser.write(b"a\x00b"), (True, None))
+        self.assertEqual(parser.write(b"\x00c"), (True, None))
+        self.assertEqual(parser.get_records(), ["a", "b"])
+
+    def testRunCmdRecords1(self):
+
+        v, r = delimited_output.run_cmd_records(["cat", self.file1])
+        self.assertTrue(v)
+        self.assertEqual(r, ["first", "sec ond", "", "アーカイブ"])
+
+        v, r = delimited_output.run_cmd_records(["cat", self.file1], keep_partial=True)
+        self.assertTrue(v)
+        self.assertEqual(r, ["first", "sec ond", "", "アーカイブ", "trailing"])
+
+    def testRunCmdRecords2(self):
+
+        v, r = delimited_output.run_cmd_records(["cat", path_utils.concat_path(self.test_dir, "nonexistent")])
+        self.assertFalse(v)
+
+        v, r = delimited_output.run_cmd_records([path_utils.concat_path(self.test_dir, "nonexistent_cmd")])
+        self.assertFalse(v)
+
+    def testSyntheticStatus1(self):
+
+        # a large status output parses the same as the old char by char loop did - whole or in chunks
+        output = make_synthetic_status(5000)
+        expected = split_records_charwise(output)
+        self.assertEqual(len(expected), 5000)
+        self.assertEqual(delimited_output.split_records(output), expected)
+
+        output_bytes = output.encode("utf8")
+        parser = delimited_output.RecordParser()
+        for i in range(0, len(output_bytes), 4096):
+            parser.write(output_bytes[i:i+4096])
+        self.assertEqual(parser.get_records() + parser.finish(), expected)
+
+if __name__ == "__main__":
+    unittest.main()
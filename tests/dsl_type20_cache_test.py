@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+import os
+import stat
+import shutil
+import unittest
+from unittest import mock
+
+import mvtools_test_fixture
+import mvtools_envvars
+import path_utils
+
+import dsl_type20
+import dsl_type20_cache
+
+class DSLType20CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mvtools_envvars_inst = mvtools_envvars.Mvtools_Envvars()
+        v, r = self.mvtools_envvars_inst.make_copy_environ()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+        v, r = self.delegate_setUp()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+
+    def delegate_setUp(self):
+
+        v, r = mvtools_test_fixture.makeAndGetTestFolder("dsl_type20_cache_test")
+        if not v:
+            return v, r
+        self.test_base_dir = r[0]
+        self.test_dir = r[1]
+
+        v, r = mvtools_envvars.mvtools_envvar_write_temp_path(self.test_dir)
+        if not v:
+            return False, "Failed setting up temp path envvar for testing."
+        self.cache_folder = path_utils.concat_path(self.test_dir, dsl_type20_cache.DSLTYPE20_CACHE_FOLDER)
+
+        v, r = mvtools_envvars.mvtools_envvar_read_test_dsltype20_reserved_1()
+        if v:
+            return False, "DSLType20's first test envvar is defined. This test requires it to be undefined."
+
+        self.contents_1 = "var1 {opt1: \"a\"} = \"val1\"\n"
+        self.contents_1 += "[\n"
+        self.contents_1 += "@ctx1 {opt2}\n"
+        self.contents_1 += "var2 = (\"b\", \"c\")\n"
+        self.contents_1 += "[\n"
+        self.contents_1 += "@ctx2\n"
+        self.contents_1 += "var3\n"
+        self.contents_1 += "]\n"
+        self.contents_1 += "var4 = \"val4\"\n"
+        self.contents_1 += "]\n"
+        self.contents_1 += "[\n"
+        self.contents_1 += "@ctx3\n"
+        self.contents_1 += "]\n"
+        self.contents_1 += "var5 = \"val5\"\n"
+
+        self.contents_2 = "var1 = \"$MVTOOLS_TEST_DSLTYPE20_RESERVED_1\"\n"
+
+        return True, ""
+
+    def tearDown(self):
+        shutil.rmtree(self.test_base_dir)
+        v, r = self.mvtools_envvars_inst.restore_copy_environ()
+        if not v:
+            self.fail(r)
+
+    def make_dsl(self, expand_envvars = False):
+        return dsl_type20.DSLType20(dsl_type20.DSLType20_Config(expand_envvars = expand_envvars))
+
+    def testParseCached1(self):
+
+        dsl_reference = self.make_dsl()
+        self.assertTrue(dsl_reference.parse(self.contents_1)[0])
+
+        # miss
+        dsl = self.make_dsl()
+        v, r = dsl_type20_cache.parse_cached(dsl, self.contents_1)
+        self.assertTrue(v)
+        self.assertTrue(dsl_type20.compare_entries(dsl.data, dsl_reference.data)[0])
+        self.assertEqual(len(os.listdir(self.cache_folder)), 1)
+
+        # hit
+        dsl = self.make_dsl()
+        with mock.patch("dsl_type20.DSLType20.parse") as dummy:
+            v, r = dsl_type20_cache.parse_cached(dsl, self.contents_1)
+            dummy.assert_not_called()
+        self.assertTrue(v)
+        self.assertTrue(dsl_type20.compare_entries(dsl.data, dsl_reference.data)[0])
+        self.assertEqual(dsl.produce(), dsl_reference.produce())
+
+    def testParseCached2(self):
+
+        # changed contents miss the cache
+        self.assertTrue(dsl_type20_cache.parse_cached(self.make_dsl(), self.contents_1)[0])
+        dsl = self.make_dsl()
+        v, r = dsl_type20_cache.parse_cached(dsl, self.contents_1 + "var6\n")
+        self.assertTrue(v)
+        self.assertEqual(len(os.listdir(self.cache_folder)), 2)
+        self.assertEqual(dsl.get_all_variables()[1][-1].get_name(), "var6")
+
+    def testParseCached3(self):
+
+        # failed parses are not cached
+        dsl = self.make_dsl()
+        v, r = dsl_type20_cache.parse_cached(dsl, "[\nvar1\n")
+        self.assertFalse(v)
+        self.assertEqual(len(os.listdir(self.cache_folder)), 0)
+
+    def testParseCached4(self):
+
+        # corrupt cache files are replaced
+        cache_file = dsl_type20_cache.get_cache_filename(dsl_type20_cache.get_cache_folder()[1], self.make_dsl().configs, self.contents_1)
+        with open(cache_file, "w") as f:
+            f.write("garbage\n")
+
+        dsl = self.make_dsl()
+        v, r = dsl_type20_cache.parse_cached(dsl, self.contents_1)
+        self.assertTrue(v)
+        self.assertEqual(len(dsl.get_all_variables()[1]), 2)
+        self.assertTrue(dsl_type20_cache.load_records(cache_file)[0])
+
+    def testParseCached5(self):
+
+        # expansion happens at load time, not at caching time
+        v, r = mvtools_envvars.mvtools_envvar_write_test_dsltype20_reserved_1("first")
+        self.assertTrue(v)
+        dsl = self.make_dsl(True)
+        self.assertTrue(dsl_type20_cache.parse_cached(dsl, self.contents_2)[0])
+        self.assertEqual(dsl.get_variables("var1")[1][0].get_value(), "first")
+
+        v, r = mvtools_envvars.mvtools_envvar_write_test_dsltype20_reserved_1("second")
+        self.assertTrue(v)
+        dsl = self.make_dsl(True)
+        self.assertTrue(dsl_type20_cache.parse_cached(dsl, self.contents_2)[0])
+        self.assertEqual(dsl.get_variables("var1")[1][0].get_value(), "second")
+        self.assertEqual(len(os.listdir(self.cache_folder)), 1)
+
+    def testParseCached6(self):
+
+        # the cache is keyed by the configs that shape the tree too
+        dsl_1 = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(var_decorator = "* "))
+        self.assertTrue(dsl_type20_cache.parse_cached(dsl_1, "* var1 = \"val1\"\n")[0])
+        dsl_2 = self.make_dsl()
+        self.assertFalse(dsl_type20_cache.parse_cached(dsl_2, "* var1 = \"val1\"\n")[0])
+
+    def testParseCached7(self):
+
+        # no usable temp path - the contents are just parsed
+        os.environ.pop("MVTOOLS_TEMP_PATH")
+        dsl = self.make_dsl()
+        v, r = dsl_type20_cache.parse_cached(dsl, self.contents_1)
+        self.assertTrue(v)
+        self.assertFalse(os.path.exists(self.cache_folder))
+        self.assertEqual(len(dsl.get_all_variables()[1]), 2)
+
+    def testParseCached8(self):
+
+        # the least recently used entries are dropped past the cap
+        contents_list = ["var%d = \"val\"\n" % i for i in range(5)]
+        with mock.patch("dsl_type20_cache.DSLTYPE20_CACHE_MAX_ENTRIES", 3):
+            for i in range(3):
+                self.assertTrue(dsl_type20_cache.parse_cached(self.make_dsl(), contents_list[i])[0])
+                os.utime(dsl_type20_cache.get_cache_filename(self.cache_folder, self.make_dsl().configs, contents_list[i]), ns=(i * 1000000000, i * 1000000000))
+
+            # a hit refreshes the entry (contents_list[0] becomes the most recently used)
+            self.assertTrue(dsl_type20_cache.parse_cached(self.make_dsl(), contents_list[0])[0])
+            self.assertTrue(dsl_type20_cache.parse_cached(self.make_dsl(), contents_list[3])[0])
+            self.assertTrue(dsl_type20_cache.parse_cached(self.make_dsl(), contents_list[4])[0])
+
+        remaining = []
+        for i in range(5):
+            if os.path.exists(dsl_type20_cache.get_cache_filename(self.cache_folder, self.make_dsl().configs, contents_list[i])):
+                remaining.append(i)
+        self.assertEqual(remaining, [0, 3, 4])
+
+    def testParseCached9(self):
+
+        # the cache is private to its owner
+        self.assertTrue(dsl_type20_cache.parse_cached(self.make_dsl(), self.contents_1)[0])
+        self.assertEqual(stat.S_IMODE(os.stat(self.cache_folder).st_mode), 0o700)
+        cache_file = dsl_type20_cache.get_cache_filename(self.cache_folder, self.make_dsl().configs, self.contents_1)
+        self.assertEqual(stat.S_IMODE(os.stat(cache_file).st_mode), 0o600)
+
+if __name__ == "__main__":
+    unittest.main()
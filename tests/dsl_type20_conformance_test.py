@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+import os
+import io
+import unittest
+from unittest import mock
+
+import path_utils
+
+import dsl_type20
+import dsl_type20_stream
+import mvtools_exception
+
+import dsl_type20_test
+
+class DSLType20ConformanceTest(dsl_type20_test.DSLType20Test):
+
+    # reruns the entire dsl_type20 test suite with both parsers working side by side - any divergence between them raises
+
+    def setUp(self):
+        patcher = mock.patch("dsl_type20.DSLTYPE20_DEFAULT_PARSER", dsl_type20.DSLTYPE20_PARSER_CONFORMANCE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+class DSLType20StreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.contents = "var1 = \"val1\"\r\n[\n@ctx1 {opt1: \"a\\\"b\"}\nvar2 {opt2} = (\"c\", \"d\") # comment\n]\n"
+
+    def make_dsl(self, parser):
+        return dsl_type20.DSLType20(dsl_type20.DSLType20_Config(parser = parser))
+
+    def check_result(self, dsl):
+        v, r = dsl.get_all_variables()
+        self.assertTrue(v)
+        self.assertEqual(dsl_type20.convert_var_obj_list_to_neutral_format(r), [("var1", "val1", [])])
+        v, r = dsl.get_all_variables("ctx1")
+        self.assertTrue(v)
+        self.assertEqual(dsl_type20.convert_var_obj_list_to_neutral_format(r), [("var2", ["c", "d"], [("opt2", None)])])
+        v, r = dsl.get_context_options("ctx1")
+        self.assertTrue(v)
+        self.assertEqual(dsl_type20.convert_opt_obj_list_to_neutral_format(r), [("opt1", "a\"b")])
+
+    def testIterateLines1(self):
+        self.assertEqual(list(dsl_type20_stream.iterate_lines("")), [""])
+        self.assertEqual(list(dsl_type20_stream.iterate_lines("a\r\nb\n")), ["a", "b", ""])
+        self.assertEqual(list(dsl_type20_stream.iterate_lines(["a\r", "\nb", "c\r\r\n", "d"])), ["a", "bc\r", "d"])
+
+    def testSanitizeBounds1(self):
+        self.assertEqual(dsl_type20_stream.sanitize_bounds("   "), (3, 3))
+        self.assertEqual(dsl_type20_stream.sanitize_bounds("  # abc"), (2, 2))
+        self.assertEqual(dsl_type20_stream.sanitize_bounds(" var1 = \"a#b//c\" // comment "), (1, 16))
+        self.assertEqual(dsl_type20_stream.sanitize_bounds("var1 = \"a\" # \"b\""), (0, 10))
+
+    def testParseStream1(self):
+        dsl = self.make_dsl(dsl_type20.DSLTYPE20_PARSER_STREAM)
+        v, r = dsl.parse(self.contents)
+        self.assertTrue(v)
+        self.check_result(dsl)
+
+    def testParseStream2(self):
+        dsl = self.make_dsl(dsl_type20.DSLTYPE20_PARSER_STREAM)
+        v, r = dsl.parse_stream(io.StringIO(self.contents))
+        self.assertTrue(v)
+        self.check_result(dsl)
+
+    def testParseStream3(self):
+        # arbitrarily chunked input
+        dsl = self.make_dsl(dsl_type20.DSLTYPE20_PARSER_STREAM)
+        v, r = dsl.parse_stream([self.contents[i:i+3] for i in range(0, len(self.contents), 3)])
+        self.assertTrue(v)
+        self.check_result(dsl)
+
+    def testParseStream4(self):
+        # the classic parser also accepts streams
+        dsl = self.make_dsl(dsl_type20.DSLTYPE20_PARSER_CLASSIC)
+        v, r = dsl.parse_stream(io.StringIO(self.contents))
+        self.assertTrue(v)
+        self.check_result(dsl)
+
+    def testParseStream5(self):
+        dsl = self.make_dsl(dsl_type20.DSLTYPE20_PARSER_STREAM)
+        v, r = dsl.parse_stream(["var1 = \"val1\"\n", "[\n", "var2 = \"val2\"\n"])
+        self.assertFalse(v)
+
+    def testParseInvalidParser(self):
+        dsl = self.make_dsl("invalid-parser")
+        v, r = dsl.parse(self.contents)
+        self.assertFalse(v)
+
+    def testParseConformance1(self):
+        dsl = self.make_dsl(dsl_type20.DSLTYPE20_PARSER_CONFORMANCE)
+        v, r = dsl.parse(self.contents)
+        self.assertTrue(v)
+        self.check_result(dsl)
+
+    def testParseConformance2(self):
+        dsl = self.make_dsl(dsl_type20.DSLTYPE20_PARSER_CONFORMANCE)
+        v, r = dsl.parse("var1 = \"val1\" ]")
+        self.assertFalse(v)
+
+    def testParseConformance3(self):
+        dsl = self.make_dsl(dsl_type20.DSLTYPE20_PARSER_CONFORMANCE)
+        with mock.patch("dsl_type20_stream.parse_variable", return_value=(True, ("var1", "val2", []))):
+            with self.assertRaises(mvtools_exception.mvtools_exception):
+                dsl.parse("var1 = \"val1\"")
+
+    def testParseConformance4(self):
+        dsl = self.make_dsl(dsl_type20.DSLTYPE20_PARSER_CONFORMANCE)
+        with mock.patch("dsl_type20_stream.parse_variable", return_value=(False, "test error")):
+            with self.assertRaises(mvtools_exception.mvtools_exception):
+                dsl.parse("var1 = \"val1\"")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2102,7 +2102,7 @@ class DSLType20Test(unittest.TestCase):
         self.assertTrue(v)
         v, r = dsl.get_context("ctx2")
         self.assertTrue(v)
-        self.assertEqual(dsl_type20.convert_opt_obj_list_to_neutral_format(r.get_options()), [("opt1", "val1"), ("opt2", "val2")])
+        self.assertEqual(sorted(dsl_type20.convert_opt_obj_list_to_neutral_format(r.get_options())), [("opt1", "val1"), ("opt2", "val2")])
 
     def testDslType20_TestGetContext10(self):
         dsl = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(inherit_options = True))
@@ -2256,7 +2256,7 @@ class DSLType20Test(unittest.TestCase):
         self.assertTrue(v)
         v, r = dsl.get_sub_context("ctx2", "ctx1")
         self.assertTrue(v)
-        self.assertEqual(dsl_type20.convert_opt_obj_list_to_neutral_format(r.get_options()), [("opt1", "val1"), ("opt2", "val2")])
+        self.assertEqual(sorted(dsl_type20.convert_opt_obj_list_to_neutral_format(r.get_options())), [("opt1", "val1"), ("opt2", "val2")])
 
     def testDslType20_TestGetSubContext7(self):
         dsl = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(inherit_options = True))
@@ -3080,6 +3080,59 @@ class DSLType20Test(unittest.TestCase):
         self.assertEqual(len(r), 0)
         self.assertEqual([x.get_name() for x in r], [])
 
+    def testDslType20_TestRemContext8(self):
+        dsl = dsl_type20.DSLType20(dsl_type20.DSLType20_Config())
+        self.assertTrue(dsl.add_context("ctx1", [], None)[0])
+        self.assertTrue(dsl.add_context("ctx2", [], "ctx1")[0])
+        self.assertTrue(dsl.add_context("ctx3", [], "ctx2")[0])
+        self.assertTrue(dsl.add_variable("var1", "val1", [], "ctx3")[0])
+        self.assertTrue(dsl.rem_context("ctx1")[0])
+        self.assertFalse(dsl.get_context("ctx1")[0])
+        self.assertFalse(dsl.get_context("ctx2")[0])
+        self.assertFalse(dsl.get_context("ctx3")[0])
+        self.assertFalse(dsl.get_variables("var1", "ctx3")[0])
+        self.assertFalse(dsl.rem_context("ctx3")[0])
+
+        # the removed names are available again
+        self.assertTrue(dsl.add_context("ctx3", [], None)[0])
+        self.assertTrue(dsl.add_context("ctx2", [], "ctx3")[0])
+        v, r = dsl.get_all_sub_contexts("ctx3")
+        self.assertTrue(v)
+        self.assertEqual([x.get_name() for x in r], ["ctx2"])
+        self.assertEqual(var_fmt_helper(dsl.get_all_variables("ctx3")), [])
+
+    def testDslType20_TestRemContext9(self):
+        dsl = dsl_type20.DSLType20(dsl_type20.DSLType20_Config())
+        self.assertTrue(dsl.add_variable("ctx1", "val1", [])[0])
+        self.assertTrue(dsl.add_context("ctx1", [], None)[0])
+        self.assertTrue(dsl.rem_context("ctx1")[0])
+        self.assertFalse(dsl.get_context("ctx1")[0])
+        self.assertEqual(var_fmt_helper(dsl.get_all_variables()), [("ctx1", "val1", [])])
+
+    def testDslType20_TestIndexConsistency1(self):
+        dsl = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(allow_var_dupes = False))
+        self.assertTrue(dsl.add_context("ctx1", [], None)[0])
+        self.assertTrue(dsl.add_variable("var1", "val1", [], "ctx1")[0])
+        self.assertTrue(dsl.add_variable("var2", "val2", [], "ctx1")[0])
+        self.assertFalse(dsl.add_variable("var1", "val3", [], "ctx1")[0])
+        self.assertEqual(dsl.rem_variables("var1", "ctx1"), (True, 1))
+        self.assertTrue(dsl.add_variable("var1", "val3", [], "ctx1")[0])
+        self.assertEqual(var_fmt_helper(dsl.get_variables("var1", "ctx1")), [("var1", "val3", [])])
+        self.assertEqual(var_fmt_helper(dsl.get_all_variables("ctx1")), [("var2", "val2", []), ("var1", "val3", [])])
+        self.assertEqual(dsl.rem_all_variables("ctx1"), (True, ["var2", "var1"]))
+        self.assertEqual(var_fmt_helper(dsl.get_variables("var1", "ctx1")), [])
+        self.assertTrue(dsl.add_variable("var1", "val4", [], "ctx1")[0])
+        self.assertEqual(var_fmt_helper(dsl.get_all_variables("ctx1")), [("var1", "val4", [])])
+
+    def testDslType20_TestIndexConsistency2(self):
+        dsl = dsl_type20.DSLType20(dsl_type20.DSLType20_Config())
+        self.assertTrue(dsl.add_context("ctx1", [], None)[0])
+        self.assertTrue(dsl.add_variable("var1", "val1", [], "ctx1")[0])
+        self.assertTrue(dsl.parse("var2 = \"val2\"")[0])
+        self.assertFalse(dsl.get_context("ctx1")[0])
+        self.assertFalse(dsl.get_variables("var1", "ctx1")[0])
+        self.assertEqual(var_fmt_helper(dsl.get_variables("var2")), [("var2", "val2", [])])
+
     def testDslType20_TestProduce1(self):
         dsl_1 = dsl_type20.DSLType20(dsl_type20.DSLType20_Config())
         self.assertTrue(dsl_1.add_variable("var1", "val1", [])[0])
@@ -4019,5 +4072,109 @@ class DSLType20Test(unittest.TestCase):
         self.assertEqual(r[0], "}")
         self.assertEqual(r[1], ["   abc  ", "  def   "])
 
+    def testDslType20_TestReadOnlyViews1(self):
+
+        contents = "var1 {opt1: \"a\"} = \"val1\"\n[\n@ctx1 {opt1: \"b\" / opt2}\nvar2 = (\"c\", \"d\")\n[\n@ctx2 {opt3: \"e\"}\nvar3 {opt2 / opt4} = \"val3\"\n]\n]\n[\n@ctx3\nvar4\n]\n"
+
+        for inherit in [False, True]:
+
+            dsl_copies = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(inherit_options = inherit))
+            self.assertTrue(dsl_copies.parse(contents)[0])
+            dsl_views = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(inherit_options = inherit, read_only_views = True))
+            self.assertTrue(dsl_views.parse(contents)[0])
+
+            self.assertEqual(var_fmt_helper(dsl_views.get_all_variables_dfs()), var_fmt_helper(dsl_copies.get_all_variables_dfs()))
+            self.assertEqual(var_fmt_helper(dsl_views.get_variables("var3", "ctx2")), var_fmt_helper(dsl_copies.get_variables("var3", "ctx2")))
+            self.assertEqual(opt_fmt_helper(dsl_views.get_context_options("ctx2")), opt_fmt_helper(dsl_copies.get_context_options("ctx2")))
+
+            v1, r1 = dsl_views.get_all_contexts_dfs()
+            v2, r2 = dsl_copies.get_all_contexts_dfs()
+            self.assertTrue(v1 and v2)
+            self.assertEqual([(x.get_name(), dsl_type20.convert_opt_obj_list_to_neutral_format(x.get_options())) for x in r1], [(x.get_name(), dsl_type20.convert_opt_obj_list_to_neutral_format(x.get_options())) for x in r2])
+
+            v1, r1 = dsl_views.get_entire_dfs()
+            v2, r2 = dsl_copies.get_entire_dfs()
+            self.assertTrue(v1 and v2)
+            self.assertEqual([(x.get_type(), x.get_name()) for x in r1], [(x.get_type(), x.get_name()) for x in r2])
+
+            v1, r1 = dsl_views.get_context("ctx1")
+            v2, r2 = dsl_copies.get_context("ctx1")
+            self.assertTrue(v1 and v2)
+            self.assertEqual([(x.get_type(), x.get_name(), dsl_type20.convert_opt_obj_list_to_neutral_format(x.get_options())) for x in r1.get_entries()], [(x.get_type(), x.get_name(), dsl_type20.convert_opt_obj_list_to_neutral_format(x.get_options())) for x in r2.get_entries()])
+
+    def testDslType20_TestReadOnlyViews2(self):
+        dsl = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(inherit_options = True, read_only_views = True))
+        self.assertTrue(dsl.add_context("ctx1", [("opt1", "val1")], None)[0])
+        self.assertTrue(dsl.add_variable("var1", "val1", [], "ctx1")[0])
+
+        v, r = dsl.get_variables("var1", "ctx1")
+        self.assertTrue(v)
+        var_view = r[0]
+        self.assertIsInstance(var_view, dsl_type20.DSLType20_VariableView)
+        with self.assertRaises(AttributeError):
+            var_view.value = "val2"
+        with self.assertRaises(AttributeError):
+            var_view.get_options()[0].value = "val2"
+
+        # the inherited options are only computed once, and shared afterwards
+        v, r = dsl.get_variables("var1", "ctx1")
+        self.assertTrue(v)
+        self.assertIs(r[0].get_options()[0], var_view.get_options()[0])
+
+        v, r = dsl.get_context("ctx1")
+        self.assertTrue(v)
+        self.assertEqual(r.get_parent_ptr().get_name(), dsl.root_context_id)
+        self.assertEqual(r.get_parent_ptr().get_parent_ptr(), None)
+
+    def testDslType20_TestReadOnlyViews3(self):
+        dsl = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(inherit_options = True, read_only_views = True))
+        self.assertTrue(dsl.add_context("ctx1", [("opt1", "val1"), ("opt2", "val2")], None)[0])
+        self.assertTrue(dsl.add_context("ctx2", [("opt1", "val1")], "ctx1")[0])
+        self.assertTrue(dsl.add_variable("var1", "val1", [("opt3", "val3")], "ctx2")[0])
+
+        # own options exclude the inherited ones - even those with the same value
+        v, r = dsl.get_context("ctx2")
+        self.assertTrue(v)
+        self.assertEqual(sorted(dsl_type20.convert_opt_obj_list_to_neutral_format(r.get_options())), [("opt1", "val1"), ("opt2", "val2")])
+        self.assertEqual(dsl_type20.convert_opt_obj_list_to_neutral_format(r.get_own_options()), [("opt1", "val1")])
+
+        v, r = dsl.get_variables("var1", "ctx2")
+        self.assertTrue(v)
+        self.assertEqual(dsl_type20.convert_opt_obj_list_to_neutral_format(r[0].get_own_options()), [("opt3", "val3")])
+        with self.assertRaises(AttributeError):
+            r[0].get_own_options()[0].value = "val4"
+
+    def testDslType20_TestCopyShared1(self):
+
+        contents = "var1 {opt1: \"a\"} = \"val1\"\n[\n@ctx1 {opt1: \"b\" / opt2}\nvar2 = (\"c\", \"d\")\n[\n@ctx2 {opt3: \"e\"}\nvar3 {opt2 / opt4} = \"val3\"\n]\n]\n[\n@ctx3\nvar4\n]\n[\n@ctx5\nvar5\n]\n"
+
+        for views in [False, True]:
+
+            dsl_orig = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(inherit_options = True, read_only_views = views))
+            self.assertTrue(dsl_orig.parse(contents)[0])
+            orig_contents = dsl_orig.produce()
+            dsl_expected = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(inherit_options = True, read_only_views = views))
+            self.assertTrue(dsl_expected.parse(contents)[0])
+
+            dsl_copy = dsl_orig.copy_shared(["ctx1", "ctx3"])
+            for d in [dsl_copy, dsl_expected]:
+                self.assertTrue(d.add_variable("var6", "val6", [], "ctx3")[0])
+                self.assertTrue(d.rem_variables("var2", "ctx1")[0])
+                self.assertTrue(d.add_variable("var7", "val7", [], None)[0])
+                self.assertTrue(d.add_variable("var8", "val8", [], "ctx4")[0])
+                self.assertTrue(d.rem_context("ctx2")[0])
+
+            # the copy carries all changes, the original none of them
+            self.assertEqual(dsl_copy.produce(), dsl_expected.produce())
+            self.assertEqual(dsl_orig.produce(), orig_contents)
+            self.assertEqual(dsl_orig.get_context("ctx2")[1].get_name(), "ctx2")
+            self.assertFalse(dsl_copy.get_context("ctx2")[0])
+
+            # contexts that were not written to keep sharing their entries
+            self.assertIs(dsl_copy.context_index["ctx5"].entries, dsl_orig.context_index["ctx5"].entries)
+            self.assertIsNot(dsl_copy.context_index["ctx3"].entries, dsl_orig.context_index["ctx3"].entries)
+            self.assertIs(dsl_copy.context_index["ctx5"].get_parent_ptr(), dsl_copy.data)
+            self.assertEqual(var_fmt_helper(dsl_copy.get_variables("var5", "ctx5")), var_fmt_helper(dsl_orig.get_variables("var5", "ctx5")))
+
 if __name__ == "__main__":
     unittest.main()
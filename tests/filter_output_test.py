@@ -1,9 +1,13 @@
 #!/usr/bin/env python
 
 import os
+import io
 import shutil
 import unittest
 
+import mvtools_exception
+import terminal_colors
+
 import filter_output
 
 class FilterOutputTest(unittest.TestCase):
@@ -178,5 +182,109 @@ class FilterOutputTest(unittest.TestCase):
         v, r = filter_output.is_asan_stack_entry(1, "    #1 0x7fb5de828801  (/home/path/out/linux/debug/selftests+0x3a1801)")
         self.assertTrue(v)
 
+    def testLinesFromStream(self):
+        for contents in ["", "\n", "a", "a\n", "a\nb", "a\n\nb\n", "\n\n"]:
+            self.assertEqual(list(filter_output.lines_from_stream(io.StringIO(contents))), contents.split("\n"))
+
+    def testLinesFromPieces(self):
+        self.assertEqual(list(filter_output.lines_from_pieces([])), [""])
+        self.assertEqual(list(filter_output.lines_from_pieces(["a", "b\nc", "", "\n"])), ["ab", "c", ""])
+        self.assertEqual(list(filter_output.lines_from_pieces(["a\n", "\nb"])), ["a", "", "b"])
+
+    def testHelperFlagLast(self):
+        self.assertEqual(list(filter_output.helper_flag_last([])), [])
+        self.assertEqual(list(filter_output.helper_flag_last(["a"])), [("a", True)])
+        self.assertEqual(list(filter_output.helper_flag_last(["a", "", "b"])), [("a", False), ("", False), ("b", True)])
+
+    def make_asan_leak_log(self):
+        contents = "=================================================================\n"
+        contents += "==123==ERROR: LeakSanitizer: detected memory leaks\n"
+        contents += "\n"
+        contents += "Direct leak of 8 byte(s) in 1 object(s) allocated from:\n"
+        contents += "    #0 0x7fb5de8aa000 in malloc /src/asan_malloc_linux.cpp:69\n"
+        contents += "    #1 0x55d1c0d0e123 in main /src/main.c:10\n"
+        contents += "\n"
+        contents += "Indirect leak of 16 byte(s) in 1 object(s) allocated from:\n"
+        contents += "    #0 0x7fb5de8aa000 in malloc /src/asan_malloc_linux.cpp:69\n"
+        contents += "    #1 0x7fb5de828801  (<unknown module>)\n"
+        contents += "\n"
+        contents += "SUMMARY: AddressSanitizer: 24 byte(s) leaked in 2 allocation(s).\n"
+        return contents
+
+    def testFilterAsanEcho(self):
+        contents = self.make_asan_leak_log()
+
+        expected = "=================================================================\n"
+        expected += "%s==123==ERROR: LeakSanitizer: detected memory leaks%s\n" % (terminal_colors.TTY_RED_BOLD, terminal_colors.get_standard_color())
+        expected += "\n"
+        expected += "%sDirect leak of 8 byte(s) in 1 object(s) allocated from:%s\n" % (terminal_colors.TTY_BLUE_BOLD, terminal_colors.get_standard_color())
+        expected += "    #0 0x7fb5de8aa000 in malloc /src/asan_malloc_linux.cpp:69\n"
+        expected += "    #1 0x55d1c0d0e123 in main /src/main.c:10\n"
+        expected += "\n"
+        expected += "%sIndirect leak of 16 byte(s) in 1 object(s) allocated from:%s\n" % (terminal_colors.TTY_BLUE_BOLD, terminal_colors.get_standard_color())
+        expected += "    #0 0x7fb5de8aa000 in malloc /src/asan_malloc_linux.cpp:69\n"
+        expected += "    #1 0x7fb5de828801  (<unknown module>)\n"
+        expected += "\n"
+        expected += "SUMMARY: AddressSanitizer: 24 byte(s) leaked in 2 allocation(s)."
+
+        v, r = filter_output.filter_asan_echo(contents)
+        self.assertTrue(v)
+        self.assertEqual(r, expected)
+
+        v, r = filter_output.filter_asan_echo(contents + "unexpected line\n")
+        self.assertFalse(v)
+        self.assertEqual(r, "Unable to detect pattern: [unexpected line] (line number 12)")
+
+    def testFilterAsanVgaV1(self):
+        contents = self.make_asan_leak_log()
+
+        # the stack with an unknown module is left out
+        expected = "=================================================================\n"
+        expected += "==123==ERROR: LeakSanitizer: detected memory leaks\n"
+        expected += "\n"
+        expected += "Direct leak of 8 byte(s) in 1 object(s) allocated from:\n"
+        expected += "    #0 0x7fb5de8aa000 in malloc /src/asan_malloc_linux.cpp:69\n"
+        expected += "    #1 0x55d1c0d0e123 in main /src/main.c:10\n"
+        expected += "\n"
+        expected += "SUMMARY: AddressSanitizer: 24 byte(s) leaked in 2 allocation(s).\n"
+
+        v, r = filter_output.filter_asan_vga_v1(contents)
+        self.assertTrue(v)
+        self.assertEqual(r, expected)
+
+        v, r = filter_output.filter_asan_vga_v1(contents.replace("    #1 0x55d1c0d0e123", "    #2 0x55d1c0d0e123"))
+        self.assertFalse(v)
+
+    def testApplyFiltersStream(self):
+        contents = self.make_asan_leak_log()
+
+        for asan_echo in [False, True]:
+            for asan_vga_v1 in [False, True]:
+                v, expected = filter_output.apply_filters(contents, asan_echo, asan_vga_v1)
+                self.assertTrue(v)
+                output = io.StringIO()
+                v, r = filter_output.apply_filters_stream(io.StringIO(contents), output, asan_echo, asan_vga_v1)
+                self.assertTrue(v)
+                self.assertEqual(output.getvalue(), expected)
+
+        v, r = filter_output.apply_filters(contents, False, False)
+        self.assertEqual((v, r), (True, contents))
+
+        output = io.StringIO()
+        v, r = filter_output.apply_filters_stream(io.StringIO("unexpected line\n"), output, True, False)
+        self.assertFalse(v)
+        self.assertEqual(r, "Unable to detect pattern: [unexpected line] (line number 0)")
+
+    def testFilterAsanEchoLinesIncremental(self):
+
+        # the output is produced while the input is still being read
+        def endless_lines():
+            yield "================================================================="
+            yield "==123==ERROR: LeakSanitizer: detected memory leaks"
+            raise mvtools_exception.mvtools_exception("input must not be read any further")
+
+        pieces = filter_output.filter_asan_echo_lines(endless_lines())
+        self.assertEqual(next(pieces), "=================================================================\n")
+
 if __name__ == "__main__":
     unittest.main()
@@ -465,5 +465,68 @@ class GenericRunTest(unittest.TestCase):
         self.assertEqual(cmd_ret.stdout, "")
         self.assertEqual(cmd_ret.stderr, "")
 
+    def testRunCmdPipeline1(self):
+
+        test_file = path_utils.concat_path(self.test_dir, self.file_test_filename)
+        create_and_write_file.create_file_contents(test_file, "line1\nline2\nline3\n")
+
+        chunks = []
+        v, r = generic_run.run_cmd_pipeline([["cat", test_file], ["grep", "-v", "line2"], ["tr", "a-z", "A-Z"]], self.collect_chunk_helper(chunks), chunk_size=4)
+        self.assertTrue(v)
+        self.assertEqual(len(r), 3)
+        for cmd_ret in r:
+            self.assertTrue(cmd_ret.success)
+            self.assertEqual(cmd_ret.stderr, "")
+        self.assertEqual(b"".join(chunks), b"LINE1\nLINE3\n")
+
+    def testRunCmdPipeline2(self):
+
+        # failures are reported per command
+        chunks = []
+        v, r = generic_run.run_cmd_pipeline([["cat", path_utils.concat_path(self.test_dir, "nonexistent")], ["cat"]], self.collect_chunk_helper(chunks))
+        self.assertTrue(v)
+        self.assertFalse(r[0].success)
+        self.assertTrue(len(r[0].stderr) > 0)
+        self.assertTrue(r[1].success)
+
+        v, r = generic_run.run_cmd_pipeline([["nonexistent-command-generic-run-test"]], self.collect_chunk_helper(chunks))
+        self.assertFalse(v)
+
+        v, r = generic_run.run_cmd_pipeline([], self.collect_chunk_helper(chunks))
+        self.assertFalse(v)
+
+    def testRunCmdPipeline3(self):
+
+        # the output function can abort the pipeline
+        v, r = generic_run.run_cmd_pipeline([["yes"]], self.fail_chunk_helper)
+        self.assertFalse(v)
+        self.assertEqual(r, "test failure")
+
+    def testRunCmdPipeline4(self):
+
+        # input fed to the first command
+        chunks = []
+        v, r = generic_run.run_cmd_pipeline([["tr", "a-z", "A-Z"], ["cat"]], self.collect_chunk_helper(chunks), use_input_chunks=[b"line1\n", b"line2\n"] * 50000)
+        self.assertTrue(v)
+        self.assertTrue(r[0].success)
+        self.assertEqual(b"".join(chunks), b"LINE1\nLINE2\n" * 50000)
+
+        # failures while producing the input abort the pipeline
+        v, r = generic_run.run_cmd_pipeline([["cat"]], self.collect_chunk_helper(chunks), use_input_chunks=self.failing_input_helper())
+        self.assertFalse(v)
+
+    def failing_input_helper(self):
+        yield b"abc"
+        raise OSError("test input failure")
+
+    def collect_chunk_helper(self, chunks):
+        def collect_chunk(chunk):
+            chunks.append(chunk)
+            return True, None
+        return collect_chunk
+
+    def fail_chunk_helper(self, chunk):
+        return False, "test failure"
+
 if __name__ == "__main__":
     unittest.main()
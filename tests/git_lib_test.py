@@ -491,6 +491,75 @@ class GitLibTest(unittest.TestCase):
         self.assertTrue(v)
         self.assertEqual(r, [])
 
+    def testGitStatusSnapshot1(self):
+
+        snapshot = git_lib.GitStatusSnapshot("/repo", [" M file1.txt", "R  new name.txt", "old name.txt", "?? a", "MM sub/file2.txt", " M file3.txt"])
+        self.assertEqual(snapshot.get_repo(), "/repo")
+        self.assertFalse(snapshot.is_clear())
+        self.assertEqual(snapshot.get_entries(), [(" M", "file1.txt", None), ("R ", "new name.txt", "old name.txt"), ("??", "a", None), ("MM", "sub/file2.txt", None), (" M", "file3.txt", None)])
+        self.assertEqual(snapshot.get_entries_by_status(" M"), [(" M", "file1.txt", None), (" M", "file3.txt", None)])
+        self.assertEqual(snapshot.get_entries_by_status("DD"), [])
+        self.assertEqual(snapshot.get_entries_by_staged_status(["R"]), [("R ", "new name.txt", "old name.txt")])
+        self.assertEqual(snapshot.get_entries_by_staged_status(["M", "R"]), [("R ", "new name.txt", "old name.txt"), ("MM", "sub/file2.txt", None)])
+
+        snapshot = git_lib.GitStatusSnapshot("/repo", [])
+        self.assertTrue(snapshot.is_clear())
+        self.assertEqual(snapshot.get_entries(), [])
+
+    def testMakeStatusSnapshot1(self):
+
+        v, r = git_lib.make_status_snapshot(self.fourth_notrepo)
+        self.assertFalse(v)
+
+        v, r = git_lib.make_status_snapshot(self.first_repo)
+        self.assertTrue(v)
+        self.assertTrue(r.is_clear())
+
+        with open(self.first_file1, "a") as f:
+            f.write("actual modification")
+
+        first_more1 = path_utils.concat_path(self.first_repo, "more1.txt")
+        create_and_write_file.create_file_contents(first_more1, "more1-contents")
+        v, r = git_wrapper.stage(self.first_repo, [first_more1])
+        self.assertTrue(v)
+
+        v, r = git_lib.make_status_snapshot(self.first_repo)
+        self.assertTrue(v)
+        snapshot = r
+        self.assertFalse(snapshot.is_clear())
+
+        v, r = git_lib.is_head_clear(self.first_repo, snapshot)
+        self.assertTrue(v)
+        self.assertFalse(r)
+
+        v, r = git_lib.get_head_modified_files(self.first_repo, snapshot)
+        self.assertTrue(v)
+        self.assertEqual(r, [self.first_file1])
+
+        v, r = git_lib.get_staged_added_files(self.first_repo, snapshot)
+        self.assertTrue(v)
+        self.assertEqual(r, [first_more1])
+
+        v, r = git_lib.repo_has_any_not_of_states(self.first_repo, [" M"], snapshot)
+        self.assertTrue(v)
+        self.assertEqual(r, ["A "])
+
+    def testGetHeadFilesSingleStatus(self):
+
+        with open(self.first_file1, "a") as f:
+            f.write("actual modification")
+
+        with mock.patch("git_wrapper.status_nullterm_porcelain_v1_records", wraps=git_wrapper.status_nullterm_porcelain_v1_records) as dummy:
+            v, r = git_lib.get_head_files(self.first_repo)
+            self.assertTrue(v)
+            self.assertEqual(r, [self.first_file1])
+            self.assertEqual(dummy.call_count, 1)
+
+            v, r = git_lib.get_staged_files(self.first_repo)
+            self.assertTrue(v)
+            self.assertEqual(r, [])
+            self.assertEqual(dummy.call_count, 2)
+
     def testGetHeadFiles1(self):
 
         v, r = git_lib.is_head_clear(self.first_repo)
@@ -4,6 +4,7 @@ import sys
 import os
 import shutil
 import unittest
+from unittest import mock
 
 import git_test_fixture
 import git_wrapper
@@ -177,6 +178,22 @@ class GitVisitorBackendsTest(unittest.TestCase):
         # must exist now because it was just pulled
         self.assertTrue(os.path.exists( newfile_r1 ))
 
+    def testFetchFeedback(self):
+
+        remotes = {}
+        remotes["origin"] = { "push": self.second_repo, "fetch": self.second_repo }
+        remotes["nonexistent"] = { "push": self.second_repo, "fetch": path_utils.concat_path(self.test_dir, "nonexistent") }
+
+        feedback = mock.Mock()
+        with mock.patch("builtins.print") as dummy:
+            v, r = git_fetch.do_fetch(self.first_repo, remotes, feedback)
+            dummy.assert_not_called()
+
+        # progress (and git's own output, on failures) goes to the feedback object only
+        self.assertTrue(v)
+        self.assertEqual(feedback.call_count, 2)
+        self.assertEqual(feedback.call_args_list[0], mock.call("\n* Fetching on %s ..." % self.first_repo))
+
     def testRemote(self):
 
         # setup
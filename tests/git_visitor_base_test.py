@@ -3,7 +3,10 @@
 import sys
 import os
 import shutil
+import time
+import threading
 import unittest
+from unittest import mock
 
 import git_test_fixture
 import git_wrapper
@@ -194,6 +197,79 @@ class GitVisitorBaseTest(unittest.TestCase):
         self.assertEqual( len(r), 1 )
         self.assertTrue( "xor-remotename" in r )
 
+    def testProcessFiltersJobs(self):
+
+        r = git_visitor_base.process_filters(["--xor-remotename", "offline", "--jobs", "4"])
+        self.assertEqual( len(r), 2 )
+        self.assertEqual( r["jobs"], 4 )
+        self.assertEqual( r["xor-remotename"], "offline" )
+
+        self.assertEqual( git_visitor_base.process_filters(["--jobs"]), None )
+        self.assertEqual( git_visitor_base.process_filters(["--jobs", "abc"]), None )
+        self.assertEqual( git_visitor_base.process_filters(["--jobs", "0"]), None )
+
+    def testVisitRepos1(self):
+
+        repos = ["repo%d" % i for i in range(20)]
+
+        def test_func(repo, options):
+            time.sleep(0.001 * (20 - int(repo[4:]))) # the first ones finish last
+            return repo, options["xor-remotename"]
+
+        for jobs in [1, 4]:
+            r = git_visitor_base.visit_repos(repos, {"xor-remotename": "origin", "jobs": jobs}, test_func)
+            self.assertEqual( r, [(rp, "origin") for rp in repos] )
+
+        self.assertEqual( git_visitor_base.visit_repos([], {"jobs": 4}, test_func), [] )
+
+    def testVisitRepos2(self):
+
+        repos = ["repo%d" % i for i in range(12)]
+        lock = threading.Lock()
+        running = 0
+        max_running = 0
+
+        def test_func(repo, options):
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+            return True
+
+        r = git_visitor_base.visit_repos(repos, {"jobs": 3}, test_func)
+        self.assertEqual( r, [True] * len(repos) )
+        self.assertTrue( max_running <= 3 )
+        self.assertTrue( max_running > 1 )
+
+        max_running = 0
+        r = git_visitor_base.visit_repos(repos, {}, test_func)
+        self.assertEqual( max_running, 1 )
+
+    def testVisitRepos3(self):
+
+        repos = ["repo%d" % i for i in range(8)]
+
+        def test_func(repo, options, feedback_object):
+            feedback_object("%s: begin" % repo)
+            time.sleep(0.001 * (8 - int(repo[4:]))) # the first ones finish last
+            feedback_object("%s: end" % repo)
+            return repo
+
+        expected_feedback = []
+        for rp in repos:
+            expected_feedback.append(mock.call("%s: begin" % rp))
+            expected_feedback.append(mock.call("%s: end" % rp))
+
+        # progress is printed in the same order as repos, no matter how many are visited at once
+        for jobs in [1, 4]:
+            with mock.patch("builtins.print") as dummy:
+                r = git_visitor_base.visit_repos(repos, {"jobs": jobs}, test_func, True)
+            self.assertEqual( r, repos )
+            self.assertEqual( dummy.call_args_list, expected_feedback )
+
     def testDoVisitOpt1(self):
 
         repos = [self.first_repo]
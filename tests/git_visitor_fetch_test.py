@@ -125,5 +125,33 @@ class GitVisitorFetchTest(unittest.TestCase):
         self.assertTrue( os.path.exists(path_utils.concat_path(fourth_repo, file3)) )
         self.assertTrue( os.path.exists(path_utils.concat_path(fifth_repo, file4)) )
 
+    def testVisitorFetchJobs(self):
+
+        # several clones of first, fetched at the same time
+        clones = []
+        for i in range(4):
+            clone_repo = path_utils.concat_path(self.test_dir, "clone%d" % i)
+            v, r = git_wrapper.clone(self.first_repo, clone_repo, "origin")
+            if not v:
+                self.fail(r)
+            clones.append(clone_repo)
+
+        file3 = self.makeFilename()
+        v, r = git_test_fixture.git_createAndCommit(self.first_repo, file3, self.makeContent(), "commit_msg")
+        if not v:
+            self.fail(r)
+
+        r = git_visitor_fetch.visitor_fetch(clones + [path_utils.concat_path(self.test_dir, "nonexistent")], {"xor-remotename": "origin", "jobs": 3})
+        self.assertFalse(r)
+
+        r = git_visitor_fetch.visitor_fetch(clones, {"xor-remotename": "origin", "jobs": 3})
+        self.assertTrue(r)
+
+        for c in clones:
+            v, r = git_wrapper.merge(c, "origin", "master")
+            if not v:
+                self.fail(r)
+            self.assertTrue( os.path.exists(path_utils.concat_path(c, file3)) )
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import mvtools_test_fixture
+import create_and_write_file
+import path_utils
+import git_wrapper
+import detect_repo_type
+
+import git_visitor_index
+
+class GitVisitorIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        v, r = self.delegate_setUp()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+
+    def delegate_setUp(self):
+
+        v, r = mvtools_test_fixture.makeAndGetTestFolder("git_visitor_index_test")
+        if not v:
+            return v, r
+        self.test_base_dir = r[0]
+        self.test_dir = r[1]
+
+        self.base = path_utils.concat_path(self.test_dir, "base")
+        os.mkdir(self.base)
+        self.sub = path_utils.concat_path(self.base, "sub")
+        os.mkdir(self.sub)
+        os.mkdir(path_utils.concat_path(self.sub, "not_a_repo"))
+
+        self.first_repo = path_utils.concat_path(self.base, "first")
+        v, r = git_wrapper.init(self.base, "first", False)
+        if not v:
+            return v, r
+
+        self.second_repo = path_utils.concat_path(self.sub, "second")
+        v, r = git_wrapper.init(self.sub, "second", False)
+        if not v:
+            return v, r
+
+        self.bare_repo = path_utils.concat_path(self.sub, "bare.git")
+        v, r = git_wrapper.init(self.sub, "bare.git", True)
+        if not v:
+            return v, r
+
+        v, r = git_visitor_index.get_index_folder()
+        if not v:
+            return v, r
+        self.index_file = git_visitor_index.get_index_filename(r, self.base)
+
+        return True, ""
+
+    def tearDown(self):
+        if hasattr(self, "index_file") and os.path.exists(self.index_file):
+            os.unlink(self.index_file)
+        shutil.rmtree(self.test_base_dir)
+
+    def testGetRepoList1(self):
+
+        v, r = git_visitor_index.get_repo_list(self.base)
+        self.assertTrue(v)
+        self.assertEqual(r, sorted([self.first_repo, self.second_repo]))
+        self.assertTrue(os.path.exists(self.index_file))
+
+        v, r = git_visitor_index.get_repo_list(self.base, detect_repo_type.REPO_TYPE_GIT_BARE)
+        self.assertTrue(v)
+        self.assertEqual(r, [self.bare_repo])
+
+        v, r = git_visitor_index.get_repo_list(path_utils.concat_path(self.test_dir, "nonexistent"))
+        self.assertFalse(v)
+
+    def testGetRepoList2(self):
+
+        v, r = git_visitor_index.get_repo_list(self.base, use_index=False)
+        self.assertTrue(v)
+        self.assertEqual(r, sorted([self.first_repo, self.second_repo]))
+        self.assertFalse(os.path.exists(self.index_file))
+
+    def testGetRepoListCached1(self):
+
+        v, r = git_visitor_index.get_repo_list(self.base)
+        self.assertTrue(v)
+        first = r
+
+        # nothing changed: no folder is listed again (and no repo is probed again)
+        with mock.patch("git_visitor_index._scan_dir") as dummy:
+            v, r = git_visitor_index.get_repo_list(self.base)
+            dummy.assert_not_called()
+        self.assertTrue(v)
+        self.assertEqual(r, first)
+
+    def testGetRepoListCached2(self):
+
+        v, r = git_visitor_index.get_repo_list(self.base)
+        self.assertTrue(v)
+
+        # new repo (nested deep), removed repo and a repo turned into a regular folder
+        deep = path_utils.concat_path(self.sub, "not_a_repo", "deeper")
+        os.mkdir(deep)
+        v, r = git_wrapper.init(deep, "third", False)
+        self.assertTrue(v)
+        third_repo = path_utils.concat_path(deep, "third")
+
+        shutil.rmtree(self.first_repo)
+        shutil.rmtree(path_utils.concat_path(self.second_repo, ".git"))
+
+        with mock.patch("git_visitor_index._scan_dir", wraps=git_visitor_index._scan_dir) as dummy:
+            v, r = git_visitor_index.get_repo_list(self.base)
+            self.assertTrue(dummy.call_count < 8)
+        self.assertTrue(v)
+        self.assertEqual(r, [third_repo])
+
+        v, r = git_visitor_index.get_repo_list(self.base, use_index=False)
+        self.assertTrue(v)
+        self.assertEqual(r, [third_repo])
+
+    def testLoadIndex1(self):
+
+        self.assertEqual(git_visitor_index.load_index(self.index_file), {})
+
+        create_and_write_file.create_file_contents(self.index_file, "garbage")
+        self.assertEqual(git_visitor_index.load_index(self.index_file), {})
+
+        # unusable indexes are just rebuilt
+        v, r = git_visitor_index.get_repo_list(self.base)
+        self.assertTrue(v)
+        self.assertEqual(r, sorted([self.first_repo, self.second_repo]))
+        self.assertNotEqual(git_visitor_index.load_index(self.index_file), {})
+
+if __name__ == "__main__":
+    unittest.main()
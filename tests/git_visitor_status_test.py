@@ -6,6 +6,7 @@ import shutil
 import unittest
 
 import git_wrapper
+import git_test_fixture
 import mvtools_test_fixture
 import path_utils
 
@@ -60,5 +61,20 @@ class GitVisitorStatusTest(unittest.TestCase):
         r = git_visitor_status.visitor_status(repos, opts)
         self.assertTrue(r)
 
+    def testVisitorStatusJobs(self):
+
+        repos = [self.first_repo, self.second_repo, self.third_repo]
+
+        v, r = git_test_fixture.git_createAndCommit(self.second_repo, "file1.txt", "contents", "commit_msg")
+        self.assertTrue(v)
+        with open(path_utils.concat_path(self.second_repo, "file1.txt"), "a") as f:
+            f.write("more contents")
+
+        r = git_visitor_status.visitor_status(repos, {"jobs": 3})
+        self.assertTrue(r)
+
+        r = git_visitor_status.visitor_status(repos + [path_utils.concat_path(self.test_dir, "nonexistent")], {"jobs": 3})
+        self.assertFalse(r)
+
 if __name__ == "__main__":
     unittest.main()
@@ -839,6 +839,25 @@ class GitWrapperTest(unittest.TestCase):
         self.assertTrue(v)
         self.assertEqual(r, "")
 
+    def testLsFilesNullTermRecords(self):
+
+        test_file1 = path_utils.concat_path(self.second_repo, "test_file1.txt")
+        create_and_write_file.create_file_contents(test_file1, "test-contents1")
+
+        v, r = git_wrapper.ls_files_nullterm_records(self.second_repo)
+        self.assertTrue(v)
+        self.assertEqual(r, ["test_file1.txt"])
+
+        test_file2 = path_utils.concat_path(self.second_repo, "test file2.txt")
+        create_and_write_file.create_file_contents(test_file2, "test-contents2")
+
+        v, r = git_wrapper.ls_files_nullterm_records(self.second_repo)
+        self.assertTrue(v)
+        self.assertEqual(sorted(r), ["test file2.txt", "test_file1.txt"])
+
+        v, r = git_wrapper.ls_files_nullterm_records(self.nonexistent_repo)
+        self.assertFalse(v)
+
     def testStash_and_StashList(self):
 
         test_file = path_utils.concat_path(self.second_repo, "test_file.txt")
@@ -1329,6 +1348,29 @@ class GitWrapperTest(unittest.TestCase):
         self.assertTrue(v)
         self.assertTrue("A  test_file2.txt" in r)
 
+    def testStatusPorcelainV1Records(self):
+
+        v, r = git_wrapper.status_nullterm_porcelain_v1_records(self.second_repo)
+        self.assertTrue(v)
+        self.assertEqual(r, [])
+
+        test_file1 = path_utils.concat_path(self.second_repo, "test file1.txt")
+        create_and_write_file.create_file_contents(test_file1, "test-contents1")
+
+        v, r = git_wrapper.status_nullterm_porcelain_v1_records(self.second_repo)
+        self.assertTrue(v)
+        self.assertEqual(r, ["?? test file1.txt"])
+
+        v, r = git_wrapper.stage(self.second_repo)
+        self.assertTrue(v)
+
+        v, r = git_wrapper.status_nullterm_porcelain_v1_records(self.second_repo)
+        self.assertTrue(v)
+        self.assertEqual(r, ["A  test file1.txt"])
+
+        v, r = git_wrapper.status_nullterm_porcelain_v1_records(self.nonexistent_repo)
+        self.assertFalse(v)
+
     def testRemoteList_and_RemoteAdd_and_ChangeUrl(self):
 
         test_file = path_utils.concat_path(self.second_repo, "test_file.txt")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import hashlib
+import unittest
+from unittest import mock
+
+import mvtools_test_fixture
+import create_and_write_file
+import path_utils
+
+import hash_engine
+
+class HashEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        v, r = self.delegate_setUp()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+
+    def delegate_setUp(self):
+
+        v, r = mvtools_test_fixture.makeAndGetTestFolder("hash_engine_test")
+        if not v:
+            return v, r
+        self.test_base_dir = r[0]
+        self.test_dir = r[1]
+
+        self.content1 = "thenotsoquickyellowfoxwagsitstailthencirclesaroundthebluecat"
+        self.file1 = path_utils.concat_path(self.test_dir, "file1.txt")
+        create_and_write_file.create_file_contents(self.file1, self.content1)
+
+        self.file_empty = path_utils.concat_path(self.test_dir, "empty.txt")
+        create_and_write_file.create_file_contents(self.file_empty, "")
+
+        # spans several reads
+        self.content_big = os.urandom(3*1024*1024 + 17)
+        self.file_big = path_utils.concat_path(self.test_dir, "big.bin")
+        with open(self.file_big, "wb") as f:
+            f.write(self.content_big)
+
+        self.nonexistent = path_utils.concat_path(self.test_dir, "nonexistent.txt")
+
+        return True, ""
+
+    def tearDown(self):
+        shutil.rmtree(self.test_base_dir)
+
+    def testHashContent1(self):
+
+        v, r = hash_engine.hash_content("sha512", self.content1)
+        self.assertTrue(v)
+        self.assertEqual(r, "b5011e56ea61610e6dc76c6cd63dd43252c215c0250dcfeb343c8853cabb1413aeb1c8bcb17ca49240ec977a82fb444b0f6a85a949d7e3edc2d11af13ced1c23")
+
+        v, r = hash_engine.hash_content("sha256", self.content1.encode())
+        self.assertTrue(v)
+        self.assertEqual(r, "735e24cec929ca91d81076fb56bed40642a3b0c5f8fe3b1a4d98b425dadc8c99")
+
+        v, r = hash_engine.hash_content("md5", self.content1)
+        self.assertFalse(v)
+
+    def testHashFile1(self):
+
+        v, r = hash_engine.hash_file("sha256", self.file1)
+        self.assertTrue(v)
+        self.assertEqual(r, "735e24cec929ca91d81076fb56bed40642a3b0c5f8fe3b1a4d98b425dadc8c99")
+
+        v, r = hash_engine.hash_file("sha512", self.file_empty)
+        self.assertTrue(v)
+        self.assertEqual(r, hashlib.sha512(b"").hexdigest())
+
+        v, r = hash_engine.hash_file("sha512", self.file_big)
+        self.assertTrue(v)
+        self.assertEqual(r, hashlib.sha512(self.content_big).hexdigest())
+
+    def testHashFile2(self):
+
+        v, r = hash_engine.hash_file("sha512", self.nonexistent)
+        self.assertFalse(v)
+
+        v, r = hash_engine.hash_file("sha512", self.test_dir)
+        self.assertFalse(v)
+
+        v, r = hash_engine.hash_file("md5", self.file1)
+        self.assertFalse(v)
+
+    def testHashFileMmap1(self):
+
+        with mock.patch("hash_engine.HASH_ENGINE_MMAP_THRESHOLD", 1024*1024):
+            v, r = hash_engine.hash_file("sha512", self.file_big)
+            self.assertTrue(v)
+            self.assertEqual(r, hashlib.sha512(self.content_big).hexdigest())
+
+            # below the threshold (and empty files can't be mapped anyway)
+            v, r = hash_engine.hash_file("sha512", self.file_empty)
+            self.assertTrue(v)
+            self.assertEqual(r, hashlib.sha512(b"").hexdigest())
+
+    def testHashFiles1(self):
+
+        filenames = [self.file1, self.nonexistent, self.file_empty, self.file_big]
+        expected = [hashlib.sha256(self.content1.encode()).hexdigest(), None, hashlib.sha256(b"").hexdigest(), hashlib.sha256(self.content_big).hexdigest()]
+
+        for workers in [None, 1, 3]:
+            v, r = hash_engine.hash_files("sha256", filenames, workers)
+            self.assertTrue(v)
+            self.assertEqual(len(r), len(filenames))
+            for i in range(len(filenames)):
+                if expected[i] is None:
+                    self.assertFalse(r[i][0])
+                else:
+                    self.assertEqual(r[i], (True, expected[i]))
+
+    def testHashFiles2(self):
+
+        v, r = hash_engine.hash_files("sha256", [])
+        self.assertTrue(v)
+        self.assertEqual(r, [])
+
+        v, r = hash_engine.hash_files("sha256", [self.file1], 0)
+        self.assertFalse(v)
+
+        v, r = hash_engine.hash_files("md5", [self.file1])
+        self.assertFalse(v)
+
+if __name__ == "__main__":
+    unittest.main()
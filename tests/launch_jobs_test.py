@@ -2,6 +2,7 @@
 
 import os
 import shutil
+import threading
 import unittest
 
 import mvtools_test_fixture
@@ -77,6 +78,16 @@ class CustomTaskTrueWithDetail(launch_jobs.BaseTask):
             test_ctx.call_stack.append("CustomTaskTrue.run_task,%s" % self.name)
         return True, "test detail"
 
+class CustomTaskBarrier(launch_jobs.BaseTask):
+    def run_task(self, feedback_object, execution_name=None):
+        # only succeeds if every other task sharing the barrier is running at the same time
+        try:
+            self.params["barrier"].wait(10)
+        except threading.BrokenBarrierError:
+            return False, "barrier broken"
+        feedback_object("CustomTaskBarrier.run_task,%s" % self.name)
+        return True, None
+
 class LaunchJobsTest(unittest.TestCase):
 
     def setUp(self):
@@ -404,5 +415,187 @@ class LaunchJobsTest(unittest.TestCase):
         self.assertTrue(v)
         self.assertFalse(r)
 
+    def testLaunchJobsParallel1(self):
+
+        test_ctx = aux_test_context()
+        main_job = standard_job.StandardJob("main_job")
+        main_job.params["parallel"] = "3"
+        barrier = threading.Barrier(3)
+
+        for i in range(3):
+            task = CustomTaskBarrier("task%d" % (i+1))
+            task.params["barrier"] = barrier
+            main_job.add_entry(task)
+
+        v, r = launch_jobs.begin_execution(main_job, test_ctx.call_stack.append)
+        self.assertTrue(v)
+        self.assertFalse(r)
+
+        # feedback is ordered as declared
+        task_msgs = [x for x in test_ctx.call_stack if x.startswith("CustomTaskBarrier")]
+        self.assertEqual(task_msgs, ["CustomTaskBarrier.run_task,task1", "CustomTaskBarrier.run_task,task2", "CustomTaskBarrier.run_task,task3"])
+
+    def testLaunchJobsParallel2(self):
+
+        test_ctx = aux_test_context()
+        main_job = standard_job.StandardJob("main_job")
+        main_job.params["parallel"] = None
+
+        job1 = standard_job.StandardJob("job1")
+        job2 = standard_job.StandardJob("job2")
+        task1 = CustomTaskTrueWithDetail("task1")
+        task2 = CustomTaskTrue("task2")
+        task1.params["internal_testing_context"] = test_ctx
+        task2.params["internal_testing_context"] = test_ctx
+        job1.add_entry(task1)
+        job2.add_entry(task2)
+        main_job.add_entry(job1)
+        main_job.add_entry(job2)
+
+        v, r = launch_jobs.begin_execution(main_job, print)
+        self.assertTrue(v)
+        self.assertTrue(r)
+        self.assertEqual(sorted(test_ctx.call_stack), ["CustomTaskTrue.run_task,task1", "CustomTaskTrue.run_task,task2"])
+
+    def testLaunchJobsParallel3(self):
+
+        # a failed task keeps further entries from starting
+        test_ctx = aux_test_context()
+        main_job = standard_job.StandardJob("main_job")
+        main_job.params["parallel"] = "1"
+
+        task1 = CustomTaskFalse("task1")
+        task2 = CustomTaskTrue("task2")
+        task1.params["internal_testing_context"] = test_ctx
+        task2.params["internal_testing_context"] = test_ctx
+        main_job.add_entry(task1)
+        main_job.add_entry(task2)
+
+        v, r = launch_jobs.begin_execution(main_job, print)
+        self.assertFalse(v)
+        self.assertEqual(test_ctx.call_stack, ["CustomTaskFalse.run_task,task1"])
+
+    def testLaunchJobsParallel4(self):
+
+        # without early abort, failed jobs do not stop the others
+        test_ctx = aux_test_context()
+        main_job = standard_job.StandardJob("main_job")
+        main_job.params["parallel"] = "1"
+
+        job1 = standard_job.StandardJob("job1")
+        job2 = standard_job.StandardJob("job2")
+        task1 = CustomTaskFalse("task1")
+        task2 = CustomTaskTrue("task2")
+        task1.params["internal_testing_context"] = test_ctx
+        task2.params["internal_testing_context"] = test_ctx
+        job1.add_entry(task1)
+        job2.add_entry(task2)
+        main_job.add_entry(job1)
+        main_job.add_entry(job2)
+
+        v, r = launch_jobs.begin_execution(main_job, print, options=launch_jobs.RunOptions(early_abort=False))
+        self.assertFalse(v)
+        self.assertEqual(test_ctx.call_stack, ["CustomTaskFalse.run_task,task1", "CustomTaskTrue.run_task,task2"])
+
+        test_ctx.call_stack = []
+        v, r = launch_jobs.begin_execution(main_job, print, options=launch_jobs.RunOptions(early_abort=True))
+        self.assertFalse(v)
+        self.assertEqual(test_ctx.call_stack, ["CustomTaskFalse.run_task,task1"])
+
+    def testLaunchJobsParallel5(self):
+
+        main_job = standard_job.StandardJob("main_job")
+        main_job.params["parallel"] = "none"
+        main_job.add_entry(CustomTaskTrue())
+
+        v, r = launch_jobs.begin_execution(main_job, print)
+        self.assertFalse(v)
+
+    def testLaunchJobsDependencyGraph1(self):
+
+        task1 = CustomTaskTrue("task1")
+        task2 = CustomTaskTrue("task2")
+        task3 = CustomTaskTrue("task3")
+        task1.params["depends_on"] = ["task3", "task2"]
+        task3.params["depends_on"] = "task2"
+
+        v, r = launch_jobs.make_dependency_graph([task1, task2, task3])
+        self.assertTrue(v)
+        self.assertEqual(r, [{1, 2}, set(), {1}])
+        self.assertEqual(launch_jobs.sort_dependency_graph(r), (True, [1, 2, 0]))
+
+    def testLaunchJobsDependencyGraph2(self):
+
+        task1 = CustomTaskTrue("task1")
+        task2 = CustomTaskTrue("task2")
+        task3 = CustomTaskTrue("task3")
+        task1.params["depends_on"] = "task2"
+        task2.params["depends_on"] = "task1"
+
+        v, r = launch_jobs.make_dependency_graph([task1, task2, task3])
+        self.assertFalse(v)
+
+        task1.params["depends_on"] = "task1"
+        task2.params["depends_on"] = None
+        v, r = launch_jobs.make_dependency_graph([task1, task2, task3])
+        self.assertFalse(v)
+
+        task1.params["depends_on"] = "task4"
+        v, r = launch_jobs.make_dependency_graph([task1, task2, task3])
+        self.assertFalse(v)
+
+    def testLaunchJobsDependencies1(self):
+
+        # without the parallel option, entries run one at a time in dependency order
+        test_ctx = aux_test_context()
+        main_job = standard_job.StandardJob("main_job")
+
+        task1 = CustomTaskTrue("task1")
+        task2 = CustomTaskTrue("task2")
+        task3 = CustomTaskTrue("task3")
+        task1.params["depends_on"] = "task3"
+        for t in [task1, task2, task3]:
+            t.params["internal_testing_context"] = test_ctx
+            main_job.add_entry(t)
+
+        v, r = launch_jobs.begin_execution(main_job, print)
+        self.assertTrue(v)
+        self.assertEqual(test_ctx.call_stack, ["CustomTaskTrue.run_task,task2", "CustomTaskTrue.run_task,task3", "CustomTaskTrue.run_task,task1"])
+
+    def testLaunchJobsDependencies2(self):
+
+        # dependents of failed jobs are skipped, independent entries still run
+        test_ctx = aux_test_context()
+        feedback = []
+        main_job = standard_job.StandardJob("main_job")
+        main_job.params["parallel"] = "2"
+
+        job1 = standard_job.StandardJob("job1")
+        task1 = CustomTaskFalse("task1")
+        task2 = CustomTaskTrue("task2")
+        task3 = CustomTaskTrue("task3")
+        task2.params["depends_on"] = "job1"
+        for t in [task1, task2, task3]:
+            t.params["internal_testing_context"] = test_ctx
+        job1.add_entry(task1)
+        main_job.add_entry(job1)
+        main_job.add_entry(task2)
+        main_job.add_entry(task3)
+
+        v, r = launch_jobs.begin_execution(main_job, feedback.append, options=launch_jobs.RunOptions(early_abort=False))
+        self.assertFalse(v)
+        self.assertEqual(sorted(test_ctx.call_stack), ["CustomTaskFalse.run_task,task1", "CustomTaskTrue.run_task,task3"])
+        self.assertTrue(any("skipped" in x for x in feedback))
+
+    def testLaunchJobsDependencies3(self):
+
+        main_job = standard_job.StandardJob("main_job")
+        task1 = CustomTaskTrue("task1")
+        task1.params["depends_on"] = "task1"
+        main_job.add_entry(task1)
+
+        v, r = launch_jobs.begin_execution(main_job, print)
+        self.assertFalse(v)
+
 if __name__ == "__main__":
     unittest.main()
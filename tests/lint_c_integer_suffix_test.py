@@ -522,5 +522,37 @@ class LintCIntegerSuffixTest(unittest.TestCase):
 
         self.assertEqual(test_shared_state, expected_shared_state)
 
+    def testLintCycleMany1(self):
+
+        test_file = "test_file.txt"
+        test_lines = ["int a = 5;", "/* comment", "still 5ul commented", "*/ int b = 7ul;", "", "no numbers here", "float c = 1.0ll; // 3xyz", "int d = \"9zz\";"]
+
+        for test_plugins_params in [{}, {"lint-c-integer-suffix-warn-no-suffix": []}]:
+
+            test_shared_state = {}
+            expected_results = []
+            v, r = lint_c_integer_suffix.lint_pre(test_plugins_params, test_file, test_shared_state, len(test_lines))
+            self.assertTrue(v)
+            for test_index in range(len(test_lines)):
+                v, r = lint_c_integer_suffix.lint_cycle(test_plugins_params, test_file, test_shared_state, test_index+1, test_lines[test_index])
+                self.assertTrue(v)
+                expected_results.append(r)
+            expected_shared_state = test_shared_state
+
+            test_shared_state = {}
+            v, r = lint_c_integer_suffix.lint_pre(test_plugins_params, test_file, test_shared_state, len(test_lines))
+            self.assertTrue(v)
+            v, r = lint_c_integer_suffix.lint_cycle_many(test_plugins_params, test_file, test_shared_state, 1, test_lines)
+            self.assertTrue(v)
+            self.assertEqual(r, expected_results)
+            self.assertEqual(test_shared_state, expected_shared_state)
+
+        self.assertNotEqual(expected_results[3], None)
+        self.assertEqual(expected_results[2], None)
+
+        v, r = lint_c_integer_suffix.lint_cycle_many({}, test_file, {"lint-c-integer-suffix-internal-slash-asterisk-state": False}, 5, test_lines[3:5])
+        self.assertTrue(v)
+        self.assertEqual(r, [("[test_file.txt:5] has [1] integer suffix violation.", [(5, "*/ int b = 7;")]), None])
+
 if __name__ == "__main__":
     unittest.main()
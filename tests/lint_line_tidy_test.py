@@ -200,5 +200,26 @@ class LintLineTidyTest(unittest.TestCase):
 
         self.assertEqual(test_shared_state, expected_shared_state)
 
+    def testLintCycleMany1(self):
+
+        test_file = "test_file.txt"
+        test_lines = ["first", "    indented", "   bad", "trailing ", "  both ", "", "    ", "\tnot-spaces", "        fine"]
+        test_plugins_params = {}
+
+        expected_results = []
+        for test_index in range(len(test_lines)):
+            v, r = lint_line_tidy.lint_cycle(test_plugins_params, test_file, {}, test_index+1, test_lines[test_index])
+            self.assertTrue(v)
+            expected_results.append(r)
+
+        v, r = lint_line_tidy.lint_cycle_many(test_plugins_params, test_file, {}, 1, test_lines)
+        self.assertTrue(v)
+        self.assertEqual(r, expected_results)
+        self.assertEqual(r[2], ("[test_file.txt:3]: bad indentation detected.", []))
+
+        v, r = lint_line_tidy.lint_cycle_many(test_plugins_params, test_file, {}, 10, [])
+        self.assertTrue(v)
+        self.assertEqual(r, [])
+
 if __name__ == "__main__":
     unittest.main()
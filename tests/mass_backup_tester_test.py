@@ -10,6 +10,7 @@ from unittest.mock import patch
 
 import create_and_write_file
 import mvtools_test_fixture
+import mvtools_envvars
 import backup_processor
 import path_utils
 
@@ -18,6 +19,11 @@ import mass_backup_tester
 class MassBackupTesterTest(unittest.TestCase):
 
     def setUp(self):
+        self.mvtools_envvars_inst = mvtools_envvars.Mvtools_Envvars()
+        v, r = self.mvtools_envvars_inst.make_copy_environ()
+        if not v:
+            self.tearDown()
+            self.fail(r)
         v, r = self.delegate_setUp()
         if not v:
             self.tearDown()
@@ -31,6 +37,10 @@ class MassBackupTesterTest(unittest.TestCase):
         self.test_base_dir = r[0]
         self.test_dir = r[1]
 
+        v, r = mvtools_envvars.mvtools_envvar_write_temp_path(self.test_dir)
+        if not v:
+            return False, "Failed setting up temp path envvar for testing."
+
         self.bk_test_temp_folder = path_utils.concat_path(self.test_dir, "bktemp")
         self.bk_base_folder_test = "BackupTests"
         self.test_source_folder = path_utils.concat_path(self.test_dir, "source_test")
@@ -70,6 +80,9 @@ class MassBackupTesterTest(unittest.TestCase):
 
     def tearDown(self):
         shutil.rmtree(self.test_base_dir)
+        v, r = self.mvtools_envvars_inst.restore_copy_environ()
+        if not v:
+            self.fail(r)
 
     def testRunBackupOk(self):
 
@@ -146,5 +159,63 @@ class MassBackupTesterTest(unittest.TestCase):
             r = mass_backup_tester.backups_mass_check(self.test_config_file, self.hash_file)
         self.assertFalse(r)
 
+    def run_backup_helper(self):
+        with mock.patch("input_checked_passphrase.get_checked_passphrase", return_value=(True, self.passphrase)):
+            r = backup_processor.run_backup(self.test_config_file, self.hash_file)
+        self.assertTrue(r)
+        return path_utils.concat_path(self.test_target_path, self.bk_base_folder_test)
+
+    def testStreamedOk(self):
+
+        self.run_backup_helper()
+        with mock.patch("input_checked_passphrase.get_checked_passphrase", return_value=(True, self.passphrase)):
+            r = mass_backup_tester.backups_mass_check(self.test_config_file, self.hash_file, True, 3)
+        self.assertTrue(r)
+
+        # no temporary files needed
+        self.assertFalse( os.path.exists( self.bk_test_temp_folder ) )
+
+    def testStreamedFail1(self):
+
+        tg_final = self.run_backup_helper()
+        tg_folder2_h = path_utils.concat_path(tg_final, "source_test", "folder2.tar.bz2.enc.sha512")
+        with open(tg_folder2_h, "w") as f:
+            f.write("tampering with folder2's hash")
+
+        with mock.patch("input_checked_passphrase.get_checked_passphrase", return_value=(True, self.passphrase)):
+            r = mass_backup_tester.backups_mass_check(self.test_config_file, self.hash_file, True, 2)
+        self.assertFalse(r)
+
+    def testStreamedFail2(self):
+
+        self.run_backup_helper()
+        with mock.patch("input_checked_passphrase.get_checked_passphrase", return_value=(True, self.passphrase + "tampering")):
+            r = mass_backup_tester.backups_mass_check(self.test_config_file, self.hash_file, True, 2)
+        self.assertFalse(r)
+
+    def testVerifyFileStreamed1(self):
+
+        tg_final = self.run_backup_helper()
+        tg_folder1_e = path_utils.concat_path(tg_final, "source_test", "folder1.tar.bz2.enc")
+        v, r = mass_backup_tester.verify_file_streamed(tg_folder1_e, self.passphrase)
+        self.assertTrue(v)
+        self.assertEqual(r, os.path.getsize(tg_folder1_e))
+
+        os.unlink(tg_folder1_e + ".sha512")
+        v, r = mass_backup_tester.verify_file_streamed(tg_folder1_e, self.passphrase)
+        self.assertFalse(v)
+        self.assertEqual(r, tg_folder1_e + " has no corresponding hash file.")
+
+    def testVerifyFolderStreamed1(self):
+
+        tg_final = self.run_backup_helper()
+        v, r = mass_backup_tester.verify_folder_streamed(tg_final, "enc", self.passphrase, 2)
+        self.assertTrue(v)
+        self.assertEqual(r[0], [])
+        self.assertTrue(r[1] > 0)
+
+        v, r = mass_backup_tester.verify_folder_streamed(path_utils.concat_path(self.test_dir, "nonexistent"), "enc", self.passphrase, 2)
+        self.assertFalse(v)
+
 if __name__ == "__main__":
     unittest.main()
@@ -911,6 +911,33 @@ class MiniparseTest(unittest.TestCase):
         self.assertEqual(miniparse.scan_largest_of("123; 456ull // some comment", 3, ["ll", "f", "u", "ull"]), None)
         self.assertEqual(miniparse.scan_largest_of("abc123def", 0, ["abc", "123", "def"]), 0)
         self.assertEqual(miniparse.scan_largest_of("abc123def", 0, ["abc", "abc", "abc"]), 0)
+        self.assertEqual(miniparse.scan_largest_of("a.c", 0, ["", ".", "a.c"]), 2)
+        self.assertEqual(miniparse.scan_largest_of("abc", 0, [""]), None)
+        self.assertEqual(miniparse.scan_largest_of("abc", 0, []), None)
+
+    def testMultiPatternMatcher1(self):
+        matcher = miniparse.MultiPatternMatcher(["ab", "", "b", "abc", "ab", "c*"])
+        self.assertEqual(matcher.match_largest_at("xabc", 1), 3)
+        self.assertEqual(matcher.match_largest_at("xabc", 0), None)
+        self.assertTrue(matcher.has_any("--c*--"))
+        self.assertFalse(matcher.has_any("--c--"))
+        self.assertEqual(matcher.find_all_positions("abc*ab"), [(0, 3), (1, 2), (2, 5), (4, 0), (5, 2)])
+        self.assertEqual(matcher.find_all_positions(""), [])
+        self.assertEqual(matcher.find_present("xabcx"), set(["ab", "b", "abc"]))
+        self.assertEqual(matcher.find_present("c*b"), set(["b", "c*"]))
+        self.assertEqual(matcher.find_present("xyz"), set())
+
+    def testMultiPatternMatcher2(self):
+        matcher = miniparse.MultiPatternMatcher(["", ""])
+        self.assertEqual(matcher.match_largest_at("abc", 0), None)
+        self.assertFalse(matcher.has_any("abc"))
+        self.assertEqual(matcher.find_all_positions("abc"), [])
+        self.assertEqual(matcher.find_present("abc"), set())
+
+    def testGetMultiPatternMatcher1(self):
+        matcher = miniparse.get_multi_pattern_matcher(["first", "second"])
+        self.assertIs(miniparse.get_multi_pattern_matcher(["first", "second"]), matcher)
+        self.assertIsNot(miniparse.get_multi_pattern_matcher(["second", "first"]), matcher)
 
     def testDescape1(self):
         v, r = miniparse.descape(None, "s")
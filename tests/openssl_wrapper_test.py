@@ -178,5 +178,36 @@ class OpensslWrapperTest(unittest.TestCase):
 
         self.assertEqual(contents_file1, contents_file3)
 
+    def testEncryptDes3Pbkdf2Content1(self):
+
+        with mock.patch("generic_run.run_cmd") as dummy:
+            self.assertEqual(openssl_wrapper.encrypt_des3_pbkdf2_content("xyz", self.test_passphrase), (False, "Invalid content (must be bytes)."))
+            self.assertEqual(openssl_wrapper.encrypt_des3_pbkdf2_content(b"xyz", ""), (False, "Invalid passphrase."))
+            self.assertEqual(openssl_wrapper.decrypt_des3_pbkdf2_content(b"xyz", None), (False, "Invalid passphrase."))
+            dummy.assert_not_called()
+
+    def testEncryptDes3Pbkdf2Content2(self):
+
+        v, r = openssl_wrapper.encrypt_des3_pbkdf2_content(b"xyz\x00\xff", self.test_passphrase)
+        self.assertTrue(v)
+        encrypted = r
+        self.assertNotEqual(encrypted, b"xyz\x00\xff")
+
+        v, r = openssl_wrapper.decrypt_des3_pbkdf2_content(encrypted, self.test_passphrase)
+        self.assertTrue(v)
+        self.assertEqual(r, b"xyz\x00\xff")
+
+        v, r = openssl_wrapper.decrypt_des3_pbkdf2_content(encrypted, "wrong-passphrase")
+        self.assertFalse(v)
+
+    def testEncryptDes3Pbkdf2Content3(self):
+
+        # interoperable with the file based functions
+        create_and_write_file.create_file_contents(self.file1, "xyz")
+        self.assertEqual(openssl_wrapper.encrypt_des3_pbkdf2(self.file1, self.file2, self.test_passphrase), (True, None))
+        with open(self.file2, "rb") as f:
+            encrypted = f.read()
+        self.assertEqual(openssl_wrapper.decrypt_des3_pbkdf2_content(encrypted, self.test_passphrase), (True, b"xyz"))
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,12 @@
 #!/usr/bin/env python
 
 import os
+import time
 import shutil
+import threading
 import unittest
+from unittest import mock
+import importlib.machinery
 
 import mvtools_test_fixture
 import create_and_write_file
@@ -11,6 +15,7 @@ import path_utils
 import toolbus
 import mvtools_envvars
 
+import launch_jobs
 import recipe_processor
 
 class RecipeProcessorTest(unittest.TestCase):
@@ -34,6 +39,12 @@ class RecipeProcessorTest(unittest.TestCase):
         self.test_base_dir = r[0]
         self.test_dir = r[1]
 
+        v, r = mvtools_envvars.mvtools_envvar_write_temp_path(self.test_dir)
+        if not v:
+            return False, "Failed setting up temp path envvar for testing."
+
+        recipe_processor.clear_plugin_cache()
+
         v, r = mvtools_envvars.mvtools_envvar_write_toolbus_base(self.test_dir)
         if not v:
             return False, "Failed setting up toolbus envvar for testing."
@@ -384,8 +395,90 @@ class RecipeProcessorTest(unittest.TestCase):
         self.recipe_test_file31 = path_utils.concat_path(self.test_dir, "recipe_test31.t20")
         create_and_write_file.create_file_contents(self.recipe_test_file31, recipe_test_contents31)
 
+        self.recipe_test_32_callstack = path_utils.concat_path(self.test_dir, "recipe_test_32_callstack.txt")
+        recipe_test_contents32 = "[\n"
+        recipe_test_contents32 += "@job1 {parallel: \"2\"}\n"
+        recipe_test_contents32 += "* task1 {depends_on: (\"task2\", \"job2\") / target_file: \"%s\" / mode: \"a\" / content: \"task1\"} = \"writefile_plugin.py\"\n" % self.recipe_test_32_callstack
+        recipe_test_contents32 += "[\n"
+        recipe_test_contents32 += "@job2 {depends_on: \"task2\"}\n"
+        recipe_test_contents32 += "* task3 {target_file: \"%s\" / mode: \"a\" / content: \"task3\"} = \"writefile_plugin.py\"\n" % self.recipe_test_32_callstack
+        recipe_test_contents32 += "]\n"
+        recipe_test_contents32 += "* task2 {target_file: \"%s\" / mode: \"a\" / content: \"task2\"} = \"writefile_plugin.py\"\n" % self.recipe_test_32_callstack
+        recipe_test_contents32 += "]\n"
+        self.recipe_test_file32 = path_utils.concat_path(self.test_dir, "recipe_test32.t20")
+        create_and_write_file.create_file_contents(self.recipe_test_file32, recipe_test_contents32)
+
+        recipe_test_contents33 = "[\n@test-job\n"
+        recipe_test_contents33 += "* task1 {depends_on: \"task2\"} = \"sample_echo_true_plugin.py\"\n"
+        recipe_test_contents33 += "* task2 {depends_on: \"task1\"} = \"sample_echo_true_plugin.py\"\n"
+        recipe_test_contents33 += "]\n"
+        self.recipe_test_file33 = path_utils.concat_path(self.test_dir, "recipe_test33.t20")
+        create_and_write_file.create_file_contents(self.recipe_test_file33, recipe_test_contents33)
+
+        recipe_test_contents34 = "[\n@test-job\n* task1 {depends_on: \"nonexistent\"} = \"sample_echo_true_plugin.py\"\n]\n"
+        self.recipe_test_file34 = path_utils.concat_path(self.test_dir, "recipe_test34.t20")
+        create_and_write_file.create_file_contents(self.recipe_test_file34, recipe_test_contents34)
+
+        recipe_test_contents35 = "[\n@%s\n" % recipe_processor.RECIPE_PROCESSOR_CONFIG_METAJOB
+        recipe_test_contents35 += "* recipe-namespace = \"%s\"\n" % self.namespace1
+        recipe_test_contents35 += "]\n"
+        recipe_test_contents35 += "[\n@job1 {parallel: \"2\"}\n"
+        for j in ["job2", "job3"]:
+            recipe_test_contents35 += "[\n@%s\n" % j
+            for t in ["task1", "task2", "task3"]:
+                recipe_test_contents35 += "* %s = \"sample_custom_echo_true_plugin.py\"\n" % t
+            recipe_test_contents35 += "]\n"
+        recipe_test_contents35 += "]\n"
+        self.recipe_test_file35 = path_utils.concat_path(self.test_dir, "recipe_test35.t20")
+        create_and_write_file.create_file_contents(self.recipe_test_file35, recipe_test_contents35)
+
+        recipe_test_contents37 = "[\n@job1 {parallel: \"2\" / depends_on: \"task1\"}\n"
+        recipe_test_contents37 += "* task2 {depends_on: \"task1\"} = \"sample_echo_true_plugin.py\"\n"
+        recipe_test_contents37 += "* task1 = \"sample_echo_true_plugin.py\"\n"
+        recipe_test_contents37 += "[\n@job2 {parallel: \"2\"}\n"
+        recipe_test_contents37 += "* task3 = \"sample_echo_true_plugin.py\"\n"
+        recipe_test_contents37 += "]\n"
+        recipe_test_contents37 += "]\n"
+        recipe_test_contents37 += "* task1 = \"sample_echo_true_plugin.py\"\n"
+        self.recipe_test_file37 = path_utils.concat_path(self.test_dir, "recipe_test37.t20")
+        create_and_write_file.create_file_contents(self.recipe_test_file37, recipe_test_contents37)
+
+        recipe_test_contents36 = "[\n@job1 {parallel: \"2\"}\n"
+        for t, e in [("task1", "value1"), ("task2", "value2")]:
+            recipe_test_contents36 += "* %s {run / recipe: \"%s\" / exec_name: \"%s\" / MVTOOLS_RECIPE_PROCESSOR_TEST_ENVVAR: \"%s\"} = \"recipe_plugin.py\"\n" % (t, self.recipe_test_file1, e, e)
+        recipe_test_contents36 += "]\n"
+        self.recipe_test_file36 = path_utils.concat_path(self.test_dir, "recipe_test36.t20")
+        create_and_write_file.create_file_contents(self.recipe_test_file36, recipe_test_contents36)
+
+        self.running_lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.seen_envvars = []
+
         return True, ""
 
+    def track_running(self, feedback_object, execution_name=None):
+
+        with self.running_lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05)
+        with self.running_lock:
+            self.running -= 1
+        return True, None
+
+    def track_running_envvar(self, operation, recipe, exec_name, req_opts):
+
+        # exec_name is set to the same value as the envvar each recipe task is given
+        with self.running_lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05)
+        with self.running_lock:
+            self.running -= 1
+            self.seen_envvars.append( (exec_name, os.environ.get("MVTOOLS_RECIPE_PROCESSOR_TEST_ENVVAR")) )
+        return True, None
+
     def tearDown(self):
         shutil.rmtree(self.test_base_dir)
         v, r = self.mvtools_envvars_inst.restore_copy_environ()
@@ -566,5 +659,96 @@ class RecipeProcessorTest(unittest.TestCase):
         self.assertTrue(v)
         self.assertTrue(r)
 
+    def testRecipeProcessorDependencies1(self):
+        # job2's own dependency is not inherited by task3
+        v, r = recipe_processor.run_jobs_from_recipe_file(self.recipe_test_file32)
+        self.assertTrue(v)
+        self.assertFalse(r)
+        self.assertEqual(getcontents.getcontents(self.recipe_test_32_callstack), "task2task3task1")
+
+    def testRecipeProcessorDependencies2(self):
+        v, r = recipe_processor.test_jobs_from_recipe_file(self.recipe_test_file33)
+        self.assertFalse(v)
+        self.assertTrue("cycle" in r)
+
+    def testRecipeProcessorDependencies3(self):
+        v, r = recipe_processor.test_jobs_from_recipe_file(self.recipe_test_file34)
+        self.assertFalse(v)
+
+    def testRecipeProcessorParallelNested1(self):
+
+        v, r = recipe_processor.test_jobs_from_recipe_file(self.recipe_test_file35)
+        self.assertTrue(v)
+        mainjob, options, exec_name = r
+
+        job1 = mainjob.entries_list[0]
+        self.assertEqual(job1.params, {"parallel": "2"})
+        self.assertEqual(job1.entries_list[0].params, {})
+        self.assertEqual(job1.entries_list[1].params, {})
+
+        # the nested jobs run their own tasks one at a time, so job1's cap holds for the whole tree
+        task_class = job1.entries_list[0].entries_list[0].__class__
+        with mock.patch.object(task_class, "run_task", side_effect=self.track_running):
+            v, r = launch_jobs.begin_execution(mainjob, mock.Mock(), exec_name, options)
+            self.assertTrue(v)
+        self.assertEqual(self.max_running, 2)
+
+    def testRecipeProcessorParallelNested2(self):
+
+        # options declared on the entry itself are kept, even when they match the parent job's
+        v, r = recipe_processor.test_jobs_from_recipe_file(self.recipe_test_file37)
+        self.assertTrue(v)
+        mainjob, options, exec_name = r
+
+        job1 = mainjob.entries_list[0]
+        self.assertEqual(job1.params, {"parallel": "2", "depends_on": "task1"})
+        self.assertEqual(job1.entries_list[0].params, {"depends_on": "task1"})
+        self.assertEqual(job1.entries_list[1].params, {})
+        self.assertEqual(job1.entries_list[2].params, {"parallel": "2"})
+        self.assertEqual(job1.entries_list[2].entries_list[0].params, {})
+
+        v, r = launch_jobs.begin_execution(mainjob, mock.Mock(), exec_name, options)
+        self.assertTrue(v)
+
+    def testRecipeProcessorParallelEnvvars1(self):
+
+        v, r = recipe_processor.test_jobs_from_recipe_file(self.recipe_test_file36)
+        self.assertTrue(v)
+        mainjob, options, exec_name = r
+
+        # recipe tasks with envvars are never run alongside each other - each sees only its own envvars
+        task_class = mainjob.entries_list[0].entries_list[0].__class__
+        with mock.patch.object(task_class, "run_task_delegate", side_effect=self.track_running_envvar):
+            v, r = launch_jobs.begin_execution(mainjob, mock.Mock(), exec_name, options)
+            self.assertTrue(v)
+        self.assertEqual(self.max_running, 1)
+        self.assertEqual(sorted(self.seen_envvars), [("value1", "value1"), ("value2", "value2")])
+        self.assertFalse("MVTOOLS_RECIPE_PROCESSOR_TEST_ENVVAR" in os.environ)
+
+    def testRecipeProcessorPluginCache1(self):
+
+        # each plugin is only loaded once, no matter how many tasks use it
+        with mock.patch("importlib.machinery.SourceFileLoader.exec_module", autospec=True, side_effect=importlib.machinery.SourceFileLoader.exec_module) as dummy:
+            v, r = recipe_processor.test_jobs_from_recipe_file(self.recipe_test_file30)
+            self.assertTrue(v)
+            self.assertEqual(dummy.call_count, 1)
+            v, r = recipe_processor.test_jobs_from_recipe_file(self.recipe_test_file30)
+            self.assertTrue(v)
+            self.assertEqual(dummy.call_count, 1)
+
+    def testRecipeProcessorPluginCache2(self):
+
+        # modified plugins are loaded again
+        v, r = recipe_processor.test_jobs_from_recipe_file(self.recipe_test_file4)
+        self.assertTrue(v)
+        first_class = r[0].entries_list[0].entries_list[0].__class__
+
+        with open(self.sample_custom_echo_true_script_file_namespace1, "a") as f:
+            f.write("\n# modified\n")
+
+        v, r = recipe_processor.test_jobs_from_recipe_file(self.recipe_test_file4)
+        self.assertTrue(v)
+        self.assertIsNot(r[0].entries_list[0].entries_list[0].__class__, first_class)
+
 if __name__ == "__main__":
     unittest.main()
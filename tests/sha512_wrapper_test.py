@@ -105,5 +105,28 @@ class Sha512WrapperTest(unittest.TestCase):
         self.assertTrue(v)
         self.assertEqual(r, self.content1_sha512)
 
+    def testHash512AppFiles1(self):
+        nonexistent = path_utils.concat_path(self.test_dir, "nonexistent.txt")
+        v, r = sha512_wrapper.hash_sha_512_app_files([self.filename1, self.filename2, nonexistent, self.filename3, self.filename4])
+        self.assertTrue(v)
+        self.assertEqual(len(r), 5)
+        self.assertEqual(r[0], (True, self.content1_sha512))
+        self.assertEqual(r[1], (True, self.content2_sha512))
+        self.assertFalse(r[2][0])
+        self.assertEqual(r[3], (True, self.content3_sha512))
+        self.assertEqual(r[4], (True, self.content4_sha512))
+
+    def testHash512AppFiles2(self):
+        v, r = sha512_wrapper.hash_sha_512_app_files([self.filename1, self.filename2], 1)
+        self.assertTrue(v)
+        self.assertEqual(r, [(True, self.content1_sha512), (True, self.content2_sha512)])
+
+        v, r = sha512_wrapper.hash_sha_512_app_files([], 4)
+        self.assertTrue(v)
+        self.assertEqual(r, [])
+
+        v, r = sha512_wrapper.hash_sha_512_app_files([self.filename1], 0)
+        self.assertFalse(v)
+
 if __name__ == "__main__":
     unittest.main()
@@ -6,6 +6,7 @@ import shutil
 import unittest
 
 import mvtools_test_fixture
+import mvtools_envvars
 import create_and_write_file
 import path_utils
 
@@ -24,6 +25,11 @@ def file_has_contents(filename, contents):
 class Text18HeaderIndexerTest(unittest.TestCase):
 
     def setUp(self):
+        self.mvtools_envvars_inst = mvtools_envvars.Mvtools_Envvars()
+        v, r = self.mvtools_envvars_inst.make_copy_environ()
+        if not v:
+            self.tearDown()
+            self.fail(r)
         v, r = self.delegate_setUp()
         if not v:
             self.tearDown()
@@ -37,6 +43,10 @@ class Text18HeaderIndexerTest(unittest.TestCase):
         self.test_base_dir = r[0] # base test folder. shared amongst other test cases
         self.test_dir = r[1] # test folder, specific for each test case (i.e. one level above self.test_base_dir)
 
+        v, r = mvtools_envvars.mvtools_envvar_write_temp_path(self.test_dir)
+        if not v:
+            return False, "Failed setting up temp path envvar for testing."
+
         # source files
         self.source1_t20 = path_utils.concat_path(self.test_dir, "source1.t20")
         self.source2_t20 = path_utils.concat_path(self.test_dir, "source2.t20")
@@ -48,6 +58,9 @@ class Text18HeaderIndexerTest(unittest.TestCase):
 
     def tearDown(self):
         shutil.rmtree(self.test_base_dir)
+        v, r = self.mvtools_envvars_inst.restore_copy_environ()
+        if not v:
+            self.fail(r)
 
     def testGenerateHeaderIndex1(self):
 
@@ -6,6 +6,7 @@ import shutil
 import unittest
 
 import mvtools_test_fixture
+import mvtools_envvars
 import create_and_write_file
 import path_utils
 
@@ -14,6 +15,11 @@ import text18_schema_checker
 class Text18SchemaCheckerTest(unittest.TestCase):
 
     def setUp(self):
+        self.mvtools_envvars_inst = mvtools_envvars.Mvtools_Envvars()
+        v, r = self.mvtools_envvars_inst.make_copy_environ()
+        if not v:
+            self.tearDown()
+            self.fail(r)
         v, r = self.delegate_setUp()
         if not v:
             self.tearDown()
@@ -27,6 +33,10 @@ class Text18SchemaCheckerTest(unittest.TestCase):
         self.test_base_dir = r[0] # base test folder. shared amongst other test cases
         self.test_dir = r[1] # test folder, specific for each test case (i.e. one level above self.test_base_dir)
 
+        v, r = mvtools_envvars.mvtools_envvar_write_temp_path(self.test_dir)
+        if not v:
+            return False, "Failed setting up temp path envvar for testing."
+
         # target files
         self.left_t20 = path_utils.concat_path(self.test_dir, "left.t20")
         self.right_t20 = path_utils.concat_path(self.test_dir, "right.t20")
@@ -36,6 +46,9 @@ class Text18SchemaCheckerTest(unittest.TestCase):
 
     def tearDown(self):
         shutil.rmtree(self.test_base_dir)
+        v, r = self.mvtools_envvars_inst.restore_copy_environ()
+        if not v:
+            self.fail(r)
 
     def testCompareT18Schemas1(self):
 
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import mvtools_test_fixture
+import create_and_write_file
+import path_utils
+import mvtools_envvars
+import getcontents
+
+import toolbus
+import toolbus_journal
+
+class ToolbusJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mvtools_envvars_inst = mvtools_envvars.Mvtools_Envvars()
+        v, r = self.mvtools_envvars_inst.make_copy_environ()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+        v, r = self.delegate_setUp()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+
+    def delegate_setUp(self):
+
+        v, r = mvtools_test_fixture.makeAndGetTestFolder("toolbus_journal_test")
+        if not v:
+            return v, r
+        self.test_base_dir = r[0]
+        self.test_dir = r[1]
+
+        v, r = mvtools_envvars.mvtools_envvar_write_toolbus_base(self.test_dir)
+        if not v:
+            return False, "Failed setting up toolbus envvar for testing."
+
+        self.contents_db_test_ok_1 = "var1 = \"val1\"" + os.linesep
+        self.contents_db_test_ok_1 += "[" + os.linesep
+        self.contents_db_test_ok_1 += "@ctx1" + os.linesep
+        self.contents_db_test_ok_1 += "var2 = \"val2\"" + os.linesep
+        self.contents_db_test_ok_1 += "]" + os.linesep
+        self.db_test_ok_1 = "test_db_ok_1"
+        self.db_test_ok_1_full = path_utils.concat_path(self.test_dir, "%s.%s" % (self.db_test_ok_1, toolbus.DB_EXTENSION))
+        self.db_test_ok_1_journal = toolbus_journal.get_journal_filename(self.db_test_ok_1_full)
+
+        create_and_write_file.create_file_contents(self.db_test_ok_1_full, self.contents_db_test_ok_1)
+
+        return True, ""
+
+    def tearDown(self):
+        toolbus.invalidate_db_cache()
+        shutil.rmtree(self.test_base_dir)
+        v, r = self.mvtools_envvars_inst.restore_copy_environ()
+        if not v:
+            self.fail(r)
+
+    def testMakeRecord1(self):
+
+        v, r = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_SET, None, "var1", "val1", [])
+        self.assertTrue(v)
+        self.assertEqual(r, "var1 {_toolbus_journal_op: \"set\"} = \"val1\"\n")
+
+    def testMakeRecord2(self):
+
+        v, r = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_SET, "ctx1", "var1", ["a", "b\"c"], [("opt1", None), ("opt2", "x")])
+        self.assertTrue(v)
+        self.assertEqual(r, "var1 {_toolbus_journal_op: \"set\" / _toolbus_journal_ctx: \"ctx1\" / opt1 / opt2: \"x\"} = (\"a\", \"b\\\"c\")\n")
+
+    def testMakeRecord3(self):
+
+        v, r = toolbus_journal.make_record("invalid-op", None, "var1", "val1", [])
+        self.assertFalse(v)
+
+    def testMakeRecord4(self):
+
+        v, r = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_SET, None, "var1", "val1", [(toolbus_journal.JOURNAL_OPT_OP, "rem")])
+        self.assertFalse(v)
+
+    def testMakeRecord5(self):
+
+        v, r = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_SET, "inv@lid", "var1", "val1", [])
+        self.assertFalse(v)
+
+    def testMakeRecord6(self):
+
+        v, r = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_SET, None, "var1", "val\n1", [])
+        self.assertFalse(v)
+
+    def testParseRecords1(self):
+
+        v, r = toolbus_journal.parse_records("")
+        self.assertTrue(v)
+        self.assertEqual(r, [])
+
+    def testParseRecords2(self):
+
+        v, r1 = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_SET, "ctx1", "var1", "val1", [("opt1", "x")])
+        self.assertTrue(v)
+        v, r2 = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_REM, None, "var2", None, [])
+        self.assertTrue(v)
+
+        v, r = toolbus_journal.parse_records(r1 + r2)
+        self.assertTrue(v)
+        self.assertEqual(r, [("set", "ctx1", "var1", "val1", [("opt1", "x")]), ("rem", None, "var2", None, [])])
+
+    def testParseRecords3(self):
+
+        v, r1 = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_SET, None, "var1", "val1", [])
+        self.assertTrue(v)
+
+        # the last record is still being written
+        v, r = toolbus_journal.parse_records(r1 + "var2 {_toolbus_jou")
+        self.assertTrue(v)
+        self.assertEqual(r, [("set", None, "var1", "val1", [])])
+
+    def testParseRecords4(self):
+
+        v, r = toolbus_journal.parse_records("var1 = \"val1\"\n")
+        self.assertFalse(v)
+
+    def testAppendRecord1(self):
+
+        self.assertFalse(os.path.exists(self.db_test_ok_1_journal))
+
+        v, r1 = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_SET, None, "var1", "val1", [])
+        self.assertTrue(v)
+        v, r = toolbus_journal.append_record(self.db_test_ok_1_full, r1)
+        self.assertTrue(v)
+        self.assertEqual(r, len(r1))
+
+        v, r2 = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_REM, None, "var1", None, [])
+        self.assertTrue(v)
+        v, r = toolbus_journal.append_record(self.db_test_ok_1_full, r2)
+        self.assertTrue(v)
+        self.assertEqual(r, len(r1) + len(r2))
+
+        self.assertEqual(getcontents.getcontents(self.db_test_ok_1_journal), r1 + r2)
+        self.assertEqual(getcontents.getcontents(self.db_test_ok_1_full), self.contents_db_test_ok_1)
+
+    def testApplyRecords1(self):
+
+        v, r, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+        self.assertTrue(v)
+        db_handle = r
+
+        records = []
+        records.append(("set", None, "var1", "val5", []))
+        records.append(("set", "ctx2", "var3", "val3", [("opt1", None)]))
+        records.append(("rem", "ctx1", "var2", None, []))
+        records.append(("rem", "nonexistent-ctx", "var2", None, []))
+        v, r = toolbus_journal.apply_records(db_handle, records)
+        self.assertTrue(v)
+
+        self.assertEqual(db_handle.produce(), "[\n@ctx1\n]\n\nvar1 = \"val5\"\n\n[\n@ctx2\nvar3 {opt1} = \"val3\"\n]")
+
+        # replaying again must not change any values
+        v, r = toolbus_journal.apply_records(db_handle, records)
+        self.assertTrue(v)
+        self.assertEqual(db_handle.produce(), "[\n@ctx1\n]\n\n[\n@ctx2\nvar3 {opt1} = \"val3\"\n]\n\nvar1 = \"val5\"")
+
+    def testApplyRecords2(self):
+
+        v, r, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+        self.assertTrue(v)
+        db_handle = r
+
+        v, r = toolbus_journal.apply_records(db_handle, [("rem_ctx", None, "ctx1", None, []), ("rem_ctx", None, "ctx1", None, [])])
+        self.assertTrue(v)
+        self.assertEqual(db_handle.produce(), "var1 = \"val1\"")
+
+    def testGetTouchedContexts1(self):
+
+        v, r, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+        self.assertTrue(v)
+        db_handle = r
+
+        records = []
+        records.append(("set", None, "var1", "val5", []))
+        records.append(("set", "ctx2", "var3", "val3", []))
+        records.append(("rem", "ctx1", "var2", None, []))
+        records.append(("rem_ctx", None, "ctx1", None, []))
+        records.append(("rem_ctx", None, "nonexistent-ctx", None, []))
+        self.assertEqual(toolbus_journal.get_touched_contexts(db_handle, records), set(["ctx1", "ctx2", db_handle.root_context_id]))
+
+    def testCompact1(self):
+
+        v, r = toolbus.set_field(self.db_test_ok_1, "ctx1", "var3", "val3", [])
+        self.assertTrue(v)
+        v, r = toolbus.remove_field(self.db_test_ok_1, None, "var1")
+        self.assertTrue(v)
+        self.assertEqual(getcontents.getcontents(self.db_test_ok_1_full), self.contents_db_test_ok_1)
+
+        v, r = toolbus.compact_db(self.db_test_ok_1_full)
+        self.assertTrue(v)
+        self.assertEqual(getcontents.getcontents(self.db_test_ok_1_full), "[\n@ctx1\nvar2 = \"val2\"\nvar3 = \"val3\"\n]")
+        self.assertEqual(getcontents.getcontents(self.db_test_ok_1_journal), "")
+
+        v, r = toolbus.get_all_fields(self.db_test_ok_1, "ctx1")
+        self.assertTrue(v)
+        self.assertEqual(r, [("var2", "val2", []), ("var3", "val3", [])])
+
+    def testCompact2(self):
+
+        with mock.patch("toolbus_journal.JOURNAL_COMPACTION_THRESHOLD", 100):
+            for i in range(10):
+                v, r = toolbus.set_field(self.db_test_ok_1, "ctx1", "var%s" % i, "val%s" % i, [])
+                self.assertTrue(v)
+
+        self.assertTrue(len(getcontents.getcontents(self.db_test_ok_1_journal)) <= 100)
+
+        v, r = toolbus.get_all_fields(self.db_test_ok_1, "ctx1")
+        self.assertTrue(v)
+        self.assertEqual(r, [("var%s" % i, "val%s" % i, []) for i in range(10)])
+
+if __name__ == "__main__":
+    unittest.main()
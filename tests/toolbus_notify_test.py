@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import unittest
+
+import mvtools_test_fixture
+import create_and_write_file
+import path_utils
+
+import toolbus_notify
+
+class ToolbusNotifyTest(unittest.TestCase):
+
+    def setUp(self):
+        v, r = self.delegate_setUp()
+        if not v:
+            self.tearDown()
+            self.fail(r)
+
+    def delegate_setUp(self):
+
+        v, r = mvtools_test_fixture.makeAndGetTestFolder("toolbus_notify_test")
+        if not v:
+            return v, r
+        self.test_base_dir = r[0]
+        self.test_dir = r[1]
+
+        self.db_test = path_utils.concat_path(self.test_dir, "test_db.t20")
+        self.db_test_notify_folder = toolbus_notify.get_notify_folder(self.db_test)
+        create_and_write_file.create_file_contents(self.db_test, "")
+
+        return True, ""
+
+    def tearDown(self):
+        shutil.rmtree(self.test_base_dir)
+
+    def testNotify1(self):
+
+        # nobody is waiting
+        toolbus_notify.notify(self.db_test)
+        self.assertFalse(os.path.exists(self.db_test_notify_folder))
+
+    def testWaiter1(self):
+
+        waiter = toolbus_notify.Waiter(self.db_test)
+        v, r = waiter.register()
+        self.assertTrue(v)
+        self.assertEqual(len(os.listdir(self.db_test_notify_folder)), 1)
+
+        self.assertFalse(waiter.wait(0.1))
+
+        toolbus_notify.notify(self.db_test)
+        toolbus_notify.notify(self.db_test)
+        self.assertTrue(waiter.wait(0.1))
+
+        # both notifications were drained by the previous wait
+        self.assertFalse(waiter.wait(0.1))
+
+        waiter.unregister()
+        self.assertEqual(len(os.listdir(self.db_test_notify_folder)), 0)
+
+    def testWaiter2(self):
+
+        waiter1 = toolbus_notify.Waiter(self.db_test)
+        v, r = waiter1.register()
+        self.assertTrue(v)
+
+        waiter2 = toolbus_notify.Waiter(self.db_test)
+        v, r = waiter2.register()
+        self.assertTrue(v)
+        self.assertEqual(len(os.listdir(self.db_test_notify_folder)), 2)
+
+        toolbus_notify.notify(self.db_test)
+        self.assertTrue(waiter1.wait(0.1))
+        self.assertTrue(waiter2.wait(0.1))
+
+        waiter1.unregister()
+        waiter2.unregister()
+
+    def testWaiter3(self):
+
+        # a stale fifo (its waiter died without unregistering) gets removed upon the next notification
+        os.mkdir(self.db_test_notify_folder)
+        stale_fifo = path_utils.concat_path(self.db_test_notify_folder, "stale.%s" % toolbus_notify.NOTIFY_FIFO_EXTENSION)
+        os.mkfifo(stale_fifo)
+
+        waiter = toolbus_notify.Waiter(self.db_test)
+        v, r = waiter.register()
+        self.assertTrue(v)
+
+        toolbus_notify.notify(self.db_test)
+        self.assertFalse(os.path.exists(stale_fifo))
+        self.assertTrue(waiter.wait(0.1))
+
+        waiter.unregister()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -125,10 +125,22 @@ class ToolbusPluginTest(unittest.TestCase):
 
     def testToolbusPluginWaitSignal1(self):
 
-        with mock.patch("toolbus.get_signal", return_value=(True, True)) as dummy:
-            v, r = self.toolbus_task.wait_signal(print, "dummy_value1")
+        feedback = mock.Mock()
+        with mock.patch("toolbus.wait_signal", return_value=(True, (True, 0.0))) as dummy:
+            v, r = self.toolbus_task.wait_signal(feedback, "dummy_value1")
             self.assertTrue(v)
             dummy.assert_called_with("dummy_value1")
+        feedback.assert_called_with("Waited on signal [dummy_value1] for [0.000] seconds.")
+
+    def testToolbusPluginWaitSignal2(self):
+
+        feedback = mock.Mock()
+        with mock.patch("toolbus.wait_signal", return_value=(False, "dummy error")) as dummy:
+            v, r = self.toolbus_task.wait_signal(feedback, "dummy_value1")
+            self.assertFalse(v)
+            self.assertEqual(r, "Failed waiting on signal [dummy_value1]: [dummy error]")
+            dummy.assert_called_with("dummy_value1")
+        feedback.assert_called_once_with("Will wait on signal [dummy_value1]")
 
 if __name__ == "__main__":
     unittest.main()
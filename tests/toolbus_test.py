@@ -3,14 +3,26 @@
 import os
 import shutil
 import unittest
+import threading
+from unittest import mock
 
 import mvtools_test_fixture
 import create_and_write_file
 import path_utils
 import mvtools_envvars
 
+import dsl_type20
 import toolbus
 
+def _check_field_exists(field_info):
+    v, r = toolbus.get_field(field_info[0], field_info[1], field_info[2])
+    if not v:
+        return False, r
+    return True, (r is not None)
+
+def _check_fails(dummy):
+    return False, "check failed"
+
 class ToolbusTest(unittest.TestCase):
 
     def setUp(self):
@@ -73,6 +85,7 @@ class ToolbusTest(unittest.TestCase):
         return True, ""
 
     def tearDown(self):
+        toolbus.invalidate_db_cache()
         shutil.rmtree(self.test_base_dir)
         v, r = self.mvtools_envvars_inst.restore_copy_environ()
         if not v:
@@ -587,5 +600,152 @@ class ToolbusTest(unittest.TestCase):
         self.assertTrue(v)
         self.assertEqual(r, [("var2", "val2", [])])
 
+    def testWaitSignal1(self):
+
+        v, r = toolbus.set_signal("var15", "val15")
+        self.assertTrue(v)
+
+        v, r = toolbus.wait_signal("var15")
+        self.assertTrue(v)
+        self.assertEqual(r[0], "val15")
+
+        v, r = toolbus.get_signal("var15")
+        self.assertTrue(v)
+        self.assertEqual(r, None)
+
+    def testWaitSignal2(self):
+
+        v, r = toolbus.wait_signal("var16", 0.2)
+        self.assertFalse(v)
+
+    def testWaitSignal3(self):
+
+        setter = threading.Timer(0.5, toolbus.set_signal, ["var17", "val17"])
+        setter.start()
+
+        with mock.patch("toolbus.TOOLBUS_WAIT_RECHECK_INTERVAL", 60):
+            v, r = toolbus.wait_signal("var17", 30)
+        setter.join()
+
+        self.assertTrue(v)
+        self.assertEqual(r[0], "val17")
+        self.assertTrue(r[1] >= 0.4 and r[1] < 30)
+
+    def testWaitCustomDb1(self):
+
+        setter = threading.Timer(0.5, toolbus.set_field, [self.db_test_ok_1, "ctx1", "var3", "val3", []])
+        setter.start()
+
+        with mock.patch("toolbus.TOOLBUS_WAIT_RECHECK_INTERVAL", 60):
+            v, r = toolbus.wait_custom_db(self.db_test_ok_1, _check_field_exists, (self.db_test_ok_1, "ctx1", "var3"), 30)
+        setter.join()
+
+        self.assertTrue(v)
+        self.assertTrue(r >= 0.4 and r < 30)
+
+    def testWaitCustomDb2(self):
+
+        v, r = toolbus.wait_custom_db(self.db_test_ok_1, _check_fails, None)
+        self.assertFalse(v)
+        self.assertEqual(r, "check failed")
+
+    def testWaitCustomDb3(self):
+
+        v, r = toolbus.wait_custom_db(self.nonexistent_file, _check_field_exists, (self.db_test_ok_1, "ctx1", "var3"))
+        self.assertFalse(v)
+
+    def testDbCache1(self):
+
+        # freshly written databases are not cached
+        v, r1, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+        self.assertTrue(v)
+        v, r2, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+        self.assertTrue(v)
+        self.assertFalse(r1 is r2)
+
+    def testDbCache2(self):
+
+        with mock.patch("toolbus.TOOLBUS_CACHE_RACY_WINDOW", 0):
+
+            v, r1, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+            self.assertTrue(v)
+            v, r2, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+            self.assertTrue(v)
+            self.assertTrue(r1 is r2)
+
+            # journal appends are applied onto a copy of the cached handle - handles already handed out are left untouched
+            v, r = toolbus.set_field(self.db_test_ok_1, None, "var1", "val2", [])
+            self.assertTrue(v)
+            v, r3, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+            self.assertTrue(v)
+            self.assertFalse(r1 is r3)
+            v, r4, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+            self.assertTrue(v)
+            self.assertTrue(r3 is r4)
+
+            v, r = toolbus.get_field(self.db_test_ok_1, None, "var1")
+            self.assertTrue(v)
+            self.assertEqual(r, ("var1", "val2", []))
+
+            v, r = r1.get_variables("var1")
+            self.assertTrue(v)
+            self.assertEqual(dsl_type20.convert_var_obj_list_to_neutral_format(r), [("var1", "val1", [])])
+            v, r = r3.get_variables("var1")
+            self.assertTrue(v)
+            self.assertEqual(dsl_type20.convert_var_obj_list_to_neutral_format(r), [("var1", "val2", [])])
+
+    def testDbCache3(self):
+
+        with mock.patch("toolbus.TOOLBUS_CACHE_RACY_WINDOW", 0):
+
+            v, r = toolbus.get_field(self.db_test_ok_1, None, "var1")
+            self.assertTrue(v)
+            self.assertEqual(r, ("var1", "val1", []))
+
+            # changes made directly to the database file are detected
+            with open(self.db_test_ok_1_full, "w") as f:
+                f.write("var1 = \"val-changed\"")
+
+            v, r = toolbus.get_field(self.db_test_ok_1, None, "var1")
+            self.assertTrue(v)
+            self.assertEqual(r, ("var1", "val-changed", []))
+
+    def testDbCache4(self):
+
+        with mock.patch("toolbus.TOOLBUS_CACHE_RACY_WINDOW", 0):
+
+            v, r = toolbus.set_field(self.db_test_ok_1, None, "var2", "val2", [])
+            self.assertTrue(v)
+
+            v, r1, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+            self.assertTrue(v)
+
+            v, r = toolbus.compact_db(self.db_test_ok_1_full)
+            self.assertTrue(v)
+
+            v, r = toolbus.set_field(self.db_test_ok_1, None, "var3", "val3", [])
+            self.assertTrue(v)
+
+            v, r2, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+            self.assertTrue(v)
+            self.assertFalse(r1 is r2)
+
+            v, r = toolbus.get_all_fields(self.db_test_ok_1, None)
+            self.assertTrue(v)
+            self.assertEqual(r, [("var1", "val1", []), ("var2", "val2", []), ("var3", "val3", [])])
+
+    def testDbCache5(self):
+
+        with mock.patch("toolbus.TOOLBUS_CACHE_RACY_WINDOW", 0):
+
+            v, r1, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+            self.assertTrue(v)
+
+            toolbus.invalidate_db_cache()
+
+            v, r2, ext = toolbus.get_handle_custom_db(self.db_test_ok_1)
+            self.assertTrue(v)
+            self.assertFalse(r1 is r2)
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,10 +2,14 @@
 
 import sys
 import os
+import time
+import threading
 
 import path_utils
 import dsl_type20
 import sync_write_file
+import toolbus_journal
+import toolbus_notify
 import mvtools_envvars
 
 DB_EXTENSION = "t20"
@@ -17,6 +21,8 @@ TOOLBUS_RET_SIG_NOT_SET = 1
 TOOLBUS_RET_USER_ERROR = 2
 TOOLBUS_RET_SYSTEM_ERROR = 3
 
+TOOLBUS_WAIT_RECHECK_INTERVAL = 30 # in seconds. safety net for changes that bypass toolbus (manual edits, for example)
+
 def bootstrap_custom_toolbus_db(db_name):
 
     v, r = mvtools_envvars.mvtools_envvar_read_toolbus_base()
@@ -31,6 +37,7 @@ def bootstrap_custom_toolbus_db(db_name):
 
     if not sync_write_file.sync_write_file(full_db_filename, ""):
         return False, "Unable to bootstrap custom toolbus database [%s]: Unable to acquire write lock on file." % full_db_filename
+    invalidate_db_cache(full_db_filename)
 
     return True, None
 
@@ -45,13 +52,17 @@ def _bootstrap_internal_toolbus_db(_filename): # this is supposed to be a "priva
 
     if not sync_write_file.sync_write_file(_filename, bootstrap_contents):
         return False, "Unable to acquire write lock on file [%s] (database: [%s], context: [%s])" % (_filename, INTERNAL_DB_FILENAME, TOOLBUS_SIGNAL_CONTEXT)
+    invalidate_db_cache(_filename)
 
     return True, None
 
-def get_db_handle(_db_name, bootstrap_internal=False):
+def _make_db_handle():
+    return dsl_type20.DSLType20(dsl_type20.DSLType20_Config(expand_envvars = False, expand_user = False, allow_var_dupes = False, inherit_options = True, var_decorator = "", read_only_views = True))
+
+def get_db_file(_db_name, bootstrap_internal=False):
 
     if _db_name is None:
-        return False, "Invalid parameters.", None
+        return False, "Invalid parameters."
 
     v, r = mvtools_envvars.mvtools_envvar_read_toolbus_base()
     if not v:
@@ -59,7 +70,7 @@ def get_db_handle(_db_name, bootstrap_internal=False):
     db_base = r
 
     if not os.path.exists(db_base):
-        return False, "Failed setting up toolbus - base path [%s] does not exist." % db_base, None
+        return False, "Failed setting up toolbus - base path [%s] does not exist." % db_base
 
     db_file_full = path_utils.concat_path(db_base, _db_name)
 
@@ -67,21 +78,125 @@ def get_db_handle(_db_name, bootstrap_internal=False):
         if bootstrap_internal:
             v, r = _bootstrap_internal_toolbus_db(db_file_full)
             if not v:
-                return False, "Failed setting up toolbus - unable to bootstrap toolbus internal database: [%s]" % r, None
+                return False, "Failed setting up toolbus - unable to bootstrap toolbus internal database: [%s]" % r
         else:
-            return False, "Failed setting up toolbus - database [%s] does not exist." % db_file_full, None
+            return False, "Failed setting up toolbus - database [%s] does not exist." % db_file_full
 
-    db_handle = dsl_type20.DSLType20(dsl_type20.DSLType20_Config(expand_envvars = False, expand_user = False, allow_var_dupes = False, inherit_options = True, var_decorator = ""))
+    return True, db_file_full
+
+class _DBCacheEntry:
+    def __init__(self, db_handle, db_sig, journal_offset):
+        self.db_handle = db_handle
+        self.db_sig = db_sig
+        self.journal_offset = journal_offset
+
+# process-local cache of parsed databases, keyed by the database's full filename
+_db_cache = {}
+_db_cache_lock = threading.RLock() # launch_jobs may run tasks from several threads at once
+
+# databases modified less than this long ago (in nanoseconds) are not cached: filesystem timestamps are
+# too coarse to tell apart two modifications this close together (that also have the same size)
+TOOLBUS_CACHE_RACY_WINDOW = 2 * 1000 * 1000 * 1000
+
+def _get_file_sig(_filename):
+    st = os.stat(_filename)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def invalidate_db_cache(_db_full_file=None):
+
+    # _db_full_file being None means the entire cache is dropped
+
+    with _db_cache_lock:
+
+        if _db_full_file is None:
+            _db_cache.clear()
+            return
+
+        if _db_full_file in _db_cache:
+            del _db_cache[_db_full_file]
+
+def _load_db_handle(_db_full_file):
+
+    invalidate_db_cache(_db_full_file)
+
+    # the journal is read before the database itself: should a compaction happen in between,
+    # the already compacted records are just replayed again, which is harmless
+    v, r = toolbus_journal.read_records_from(_db_full_file, 0)
+    if not v:
+        return False, "Failed setting up toolbus - failed reading database journal: %s" % r
+    journal_records, journal_offset = r
+
+    # the signature is taken before reading - any change made after that point is caught on the next revalidation
+    db_sig = _get_file_sig(_db_full_file)
+    db_handle = _make_db_handle()
 
     db_contents = ""
-    with open(db_file_full) as f:
+    with open(_db_full_file) as f:
         db_contents = f.read()
 
     v, r = db_handle.parse(db_contents)
     if not v:
-        return False, "Failed setting up toolbus - failed parsing database: %s" % r, None
+        return False, "Failed setting up toolbus - failed parsing database: %s" % r
+
+    v, r = toolbus_journal.apply_records(db_handle, journal_records)
+    if not v:
+        return False, "Failed setting up toolbus - failed applying database journal: %s" % r
+
+    if (time.time_ns() - db_sig[0]) >= TOOLBUS_CACHE_RACY_WINDOW:
+        _db_cache[_db_full_file] = _DBCacheEntry(db_handle, db_sig, journal_offset)
+
+    return True, db_handle
+
+def _refresh_db_handle(_db_full_file):
+
+    if _db_full_file not in _db_cache:
+        return _load_db_handle(_db_full_file)
+    cache_entry = _db_cache[_db_full_file]
+
+    # the database itself changed (or got compacted) - no way around a full reload
+    if _get_file_sig(_db_full_file) != cache_entry.db_sig:
+        return _load_db_handle(_db_full_file)
+
+    # otherwise, only the records appended to the journal since the last time need applying
+    v, r = toolbus_journal.read_records_from(_db_full_file, cache_entry.journal_offset)
+    if not v:
+        invalidate_db_cache(_db_full_file)
+        return False, "Failed setting up toolbus - failed reading database journal: %s" % r
+    if r is None:
+        return _load_db_handle(_db_full_file)
+    journal_records, journal_offset = r
+
+    if len(journal_records) == 0:
+        return True, cache_entry.db_handle
+
+    # handles already handed out are still being read (possibly from other threads, outside the lock), so the
+    # records are applied to a copy, which then replaces the cache entry as a whole. the copy only duplicates
+    # the context nodes and the entry lists of the contexts the records touch - everything else is shared
+    db_handle = cache_entry.db_handle.copy_shared(toolbus_journal.get_touched_contexts(cache_entry.db_handle, journal_records))
+    v, r = toolbus_journal.apply_records(db_handle, journal_records)
+    if not v:
+        invalidate_db_cache(_db_full_file)
+        return False, "Failed setting up toolbus - failed applying database journal: %s" % r
+    _db_cache[_db_full_file] = _DBCacheEntry(db_handle, cache_entry.db_sig, journal_offset)
+
+    return True, db_handle
+
+def get_db_handle(_db_name, bootstrap_internal=False):
+
+    # the returned handle is shared through the cache, and must not be modified. it is never modified by the
+    # cache either: newer journal records always go into a new handle
+
+    v, r = get_db_file(_db_name, bootstrap_internal)
+    if not v:
+        return False, r, None
+    db_file_full = r
+
+    with _db_cache_lock:
+        v, r = _refresh_db_handle(db_file_full)
+    if not v:
+        return False, r, None
 
-    return True, db_handle, db_file_full
+    return True, r, db_file_full
 
 def get_handle_internal_db():
     return get_db_handle("%s.%s" % (INTERNAL_DB_FILENAME, DB_EXTENSION), True)
@@ -91,6 +206,35 @@ def get_handle_custom_db(_db_name):
         return False, "Failed setting up toolbus - the database name [%s] is reserved." % INTERNAL_DB_FILENAME, None
     return get_db_handle("%s.%s" % (_db_name, DB_EXTENSION))
 
+def get_file_internal_db():
+    return get_db_file("%s.%s" % (INTERNAL_DB_FILENAME, DB_EXTENSION), True)
+
+def get_file_custom_db(_db_name):
+    if _db_name == INTERNAL_DB_FILENAME:
+        return False, "Failed setting up toolbus - the database name [%s] is reserved." % INTERNAL_DB_FILENAME
+    return get_db_file("%s.%s" % (_db_name, DB_EXTENSION))
+
+def compact_db(_db_full_file):
+    v, r = toolbus_journal.compact(_db_full_file, _make_db_handle())
+    invalidate_db_cache(_db_full_file)
+    return v, r
+
+def _write_record(_db_name, _db_full_file, _context, _record):
+
+    v, r = toolbus_journal.append_record(_db_full_file, _record)
+    if not v:
+        return False, "%s (database: [%s], context: [%s])" % (r, _db_name, _context)
+    journal_size = r
+
+    # wake up whoever is waiting on this database
+    toolbus_notify.notify(_db_full_file)
+
+    # a failed compaction is not an error - the record itself is already stored, and compaction will be retried on the next write
+    if journal_size > toolbus_journal.JOURNAL_COMPACTION_THRESHOLD:
+        compact_db(_db_full_file)
+
+    return True, None
+
 def _get_internal(_dh_handle, _db_name, _context, _var):
 
     # ensure the context exists
@@ -128,17 +272,14 @@ def get_signal(_sig_name, probe_only=False):
     if not probe_only: # signal consumed
 
         # delete the consumed variable
-        v, r = _db_handle.rem_variables(_sig_name, TOOLBUS_SIGNAL_CONTEXT)
+        v, r = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_REM, TOOLBUS_SIGNAL_CONTEXT, _sig_name, None, [])
         if not v:
             return False, "Unable to remove variable (internal error): [%s] (signal: [%s], database: [%s], context: [%s])" % (r, _sig_name, "(internal toolbus database)", TOOLBUS_SIGNAL_CONTEXT)
-        if r == 0:
-            return False, "Unable to remove variable (already used signal) [%s] (database: [%s], context: [%s])" % (_sig_name, "(internal toolbus database)", TOOLBUS_SIGNAL_CONTEXT)
-
-        new_contents = _db_handle.produce()
 
         # save changes to file
-        if not sync_write_file.sync_write_file(ext, new_contents):
-            return False, "Unable to acquire write lock on file [%s] (database: [%s], context: [%s])" % (ext, "(internal toolbus database)", TOOLBUS_SIGNAL_CONTEXT)
+        v, r = _write_record("(internal toolbus database)", ext, TOOLBUS_SIGNAL_CONTEXT, r)
+        if not v:
+            return False, r
 
     return True, sig_val
 
@@ -157,19 +298,19 @@ def remove_field(_db_name, _context, _var):
         return False, r
     _db_handle = r
 
-    v, r = _db_handle.rem_variables(_var, _context)
+    # the variable must preexist
+    v, r = _db_handle.get_variables(_var, _context)
     if not v:
         return False, "Unable to remove variable [%s] - internal error: [%s] (database: [%s], context: [%s])." % (_var, r, _db_name, _context)
-    if r == 0:
+    if len(r) == 0:
         return False, "Unable to remove variable [%s] (database: [%s], context: [%s])." % (_var, _db_name, _context)
 
-    new_contents = _db_handle.produce()
+    v, r = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_REM, _context, _var, None, [])
+    if not v:
+        return False, "Unable to remove variable [%s] - internal error: [%s] (database: [%s], context: [%s])." % (_var, r, _db_name, _context)
 
     # save changes to file
-    if not sync_write_file.sync_write_file(ext, new_contents):
-        return False, "Unable to acquire write lock on file [%s] (database: [%s], context: [%s])" % (ext, "_db_name", _context)
-
-    return True, None
+    return _write_record(_db_name, ext, _context, r)
 
 def remove_table(_db_name, _context):
 
@@ -178,17 +319,17 @@ def remove_table(_db_name, _context):
         return False, r
     _db_handle = r
 
-    v, r = _db_handle.rem_context(_context)
+    # the context must preexist
+    v, r = _db_handle.get_context(_context)
+    if not v or r is None:
+        return False, "Unable to remove context [%s] (database: [%s]): [Context [%s] does not exist.]." % (_context, _db_name, _context)
+
+    v, r = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_REM_CTX, None, _context, None, [])
     if not v:
         return False, "Unable to remove context [%s] (database: [%s]): [%s]." % (_context, _db_name, r)
 
-    new_contents = _db_handle.produce()
-
     # save changes to file
-    if not sync_write_file.sync_write_file(ext, new_contents):
-        return False, "Unable to acquire write lock on file [%s] (database: [%s], context: [%s])" % (ext, "_db_name", _context)
-
-    return True, None
+    return _write_record(_db_name, ext, _context, r)
 
 def get_all_tables(_db_name):
 
@@ -221,42 +362,29 @@ def get_all_fields(_db_name, _context):
 
 def _set_internal(_dh_handle, _db_name, _db_full_file, _context, _var, _val, _opts, allow_overwrite):
 
-    # avoid checking pre-existence if the context does not exist
-    v, r = _dh_handle.get_context(_context)
-    ctx_already_exists = v
-
-    if ctx_already_exists:
+    # _dh_handle is only required (and only used) when overwrites are not allowed
 
-        v, r = _dh_handle.get_variables(_var, _context)
-        if not v:
-            return False, "Unable to get variables [%s] (database: [%s], context: [%s]): [%s]" % (_var, _db_name, _context, r)
-        vars = r
+    if not allow_overwrite:
 
-        if len(vars) != 0:
+        # avoid checking pre-existence if the context does not exist
+        v, r = _dh_handle.get_context(_context)
+        ctx_already_exists = v
 
-            if not allow_overwrite:
-                return False, "Setting variable [%s] failed - overwrites are not allowed (database: [%s], context: [%s])" % (_var, _db_name, _context)
+        if ctx_already_exists:
 
-            # var already exists. must be removed first so it can then be recreated with the new value.
-            v, r = _dh_handle.rem_variables(_var, _context)
+            v, r = _dh_handle.get_variables(_var, _context)
             if not v:
-                return False, "Unable to remove variable [%s] - internal error: [%s] (database: [%s], context: [%s])" % (_var, r, _db_name, _context)
-            if r == 0:
-                return False, "Unable to remove variable [%s] (database: [%s], context: [%s])" % (_var, _db_name, _context)
+                return False, "Unable to get variables [%s] (database: [%s], context: [%s]): [%s]" % (_var, _db_name, _context, r)
+            if len(r) != 0:
+                return False, "Setting variable [%s] failed - overwrites are not allowed (database: [%s], context: [%s])" % (_var, _db_name, _context)
 
-    # add/set new variable
-    v, r = _dh_handle.add_variable(_var, _val, _opts, _context)
+    # a preexisting variable gets replaced by the new one
+    v, r = toolbus_journal.make_record(toolbus_journal.JOURNAL_OP_SET, _context, _var, _val, _opts)
     if not v:
         return False, "Unable to add variable [%s] (database: [%s], context: [%s]): [%s]" % (_var, _db_name, _context, r)
 
-    # serialize updated database
-    new_contents = _dh_handle.produce()
-
     # save changes to file
-    if not sync_write_file.sync_write_file(_db_full_file, new_contents):
-        return False, "Unable to acquire write lock on file [%s] (database: [%s], context: [%s])" % (_db_full_file, _db_name, _context)
-
-    return True, None
+    return _write_record(_db_name, _db_full_file, _context, r)
 
 def set_signal(_sig_name, _sig_val):
 
@@ -268,18 +396,95 @@ def set_signal(_sig_name, _sig_val):
 
 def set_field(_db_name, _context, _var, _val, _opts):
 
-    v, r, ext = get_handle_custom_db(_db_name)
+    # no need to load the database - the new value is just appended to the journal
+    v, r = get_file_custom_db(_db_name)
     if not v:
         return False, r
 
-    return _set_internal(r, _db_name, ext, _context, _var, _val, _opts, True)
+    return _set_internal(None, _db_name, r, _context, _var, _val, _opts, True)
+
+def _wait_on_db(_db_full_file, check_function, check_param, timeout):
+
+    # check_function follows retry's convention: it returns (False, error) on failures, (True, True) once
+    # the awaited condition is met, and (True, False) otherwise. it is run again upon every change to the database.
+    # on success, the time spent waiting (in seconds) is returned.
+
+    wait_begin = time.monotonic()
+
+    waiter = toolbus_notify.Waiter(_db_full_file)
+    v, r = waiter.register()
+    if not v:
+        waiter.unregister()
+        return False, "Unable to wait on database [%s]: [%s]" % (_db_full_file, r)
+
+    try:
+
+        while True:
+
+            # only checked after registering - so that no change can go unnoticed
+            v, r = check_function(check_param)
+            if not v:
+                return False, r
+            if r:
+                break
+
+            wait_slice = TOOLBUS_WAIT_RECHECK_INTERVAL
+            if timeout is not None:
+                remaining = timeout - (time.monotonic() - wait_begin)
+                if remaining <= 0:
+                    return False, "Timed out waiting on database [%s] (timeout: [%s] seconds)" % (_db_full_file, timeout)
+                wait_slice = min(wait_slice, remaining)
+
+            waiter.wait(wait_slice)
+
+    finally:
+        waiter.unregister()
+
+    return True, (time.monotonic() - wait_begin)
+
+def wait_internal_db(check_function, check_param, timeout=None):
+
+    v, r = get_file_internal_db()
+    if not v:
+        return False, r
+
+    return _wait_on_db(r, check_function, check_param, timeout)
+
+def wait_custom_db(_db_name, check_function, check_param, timeout=None):
+
+    v, r = get_file_custom_db(_db_name)
+    if not v:
+        return False, r
+
+    return _wait_on_db(r, check_function, check_param, timeout)
+
+def _wait_signal_delegate(_wait_params):
+    _sig_name, _sig_val_ptr = _wait_params
+    v, r = get_signal(_sig_name) # signal will be consumed
+    if not v:
+        return False, r
+    if r is None:
+        return True, False
+    _sig_val_ptr.append(r)
+    return True, True
+
+def wait_signal(_sig_name, timeout=None):
+
+    # waits until the signal is set, and then consumes it. returns the signal's value and the time spent waiting (in seconds)
+
+    sig_val_ptr = []
+    v, r = wait_internal_db(_wait_signal_delegate, (_sig_name, sig_val_ptr), timeout)
+    if not v:
+        return False, r
+
+    return True, (sig_val_ptr[0], r)
 
 def error_only_one_op_allowed():
-    print("Only one operation is allowed (either --get-signal or --set-signal)")
+    print("Only one operation is allowed (either --get-signal, --wait-signal or --set-signal)")
     sys.exit(TOOLBUS_RET_USER_ERROR)
 
 def puaq(selfhelp):
-    print("Usage: %s [--get-signal signame | --set-signal signame sigvalue]" % path_utils.basename_filtered(__file__))
+    print("Usage: %s [--get-signal signame | --wait-signal signame | --set-signal signame sigvalue]" % path_utils.basename_filtered(__file__))
     if selfhelp:
         sys.exit(0)
     else:
@@ -295,10 +500,12 @@ if __name__ == "__main__":
     operation = None
 
     get_signal_signame_next = False
+    wait_signal_signame_next = False
     set_signal_signame_next = False
     set_signal_sigval_next = False
 
     get_signame = None
+    wait_signame = None
     set_signame = None
     set_sigval = None
 
@@ -309,6 +516,11 @@ if __name__ == "__main__":
             get_signame = p
             continue
 
+        if wait_signal_signame_next:
+            wait_signal_signame_next = False
+            wait_signame = p
+            continue
+
         if set_signal_signame_next:
             set_signal_signame_next = False
             set_signal_sigval_next = True
@@ -325,6 +537,11 @@ if __name__ == "__main__":
                 error_only_one_op_allowed()
             operation = "get-signal"
             get_signal_signame_next = True
+        elif p == "--wait-signal":
+            if operation is not None:
+                error_only_one_op_allowed()
+            operation = "wait-signal"
+            wait_signal_signame_next = True
         elif p == "--set-signal":
             if operation is not None:
                 error_only_one_op_allowed()
@@ -343,6 +560,14 @@ if __name__ == "__main__":
             print("Toolbus get_signal failed: %s" % r)
             sys.exit(TOOLBUS_RET_SYSTEM_ERROR)
 
+    elif operation == "wait-signal":
+        v, r = wait_signal(wait_signame)
+        if v:
+            print(r[0])
+        else:
+            print("Toolbus wait_signal failed: %s" % r)
+            sys.exit(TOOLBUS_RET_SYSTEM_ERROR)
+
     elif operation == "set-signal":
         if set_sigval is None:
             print("--set-signal was specified. It requires two parameters but only one was provided. Aborting.")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+
+import sys
+import os
+
+import path_utils
+import dsl_type20
+import miniparse
+import trylock
+import sync_write_file
+
+# the journal is an append-only companion file to a toolbus database. every write operation
+# appends a single record (which is itself a plain t20 variable) instead of rewriting the whole
+# database. the records are folded back into the database (compaction) once the journal grows
+# past JOURNAL_COMPACTION_THRESHOLD bytes.
+
+JOURNAL_EXTENSION = "journal"
+JOURNAL_COMPACTION_THRESHOLD = 64 * 1024 # in bytes
+
+JOURNAL_OP_SET = "set"
+JOURNAL_OP_REM = "rem"
+JOURNAL_OP_REM_CTX = "rem_ctx"
+
+JOURNAL_OPT_OP = "_toolbus_journal_op"
+JOURNAL_OPT_CTX = "_toolbus_journal_ctx"
+
+def _make_journal_dsl():
+    return dsl_type20.DSLType20(dsl_type20.DSLType20_Config(expand_envvars = False, expand_user = False, allow_var_dupes = True, inherit_options = False, var_decorator = ""))
+
+def get_journal_filename(db_file_full):
+    return "%s.%s" % (db_file_full, JOURNAL_EXTENSION)
+
+def make_record(op, context, var_name, var_val, var_opts):
+
+    if op not in [JOURNAL_OP_SET, JOURNAL_OP_REM, JOURNAL_OP_REM_CTX]:
+        return False, "Invalid journal operation: [%s]" % op
+
+    meta_opts = [(JOURNAL_OPT_OP, op)]
+    if context is not None:
+        v, r = dsl_type20.validate_context(context)
+        if not v:
+            return False, r
+        meta_opts.append((JOURNAL_OPT_CTX, context))
+
+    for opt in var_opts:
+        if isinstance(opt, tuple) and len(opt) > 0 and opt[0] in [JOURNAL_OPT_OP, JOURNAL_OPT_CTX]:
+            return False, "Option name [%s] is reserved" % opt[0]
+
+    journal_dsl = _make_journal_dsl()
+    v, r = journal_dsl.add_variable(var_name, var_val, meta_opts + var_opts)
+    if not v:
+        return False, r
+
+    return True, journal_dsl.produce() + miniparse.NEWLINE
+
+def append_record(db_file_full, record):
+
+    # returns the size of the journal after the record has been appended
+
+    journal_file = get_journal_filename(db_file_full)
+
+    with open(journal_file, "a") as f:
+
+        if not trylock.try_lock_file(f):
+            return False, "Unable to acquire write lock on file [%s]" % journal_file
+
+        f.write(record)
+        f.flush()
+        journal_size = f.tell()
+        trylock.try_unlock_file(f)
+
+    return True, journal_size
+
+def parse_records(journal_contents):
+
+    # partially written records (no trailing newline yet) are left out
+    complete_contents = journal_contents[:journal_contents.rfind(miniparse.NEWLINE)+1]
+    if complete_contents == "":
+        return True, []
+
+    journal_dsl = _make_journal_dsl()
+    v, r = journal_dsl.parse(complete_contents)
+    if not v:
+        return False, "Failed parsing journal: [%s]" % r
+
+    v, r = journal_dsl.get_all_variables()
+    if not v:
+        return False, "Failed reading journal records: [%s]" % r
+
+    records = []
+    for var in dsl_type20.convert_var_obj_list_to_neutral_format(r):
+
+        var_name, var_val, var_opts = var
+        if len(var_opts) == 0 or var_opts[0][0] != JOURNAL_OPT_OP:
+            return False, "Malformed journal record: [%s]" % var_name
+        op = var_opts[0][1]
+
+        context = None
+        idx = 1
+        if len(var_opts) > 1 and var_opts[1][0] == JOURNAL_OPT_CTX:
+            context = var_opts[1][1]
+            idx = 2
+
+        records.append((op, context, var_name, var_val, var_opts[idx:]))
+
+    return True, records
+
+def read_records_from(db_file_full, offset):
+
+    # reads the records stored from offset (in bytes) onwards. returns them along with the offset just past the
+    # last complete record. None is returned instead if the journal has shrunk below offset (i.e. it was compacted)
+
+    journal_file = get_journal_filename(db_file_full)
+    if not os.path.exists(journal_file):
+        if offset > 0:
+            return True, None
+        return True, ([], 0)
+
+    journal_contents = b""
+    with open(journal_file, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() < offset:
+            return True, None
+        f.seek(offset)
+        journal_contents = f.read()
+
+    complete_contents = journal_contents[:journal_contents.rfind(miniparse.NEWLINE.encode())+1]
+
+    v, r = parse_records(complete_contents.decode())
+    if not v:
+        return False, r
+
+    return True, (r, offset + len(complete_contents))
+
+def read_records(db_file_full):
+
+    v, r = read_records_from(db_file_full, 0)
+    if not v:
+        return False, r
+    return True, r[0]
+
+def get_touched_contexts(db_handle, records):
+
+    # returns the names of the (preexisting) contexts that applying records onto db_handle would modify
+
+    touched = set()
+    for rec in records:
+
+        op, context, var_name, var_val, var_opts = rec
+
+        if op == JOURNAL_OP_REM_CTX:
+            v, r = db_handle.get_context(var_name)
+            if v and r is not None and r.get_parent_ptr() is not None:
+                touched.add(r.get_parent_ptr().get_name())
+        elif context is not None:
+            touched.add(context)
+
+    return touched
+
+def apply_records(db_handle, records):
+
+    # replaying is idempotent with regards to the stored values (every operation is last-writer-wins per field or table),
+    # though replayed fields may end up reordered
+
+    for rec in records:
+
+        op, context, var_name, var_val, var_opts = rec
+
+        ctx_exists = True
+        if context is not None:
+            v, r = db_handle.get_context(context)
+            ctx_exists = v and r is not None
+
+        if op == JOURNAL_OP_SET:
+            if ctx_exists:
+                v, r = db_handle.rem_variables(var_name, context)
+                if not v:
+                    return False, r
+            v, r = db_handle.add_variable(var_name, var_val, var_opts, context)
+            if not v:
+                return False, r
+
+        elif op == JOURNAL_OP_REM:
+            if ctx_exists:
+                v, r = db_handle.rem_variables(var_name, context)
+                if not v:
+                    return False, r
+
+        elif op == JOURNAL_OP_REM_CTX:
+            v, r = db_handle.get_context(var_name)
+            if v and r is not None:
+                v, r = db_handle.rem_context(var_name)
+                if not v:
+                    return False, r
+
+        else:
+            return False, "Invalid journal operation: [%s]" % op
+
+    return True, None
+
+def compact(db_file_full, db_handle):
+
+    # db_handle is expected to be a fresh (empty) handle, configured the same way the database is
+
+    journal_file = get_journal_filename(db_file_full)
+    if not os.path.exists(journal_file):
+        return True, None
+
+    with open(journal_file, "a+") as f:
+
+        # holding the journal's lock blocks appends for the duration of the compaction
+        if not trylock.try_lock_file(f):
+            return False, "Unable to acquire write lock on file [%s]" % journal_file
+
+        try:
+
+            f.seek(0)
+            journal_contents = f.read()
+
+            v, r = parse_records(journal_contents)
+            if not v:
+                return False, r
+            records = r
+
+            db_contents = ""
+            with open(db_file_full) as fdb:
+                db_contents = fdb.read()
+
+            v, r = db_handle.parse(db_contents)
+            if not v:
+                return False, "Failed parsing database [%s]: [%s]" % (db_file_full, r)
+
+            v, r = apply_records(db_handle, records)
+            if not v:
+                return False, "Failed applying journal [%s]: [%s]" % (journal_file, r)
+
+            if not sync_write_file.sync_write_file(db_file_full, db_handle.produce()):
+                return False, "Unable to acquire write lock on file [%s]" % db_file_full
+
+            f.truncate(0)
+            f.flush()
+
+        finally:
+            trylock.try_unlock_file(f)
+
+    return True, None
+
+if __name__ == "__main__":
+    print("Hello from %s" % path_utils.basename_filtered(__file__))
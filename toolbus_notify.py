@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+import sys
+import os
+import errno
+import select
+
+import path_utils
+
+# change notification for toolbus databases. each waiting process registers a named pipe (fifo)
+# inside the database's waiters folder and sleeps on it. writers, after changing the database,
+# poke every registered fifo once - waking up the waiters without anyone having to poll.
+
+NOTIFY_FOLDER_EXTENSION = "waiters"
+NOTIFY_FIFO_EXTENSION = "fifo"
+
+def get_notify_folder(db_file_full):
+    return "%s.%s" % (db_file_full, NOTIFY_FOLDER_EXTENSION)
+
+class Waiter:
+    def __init__(self, db_file_full):
+
+        self.notify_folder = get_notify_folder(db_file_full)
+        self.fifo_filename = None
+        self.fd_read = None
+        self.fd_keepalive = None
+
+    def register(self):
+
+        if not os.path.exists(self.notify_folder):
+            try:
+                os.mkdir(self.notify_folder)
+            except FileExistsError:
+                pass # some other waiter just beat us to it
+
+        idx = 0
+        while True:
+            idx += 1
+            self.fifo_filename = path_utils.concat_path(self.notify_folder, "%s_%s.%s" % (os.getpid(), idx, NOTIFY_FIFO_EXTENSION))
+            try:
+                os.mkfifo(self.fifo_filename)
+                break
+            except FileExistsError:
+                continue
+            except OSError as ex:
+                return False, "Unable to create fifo [%s]: [%s]" % (self.fifo_filename, ex)
+
+        # the keepalive writer end prevents the fifo from reporting end-of-file (and therefore busy looping) once a notifier closes it
+        self.fd_read = os.open(self.fifo_filename, os.O_RDONLY | os.O_NONBLOCK)
+        self.fd_keepalive = os.open(self.fifo_filename, os.O_WRONLY | os.O_NONBLOCK)
+
+        return True, None
+
+    def wait(self, timeout):
+
+        # returns True if a notification arrived, False if the timeout expired first
+
+        r, w, x = select.select([self.fd_read], [], [], timeout)
+        if len(r) == 0:
+            return False
+
+        # drain all pending notifications - they all mean the same thing
+        try:
+            while len(os.read(self.fd_read, 4096)) > 0:
+                pass
+        except BlockingIOError:
+            pass
+
+        return True
+
+    def unregister(self):
+
+        if self.fd_keepalive is not None:
+            os.close(self.fd_keepalive)
+            self.fd_keepalive = None
+
+        if self.fd_read is not None:
+            os.close(self.fd_read)
+            self.fd_read = None
+
+        if self.fifo_filename is not None:
+            if os.path.exists(self.fifo_filename):
+                os.unlink(self.fifo_filename)
+            self.fifo_filename = None
+
+def notify(db_file_full):
+
+    notify_folder = get_notify_folder(db_file_full)
+    if not os.path.exists(notify_folder):
+        return
+
+    try:
+        fifo_list = os.listdir(notify_folder)
+    except FileNotFoundError:
+        return
+
+    for fifo in fifo_list:
+
+        fifo_full = path_utils.concat_path(notify_folder, fifo)
+
+        try:
+            fd = os.open(fifo_full, os.O_WRONLY | os.O_NONBLOCK)
+        except FileNotFoundError:
+            continue # the waiter is already gone
+        except OSError as ex:
+            if ex.errno == errno.ENXIO:
+                # nobody is reading from this fifo anymore - the waiter died without unregistering
+                try:
+                    os.unlink(fifo_full)
+                except FileNotFoundError:
+                    pass
+            continue
+
+        try:
+            os.write(fd, b"\x00")
+        except BlockingIOError:
+            pass # the fifo is full - the waiter has plenty of pending notifications already
+        finally:
+            os.close(fd)
+
+if __name__ == "__main__":
+    print("Hello from %s" % path_utils.basename_filtered(__file__))
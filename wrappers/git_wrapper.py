@@ -5,6 +5,7 @@ import os
 
 import path_utils
 import generic_run
+import delimited_output
 
 def git_wrapper_standard_command(cmd, cmd_name="git_wrapper_standard_command"):
     v, r = generic_run.run_cmd_simple(cmd)
@@ -12,6 +13,13 @@ def git_wrapper_standard_command(cmd, cmd_name="git_wrapper_standard_command"):
         return False, "Failed calling %s: %s" % (cmd_name, r)
     return v, r
 
+def git_wrapper_records_command(cmd, cmd_name="git_wrapper_records_command"):
+    # for nullterm outputs: parsed into a list of records as they are produced
+    v, r = delimited_output.run_cmd_records(cmd)
+    if not v:
+        return False, "Failed calling %s: %s" % (cmd_name, r)
+    return v, r
+
 def git_wrapper_extended_command(cmd, cmd_name="git_wrapper_extended_command"):
     v, r = generic_run.run_cmd(cmd)
     if not v:
@@ -154,6 +162,10 @@ def ls_files_nullterm(repo):
     cmd = ["git", "-C", repo, "ls-files", "-z", "--exclude-standard", "--others"]
     return git_wrapper_standard_command(cmd, "ls-files-nullterm")
 
+def ls_files_nullterm_records(repo):
+    cmd = ["git", "-C", repo, "ls-files", "-z", "--exclude-standard", "--others"]
+    return git_wrapper_records_command(cmd, "ls-files-nullterm")
+
 def stash(repo):
     cmd = ["git", "-C", repo, "stash"]
     return git_wrapper_standard_command(cmd, "stash")
@@ -216,6 +228,10 @@ def status_nullterm_porcelain_v1(repo):
     cmd = ["git", "-C", repo, "status", "-z", "--porcelain=v1"]
     return git_wrapper_standard_command(cmd, "porcelain-v1")
 
+def status_nullterm_porcelain_v1_records(repo):
+    cmd = ["git", "-C", repo, "status", "-z", "--porcelain=v1"]
+    return git_wrapper_records_command(cmd, "porcelain-v1")
+
 def remote_list(repo):
     cmd = ["git", "-C", repo, "remote", "-v"]
     return git_wrapper_standard_command(cmd, "remote-list")
@@ -51,6 +51,31 @@ def decrypt_des3_pbkdf2(infile, outfile, passphrase):
 
     return True, None
 
+def _run_des3_pbkdf2_content(mode, content, passphrase):
+
+    # content goes in (and comes out) as bytes - through the pipes, never touching the disk
+
+    if not isinstance(content, bytes):
+        return False, "Invalid content (must be bytes)."
+
+    if passphrase == "" or passphrase is None:
+        return False, "Invalid passphrase."
+
+    full_cmd = ["openssl", "des3", mode, "-pbkdf2", "-k", passphrase]
+    v, r = generic_run.run_cmd(full_cmd, use_input=content, use_encoding=None, use_errors=None)
+    if not v:
+        return False, "Failed running openssl des3-pbkdf2 (content) command: [%s]" % r
+    if not r.success:
+        return False, "Failed running openssl des3-pbkdf2 (content) command: [%s]" % r.stderr.decode(errors="ignore")
+
+    return True, r.stdout
+
+def encrypt_des3_pbkdf2_content(content, passphrase):
+    return _run_des3_pbkdf2_content("-e", content, passphrase)
+
+def decrypt_des3_pbkdf2_content(content, passphrase):
+    return _run_des3_pbkdf2_content("-d", content, passphrase)
+
 def puaq(selfhelp):
     print("Hello from %s" % path_utils.basename_filtered(__file__))
     if selfhelp:
@@ -4,23 +4,42 @@ import sys
 import os
 
 import path_utils
-import generic_run
+import hash_engine
+
+# hashing is done in-process (see hash_engine)
 
 def hash_sha_256_app_content(content):
 
-    v, r = generic_run.run_cmd_simple(["sha256sum"], use_input=content)
+    v, r = hash_engine.hash_content("sha256", content)
     if not v:
         return False, "Failed running sha256 (contents) command: [%s]" % r
 
-    return True, r[0:64]
+    return True, r
 
 def hash_sha_256_app_file(filename):
 
-    v, r = generic_run.run_cmd_simple(["sha256sum", filename])
+    v, r = hash_engine.hash_file("sha256", filename)
     if not v:
         return False, "Failed running sha256 (file) command: [%s]" % r
 
-    return True, r[0:64]
+    return True, r
+
+def hash_sha_256_app_files(filenames, workers=None):
+
+    # hashes many files at once (in parallel threads). returns a list with the result (v, r) of each file, in order
+
+    v, r = hash_engine.hash_files("sha256", filenames, workers)
+    if not v:
+        return False, "Failed running sha256 (files) command: [%s]" % r
+
+    results = []
+    for fv, fr in r:
+        if fv:
+            results.append((True, fr))
+        else:
+            results.append((False, "Failed running sha256 (file) command: [%s]" % fr))
+
+    return True, results
 
 def puaq(selfhelp):
     print("Usage: %s (--file|--contents) (file|contents)" % path_utils.basename_filtered(__file__))
@@ -4,23 +4,42 @@ import sys
 import os
 
 import path_utils
-import generic_run
+import hash_engine
+
+# hashing is done in-process (see hash_engine)
 
 def hash_sha_512_app_content(content):
 
-    v, r = generic_run.run_cmd_simple(["sha512sum"], use_input=content)
+    v, r = hash_engine.hash_content("sha512", content)
     if not v:
         return False, "Failed running sha512 (contents) command: [%s]" % r
 
-    return True, r[0:128]
+    return True, r
 
 def hash_sha_512_app_file(filename):
 
-    v, r = generic_run.run_cmd_simple(["sha512sum", filename])
+    v, r = hash_engine.hash_file("sha512", filename)
     if not v:
         return False, "Failed running sha512 (file) command: [%s]" % r
 
-    return True, r[0:128]
+    return True, r
+
+def hash_sha_512_app_files(filenames, workers=None):
+
+    # hashes many files at once (in parallel threads). returns a list with the result (v, r) of each file, in order
+
+    v, r = hash_engine.hash_files("sha512", filenames, workers)
+    if not v:
+        return False, "Failed running sha512 (files) command: [%s]" % r
+
+    results = []
+    for fv, fr in r:
+        if fv:
+            results.append((True, fr))
+        else:
+            results.append((False, "Failed running sha512 (file) command: [%s]" % fr))
+
+    return True, results
 
 def puaq(selfhelp):
     print("Usage: %s (--file|--contents) (file|contents)" % path_utils.basename_filtered(__file__))